@@ -4,6 +4,7 @@ import uuid
 from django.contrib import admin
 from django.contrib.admin import helpers
 from django.contrib.auth.admin import UserAdmin as UserAdmin_
+from django.core.cache import caches
 from django.db.models import QuerySet
 from django.http import HttpResponse, HttpResponseRedirect
 from django.http.request import HttpRequest
@@ -223,7 +224,8 @@ class DuplicateFeedSuggestionAdmin(admin.ModelAdmin):
         queryset: QuerySet[DuplicateFeedSuggestion],
     ):  # pragma: no cover
         convert_duplicate_feeds_to_alternate_feed_urls(
-            DuplicateFeedTuple(dfs.feed2, dfs.feed1) for dfs in queryset
+            (DuplicateFeedTuple(dfs.feed2, dfs.feed1) for dfs in queryset),
+            caches["default"],
         )
 
     @admin.action(
@@ -236,7 +238,8 @@ class DuplicateFeedSuggestionAdmin(admin.ModelAdmin):
         queryset: QuerySet[DuplicateFeedSuggestion],
     ):  # pragma: no cover
         convert_duplicate_feeds_to_alternate_feed_urls(
-            DuplicateFeedTuple(dfs.feed1, dfs.feed2) for dfs in queryset
+            (DuplicateFeedTuple(dfs.feed1, dfs.feed2) for dfs in queryset),
+            caches["default"],
         )
 
     def has_convert_permission(self, request: HttpRequest) -> bool:  # pragma: no cover
@@ -53,6 +53,14 @@ def save_archived_counts_lookup_to_cache(
     )
 
 
+def delete_archived_counts_lookup_cache(
+    feed_uuids: Collection[uuid_.UUID], cache: BaseCache
+) -> None:
+    cache.delete_many(
+        [f"archived_counts_lookup_{feed_uuid}" for feed_uuid in feed_uuids]
+    )
+
+
 class _GetArchivedCountsLookupFromCacheResult(NamedTuple):
     archived_counts_lookup: dict[uuid_.UUID, int]
     missing_feed_uuids: list[uuid_.UUID]
@@ -1,58 +1,183 @@
 import uuid as uuid_
-from typing import Any, Collection, Generator, NamedTuple, TypedDict
+from typing import Any, Collection, Generator, NamedTuple, TypedDict, cast
 
 from django.conf import settings
 from django.core.cache import BaseCache
 from django.core.signals import setting_changed
 from django.dispatch import receiver
+from django_redis.cache import RedisCache
 
+from api.cache_utils.archived_counts_lookup import save_archived_counts_lookup_to_cache
 from api.lock_context import lock_context
-from api.models import Feed, User
+from api.models import Feed, SubscribedFeedUserMapping, User
 
 _FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS: float | None
+_FEED_TOTAL_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS: float | None
+_FEED_COUNT_LOOKUPS_CACHE_REDIS_HASH: bool
 
 
 @receiver(setting_changed)
 def _load_global_settings(*args: Any, **kwargs: Any):
     global _FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS
+    global _FEED_TOTAL_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS
+    global _FEED_COUNT_LOOKUPS_CACHE_REDIS_HASH
 
     _FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS = (
         settings.FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS
     )
+    _FEED_TOTAL_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS = (
+        settings.FEED_TOTAL_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS
+    )
+    _FEED_COUNT_LOOKUPS_CACHE_REDIS_HASH = getattr(
+        settings, "FEED_COUNT_LOOKUPS_CACHE_REDIS_HASH", True
+    )
 
 
 _load_global_settings()
 
+# The unread/read counts are composed from 3 separately-cached parts:
+# - `total_counts_lookup_{feed}`, shared by every subscriber, and dropped whenever
+#   entries are added or removed
+# - `archived_counts_lookup_{feed}`, shared by every subscriber, and dropped whenever
+#   entries are archived
+# - the user's read count, the only per-user part
+#
+# On Redis, the read counts are the fields of one `read_counts_lookup_{user}` hash,
+# keyed by feed UUID. Otherwise, they are `read_counts_lookup_{user}_{feed}` keys.
+
+# only touches fields that already exist, so uncached feeds stay uncached
+_HASH_INCREMENT_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    local current = redis.call("HGET", KEYS[1], ARGV[i])
+    if current then
+        local new = tonumber(current) + tonumber(ARGV[i + 1])
+        if new < 0 then
+            new = 0
+        end
+        redis.call("HSET", KEYS[1], ARGV[i], new)
+    end
+end
+return 0
+"""
+
+
+def _use_redis_hash(cache: BaseCache) -> bool:
+    return _FEED_COUNT_LOOKUPS_CACHE_REDIS_HASH and isinstance(cache, RedisCache)
+
+
+def _redis_hash_key(
+    cache: RedisCache, user_uuid: uuid_.UUID
+) -> str:  # pragma: no cover
+    return cache.client.make_key(f"read_counts_lookup_{user_uuid}")
+
+
+def _generate_cached_entries__redis_hash(
+    user: User, feed_uuids: Collection[uuid_.UUID], cache: RedisCache
+) -> Generator[
+    tuple[uuid_.UUID, int | None, int | None, int | None], None, None
+]:  # pragma: no cover
+    feed_uuids = list(feed_uuids)
+
+    shared_keys = [
+        cache.client.make_key(key)
+        for f_uuid in feed_uuids
+        for key in (
+            f"total_counts_lookup_{f_uuid}",
+            f"archived_counts_lookup_{f_uuid}",
+        )
+    ]
+
+    # the shared keys and the user's hash in a single round trip
+    pipeline = cache.client.get_client(write=False).pipeline(transaction=False)
+    pipeline.mget(shared_keys)
+    pipeline.hmget(_redis_hash_key(cache, user.uuid), [str(f) for f in feed_uuids])
+    shared_values, read_values = pipeline.execute()
+
+    for i, feed_uuid in enumerate(feed_uuids):
+        total = shared_values[i * 2]
+        archived = shared_values[i * 2 + 1]
+        read = read_values[i]
+        yield (
+            feed_uuid,
+            cache.client.decode(total) if total is not None else None,
+            cache.client.decode(archived) if archived is not None else None,
+            int(read) if read is not None else None,
+        )
+
 
 def _generate_cached_entries(
     user: User, feed_uuids: Collection[uuid_.UUID], cache: BaseCache
-) -> Generator[tuple[uuid_.UUID, int, int], None, None]:
+) -> Generator[tuple[uuid_.UUID, int | None, int | None, int | None], None, None]:
     if not feed_uuids:
         return
 
-    cache_entries: dict[str, tuple[int, int] | None] = cache.get_many(
-        f"counts_lookup_{user.uuid}_{f_uuid}" for f_uuid in feed_uuids
+    if _use_redis_hash(cache):  # pragma: no cover
+        yield from _generate_cached_entries__redis_hash(
+            user, feed_uuids, cast(RedisCache, cache)
+        )
+        return
+
+    cache_entries: dict[str, int] = cache.get_many(
+        key
+        for f_uuid in feed_uuids
+        for key in (
+            f"total_counts_lookup_{f_uuid}",
+            f"archived_counts_lookup_{f_uuid}",
+            f"read_counts_lookup_{user.uuid}_{f_uuid}",
+        )
     )
 
-    for key, entry in cache_entries.items():
-        if entry is not None:
-            unread, read = entry
-            feed_uuid = uuid_.UUID(key.removeprefix(f"counts_lookup_{user.uuid}_"))
-            yield feed_uuid, unread, read
+    for feed_uuid in feed_uuids:
+        yield (
+            feed_uuid,
+            cache_entries.get(f"total_counts_lookup_{feed_uuid}"),
+            cache_entries.get(f"archived_counts_lookup_{feed_uuid}"),
+            cache_entries.get(f"read_counts_lookup_{user.uuid}_{feed_uuid}"),
+        )
 
 
-def save_counts_lookup_to_cache(
-    user: User,
-    counts_lookup: dict[uuid_.UUID, Feed._CountsDescriptor],
-    cache: BaseCache,
+def save_total_counts_lookup_to_cache(
+    total_counts_lookup: dict[uuid_.UUID, int], cache: BaseCache
 ) -> None:
     cache.set_many(
         {
-            f"counts_lookup_{user.uuid}_{feed_uuid}": (
-                counts_descriptor.unread_count,
-                counts_descriptor.read_count,
+            f"total_counts_lookup_{feed_uuid}": total_count
+            for feed_uuid, total_count in total_counts_lookup.items()
+        },
+        _FEED_TOTAL_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS,
+    )
+
+
+def save_read_counts_lookup_to_cache(
+    user: User, read_counts_lookup: dict[uuid_.UUID, int], cache: BaseCache
+) -> None:
+    if not read_counts_lookup:
+        return
+
+    if _use_redis_hash(cache):  # pragma: no cover
+        cache = cast(RedisCache, cache)
+        key = _redis_hash_key(cache, user.uuid)
+        pipeline = cache.client.get_client(write=True).pipeline()
+        pipeline.hset(
+            key,
+            mapping={
+                str(feed_uuid): read_count
+                for feed_uuid, read_count in read_counts_lookup.items()
+            },
+        )
+        if _FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS is not None:
+            # `NX`, so that the hash as a whole still expires, rather than
+            # every write pushing it further out
+            pipeline.expire(
+                key, int(_FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS), nx=True
             )
-            for feed_uuid, counts_descriptor in counts_lookup.items()
+        pipeline.execute()
+        return
+
+    cache.set_many(
+        {
+            f"read_counts_lookup_{user.uuid}_{feed_uuid}": read_count
+            for feed_uuid, read_count in read_counts_lookup.items()
         },
         _FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS,
     )
@@ -67,34 +192,135 @@ def get_counts_lookup_from_cache(
     user: User, feed_uuids: Collection[uuid_.UUID], cache: BaseCache
 ) -> _GetCountsLookupFromCacheResults:
     with lock_context(cache, f"counts_lookup_lock__{user.uuid}"):
-        counts_lookup: dict[uuid_.UUID, Feed._CountsDescriptor] = {
-            feed_uuid: Feed._CountsDescriptor(unread, read)
-            for feed_uuid, unread, read in _generate_cached_entries(
-                user, feed_uuids, cache
-            )
-        }
-
-        missing_feed_uuids = [
-            f_uuid for f_uuid in feed_uuids if f_uuid not in counts_lookup
-        ]
+        counts_lookup: dict[uuid_.UUID, Feed._CountsDescriptor] = {}
+        missing_feed_uuids: list[uuid_.UUID] = []
+        for feed_uuid, total, archived, read in _generate_cached_entries(
+            user, feed_uuids, cache
+        ):
+            if total is None or archived is None or read is None:
+                missing_feed_uuids.append(feed_uuid)
+            else:
+                counts_lookup[feed_uuid] = Feed.compose_counts_descriptor(
+                    total, archived, read
+                )
 
         return _GetCountsLookupFromCacheResults(counts_lookup, missing_feed_uuids)
 
 
+def generate_counts_lookup(
+    user: User, feed_uuids: Collection[uuid_.UUID], cache: BaseCache
+) -> dict[uuid_.UUID, Feed._CountsDescriptor]:
+    feed_uuids = frozenset(feed_uuids)
+
+    total_counts_lookup: dict[uuid_.UUID, int] = {}
+    archived_counts_lookup: dict[uuid_.UUID, int] = {}
+    read_counts_lookup: dict[uuid_.UUID, int] = {}
+    for feed_uuid, total, archived, read in _generate_cached_entries(
+        user, feed_uuids, cache
+    ):
+        if total is not None:
+            total_counts_lookup[feed_uuid] = total
+        if archived is not None:
+            archived_counts_lookup[feed_uuid] = archived
+        if read is not None:
+            read_counts_lookup[feed_uuid] = read
+
+    # only the missing parts are recomputed, so a popular feed's shared total is
+    # counted once, rather than once per subscriber
+    if missing := feed_uuids.difference(total_counts_lookup.keys()):
+        missing_total_counts_lookup = Feed.generate_total_counts_lookup(missing)
+        save_total_counts_lookup_to_cache(missing_total_counts_lookup, cache)
+        total_counts_lookup.update(missing_total_counts_lookup)
+
+    if missing := feed_uuids.difference(archived_counts_lookup.keys()):
+        missing_archived_counts_lookup = Feed.generate_archived_counts_lookup(missing)
+        save_archived_counts_lookup_to_cache(missing_archived_counts_lookup, cache)
+        archived_counts_lookup.update(missing_archived_counts_lookup)
+
+    if missing := feed_uuids.difference(read_counts_lookup.keys()):
+        missing_read_counts_lookup = Feed.generate_read_counts_lookup(user, missing)
+        with lock_context(cache, f"counts_lookup_lock__{user.uuid}"):
+            save_read_counts_lookup_to_cache(user, missing_read_counts_lookup, cache)
+        read_counts_lookup.update(missing_read_counts_lookup)
+
+    return {
+        feed_uuid: Feed.compose_counts_descriptor(
+            total_counts_lookup[feed_uuid],
+            archived_counts_lookup[feed_uuid],
+            read_counts_lookup[feed_uuid],
+        )
+        for feed_uuid in feed_uuids
+    }
+
+
 def increment_read_in_counts_lookup_cache(
     user: User, feed_increments: dict[uuid_.UUID, int], cache: BaseCache
 ) -> None:
+    if _use_redis_hash(cache):  # pragma: no cover
+        cache = cast(RedisCache, cache)
+        client = cache.client.get_client(write=True)
+        client.register_script(_HASH_INCREMENT_SCRIPT)(
+            keys=[_redis_hash_key(cache, user.uuid)],
+            args=[
+                a
+                for feed_uuid, incr in feed_increments.items()
+                for a in (str(feed_uuid), incr)
+            ],
+        )
+        return
+
     with lock_context(cache, f"counts_lookup_lock__{user.uuid}"):
-        counts_lookup: dict[uuid_.UUID, Feed._CountsDescriptor] = {}
-        for feed_uuid, unread, read in _generate_cached_entries(
+        read_counts_lookup: dict[uuid_.UUID, int] = {}
+        for feed_uuid, _, _, read in _generate_cached_entries(
             user, feed_increments.keys(), cache
         ):
-            incr = feed_increments[feed_uuid]
-            counts_lookup[feed_uuid] = Feed._CountsDescriptor(
-                max(0, unread - incr), max(0, read + incr)
-            )
+            if read is not None:
+                read_counts_lookup[feed_uuid] = max(
+                    0, read + feed_increments[feed_uuid]
+                )
+
+        save_read_counts_lookup_to_cache(user, read_counts_lookup, cache)
+
+
+def delete_read_counts_lookup_cache(
+    user_uuids: Collection[uuid_.UUID], feed_uuid: uuid_.UUID, cache: BaseCache
+) -> None:
+    if _use_redis_hash(cache):  # pragma: no cover
+        cache = cast(RedisCache, cache)
+        pipeline = cache.client.get_client(write=True).pipeline(transaction=False)
+        for user_uuid in user_uuids:
+            pipeline.hdel(_redis_hash_key(cache, user_uuid), str(feed_uuid))
+        pipeline.execute()
+        return
+
+    cache.delete_many(
+        [f"read_counts_lookup_{user_uuid}_{feed_uuid}" for user_uuid in user_uuids]
+    )
+
+
+def delete_read_counts_lookup_cache__user(user: User, cache: BaseCache) -> None:
+    if _use_redis_hash(cache):  # pragma: no cover
+        cache = cast(RedisCache, cache)
+        cache.client.get_client(write=True).delete(_redis_hash_key(cache, user.uuid))
+        return
+
+    cache.delete_many(
+        [
+            f"read_counts_lookup_{user.uuid}_{feed_uuid}"
+            for feed_uuid in SubscribedFeedUserMapping.objects.filter(
+                user=user
+            ).values_list("feed_id", flat=True)
+        ]
+    )
 
-        save_counts_lookup_to_cache(user, counts_lookup, cache)
+
+def delete_total_counts_lookup_cache(
+    feed_uuids: Collection[uuid_.UUID], cache: BaseCache
+) -> None:
+    # dropped rather than incremented: a reader that missed the cache in between
+    # would have already counted the new entries, and the increment would count
+    # them again
+    cache.delete_many([f"total_counts_lookup_{feed_uuid}" for feed_uuid in feed_uuids])
 
 
 class _GetCountsLookupTaskResults_Lookup(TypedDict):
@@ -103,10 +329,18 @@ class _GetCountsLookupTaskResults_Lookup(TypedDict):
 
 
 def get_counts_lookup_task(
-    user_uuid_str: str, feed_uuid_str: str
+    user_uuid_str: str, feed_uuid_str: str, cache: BaseCache
+) -> dict[str, _GetCountsLookupTaskResults_Lookup]:
+    return get_counts_lookup_batch_task(user_uuid_str, (feed_uuid_str,), cache)
+
+
+def get_counts_lookup_batch_task(
+    user_uuid_str: str, feed_uuid_strs: Collection[str], cache: BaseCache
 ) -> dict[str, _GetCountsLookupTaskResults_Lookup]:
     user = User.objects.get(uuid=uuid_.UUID(user_uuid_str))
-    counts_lookup = Feed.generate_counts_lookup(user, [uuid_.UUID(feed_uuid_str)])
+    counts_lookup = generate_counts_lookup(
+        user, [uuid_.UUID(fus) for fus in feed_uuid_strs], cache
+    )
 
     return {
         str(uuid_): {
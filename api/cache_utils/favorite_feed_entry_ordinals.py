@@ -0,0 +1,52 @@
+from typing import Iterable, NamedTuple
+
+from django.core.cache import BaseCache
+
+from api.cache_utils.ordinal_bitmap import (
+    delete_ordinal_bitmap_cache,
+    get_ordinal_bitmap_from_cache,
+    update_ordinal_bitmap_cache,
+)
+from api.models import User
+from api.ordinal_bitmap import OrdinalBitmap
+
+
+class _GetFavoriteFeedEntryOrdinalsFromCacheResults(NamedTuple):
+    favorite_feed_entry_ordinals: OrdinalBitmap
+    cache_hit: bool
+
+
+def get_favorite_feed_entry_ordinals_from_cache(
+    user: User, cache: BaseCache
+) -> _GetFavoriteFeedEntryOrdinalsFromCacheResults:
+    favorite_feed_entry_ordinals, cache_hit = get_ordinal_bitmap_from_cache(
+        f"favorite_feed_entry_ordinals__{user.uuid}",
+        f"favorite_feed_entry_ordinals_lock__{user.uuid}",
+        lambda: User.favorite_feed_entries.through.objects.filter(
+            user=user, feedentry__ordinal__isnull=False
+        ).values_list("feedentry__ordinal", flat=True),
+        cache,
+    )
+    return _GetFavoriteFeedEntryOrdinalsFromCacheResults(
+        favorite_feed_entry_ordinals, cache_hit
+    )
+
+
+def update_favorite_feed_entry_ordinals_cache(
+    user: User,
+    cache: BaseCache,
+    *,
+    added_ordinals: Iterable[int | None] = (),
+    removed_ordinals: Iterable[int | None] = (),
+) -> None:
+    update_ordinal_bitmap_cache(
+        f"favorite_feed_entry_ordinals__{user.uuid}",
+        f"favorite_feed_entry_ordinals_lock__{user.uuid}",
+        (o for o in added_ordinals if o is not None),
+        (o for o in removed_ordinals if o is not None),
+        cache,
+    )
+
+
+def delete_favorite_feed_entry_ordinals_cache(user: User, cache: BaseCache) -> None:
+    delete_ordinal_bitmap_cache(f"favorite_feed_entry_ordinals__{user.uuid}", cache)
@@ -0,0 +1,107 @@
+import time
+from typing import Callable, Iterable, NamedTuple
+
+from django.core.cache import BaseCache
+
+from api.lock_context import lock_context
+from api.ordinal_bitmap import OrdinalBitmap
+
+# The bitmaps are kept current by the writers, rather than dropped on every change.
+# Every write bumps `{key}__version`, and the cached bitmap records the version it
+# is current as of, so a bitmap which missed a write (a load racing a write, or 2
+# writes racing each other where the cache can't lock) is seen as stale, and
+# reloaded, instead of being served.
+#
+# The writers must run after their transaction commits, otherwise a load could
+# read the pre-commit rows against the post-write version.
+
+
+def _version_key(cache_key: str) -> str:
+    return f"{cache_key}__version"
+
+
+def _init_version(cache: BaseCache, cache_key: str) -> None:
+    # seeded from the clock, so a version key which was evicted and recreated
+    # can't land back on a version that some stale bitmap was saved with
+    cache.add(_version_key(cache_key), time.time_ns(), None)
+
+
+class _GetOrdinalBitmapFromCacheResults(NamedTuple):
+    ordinal_bitmap: OrdinalBitmap
+    cache_hit: bool
+
+
+def get_ordinal_bitmap_from_cache(
+    cache_key: str,
+    lock_key: str,
+    load_ordinals: Callable[[], Iterable[int]],
+    cache: BaseCache,
+) -> _GetOrdinalBitmapFromCacheResults:
+    with lock_context(cache, lock_key):
+        version_key = _version_key(cache_key)
+
+        _init_version(cache, cache_key)
+        cache_entries = cache.get_many((cache_key, version_key))
+        version: int | None = cache_entries.get(version_key)
+        cached: tuple[int, bytes] | None = cache_entries.get(cache_key)
+
+        if version is not None and cached is not None and cached[0] == version:
+            return _GetOrdinalBitmapFromCacheResults(
+                OrdinalBitmap.from_bytes(cached[1]), True
+            )
+
+        ordinal_bitmap = OrdinalBitmap(load_ordinals())
+
+        # a write which landed during the load may be missing from it, so only save
+        # if there was none. Otherwise, the next read tries again
+        if version is not None and cache.get(version_key) == version:
+            cache.set(cache_key, (version, ordinal_bitmap.to_bytes()), None)
+
+        return _GetOrdinalBitmapFromCacheResults(ordinal_bitmap, False)
+
+
+def update_ordinal_bitmap_cache(
+    cache_key: str,
+    lock_key: str,
+    added_ordinals: Iterable[int],
+    removed_ordinals: Iterable[int],
+    cache: BaseCache,
+) -> None:
+    with lock_context(cache, lock_key):
+        version_key = _version_key(cache_key)
+
+        version: int
+        try:
+            version = cache.incr(version_key)
+        except ValueError:
+            # no version, so no bitmap can be current either
+            _init_version(cache, cache_key)
+            return
+
+        cached: tuple[int, bytes] | None = cache.get(cache_key)
+        if cached is None:
+            return
+
+        if cached[0] != version - 1:
+            # another write got in first (or the bitmap was already stale), so
+            # this one can't be applied on top of it
+            cache.delete(cache_key)
+            return
+
+        ordinal_bitmap = OrdinalBitmap.from_bytes(cached[1])
+        for ordinal in added_ordinals:
+            ordinal_bitmap.add(ordinal)
+        for ordinal in removed_ordinals:
+            ordinal_bitmap.discard(ordinal)
+
+        cache.set(cache_key, (version, ordinal_bitmap.to_bytes()), None)
+
+
+def delete_ordinal_bitmap_cache(cache_key: str, cache: BaseCache) -> None:
+    # bumped too, so that a load already underway doesn't save its (possibly
+    # pre-change) bitmap back
+    try:
+        cache.incr(_version_key(cache_key))
+    except ValueError:
+        pass
+    cache.delete(cache_key)
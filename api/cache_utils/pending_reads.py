@@ -0,0 +1,95 @@
+import datetime
+import uuid as uuid_
+from typing import NamedTuple
+
+from django.core.cache import BaseCache
+
+from api.lock_context import lock_context
+from api.models import FeedEntry, User
+
+# With write-behind enabled, single-entry read/unread requests only record the
+# change here. `flush_pending_reads` later applies them to the DB in batches.
+#
+# - `pending_reads__{user}`: `{feed entry UUID: (feed UUID, ordinal, read_at)}`,
+#   where a `read_at` of `None` means "unread". Only the latest change per entry
+#   is kept
+# - `pending_reads_users`: the UUIDs of the users with anything pending
+
+
+class PendingRead(NamedTuple):
+    feed_uuid: uuid_.UUID
+    ordinal: int | None
+    read_at: datetime.datetime | None
+
+
+def _pending_reads_key(user_uuid: uuid_.UUID) -> str:
+    return f"pending_reads__{user_uuid}"
+
+
+def _pending_reads_lock_key(user_uuid: uuid_.UUID) -> str:
+    return f"pending_reads_lock__{user_uuid}"
+
+
+def queue_pending_read(
+    user: User,
+    feed_entry: FeedEntry,
+    read_at: datetime.datetime | None,
+    cache: BaseCache,
+) -> None:
+    with lock_context(cache, _pending_reads_lock_key(user.uuid)):
+        cache_key = _pending_reads_key(user.uuid)
+        pending_reads: dict[uuid_.UUID, PendingRead] = cache.get(cache_key) or {}
+        pending_reads[feed_entry.uuid] = PendingRead(
+            feed_entry.feed_id, feed_entry.ordinal, read_at
+        )
+        cache.set(cache_key, pending_reads, None)
+
+    with lock_context(cache, "pending_reads_users_lock"):
+        user_uuids: set[uuid_.UUID] = cache.get("pending_reads_users") or set()
+        if user.uuid not in user_uuids:
+            user_uuids.add(user.uuid)
+            cache.set("pending_reads_users", user_uuids, None)
+
+
+def get_pending_reads_from_cache(
+    user_uuid: uuid_.UUID, cache: BaseCache
+) -> dict[uuid_.UUID, PendingRead]:
+    return cache.get(_pending_reads_key(user_uuid)) or {}
+
+
+def get_pending_read_states_from_cache(user: User, cache: BaseCache) -> dict[int, bool]:
+    return {
+        pending_read.ordinal: pending_read.read_at is not None
+        for pending_read in get_pending_reads_from_cache(user.uuid, cache).values()
+        if pending_read.ordinal is not None
+    }
+
+
+def get_pending_read_user_uuids_from_cache(cache: BaseCache) -> set[uuid_.UUID]:
+    return cache.get("pending_reads_users") or set()
+
+
+def discard_pending_reads(
+    user_uuid: uuid_.UUID,
+    flushed_pending_reads: dict[uuid_.UUID, PendingRead],
+    cache: BaseCache,
+) -> None:
+    with lock_context(cache, _pending_reads_lock_key(user_uuid)):
+        cache_key = _pending_reads_key(user_uuid)
+        pending_reads: dict[uuid_.UUID, PendingRead] = cache.get(cache_key) or {}
+        # anything which changed again during the flush stays queued
+        for feed_entry_uuid, pending_read in flushed_pending_reads.items():
+            if pending_reads.get(feed_entry_uuid) == pending_read:
+                del pending_reads[feed_entry_uuid]
+
+        if pending_reads:
+            cache.set(cache_key, pending_reads, None)
+            return
+
+        cache.delete(cache_key)
+
+        with lock_context(cache, "pending_reads_users_lock"):
+            user_uuids: set[uuid_.UUID] = cache.get("pending_reads_users") or set()
+            if user_uuid in user_uuids:
+                user_uuids.discard(user_uuid)
+                cache.set("pending_reads_users", user_uuids, None)
@@ -0,0 +1,75 @@
+import zlib
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_QUERY_RESULT_CACHE: bool
+_QUERY_RESULT_CACHE_MAX_BYTES: int
+_QUERY_RESULT_CACHE_COMPRESS: bool
+_QUERY_RESULT_CACHE_TIMEOUT_SECONDS: float | None
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _QUERY_RESULT_CACHE
+    global _QUERY_RESULT_CACHE_MAX_BYTES
+    global _QUERY_RESULT_CACHE_COMPRESS
+    global _QUERY_RESULT_CACHE_TIMEOUT_SECONDS
+
+    _QUERY_RESULT_CACHE = getattr(settings, "QUERY_RESULT_CACHE", False)
+    _QUERY_RESULT_CACHE_MAX_BYTES = getattr(
+        settings, "QUERY_RESULT_CACHE_MAX_BYTES", 256 * 1024
+    )
+    _QUERY_RESULT_CACHE_COMPRESS = getattr(
+        settings, "QUERY_RESULT_CACHE_COMPRESS", False
+    )
+    _QUERY_RESULT_CACHE_TIMEOUT_SECONDS = getattr(
+        settings, "QUERY_RESULT_CACHE_TIMEOUT_SECONDS", 60.0 * 60.0
+    )
+
+
+_load_global_settings()
+
+# Rendered query responses, keyed by the state digest of the request (see
+# `api.etag_util.generate_state_digest`). The digest changes along with any
+# version the response depends on, so an entry is never stale, just unreachable,
+# and the timeout is only there to free up the space sooner.
+#
+# Stored as `(compressed, content)`.
+
+
+def query_result_cache_enabled() -> bool:
+    return _QUERY_RESULT_CACHE
+
+
+def _cache_key(state_digest: str) -> str:
+    return f"query_result__{state_digest}"
+
+
+def get_query_result_from_cache(state_digest: str, cache: BaseCache) -> bytes | None:
+    entry: tuple[bool, bytes] | None = cache.get(_cache_key(state_digest))
+    if entry is None:
+        return None
+
+    compressed, content = entry
+    return zlib.decompress(content) if compressed else content
+
+
+def save_query_result_to_cache(
+    state_digest: str, content: bytes, cache: BaseCache
+) -> bool:
+    # big pages are rare to repeat exactly, and would crowd out everything else
+    if len(content) > _QUERY_RESULT_CACHE_MAX_BYTES:
+        return False
+
+    compressed = _QUERY_RESULT_CACHE_COMPRESS
+    cache.set(
+        _cache_key(state_digest),
+        (compressed, zlib.compress(content) if compressed else content),
+        _QUERY_RESULT_CACHE_TIMEOUT_SECONDS,
+    )
+
+    return True
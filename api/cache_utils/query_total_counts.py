@@ -0,0 +1,53 @@
+import hashlib
+from typing import Any, Callable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from api.models import User
+
+_QUERY_TOTAL_COUNT_CACHE_TIMEOUT_SECONDS: float | None
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _QUERY_TOTAL_COUNT_CACHE_TIMEOUT_SECONDS
+
+    _QUERY_TOTAL_COUNT_CACHE_TIMEOUT_SECONDS = (
+        settings.QUERY_TOTAL_COUNT_CACHE_TIMEOUT_SECONDS
+    )
+
+
+_load_global_settings()
+
+
+class _GetQueryTotalCountFromCacheResults(NamedTuple):
+    total_count: int
+    cache_hit: bool
+
+
+def normalize_query(*parts: str) -> str:
+    # the parts are hashed as given, so any normalizing (e.g. of the search, see
+    # `query_utils.search.to_canonical`) has to happen before they get here
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def get_query_total_count_from_cache(
+    user: User,
+    object_name: str,
+    normalized_query: str,
+    load_total_count: Callable[[], int],
+    cache: BaseCache,
+) -> _GetQueryTotalCountFromCacheResults:
+    cache_key = f"query_total_count__{object_name}__{user.uuid}__{normalized_query}"
+
+    total_count: int | None = cache.get(cache_key)
+    if total_count is not None:
+        return _GetQueryTotalCountFromCacheResults(total_count, True)
+
+    total_count = load_total_count()
+    cache.set(cache_key, total_count, _QUERY_TOTAL_COUNT_CACHE_TIMEOUT_SECONDS)
+
+    return _GetQueryTotalCountFromCacheResults(total_count, False)
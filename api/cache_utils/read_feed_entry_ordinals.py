@@ -0,0 +1,52 @@
+from typing import Iterable, NamedTuple
+
+from django.core.cache import BaseCache
+
+from api.cache_utils.ordinal_bitmap import (
+    delete_ordinal_bitmap_cache,
+    get_ordinal_bitmap_from_cache,
+    update_ordinal_bitmap_cache,
+)
+from api.models import ReadFeedEntryUserMapping, User
+from api.ordinal_bitmap import OrdinalBitmap
+
+
+class _GetReadFeedEntryOrdinalsFromCacheResults(NamedTuple):
+    read_feed_entry_ordinals: OrdinalBitmap
+    cache_hit: bool
+
+
+def get_read_feed_entry_ordinals_from_cache(
+    user: User, cache: BaseCache
+) -> _GetReadFeedEntryOrdinalsFromCacheResults:
+    read_feed_entry_ordinals, cache_hit = get_ordinal_bitmap_from_cache(
+        f"read_feed_entry_ordinals__{user.uuid}",
+        f"read_feed_entry_ordinals_lock__{user.uuid}",
+        lambda: ReadFeedEntryUserMapping.objects.filter(
+            user=user, feed_entry__ordinal__isnull=False
+        ).values_list("feed_entry__ordinal", flat=True),
+        cache,
+    )
+    return _GetReadFeedEntryOrdinalsFromCacheResults(
+        read_feed_entry_ordinals, cache_hit
+    )
+
+
+def update_read_feed_entry_ordinals_cache(
+    user: User,
+    cache: BaseCache,
+    *,
+    added_ordinals: Iterable[int | None] = (),
+    removed_ordinals: Iterable[int | None] = (),
+) -> None:
+    update_ordinal_bitmap_cache(
+        f"read_feed_entry_ordinals__{user.uuid}",
+        f"read_feed_entry_ordinals_lock__{user.uuid}",
+        (o for o in added_ordinals if o is not None),
+        (o for o in removed_ordinals if o is not None),
+        cache,
+    )
+
+
+def delete_read_feed_entry_ordinals_cache(user: User, cache: BaseCache) -> None:
+    delete_ordinal_bitmap_cache(f"read_feed_entry_ordinals__{user.uuid}", cache)
@@ -0,0 +1,145 @@
+import itertools
+import time
+import uuid as uuid_
+import zlib
+from typing import Any, Iterable, NamedTuple
+
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_STABLE_QUERY_SEGMENT_SIZE: int
+_STABLE_QUERY_SEGMENT_COMPRESS: bool
+_STABLE_QUERY_MAX_LIFETIME_SECONDS: float
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _STABLE_QUERY_SEGMENT_SIZE
+    global _STABLE_QUERY_SEGMENT_COMPRESS
+    global _STABLE_QUERY_MAX_LIFETIME_SECONDS
+
+    _STABLE_QUERY_SEGMENT_SIZE = getattr(settings, "STABLE_QUERY_SEGMENT_SIZE", 512)
+    _STABLE_QUERY_SEGMENT_COMPRESS = getattr(
+        settings, "STABLE_QUERY_SEGMENT_COMPRESS", False
+    )
+    _STABLE_QUERY_MAX_LIFETIME_SECONDS = getattr(
+        settings, "STABLE_QUERY_MAX_LIFETIME_SECONDS", 60.0 * 60.0 * 24.0
+    )
+
+
+_load_global_settings()
+
+# A stable query is stored as packed UUIDs (16 bytes each, back to back), split
+# into fixed-size segments, so that a page only has to fetch and unpack the 1 or 2
+# segments it falls in, rather than the whole result set.
+#
+# - `{token}`: the header, `(count, segment size, compressed, expires at)`
+# - `{token}__{i}`: the `i`th segment
+#
+# The segments are saved for the query's whole (capped) lifetime, while the header
+# only lives for the cache's timeout, and is touched on every page, but never past
+# the cap. So the segments always outlive the header, and a page only costs the
+# header touch plus fetching the segments it falls in.
+
+
+class _StableQueryHeader(NamedTuple):
+    count: int
+    segment_size: int
+    compressed: bool
+    expires_at: float
+
+
+class _GetStableQueryFromCacheResults(NamedTuple):
+    uuids: list[uuid_.UUID]
+    total_count: int
+
+
+def _segment_key(token: str, index: int) -> str:
+    return f"{token}__{index}"
+
+
+def _header_timeout(expires_at: float, cache: BaseCache) -> float:
+    remaining = expires_at - time.time()
+    if cache.default_timeout is None:
+        return remaining
+    return min(cache.default_timeout, remaining)
+
+
+def save_stable_query_to_cache(
+    token: str, uuids: Iterable[uuid_.UUID], cache: BaseCache
+) -> int:
+    segment_size = _STABLE_QUERY_SEGMENT_SIZE
+    compressed = _STABLE_QUERY_SEGMENT_COMPRESS
+    lifetime = _STABLE_QUERY_MAX_LIFETIME_SECONDS
+    expires_at = time.time() + lifetime
+
+    count = 0
+    segments: dict[str, bytes] = {}
+    uuids_iter = iter(uuids)
+    for index in itertools.count():
+        segment_uuids = list(itertools.islice(uuids_iter, segment_size))
+        if not segment_uuids:
+            break
+
+        segment = b"".join(uuid.bytes for uuid in segment_uuids)
+        if compressed:
+            segment = zlib.compress(segment)
+
+        segments[_segment_key(token, index)] = segment
+        count += len(segment_uuids)
+
+    cache.set_many(segments, lifetime)
+    # saved last, so that a token is never readable without its segments
+    cache.set(
+        token,
+        _StableQueryHeader(count, segment_size, compressed, expires_at),
+        _header_timeout(expires_at, cache),
+    )
+
+    return count
+
+
+def get_stable_query_from_cache(
+    token: str, skip: int, count: int, cache: BaseCache
+) -> _GetStableQueryFromCacheResults:
+    header: _StableQueryHeader | None = cache.get(token)
+    if header is None:
+        return _GetStableQueryFromCacheResults([], 0)
+
+    timeout = _header_timeout(header.expires_at, cache)
+    if timeout <= 0.0:
+        return _GetStableQueryFromCacheResults([], 0)
+
+    cache.touch(token, timeout)
+
+    start = min(skip, header.count)
+    stop = min(skip + count, header.count)
+    if start >= stop:
+        return _GetStableQueryFromCacheResults([], header.count)
+
+    first_index = start // header.segment_size
+    last_index = (stop - 1) // header.segment_size
+    segment_keys = [
+        _segment_key(token, index) for index in range(first_index, last_index + 1)
+    ]
+    segments: dict[str, bytes] = cache.get_many(segment_keys)
+    if len(segments) != len(segment_keys):
+        # partially evicted, so treat as expired
+        return _GetStableQueryFromCacheResults([], 0)
+
+    uuids: list[uuid_.UUID] = []
+    for index, segment_key in zip(range(first_index, last_index + 1), segment_keys):
+        segment = segments[segment_key]
+        if header.compressed:
+            segment = zlib.decompress(segment)
+
+        segment_start = index * header.segment_size
+        for i in range(
+            max(start, segment_start) - segment_start,
+            min(stop, segment_start + header.segment_size) - segment_start,
+        ):
+            uuids.append(uuid_.UUID(bytes=segment[i * 16 : (i + 1) * 16]))
+
+    return _GetStableQueryFromCacheResults(uuids, header.count)
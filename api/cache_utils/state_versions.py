@@ -0,0 +1,105 @@
+import time
+import uuid as uuid_
+from typing import Collection, Iterable, Literal
+
+from django.core.cache import BaseCache
+from django.db import transaction
+
+from api.models import SubscribedFeedUserMapping
+
+# Monotonic version counters, for telling whether anything a response was made
+# from has changed since, without looking at the data itself:
+# - per user, for each kind of their state (`content` being the content of the
+#   feeds they are subscribed to)
+# - per feed, for its content (its entries, and their counts)
+# - for the content of all feeds
+# - the epoch, which covers everything, for changes with no narrower version
+#
+# Counters never expire, and one that is missing (evicted, or never bumped)
+# starts at the current time in nanoseconds, so it is still past any value it
+# had before.
+
+UserStateKind = Literal["read", "favorite", "subscription", "category", "content"]
+
+EPOCH_VERSION_KEY = "state_version__epoch"
+ALL_FEEDS_CONTENT_VERSION_KEY = "feed_content_version__all"
+
+
+def user_state_version_key(user_uuid: uuid_.UUID, kind: UserStateKind) -> str:
+    return f"state_version__{kind}__{user_uuid}"
+
+
+def feed_content_version_key(feed_uuid: uuid_.UUID) -> str:
+    return f"feed_content_version__{feed_uuid}"
+
+
+def get_versions(keys: Collection[str], cache: BaseCache) -> list[int]:
+    versions: dict[str, int] = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # whoever adds it first sets where it starts
+            initial_version = time.time_ns()
+            cache.add(key, initial_version, None)
+            versions[key] = cache.get(key, initial_version)
+
+    return [versions[key] for key in keys]
+
+
+def _bump(keys: Iterable[str], cache: BaseCache) -> None:
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # restarting it is as good as bumping it
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_versions(keys: Collection[str], cache: BaseCache) -> None:
+    # only once the change is visible, or a request in between could see the new
+    # version with the old data, and be told later that nothing has changed
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: _bump(keys, cache))
+
+
+def bump_user_state_versions(
+    user_uuids: Iterable[uuid_.UUID],
+    kinds: Iterable[UserStateKind],
+    cache: BaseCache,
+) -> None:
+    kinds = tuple(kinds)
+    bump_versions(
+        [
+            user_state_version_key(user_uuid, kind)
+            for user_uuid in user_uuids
+            for kind in kinds
+        ],
+        cache,
+    )
+
+
+def bump_feed_content_versions(
+    feed_uuids: Collection[uuid_.UUID], cache: BaseCache
+) -> None:
+    if not feed_uuids:
+        return
+
+    bump_versions(
+        [
+            ALL_FEEDS_CONTENT_VERSION_KEY,
+            *(feed_content_version_key(feed_uuid) for feed_uuid in feed_uuids),
+            *(
+                user_state_version_key(user_uuid, "content")
+                for user_uuid in SubscribedFeedUserMapping.objects.filter(
+                    feed_id__in=feed_uuids
+                )
+                .values_list("user_id", flat=True)
+                .distinct()
+            ),
+        ],
+        cache,
+    )
+
+
+def bump_epoch(cache: BaseCache) -> None:
+    bump_versions([EPOCH_VERSION_KEY], cache)
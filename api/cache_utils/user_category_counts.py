@@ -0,0 +1,121 @@
+import uuid as uuid_
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from api.cache_utils.counts_lookup import generate_counts_lookup
+from api.lock_context import lock_context
+from api.models import Feed, SubscribedFeedUserMapping, User, UserCategory
+
+_USER_CATEGORY_COUNTS_CACHE_TIMEOUT_SECONDS: float | None
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _USER_CATEGORY_COUNTS_CACHE_TIMEOUT_SECONDS
+
+    _USER_CATEGORY_COUNTS_CACHE_TIMEOUT_SECONDS = (
+        settings.USER_CATEGORY_COUNTS_CACHE_TIMEOUT_SECONDS
+    )
+
+
+_load_global_settings()
+
+
+class UserCategoryCounts(NamedTuple):
+    categories: dict[uuid_.UUID, tuple[int, int]]
+    uncategorized: tuple[int, int]
+    total: tuple[int, int]
+
+
+def _sum_counts(
+    counts_lookup: dict[uuid_.UUID, Feed._CountsDescriptor],
+    feed_uuids: set[uuid_.UUID],
+) -> tuple[int, int]:
+    unread_count = 0
+    read_count = 0
+    for feed_uuid in feed_uuids:
+        if counts_descriptor := counts_lookup.get(feed_uuid):
+            unread_count += counts_descriptor.unread_count
+            read_count += counts_descriptor.read_count
+    return unread_count, read_count
+
+
+def generate_user_category_counts(user: User, cache: BaseCache) -> UserCategoryCounts:
+    subscribed_feed_uuids = set(
+        SubscribedFeedUserMapping.objects.filter(user=user).values_list(
+            "feed_id", flat=True
+        )
+    )
+
+    category_feed_uuids: dict[uuid_.UUID, set[uuid_.UUID]] = {
+        uc_uuid: set()
+        for uc_uuid in UserCategory.objects.filter(user=user).values_list(
+            "uuid", flat=True
+        )
+    }
+    for uc_uuid, feed_uuid in UserCategory.feeds.through.objects.filter(
+        usercategory__user=user, feed_id__in=subscribed_feed_uuids
+    ).values_list("usercategory_id", "feed_id"):
+        category_feed_uuids[uc_uuid].add(feed_uuid)
+
+    # the per-feed counts come from (and warm) the shared counts cache, with at
+    # most one grouped aggregate per missing part, and are then rolled up in Python
+    counts_lookup = generate_counts_lookup(user, subscribed_feed_uuids, cache)
+
+    categorized_feed_uuids: set[uuid_.UUID] = set()
+    for feed_uuids in category_feed_uuids.values():
+        categorized_feed_uuids.update(feed_uuids)
+
+    return UserCategoryCounts(
+        {
+            uc_uuid: _sum_counts(counts_lookup, feed_uuids)
+            for uc_uuid, feed_uuids in category_feed_uuids.items()
+        },
+        _sum_counts(counts_lookup, subscribed_feed_uuids - categorized_feed_uuids),
+        _sum_counts(counts_lookup, subscribed_feed_uuids),
+    )
+
+
+class _GetUserCategoryCountsFromCacheResults(NamedTuple):
+    user_category_counts: UserCategoryCounts
+    cache_hit: bool
+
+
+def get_user_category_counts_from_cache(
+    user: User, cache: BaseCache
+) -> _GetUserCategoryCountsFromCacheResults:
+    with lock_context(cache, f"user_category_counts_lock__{user.uuid}"):
+        cache_hit = True
+        cache_key = f"user_category_counts__{user.uuid}"
+        user_category_counts: UserCategoryCounts | None = cache.get(cache_key)
+        if user_category_counts is None:
+            user_category_counts = generate_user_category_counts(user, cache)
+            cache.set(
+                cache_key,
+                user_category_counts,
+                _USER_CATEGORY_COUNTS_CACHE_TIMEOUT_SECONDS,
+            )
+            cache_hit = False
+
+        return _GetUserCategoryCountsFromCacheResults(user_category_counts, cache_hit)
+
+
+def delete_user_category_counts_cache(user: User, cache: BaseCache) -> None:
+    cache.delete(f"user_category_counts__{user.uuid}")
+
+
+def delete_user_category_counts_cache__subscribers(
+    feed_uuid: uuid_.UUID, cache: BaseCache
+) -> None:
+    cache.delete_many(
+        [
+            f"user_category_counts__{user_uuid}"
+            for user_uuid in SubscribedFeedUserMapping.objects.filter(
+                feed_id=feed_uuid
+            ).values_list("user_id", flat=True)
+        ]
+    )
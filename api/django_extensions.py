@@ -7,11 +7,17 @@ _Model = TypeVar("_Model", bound=Model)
 
 
 def bulk_create_iter(
-    iterable: Iterable[_Model], model_type: type[_Model], batch_size=2000
+    iterable: Iterable[_Model],
+    model_type: type[_Model],
+    batch_size=2000,
+    ignore_conflicts=False,
 ):
     created = 0
     while True:
-        objects = model_type.objects.bulk_create(itertools.islice(iterable, batch_size))  # type: ignore
+        objects = model_type.objects.bulk_create(
+            itertools.islice(iterable, batch_size),  # type: ignore
+            ignore_conflicts=ignore_conflicts,
+        )
         created += len(objects)
         if not objects:
             break
@@ -1,12 +1,15 @@
 import uuid
 from typing import Any, Iterable, NamedTuple
 
+from django.core.cache import BaseCache
 from django.db import IntegrityError, transaction
 
+from api.cache_utils.state_versions import bump_epoch
 from api.models import (
     AlternateFeedURL,
     Feed,
     FeedEntry,
+    FeedReadWatermark,
     ReadFeedEntryUserMapping,
     SubscribedFeedUserMapping,
     User,
@@ -21,66 +24,84 @@ class DuplicateFeedTuple(NamedTuple):
 
 def convert_duplicate_feeds_to_alternate_feed_urls(
     duplicate_feed_suggestions: Iterable[DuplicateFeedTuple],
+    cache: BaseCache | None = None,
 ) -> None:
     alternate_feed_urls: list[AlternateFeedURL] = []
     remove_feed_uuids: set[uuid.UUID] = set()
+    original_feed_uuids: set[uuid.UUID] = set()
     moving_subscriptions: list[SubscribedFeedUserMapping] = []
     moving_read_mappings: list[ReadFeedEntryUserMapping] = []
     moving_favorite_mappings: list[Any] = []
     user_category_additions: dict[uuid.UUID, tuple[UserCategory, list[Feed]]] = {}
-    for original_feed, duplicate_feed in duplicate_feed_suggestions:
-        for subsciption_mapping in SubscribedFeedUserMapping.objects.filter(
-            feed=duplicate_feed
-        ).iterator():
-            subsciption_mapping.feed = original_feed
-            moving_subscriptions.append(subsciption_mapping)
-
-        for read_mapping in (
-            ReadFeedEntryUserMapping.objects.filter(feed_entry__feed=duplicate_feed)
-            .select_related("feed_entry")
-            .iterator()
-        ):
-            similar_feed_entry = FeedEntry.objects.filter(
-                feed=original_feed,
-                title=read_mapping.feed_entry.title,
-                url=read_mapping.feed_entry.url,
-                is_archived=False,
-            ).first()
-            if similar_feed_entry:
-                read_mapping.feed_entry = similar_feed_entry
-                moving_read_mappings.append(read_mapping)
-
-        for favorite_mapping in (
-            User.favorite_feed_entries.through.objects.filter(
-                feedentry__feed=duplicate_feed
-            )
-            .select_related("feedentry")
-            .iterator()
+    duplicate_feed_suggestions = list(duplicate_feed_suggestions)
+
+    # all in one transaction, so nobody sees a half-merged feed, nor an entry
+    # that is both under a watermark and in a mapping
+    with transaction.atomic():
+        # watermarks are per-feed, so spell them out as mappings which can be
+        # moved, before those are collected
+        for watermark in FeedReadWatermark.objects.filter(
+            feed__in=[
+                duplicate_feed for _, duplicate_feed in duplicate_feed_suggestions
+            ]
         ):
-            similar_feed_entry = FeedEntry.objects.filter(
-                feed=original_feed,
-                title=favorite_mapping.feedentry.title,
-                url=favorite_mapping.feedentry.url,
-            ).first()
-            if similar_feed_entry:
-                favorite_mapping.feedentry = similar_feed_entry
-                moving_favorite_mappings.append(favorite_mapping)
-
-        for user_category in duplicate_feed.user_categories.iterator():
-            user_category_feeds_tuple: tuple[UserCategory, list[Feed]] | None = (
-                user_category_additions.get(user_category.uuid)
-            )
-            if not user_category_feeds_tuple:
-                user_category_feeds_tuple = (user_category, [])
-                user_category_additions[user_category.uuid] = user_category_feeds_tuple
-            user_category_feeds_tuple[1].append(original_feed)
+            watermark.materialize()
 
-        alternate_feed_urls.append(
-            AlternateFeedURL(feed_url=duplicate_feed.feed_url, feed=original_feed)
-        )
-        remove_feed_uuids.add(duplicate_feed.uuid)
+        for original_feed, duplicate_feed in duplicate_feed_suggestions:
+            for subsciption_mapping in SubscribedFeedUserMapping.objects.filter(
+                feed=duplicate_feed
+            ).iterator():
+                subsciption_mapping.feed = original_feed
+                moving_subscriptions.append(subsciption_mapping)
+
+            for read_mapping in (
+                ReadFeedEntryUserMapping.objects.filter(feed_entry__feed=duplicate_feed)
+                .select_related("feed_entry")
+                .iterator()
+            ):
+                similar_feed_entry = FeedEntry.objects.filter(
+                    feed=original_feed,
+                    title=read_mapping.feed_entry.title,
+                    url=read_mapping.feed_entry.url,
+                    is_archived=False,
+                ).first()
+                if similar_feed_entry:
+                    read_mapping.feed_entry = similar_feed_entry
+                    moving_read_mappings.append(read_mapping)
+
+            for favorite_mapping in (
+                User.favorite_feed_entries.through.objects.filter(
+                    feedentry__feed=duplicate_feed
+                )
+                .select_related("feedentry")
+                .iterator()
+            ):
+                similar_feed_entry = FeedEntry.objects.filter(
+                    feed=original_feed,
+                    title=favorite_mapping.feedentry.title,
+                    url=favorite_mapping.feedentry.url,
+                ).first()
+                if similar_feed_entry:
+                    favorite_mapping.feedentry = similar_feed_entry
+                    moving_favorite_mappings.append(favorite_mapping)
+
+            for user_category in duplicate_feed.user_categories.iterator():
+                user_category_feeds_tuple: tuple[UserCategory, list[Feed]] | None = (
+                    user_category_additions.get(user_category.uuid)
+                )
+                if not user_category_feeds_tuple:
+                    user_category_feeds_tuple = (user_category, [])
+                    user_category_additions[user_category.uuid] = (
+                        user_category_feeds_tuple
+                    )
+                user_category_feeds_tuple[1].append(original_feed)
+
+            alternate_feed_urls.append(
+                AlternateFeedURL(feed_url=duplicate_feed.feed_url, feed=original_feed)
+            )
+            remove_feed_uuids.add(duplicate_feed.uuid)
+            original_feed_uuids.add(original_feed.uuid)
 
-    with transaction.atomic():
         for subsciption_mapping in moving_subscriptions:
             try:
                 with transaction.atomic():
@@ -111,3 +132,13 @@ def convert_duplicate_feeds_to_alternate_feed_urls(
         AlternateFeedURL.objects.bulk_create(alternate_feed_urls)
         Feed.objects.filter(uuid__in=remove_feed_uuids).delete()
         # `DuplicateFeedSuggestion` are deleted via CASCADE
+
+        # the moved subscriptions still have the duplicate feeds' counts, and the
+        # moved read mappings change the ones that were already there
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.filter(feed_id__in=original_feed_uuids)
+        )
+
+        if cache is not None:
+            # every user who had either feed is affected
+            bump_epoch(cache)
@@ -0,0 +1,193 @@
+import hashlib
+import re
+import uuid as uuid_
+from typing import Any, Collection, NamedTuple
+
+import ujson
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponseNotModified
+from rest_framework.request import Request
+
+from api.cache_utils.state_versions import (
+    ALL_FEEDS_CONTENT_VERSION_KEY,
+    EPOCH_VERSION_KEY,
+    UserStateKind,
+    feed_content_version_key,
+    get_versions,
+    user_state_version_key,
+)
+from api.models import User
+from api.searches import search_fns
+from query_utils import search as searchutils
+from query_utils.search.convertto import Bool, UuidList
+
+# Weak ETags (the same objects, not necessarily the same bytes) made from the
+# request and the versions of everything the response depends on, so that an
+# unchanged response can be answered with a 304 from a few cache reads, before
+# any SQL.
+
+_QUERY_ETAGS: bool
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _QUERY_ETAGS
+
+    _QUERY_ETAGS = getattr(settings, "QUERY_ETAGS", True)
+
+
+_load_global_settings()
+
+# these depend on the time as well, which no version covers
+_TIME_DEPENDENT_FIELD_NAMES: dict[str, frozenset[str]] = {
+    "feed": frozenset({"isDead"}),
+}
+_time_dependent_search_regex = re.compile(r"_delta\s*:", re.IGNORECASE)
+
+
+class ContentScope(NamedTuple):
+    # the search fields that narrow the results down to some feeds' content, if
+    # the object has them. With neither in the search, the content of all feeds
+    # is in scope
+    feed_uuids_field_name: str | None = None
+    is_subscribed_field_name: str | None = None
+
+
+def _content_version_keys(
+    user: User, object_name: str, search: str, content_scope: ContentScope
+) -> list[str]:
+    # the narrowest of the scopes that the search is and-ed with
+    feed_uuids: frozenset[uuid_.UUID] | None = None
+    is_subscribed = False
+    for conjunct in searchutils.to_conjuncts(object_name, search, search_fns):
+        if conjunct.exclude:
+            continue
+
+        if conjunct.field_name == content_scope.feed_uuids_field_name:
+            feed_uuids_ = frozenset(UuidList.convertto(conjunct.search_obj))
+            feed_uuids = feed_uuids_ if feed_uuids is None else feed_uuids & feed_uuids_
+        elif conjunct.field_name == content_scope.is_subscribed_field_name:
+            is_subscribed = is_subscribed or Bool.convertto(conjunct.search_obj)
+
+    if feed_uuids is not None:
+        return sorted(feed_content_version_key(u) for u in feed_uuids)
+    elif is_subscribed:
+        return [user_state_version_key(user.uuid, "content")]
+    else:
+        return [ALL_FEEDS_CONTENT_VERSION_KEY]
+
+
+def etags_enabled() -> bool:
+    return _QUERY_ETAGS
+
+
+def generate_state_digest(
+    request: Request,
+    user: User,
+    cache: BaseCache,
+    *,
+    kinds: Collection[UserStateKind],
+    object_name: str | None = None,
+    content_scope: ContentScope | None = None,
+    field_names: Collection[str] = (),
+    parts: Collection[Any] = (),
+) -> str | None:
+    # a digest of the request and of the current versions of everything the
+    # response depends on, or `None` if it also depends on something that no
+    # version covers. The versions are read before the response is made, so a
+    # change that lands in between only ever makes the digest look stale sooner
+    search = str(request.data.get("search", "")).strip() if object_name else ""
+    if object_name is not None:
+        if _time_dependent_search_regex.search(search) or any(
+            field_name in _TIME_DEPENDENT_FIELD_NAMES.get(object_name, ())
+            for field_name in field_names
+        ):
+            return None
+
+    version_keys = [EPOCH_VERSION_KEY]
+    version_keys.extend(user_state_version_key(user.uuid, kind) for kind in kinds)
+    if content_scope is not None:
+        if object_name is not None and search:
+            try:
+                version_keys.extend(
+                    _content_version_keys(user, object_name, search, content_scope)
+                )
+            except (ValueError, AttributeError):
+                return None
+        else:
+            version_keys.append(ALL_FEEDS_CONTENT_VERSION_KEY)
+
+    hash_ = hashlib.blake2b(digest_size=16)
+    hash_.update(
+        ujson.dumps(
+            [
+                request.method,
+                request.path,
+                str(user.uuid),
+                sorted(request.query_params.lists()),
+                request.data if request.method != "GET" else None,
+                get_versions(version_keys, cache),
+                list(parts),
+            ],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    return hash_.hexdigest()
+
+
+def digest_etag(state_digest: str | None) -> str | None:
+    if not _QUERY_ETAGS or state_digest is None:
+        return None
+
+    return f'W/"{state_digest}"'
+
+
+def generate_etag(
+    request: Request,
+    user: User,
+    cache: BaseCache,
+    *,
+    kinds: Collection[UserStateKind],
+    object_name: str | None = None,
+    content_scope: ContentScope | None = None,
+    field_names: Collection[str] = (),
+    parts: Collection[Any] = (),
+) -> str | None:
+    # `None` if there can't be one
+    if not _QUERY_ETAGS:
+        return None
+
+    return digest_etag(
+        generate_state_digest(
+            request,
+            user,
+            cache,
+            kinds=kinds,
+            object_name=object_name,
+            content_scope=content_scope,
+            field_names=field_names,
+            parts=parts,
+        )
+    )
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if (if_none_match := request.headers.get("If-None-Match")) is None:
+        return False
+
+    # compared weakly, as `If-None-Match` always is
+    weak_etag = etag.removeprefix("W/")
+    return any(
+        etag_ == "*" or etag_.removeprefix("W/") == weak_etag
+        for etag_ in (e.strip() for e in if_none_match.split(","))
+    )
+
+
+def not_modified_response(etag: str) -> HttpResponseNotModified:
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    return response
@@ -11,8 +11,8 @@ from django.dispatch import receiver
 from django.http import HttpRequest
 from django.utils import timezone
 
-from api.models import Feed, FeedEntry, ReadFeedEntryUserMapping, User, UserCategory
-from query_utils.fields import FieldConfig
+from api.models import Feed, FeedEntry, User, UserCategory
+from query_utils.fields import FieldConfig, ValuesConfig
 
 _logger = logging.getLogger("rss_temple.fields")
 
@@ -169,23 +169,20 @@ def _feedentry_readAt(
     request: HttpRequest, db_obj: FeedEntry, queryset: Iterable[FeedEntry] | None
 ) -> str | None:
     if queryset is None:
-        try:
-            read_mapping = ReadFeedEntryUserMapping.objects.get(
-                user=cast(User, request.user), feed_entry=db_obj
-            )
-            return read_mapping.read_at.isoformat()
-        except ReadFeedEntryUserMapping.DoesNotExist:
-            return None
+        read_at_dict = FeedEntry.generate_read_at_lookup(
+            cast(User, request.user), (db_obj.uuid,)
+        )
+        return (
+            read_at.isoformat()
+            if (read_at := read_at_dict.get(db_obj.uuid)) is not None
+            else None
+        )
     else:
         read_at_dict: dict[uuid.UUID, datetime.datetime] | None
         if (read_at_dict := getattr(request, "_feedentry_readAt", None)) is None:
-            read_at_dict = {
-                mapping.feed_entry_id: mapping.read_at
-                for mapping in ReadFeedEntryUserMapping.objects.filter(
-                    user=cast(User, request.user),
-                    feed_entry_id__in=(fe.uuid for fe in queryset),
-                )
-            }
+            read_at_dict = FeedEntry.generate_read_at_lookup(
+                cast(User, request.user), [fe.uuid for fe in queryset]
+            )
             setattr(request, "_feedentry_readAt", read_at_dict)
 
         return (
@@ -195,17 +192,31 @@ def _feedentry_readAt(
         )
 
 
+def _isoformat(dt: datetime.datetime) -> str:
+    return dt.isoformat()
+
+
+def _isoformat_or_none(dt: datetime.datetime | None) -> str | None:
+    return dt.isoformat() if dt is not None else None
+
+
+def _calculated_title(custom_title: str | None, title: str) -> str:
+    return custom_title if custom_title is not None else title
+
+
 field_configs: dict[str, dict[str, FieldConfig]] = {
     "usercategory": {
         "uuid": FieldConfig(
             lambda request, db_obj, queryset: str(db_obj.uuid),
             True,
             {"uuid"},
+            ValuesConfig(("uuid",), str),
         ),
         "text": FieldConfig(
             lambda request, db_obj, queryset: db_obj.text,
             True,
             {"text"},
+            ValuesConfig(("text",)),
         ),
         "feedUuids": FieldConfig(
             _usercategory_feedUuids,
@@ -218,26 +229,31 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             lambda request, db_obj, queryset: str(db_obj.uuid),
             True,
             {"uuid"},
+            ValuesConfig(("uuid",), str),
         ),
         "title": FieldConfig(
             lambda request, db_obj, queryset: db_obj.title,
             False,
             {"title"},
+            ValuesConfig(("title",)),
         ),
         "feedUrl": FieldConfig(
             lambda request, db_obj, queryset: db_obj.feed_url,
             False,
             {"feed_url"},
+            ValuesConfig(("feed_url",)),
         ),
         "homeUrl": FieldConfig(
             lambda request, db_obj, queryset: db_obj.home_url,
             False,
             {"home_url"},
+            ValuesConfig(("home_url",)),
         ),
         "publishedAt": FieldConfig(
             lambda request, db_obj, queryset: db_obj.published_at.isoformat(),
             False,
             {"published_at"},
+            ValuesConfig(("published_at",), _isoformat),
         ),
         "updatedAt": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -245,16 +261,19 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"updated_at"},
+            ValuesConfig(("updated_at",), _isoformat_or_none),
         ),
         "isSubscribed": FieldConfig(
             lambda request, db_obj, queryset: db_obj.is_subscribed,
             False,
             frozenset(),
+            ValuesConfig(("is_subscribed",)),
         ),
         "customTitle": FieldConfig(
             lambda request, db_obj, queryset: db_obj.custom_title,
             False,
             frozenset(),
+            ValuesConfig(("custom_title",)),
         ),
         "calculatedTitle": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -262,6 +281,7 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"title"},
+            ValuesConfig(("custom_title", "title"), _calculated_title),
         ),
         "userCategoryUuids": FieldConfig(
             _feed_userCategoryUuids,
@@ -282,11 +302,13 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             lambda request, db_obj, queryset: str(db_obj.uuid),
             True,
             {"uuid"},
+            ValuesConfig(("uuid",), str),
         ),
         "id": FieldConfig(
             lambda request, db_obj, queryset: db_obj.id,
             False,
             {"id"},
+            ValuesConfig(("id",)),
         ),
         "createdAt": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -294,11 +316,13 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"created_at"},
+            ValuesConfig(("created_at",), _isoformat_or_none),
         ),
         "publishedAt": FieldConfig(
             lambda request, db_obj, queryset: db_obj.published_at.isoformat(),
             False,
             {"published_at"},
+            ValuesConfig(("published_at",), _isoformat),
         ),
         "updatedAt": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -306,46 +330,55 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"updated_at"},
+            ValuesConfig(("updated_at",), _isoformat_or_none),
         ),
         "title": FieldConfig(
             lambda request, db_obj, queryset: db_obj.title,
             False,
             {"title"},
+            ValuesConfig(("title",)),
         ),
         "url": FieldConfig(
             lambda request, db_obj, queryset: db_obj.url,
             False,
             {"url"},
+            ValuesConfig(("url",)),
         ),
         "content": FieldConfig(
             lambda request, db_obj, queryset: db_obj.content,
             False,
             {"content"},
+            ValuesConfig(("content",)),
         ),
         "authorName": FieldConfig(
             lambda request, db_obj, queryset: db_obj.author_name,
             False,
             {"author_name"},
+            ValuesConfig(("author_name",)),
         ),
         "feedUuid": FieldConfig(
             lambda request, db_obj, queryset: str(db_obj.feed_id),
             False,
             {"feed_id"},
+            ValuesConfig(("feed_id",), str),
         ),
         "isFromSubscription": FieldConfig(
             lambda request, db_obj, queryset: db_obj.is_from_subscription,
             False,
             frozenset(),
+            ValuesConfig(("is_from_subscription",)),
         ),
         "isRead": FieldConfig(
             lambda request, db_obj, queryset: db_obj.is_read,
             False,
             frozenset(),
+            ValuesConfig(("is_read",)),
         ),
         "isFavorite": FieldConfig(
             lambda request, db_obj, queryset: db_obj.is_favorite,
             False,
             frozenset(),
+            ValuesConfig(("is_favorite",)),
         ),
         "readAt": FieldConfig(
             _feedentry_readAt,
@@ -356,6 +389,7 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             lambda request, db_obj, queryset: db_obj.is_archived,
             False,
             {"is_archived"},
+            ValuesConfig(("is_archived",)),
         ),
         "languageIso639_3": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -363,6 +397,7 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"language"},
+            ValuesConfig(("language__iso639_3",)),
         ),
         "languageIso639_1": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -370,6 +405,7 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"language"},
+            ValuesConfig(("language__iso639_1",)),
         ),
         "languageName": FieldConfig(
             lambda request, db_obj, queryset: (
@@ -377,16 +413,19 @@ field_configs: dict[str, dict[str, FieldConfig]] = {
             ),
             False,
             {"language"},
+            ValuesConfig(("language__name",)),
         ),
         "hasTopImageBeenProcessed": FieldConfig(
             lambda request, db_obj, queryset: db_obj.has_top_image_been_processed,
             False,
             {"has_top_image_been_processed"},
+            ValuesConfig(("has_top_image_been_processed",)),
         ),
         "topImageSrc": FieldConfig(
             lambda request, db_obj, queryset: db_obj.top_image_src,
             False,
             {"top_image_src"},
+            ValuesConfig(("top_image_src",)),
         ),
     },
 }
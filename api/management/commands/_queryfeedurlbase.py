@@ -2,6 +2,7 @@ import traceback
 from typing import Any, Collection
 
 from django.conf import settings
+from django.core.cache import caches
 from django.core.management.base import BaseCommand as BaseCommand_
 from django.db import IntegrityError, transaction
 from django.db.models import Q
@@ -96,7 +97,7 @@ class BaseCommand(BaseCommand_):
 
                     try:
                         with transaction.atomic():
-                            feed_scrape(feed, response_text)
+                            feed_scrape(feed, response_text, caches["default"])
                             feed.save(update_fields=["db_updated_at"])
                     except IntegrityError:
                         self.stderr.write(
@@ -176,3 +176,35 @@ def ignore_missed_top_images(
             options=options,
         )
     )
+
+
+def flush_pending_reads(
+    *args: Any, options: dict[str, Any] | None = None, **kwargs: Any
+):
+    from dramatiq import Message
+
+    options = options or {}
+    broker.enqueue(
+        Message(
+            queue_name="rss_temple",
+            actor_name="flush_pending_reads",
+            args=args,
+            kwargs=kwargs,
+            options=options,
+        )
+    )
+
+
+def fold_read_history(*args: Any, options: dict[str, Any] | None = None, **kwargs: Any):
+    from dramatiq import Message
+
+    options = options or {}
+    broker.enqueue(
+        Message(
+            queue_name="rss_temple",
+            actor_name="fold_read_history",
+            args=args,
+            kwargs=kwargs,
+            options=options,
+        )
+    )
@@ -310,6 +310,44 @@ class _IgnoreMissedTopImagesSerializer(serializers.Serializer):
         return job
 
 
+class _FlushPendingReadsSerializer(serializers.Serializer):
+    intervalSeconds = serializers.IntegerField(source="interval_seconds", default=5)
+    maxAge = serializers.IntegerField(source="max_age", default=(1000 * 4))  # 4 seconds
+
+    def create(self, validated_data: Any) -> Any:
+        scheduler: BaseScheduler = self.context["scheduler"]
+        job = scheduler.add_job(
+            jobs.flush_pending_reads,
+            trigger=IntervalTrigger(seconds=validated_data["interval_seconds"]),
+            id="flush_pending_reads",
+            max_instances=1,
+            replace_existing=True,
+            coalesce=True,
+            kwargs={
+                "options": {
+                    "max_age": validated_data["max_age"],
+                },
+            },
+        )
+        return job
+
+
+class _FoldReadHistorySerializer(serializers.Serializer):
+    crontab = serializers.CharField(default="0 1 * * *")  # every day at 1 AM
+
+    def create(self, validated_data: Any) -> Any:
+        scheduler: BaseScheduler = self.context["scheduler"]
+        job = scheduler.add_job(
+            jobs.fold_read_history,
+            trigger=CronTrigger.from_crontab(validated_data["crontab"]),
+            id="fold_read_history",
+            max_instances=1,
+            replace_existing=True,
+            coalesce=True,
+        )
+        return job
+
+
 class SetupSerializer(serializers.Serializer):
     delete_old_job_executions = _DeleteOldJobExecutionsSerializer()
     archive_feed_entries = _ArchiveFeedEntriesSerializer()
@@ -322,6 +360,8 @@ class SetupSerializer(serializers.Serializer):
     flag_duplicate_feeds = _FlagDuplicateFeedsSerializer()
     purge_duplicate_feed_urls = _PurgeDuplicateFeedUrlsSerializer()
     ignore_missed_top_images = _IgnoreMissedTopImagesSerializer()
+    flush_pending_reads = _FlushPendingReadsSerializer()
+    fold_read_history = _FoldReadHistorySerializer()
 
     def create(self, validated_data: Any) -> Any:
         jobs: list[Any] = []
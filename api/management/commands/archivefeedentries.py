@@ -1,6 +1,7 @@
 from typing import Any
 
 from django.conf import settings
+from django.core.cache import caches
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.db.models.functions import Now
@@ -29,6 +30,7 @@ class Command(BaseCommand):
                     settings.ARCHIVE_TIME_THRESHOLD,
                     settings.ARCHIVE_COUNT_THRESHOLD,
                     settings.ARCHIVE_BACKOFF_SECONDS,
+                    caches["default"],
                 )
 
         self.stderr.write(self.style.NOTICE(f"updated {count} feed archives"))
@@ -1,10 +1,17 @@
 import uuid
 from typing import Any
 
+from django.core.cache import caches
 from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
 from django.db.models import QuerySet
 
-from api.models import ReadFeedEntryUserMapping
+from api.cache_utils.state_versions import bump_epoch
+from api.models import (
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+)
 
 
 class Command(BaseCommand):
@@ -15,11 +22,27 @@ class Command(BaseCommand):
 
     def handle(self, *args: Any, **options: Any) -> None:
         qs: QuerySet[ReadFeedEntryUserMapping]
+        watermark_qs: QuerySet[FeedReadWatermark]
+        subscription_qs: QuerySet[SubscribedFeedUserMapping]
         if options["user_uuid"] is not None:
             qs = ReadFeedEntryUserMapping.objects.filter(user_id=options["user_uuid"])
+            watermark_qs = FeedReadWatermark.objects.filter(
+                user_id=options["user_uuid"]
+            )
+            subscription_qs = SubscribedFeedUserMapping.objects.filter(
+                user_id=options["user_uuid"]
+            )
         else:
             qs = ReadFeedEntryUserMapping.objects.all()
+            watermark_qs = FeedReadWatermark.objects.all()
+            subscription_qs = SubscribedFeedUserMapping.objects.all()
 
-        count, _ = qs.delete()
+        with transaction.atomic():
+            count, _ = qs.delete()
+            watermark_qs.delete()
+
+            SubscribedFeedUserMapping.refresh_stored_counts(subscription_qs)
+
+        bump_epoch(caches["default"])
 
         self.stderr.write(self.style.NOTICE(f"{count} entries deleted"))
@@ -1,6 +1,7 @@
 import datetime
 from typing import Any
 
+from django.core.cache import caches
 from django.core.management.base import BaseCommand, CommandParser
 from django.utils import timezone
 
@@ -64,6 +65,7 @@ class Command(BaseCommand):
                     options["min_image_height"],
                     options["response_max_byte_count"],
                     options["timeout_per_request"],
+                    caches["default"],
                 )
                 self.stderr.write(
                     self.style.NOTICE(f"updated {count}/{total_remaining}")
@@ -2,6 +2,7 @@ import uuid
 from typing import Any, cast
 
 from django.conf import settings
+from django.core.cache import caches
 from django.core.management.base import BaseCommand, CommandError, CommandParser
 from django.db import transaction
 from django.db.models import Q
@@ -53,5 +54,5 @@ class Command(BaseCommand):
             )
 
         with transaction.atomic():
-            feed_scrape(feed, response_text)
+            feed_scrape(feed, response_text, caches["default"])
             feed.save(update_fields=["db_updated_at"])
@@ -0,0 +1,19 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.tasks import fold_read_history
+
+
+class Command(BaseCommand):
+    help = "Fold old read history into the per-feed read watermarks"
+
+    def handle(self, *args: Any, **options: Any) -> None:  # pragma: no cover
+        count = fold_read_history(
+            timezone.now(), settings.READ_HISTORY_FOLD_TIME_THRESHOLD, caches["default"]
+        )
+
+        self.stderr.write(self.style.NOTICE(f"folded {count} read mappings"))
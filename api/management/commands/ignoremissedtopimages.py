@@ -1,6 +1,7 @@
 from typing import Any
 import datetime
 
+from django.core.cache import caches
 from django.core.management.base import BaseCommand, CommandParser
 from django.utils import timezone
 
@@ -19,4 +20,4 @@ class Command(BaseCommand):
         if timezone.is_naive(since):
             since = timezone.make_aware(since)
 
-        ignore_missed_top_images(since)
+        ignore_missed_top_images(since, caches["default"])
@@ -1,7 +1,9 @@
 from typing import Any
 
+from django.core.cache import caches
 from django.core.management.base import BaseCommand, CommandParser
 
+from api.cache_utils.state_versions import bump_epoch
 from api.models import FeedEntry, Language
 from api.text_classifier.lang_detector import detect_iso639_3
 from api.text_classifier.prep_content import prep_for_lang_detection
@@ -41,3 +43,6 @@ class Command(BaseCommand):
                     )
         except KeyboardInterrupt:
             pass
+        finally:
+            if not dry_run:
+                bump_epoch(caches["default"])
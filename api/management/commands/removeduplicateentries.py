@@ -1,10 +1,16 @@
 import pprint
+import uuid
 from typing import Any
 
+from django.core.cache import caches
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.db.models import F
 
-from api.models import FeedEntry
+from api.cache_utils.archived_counts_lookup import delete_archived_counts_lookup_cache
+from api.cache_utils.counts_lookup import delete_total_counts_lookup_cache
+from api.cache_utils.state_versions import bump_epoch
+from api.models import FeedEntry, SubscribedFeedUserMapping
 
 
 class Command(BaseCommand):
@@ -13,6 +19,7 @@ class Command(BaseCommand):
     def handle(self, *args: Any, **options: Any) -> None:
         seen = set()
         to_remove = []
+        affected_feed_uuids: set[uuid.UUID] = set()
         for fe_dict in (
             FeedEntry.objects.order_by(F("updated_at").desc(nulls_last=True))
             .values("uuid", "feed_id", "url")
@@ -21,9 +28,23 @@ class Command(BaseCommand):
             key = (fe_dict["feed_id"], fe_dict["url"])
             if key in seen:
                 to_remove.append(fe_dict["uuid"])
+                affected_feed_uuids.add(fe_dict["feed_id"])
             else:
                 seen.add(key)
 
-        count, model_count = FeedEntry.objects.filter(uuid__in=to_remove).delete()
+        with transaction.atomic():
+            count, model_count = FeedEntry.objects.filter(uuid__in=to_remove).delete()
+
+            SubscribedFeedUserMapping.refresh_stored_counts(
+                SubscribedFeedUserMapping.objects.filter(
+                    feed_id__in=affected_feed_uuids
+                )
+            )
+
+        cache = caches["default"]
+        delete_total_counts_lookup_cache(affected_feed_uuids, cache)
+        delete_archived_counts_lookup_cache(affected_feed_uuids, cache)
+        bump_epoch(cache)
+
         self.stderr.write(f"deleted {count} rows")
         self.stderr.write(pprint.pformat(model_count))
@@ -1,7 +1,9 @@
 from typing import Any, Literal
 
+from django.core.cache import caches
 from django.core.management.base import BaseCommand, CommandError, CommandParser
 
+from api.cache_utils.state_versions import bump_epoch
 from api.content_sanitize import sanitize
 from api.models import FeedEntry
 
@@ -67,6 +69,9 @@ class Command(BaseCommand):
         except KeyboardInterrupt:
             pass
         finally:
+            if not dry_run and update_count > 0:
+                bump_epoch(caches["default"])
+
             if verbosity >= 1:
                 self.stderr.write(
                     self.style.NOTICE(
@@ -2,7 +2,7 @@ from typing import Any
 
 from django.core.management.base import BaseCommand
 
-from api.models import User
+from api.models import FeedEntry, FeedReadWatermark, User
 
 
 class Command(BaseCommand):
@@ -10,5 +10,11 @@ class Command(BaseCommand):
 
     def handle(self, *args: Any, **options: Any) -> None:
         for user in User.objects.all().iterator():
-            user.read_feed_entries_counter = user.read_feed_entries.count()
+            user.read_feed_entries_counter = (
+                user.read_feed_entries.count()
+                + FeedEntry.objects.filter(is_archived=False)
+                .filter(FeedReadWatermark.covers(user))
+                .exclude(uuid__in=user.read_feed_entries.values("uuid"))
+                .count()
+            )
             user.save(update_fields=("read_feed_entries_counter",))
@@ -0,0 +1,70 @@
+# Generated by Django 6.1.2 on 2026-10-19 01:37
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models.functions import Coalesce
+
+
+def forwards_func(apps: StateApps, schema_editor: BaseDatabaseSchemaEditor):
+    SubscribedFeedUserMapping = apps.get_model("api", "SubscribedFeedUserMapping")
+    FeedEntry = apps.get_model("api", "FeedEntry")
+    ReadFeedEntryUserMapping = apps.get_model("api", "ReadFeedEntryUserMapping")
+
+    def _count_subquery(qs):
+        return Coalesce(
+            models.Subquery(
+                qs.order_by()
+                .annotate(c=models.Func(models.F("pk"), function="COUNT"))
+                .values("c")
+            ),
+            0,
+        )
+
+    total_count_expression = _count_subquery(
+        FeedEntry.objects.filter(feed_id=models.OuterRef("feed_id"))
+    )
+    read_count_expression = _count_subquery(
+        FeedEntry.objects.filter(feed_id=models.OuterRef("feed_id"), is_archived=True)
+    ) + _count_subquery(
+        ReadFeedEntryUserMapping.objects.filter(
+            user_id=models.OuterRef("user_id"),
+            feed_entry__feed_id=models.OuterRef("feed_id"),
+        )
+    )
+    SubscribedFeedUserMapping.objects.update(
+        unread_count=total_count_expression - read_count_expression,
+        read_count=read_count_expression,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0041_classifierlabelfeedcalculated_weight_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="subscribedfeedusermapping",
+            name="read_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="subscribedfeedusermapping",
+            name="unread_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="subscribedfeedusermapping",
+            index=models.Index(
+                fields=["user", "-unread_count"], name="api_subscri_user_id_a160f5_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="subscribedfeedusermapping",
+            index=models.Index(
+                fields=["user", "-read_count"], name="api_subscri_user_id_969c06_idx"
+            ),
+        ),
+        migrations.RunPython(forwards_func, migrations.RunPython.noop),
+    ]
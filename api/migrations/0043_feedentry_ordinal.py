@@ -0,0 +1,100 @@
+# Generated by Django 6.1.2 on 2026-10-19 01:42
+
+from django.db import migrations, models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def _forward_func_feed_entry_ordinal(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as c:
+        if vendor == "postgresql":  # pragma: no cover
+            c.execute(
+                """
+                CREATE SEQUENCE api_feedentry_ordinal_seq"""
+            )
+            c.execute(
+                """
+                UPDATE api_feedentry fe SET ordinal = o.n FROM (
+                    SELECT uuid, row_number() OVER (ORDER BY db_created_at, uuid) AS n FROM api_feedentry
+                ) o WHERE fe.uuid = o.uuid"""
+            )
+            c.execute(
+                """
+                SELECT setval('api_feedentry_ordinal_seq', COALESCE(MAX(ordinal), 0) + 1, false) FROM api_feedentry"""
+            )
+            c.execute(
+                """
+                CREATE FUNCTION api_feedentry_ordinal_fn() RETURNS trigger AS $$
+                BEGIN
+                    IF NEW.ordinal IS NULL THEN
+                        NEW.ordinal := nextval('api_feedentry_ordinal_seq');
+                    END IF;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql"""
+            )
+            c.execute(
+                """
+                CREATE TRIGGER api_feedentry_ordinal_trg BEFORE INSERT ON api_feedentry
+                FOR EACH ROW EXECUTE FUNCTION api_feedentry_ordinal_fn()"""
+            )
+        elif vendor == "sqlite":
+            c.execute(
+                """
+                UPDATE api_feedentry SET ordinal = rowid"""
+            )
+            c.execute(
+                """
+                CREATE TRIGGER api_feedentry_ordinal_trg AFTER INSERT ON api_feedentry
+                FOR EACH ROW WHEN NEW.ordinal IS NULL BEGIN
+                    UPDATE api_feedentry SET ordinal = NEW.rowid WHERE rowid = NEW.rowid;
+                END"""
+            )
+        else:  # pragma: no cover
+            raise RuntimeError(f"unsupported database vendor: {vendor}")
+
+
+def _reverse_func_feed_entry_ordinal(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as c:
+        if vendor == "postgresql":  # pragma: no cover
+            c.execute(
+                """
+                DROP TRIGGER IF EXISTS api_feedentry_ordinal_trg ON api_feedentry"""
+            )
+            c.execute(
+                """
+                DROP FUNCTION IF EXISTS api_feedentry_ordinal_fn()"""
+            )
+            c.execute(
+                """
+                DROP SEQUENCE IF EXISTS api_feedentry_ordinal_seq"""
+            )
+        elif vendor == "sqlite":
+            c.execute(
+                """
+                DROP TRIGGER IF EXISTS api_feedentry_ordinal_trg"""
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0042_subscribedfeedusermapping_stored_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feedentry",
+            name="ordinal",
+            field=models.BigIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.RunPython(
+            _forward_func_feed_entry_ordinal,
+            _reverse_func_feed_entry_ordinal,
+        ),
+    ]
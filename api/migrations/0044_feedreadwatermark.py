@@ -0,0 +1,52 @@
+# Generated by Django 6.1.2 on 2026-10-19 01:49
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid_extensions.uuid7
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0043_feedentry_ordinal"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedReadWatermark",
+            fields=[
+                (
+                    "uuid",
+                    models.UUIDField(
+                        default=uuid_extensions.uuid7,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("ordinal", models.BigIntegerField()),
+                ("read_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "feed",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.feed"
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "feed"),
+                        name="feedreadwatermark__unique__user__feed",
+                    )
+                ],
+            },
+        ),
+    ]
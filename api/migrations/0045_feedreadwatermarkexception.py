@@ -0,0 +1,46 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:22
+
+import django.db.models.deletion
+import uuid_extensions.uuid7
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0044_feedreadwatermark"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedReadWatermarkException",
+            fields=[
+                (
+                    "uuid",
+                    models.UUIDField(
+                        default=uuid_extensions.uuid7, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "feed_entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="api.feedentry"
+                    ),
+                ),
+                (
+                    "watermark",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="api.feedreadwatermark",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("watermark", "feed_entry"),
+                        name="feedreadwatermarkexception__unique__watermark__feed_entry",
+                    )
+                ],
+            },
+        ),
+    ]
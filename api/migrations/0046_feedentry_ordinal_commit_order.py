@@ -0,0 +1,62 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:41
+
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def _forward_func_feed_entry_ordinal_commit_order(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+):
+    # An ordinal is drawn when the row is inserted, not when it commits. A read
+    # watermark is the highest *committed* ordinal of its feed, so an entry still
+    # in flight with a lower ordinal would be under it, and read, once it commits.
+    # Holding a per-feed lock until commit means that a feed's entries commit in
+    # ordinal order. SQLite only has the one writer at a time, so it already does
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as c:
+        if vendor == "postgresql":  # pragma: no cover
+            c.execute(
+                """
+                CREATE OR REPLACE FUNCTION api_feedentry_ordinal_fn() RETURNS trigger AS $$
+                BEGIN
+                    IF NEW.ordinal IS NULL THEN
+                        PERFORM pg_advisory_xact_lock(hashtextextended('api_feedentry_ordinal_' || NEW.feed_id::text, 0));
+                        NEW.ordinal := nextval('api_feedentry_ordinal_seq');
+                    END IF;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql"""
+            )
+
+
+def _reverse_func_feed_entry_ordinal_commit_order(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as c:
+        if vendor == "postgresql":  # pragma: no cover
+            c.execute(
+                """
+                CREATE OR REPLACE FUNCTION api_feedentry_ordinal_fn() RETURNS trigger AS $$
+                BEGIN
+                    IF NEW.ordinal IS NULL THEN
+                        NEW.ordinal := nextval('api_feedentry_ordinal_seq');
+                    END IF;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql"""
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0045_feedreadwatermarkexception"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _forward_func_feed_entry_ordinal_commit_order,
+            _reverse_func_feed_entry_ordinal_commit_order,
+        ),
+    ]
@@ -1,8 +1,9 @@
+import datetime
 import random
 import uuid as uuid_
-from collections import defaultdict
+from collections import Counter, defaultdict
 from functools import cached_property
-from typing import TYPE_CHECKING, Collection, NamedTuple, Sequence
+from typing import TYPE_CHECKING, Any, Collection, Mapping, NamedTuple, Sequence
 
 # TODO replace with regular `uuid` module when finalized in Python
 import uuid_extensions
@@ -11,10 +12,13 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.core.validators import MinValueValidator
 from django.db import connection, models
+from django.db.models.functions import Coalesce
 from django.utils import timezone, tree
 from rest_framework.authtoken.models import Token as _Token
 
 from api.captcha import ALPHABET as CAPTCHA_ALPHABET
+from api.django_extensions import bulk_create_iter
+from api.user_data_strategy import choose_user_data_strategy
 
 if TYPE_CHECKING:  # pragma: no cover
     from django.db.models.fields.related_descriptors import RelatedManager
@@ -322,10 +326,14 @@ class Feed(models.Model):
         qs: models.QuerySet["Feed"],
         user: User,
         subscription_datas: Sequence["SubscriptionData"] | None = None,
+        page_size: int | None = None,
     ) -> models.QuerySet["Feed"]:
         custom_title_expression: models.expressions.BaseExpression | tree.Node
         is_subscribed_expression: models.expressions.BaseExpression | tree.Node
-        if subscription_datas is not None:
+        strategy = choose_user_data_strategy(
+            None if subscription_datas is None else len(subscription_datas), page_size
+        )
+        if strategy == "literal" and subscription_datas is not None:
             is_subscribed_expression = (
                 models.Q(uuid__in=[sd["uuid"] for sd in subscription_datas])
                 if subscription_datas
@@ -347,7 +355,7 @@ class Feed(models.Model):
                     models.Value(None), output_field=models.CharField(null=True)
                 )
             )
-        else:
+        elif strategy == "exists":
             subscribed_user_feed_mappings = SubscribedFeedUserMapping.objects.filter(
                 user=user, feed_id=models.OuterRef("uuid")
             )
@@ -355,12 +363,42 @@ class Feed(models.Model):
                 subscribed_user_feed_mappings.values("custom_feed_title")
             )
             is_subscribed_expression = models.Exists(subscribed_user_feed_mappings)
+        else:
+            # the (user, feed) unique constraint means the join never fans out
+            qs = qs.alias(
+                user_subscription_mapping=models.FilteredRelation(
+                    "subscribedfeedusermapping",
+                    condition=models.Q(subscribedfeedusermapping__user=user),
+                )
+            )
+            custom_title_expression = models.F(
+                "user_subscription_mapping__custom_feed_title"
+            )
+            is_subscribed_expression = models.Q(user_subscription_mapping__isnull=False)
 
         return qs.annotate(
             custom_title=custom_title_expression,
             is_subscribed=is_subscribed_expression,
         )
 
+    @staticmethod
+    def alias_stored_counts(
+        qs: models.QuerySet["Feed"], user: User
+    ) -> models.QuerySet["Feed"]:
+        # aliased rather than annotated, so the subqueries are only emitted when a
+        # sort or search references them. `None` for feeds the user isn't subscribed to
+        subscribed_user_feed_mappings = SubscribedFeedUserMapping.objects.filter(
+            user=user, feed_id=models.OuterRef("uuid")
+        )
+        return qs.alias(
+            stored_unread_count=models.Subquery(
+                subscribed_user_feed_mappings.values("unread_count")
+            ),
+            stored_read_count=models.Subquery(
+                subscribed_user_feed_mappings.values("read_count")
+            ),
+        )
+
     def with_subscription_data(self) -> None:
         self.custom_title = None
         self.is_subscribed = False
@@ -369,11 +407,97 @@ class Feed(models.Model):
         unread_count: int
         read_count: int
 
+    @staticmethod
+    def compose_counts_descriptor(
+        total_count: int, archived_count: int, read_count: int
+    ) -> _CountsDescriptor:
+        # archiving deletes the read mappings of the archived entries, so the
+        # user's read count never overlaps with the archived count
+        read_count += archived_count
+        return Feed._CountsDescriptor(total_count - read_count, read_count)
+
     @staticmethod
     def generate_counts_lookup(
         user: User, feed_uuids: Collection[uuid_.UUID]
     ) -> dict[uuid_.UUID, _CountsDescriptor]:
-        return Feed.generate_counts_lookup__fast(user, feed_uuids)
+        feed_uuids = frozenset(feed_uuids)
+
+        total_counts_lookup = Feed.generate_total_counts_lookup(feed_uuids)
+        archived_counts_lookup = Feed.generate_archived_counts_lookup(feed_uuids)
+        read_counts_lookup = Feed.generate_read_counts_lookup(user, feed_uuids)
+
+        return {
+            feed_uuid: Feed.compose_counts_descriptor(
+                total_counts_lookup[feed_uuid],
+                archived_counts_lookup[feed_uuid],
+                read_counts_lookup[feed_uuid],
+            )
+            for feed_uuid in feed_uuids
+        }
+
+    @staticmethod
+    def generate_total_counts_lookup(
+        feed_uuids: Collection[uuid_.UUID],
+    ) -> dict[uuid_.UUID, int]:
+        feed_uuids = frozenset(feed_uuids)
+
+        total_counts_lookup: dict[uuid_.UUID, int] = {
+            f_uuid: 0 for f_uuid in feed_uuids
+        }
+        total_counts_lookup.update(
+            FeedEntry.objects.filter(feed_id__in=feed_uuids)
+            .values("feed_id")
+            .annotate(total_count=models.Count("uuid"))
+            .order_by()
+            .values_list("feed_id", "total_count")
+        )
+
+        return total_counts_lookup
+
+    @staticmethod
+    def generate_read_counts_lookup(
+        user: User, feed_uuids: Collection[uuid_.UUID]
+    ) -> dict[uuid_.UUID, int]:
+        feed_uuids = frozenset(feed_uuids)
+
+        watermarked_feed_uuids = frozenset(
+            FeedReadWatermark.objects.filter(
+                user=user, feed_id__in=feed_uuids
+            ).values_list("feed_id", flat=True)
+        )
+
+        read_counts_lookup: dict[uuid_.UUID, int] = {f_uuid: 0 for f_uuid in feed_uuids}
+        read_counts_lookup.update(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=user, feed_entry__feed_id__in=(feed_uuids - watermarked_feed_uuids)
+            )
+            .values("feed_entry__feed_id")
+            .annotate(read_count=models.Count("uuid"))
+            .order_by()
+            .values_list("feed_entry__feed_id", "read_count")
+        )
+        if watermarked_feed_uuids:
+            read_counts_lookup.update(
+                FeedEntry.objects.filter(
+                    feed_id__in=watermarked_feed_uuids, is_archived=False
+                )
+                .filter(
+                    models.Q(FeedReadWatermark.covers(user))
+                    | models.Q(
+                        models.Exists(
+                            ReadFeedEntryUserMapping.objects.filter(
+                                user=user, feed_entry_id=models.OuterRef("uuid")
+                            )
+                        )
+                    )
+                )
+                .values("feed_id")
+                .annotate(read_count=models.Count("uuid"))
+                .order_by()
+                .values_list("feed_id", "read_count")
+            )
+
+        return read_counts_lookup
 
     @staticmethod
     def generate_counts_lookup__fast(
@@ -385,12 +509,16 @@ class Feed(models.Model):
         for feed_uuid in feed_uuids:
             total_count = FeedEntry.objects.filter(feed_id=feed_uuid).count()
             read_count = (
-                FeedEntry.objects.filter(
-                    uuid__in=ReadFeedEntryUserMapping.objects.filter(user=user).values(
-                        "feed_entry_id"
-                    ),
-                    feed_id=feed_uuid,
-                ).count()
+                FeedEntry.objects.filter(feed_id=feed_uuid, is_archived=False)
+                .filter(
+                    models.Q(
+                        uuid__in=ReadFeedEntryUserMapping.objects.filter(
+                            user=user
+                        ).values("feed_entry_id")
+                    )
+                    | models.Q(FeedReadWatermark.covers(user))
+                )
+                .count()
                 + FeedEntry.objects.filter(feed_id=feed_uuid, is_archived=True).count()
             )
 
@@ -424,6 +552,7 @@ class Feed(models.Model):
                                 feed_entry__feed_id__in=feed_uuids,
                             ).values("feed_entry_id")
                         )
+                        & ~models.Q(FeedReadWatermark.covers(user, "feed_entries__"))
                     ),
                 ),
             )
@@ -432,6 +561,43 @@ class Feed(models.Model):
 
         return counts_lookup
 
+    @staticmethod
+    def generate_counts_lookup__grouped(
+        user: User, feed_uuids: Collection[uuid_.UUID]
+    ) -> dict[uuid_.UUID, _CountsDescriptor]:
+        feed_uuids = frozenset(feed_uuids)
+
+        # a single `GROUP BY feed_id` pass over the `(feed_id, is_archived)` index,
+        # rather than 3 `COUNT(*)`s per feed
+        counts_lookup: dict[uuid_.UUID, Feed._CountsDescriptor] = {
+            f_uuid: Feed._CountsDescriptor(0, 0) for f_uuid in feed_uuids
+        }
+        for r in (
+            FeedEntry.objects.filter(feed_id__in=feed_uuids)
+            .values("feed_id")
+            .annotate(
+                total_count=models.Count("uuid"),
+                read_count=models.Count(
+                    "uuid",
+                    filter=models.Q(is_archived=True)
+                    | models.Q(
+                        models.Exists(
+                            ReadFeedEntryUserMapping.objects.filter(
+                                user=user, feed_entry_id=models.OuterRef("uuid")
+                            )
+                        )
+                    )
+                    | models.Q(FeedReadWatermark.covers(user)),
+                ),
+            )
+            .order_by()
+        ):
+            counts_lookup[r["feed_id"]] = Feed._CountsDescriptor(
+                r["total_count"] - r["read_count"], r["read_count"]
+            )
+
+        return counts_lookup
+
     def _counts(self, user: User) -> _CountsDescriptor:
         counts = getattr(self, "_counts_", None)
         if counts is None:
@@ -532,11 +698,98 @@ class SubscribedFeedUserMapping(models.Model):
                 name="subscribedfeedusermapping__unique__user__custom_feed_title",
             ),
         )
+        indexes = (
+            # back the `unreadCount`/`readCount` sorts and searches
+            models.Index(fields=("user", "-unread_count")),
+            models.Index(fields=("user", "-read_count")),
+        )
 
     uuid = models.UUIDField(primary_key=True, default=uuid_extensions.uuid7)
     feed = models.ForeignKey(Feed, on_delete=models.CASCADE)
     custom_feed_title = models.CharField(max_length=1024, null=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # denormalized copies of `Feed.unread_count()`/`Feed.read_count()`, kept in
+    # step by the read/unread views, the scraper and the archiver
+    unread_count = models.IntegerField(default=0)
+    read_count = models.IntegerField(default=0)
+
+    @staticmethod
+    def refresh_stored_counts(qs: models.QuerySet["SubscribedFeedUserMapping"]) -> int:
+        total_count_subquery = (
+            FeedEntry.objects.filter(feed_id=models.OuterRef("feed_id"))
+            .order_by()
+            .values("feed_id")
+            .annotate(c=models.Count("uuid"))
+            .values("c")
+        )
+        read_count_expression = Coalesce(
+            models.Subquery(
+                FeedEntry.objects.filter(
+                    feed_id=models.OuterRef("feed_id"), is_archived=True
+                )
+                .order_by()
+                .values("feed_id")
+                .annotate(c=models.Count("uuid"))
+                .values("c")
+            ),
+            0,
+        ) + Coalesce(
+            models.Subquery(
+                FeedEntry.objects.filter(
+                    feed_id=models.OuterRef("feed_id"), is_archived=False
+                )
+                .filter(
+                    models.Q(
+                        models.Exists(
+                            ReadFeedEntryUserMapping.objects.filter(
+                                user_id=models.OuterRef(models.OuterRef("user_id")),
+                                feed_entry_id=models.OuterRef("uuid"),
+                            )
+                        )
+                    )
+                    | models.Q(
+                        FeedReadWatermark.covers(
+                            models.OuterRef(models.OuterRef("user_id"))
+                        )
+                    )
+                )
+                .order_by()
+                .values("feed_id")
+                .annotate(c=models.Count("uuid"))
+                .values("c")
+            ),
+            0,
+        )
+        return qs.update(
+            unread_count=Coalesce(models.Subquery(total_count_subquery), 0)
+            - read_count_expression,
+            read_count=read_count_expression,
+        )
+
+    @staticmethod
+    def increment_stored_read_counts(
+        user: User, read_increments: dict[uuid_.UUID, int]
+    ) -> None:
+        read_increments = {
+            feed_uuid: incr for feed_uuid, incr in read_increments.items() if incr
+        }
+        if not read_increments:
+            return
+
+        incr_expression = models.Case(
+            *(
+                models.When(feed_id=feed_uuid, then=models.Value(incr))
+                for feed_uuid, incr in read_increments.items()
+            ),
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
+        SubscribedFeedUserMapping.objects.filter(
+            user=user, feed_id__in=read_increments.keys()
+        ).update(
+            unread_count=models.F("unread_count") - incr_expression,
+            read_count=models.F("read_count") + incr_expression,
+        )
 
 
 class FeedEntry(models.Model):
@@ -610,6 +863,9 @@ class FeedEntry(models.Model):
     language = models.ForeignKey(
         Language, related_name="feed_entries", null=True, on_delete=models.SET_NULL
     )
+    # dense integer handle for the per-user read/favorite bitmaps. Assigned by the
+    # database on insert (see migration 0043), so it's `None` on freshly-created instances
+    ordinal = models.BigIntegerField(null=True, unique=True, editable=False)
     has_top_image_been_processed = models.BooleanField(default=False)
     top_image_src = models.URLField(max_length=2048, default="")
     top_image_processing_attempt_count = models.PositiveIntegerField(default=0)
@@ -660,49 +916,147 @@ class FeedEntry(models.Model):
         qs: models.QuerySet["FeedEntry"],
         user: User,
         subscription_datas: Sequence["SubscriptionData"] | None = None,
-        read_feed_entry_uuids: Sequence[uuid_.UUID] | None = None,
-        favorite_feed_entry_uuids: Sequence[uuid_.UUID] | None = None,
+        read_feed_entry_ordinals: Collection[int] | None = None,
+        favorite_feed_entry_ordinals: Collection[int] | None = None,
+        page_size: int | None = None,
+        pending_read_states: Mapping[int, bool] | None = None,
     ) -> models.QuerySet["FeedEntry"]:
-        is_from_subscription_expression = (
-            (
+        is_from_subscription_expression: models.expressions.BaseExpression | tree.Node
+        subscription_strategy = choose_user_data_strategy(
+            None if subscription_datas is None else len(subscription_datas), page_size
+        )
+        if subscription_strategy == "literal" and subscription_datas is not None:
+            is_from_subscription_expression = (
                 models.Q(feed_id__in=[sd["uuid"] for sd in subscription_datas])
                 if subscription_datas
                 else models.Value(False)
             )
-            if subscription_datas is not None
-            else models.Exists(
+        elif subscription_strategy == "exists":
+            is_from_subscription_expression = models.Exists(
                 SubscribedFeedUserMapping.objects.filter(
                     user=user, feed_id=models.OuterRef("feed_id")
                 )
             )
+        else:
+            qs = qs.alias(
+                user_subscription_mapping=models.FilteredRelation(
+                    "feed__subscribedfeedusermapping",
+                    condition=models.Q(feed__subscribedfeedusermapping__user=user),
+                )
+            )
+            is_from_subscription_expression = models.Q(
+                user_subscription_mapping__isnull=False
+            )
+
+        is_read_expression: models.expressions.BaseExpression | tree.Node
+        read_strategy = choose_user_data_strategy(
+            None if read_feed_entry_ordinals is None else len(read_feed_entry_ordinals),
+            page_size,
         )
-        is_read_expression = (
-            (
-                (models.Q(is_archived=True) | models.Q(uuid__in=read_feed_entry_uuids))
-                if read_feed_entry_uuids
+        if read_strategy == "literal" and read_feed_entry_ordinals is not None:
+            is_read_expression = (
+                (
+                    models.Q(is_archived=True)
+                    | models.Q(ordinal__in=list(read_feed_entry_ordinals))
+                    | models.Q(FeedReadWatermark.covers(user))
+                )
+                if read_feed_entry_ordinals
                 else models.Q(is_archived=True)
+                | models.Q(FeedReadWatermark.covers(user))
             )
-            if read_feed_entry_uuids is not None
-            else models.Q(is_archived=True)
-            | models.Exists(
-                ReadFeedEntryUserMapping.objects.filter(
-                    user=user, feed_entry_id=models.OuterRef("uuid")
+        elif read_strategy == "exists":
+            is_read_expression = (
+                models.Q(is_archived=True)
+                | models.Q(
+                    models.Exists(
+                        ReadFeedEntryUserMapping.objects.filter(
+                            user=user, feed_entry_id=models.OuterRef("uuid")
+                        )
+                    )
                 )
+                | models.Q(FeedReadWatermark.covers(user))
+            )
+        else:
+            qs = qs.alias(
+                user_read_mapping=models.FilteredRelation(
+                    "readfeedentryusermapping",
+                    condition=models.Q(readfeedentryusermapping__user=user),
+                ),
+                user_read_watermark=models.FilteredRelation(
+                    "feed__feedreadwatermark",
+                    condition=models.Q(feed__feedreadwatermark__user=user),
+                ),
+            ).alias(
+                # ordinals start at 1, and a NULL comparison would NULL the whole OR
+                user_read_watermark_ordinal=Coalesce("user_read_watermark__ordinal", 0),
             )
+            is_read_expression = (
+                models.Q(is_archived=True)
+                | models.Q(user_read_mapping__isnull=False)
+                | (
+                    models.Q(user_read_watermark_ordinal__gte=models.F("ordinal"))
+                    & ~models.Q(
+                        models.Exists(
+                            FeedReadWatermarkException.objects.filter(
+                                watermark_id=models.OuterRef(
+                                    "user_read_watermark__uuid"
+                                ),
+                                feed_entry_id=models.OuterRef("uuid"),
+                            )
+                        )
+                    )
+                )
+            )
+
+        if pending_read_states:
+            # read/unread changes which are queued, but not yet written
+            is_read_expression = models.Case(
+                models.When(
+                    models.Q(is_archived=False)
+                    & models.Q(
+                        ordinal__in=[
+                            ordinal
+                            for ordinal, is_read in pending_read_states.items()
+                            if not is_read
+                        ]
+                    ),
+                    then=models.Value(False),
+                ),
+                models.When(
+                    ordinal__in=[
+                        ordinal
+                        for ordinal, is_read in pending_read_states.items()
+                        if is_read
+                    ],
+                    then=models.Value(True),
+                ),
+                default=models.ExpressionWrapper(
+                    is_read_expression, output_field=models.BooleanField()
+                ),
+                output_field=models.BooleanField(),
+            )
+
+        is_favorite_expression: models.expressions.BaseExpression | tree.Node
+        favorite_strategy = choose_user_data_strategy(
+            None
+            if favorite_feed_entry_ordinals is None
+            else len(favorite_feed_entry_ordinals),
+            page_size,
         )
-        is_favorite_expression = (
-            (
-                models.Q(uuid__in=favorite_feed_entry_uuids)
-                if favorite_feed_entry_uuids
+        if favorite_strategy == "literal" and favorite_feed_entry_ordinals is not None:
+            is_favorite_expression = (
+                models.Q(ordinal__in=list(favorite_feed_entry_ordinals))
+                if favorite_feed_entry_ordinals
                 else models.Value(False)
             )
-            if favorite_feed_entry_uuids is not None
-            else models.Exists(
+        else:
+            # the auto-created favorites through table can't be the target of a
+            # `FilteredRelation`, so "join" also falls back to `EXISTS` here
+            is_favorite_expression = models.Exists(
                 User.favorite_feed_entries.through.objects.filter(
                     user=user, feedentry_id=models.OuterRef("uuid")
                 )
             )
-        )
 
         return qs.annotate(
             is_from_subscription=is_from_subscription_expression,
@@ -710,6 +1064,27 @@ class FeedEntry(models.Model):
             is_favorite=is_favorite_expression,
         )
 
+    @staticmethod
+    def generate_read_at_lookup(
+        user: User, feed_entry_uuids: Collection[uuid_.UUID]
+    ) -> dict[uuid_.UUID, datetime.datetime]:
+        read_at_lookup: dict[uuid_.UUID, datetime.datetime] = dict(
+            FeedEntry.objects.filter(uuid__in=feed_entry_uuids)
+            .annotate(
+                watermark_read_at=models.Subquery(
+                    FeedReadWatermark.covering(user).values("read_at")
+                )
+            )
+            .filter(watermark_read_at__isnull=False)
+            .values_list("uuid", "watermark_read_at")
+        )
+        read_at_lookup.update(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=user, feed_entry_id__in=feed_entry_uuids
+            ).values_list("feed_entry_id", "read_at")
+        )
+        return read_at_lookup
+
     def with_user_data(self):
         self.is_from_subscription = False
         self.is_read = False
@@ -733,6 +1108,261 @@ class ReadFeedEntryUserMapping(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     read_at = models.DateTimeField(default=timezone.now)
 
+    @staticmethod
+    def insert_from_query(
+        user: User, feed_entries: models.QuerySet[FeedEntry], read_at: datetime.datetime
+    ) -> int:
+        # a single `INSERT ... SELECT`, so that the matching entries never leave
+        # the DB. Entries which are already read are skipped by the conflict clause
+        select_sql, select_params = (
+            feed_entries.values("uuid")
+            .query.get_compiler(connection=connection)
+            .as_sql()
+        )
+
+        uuid_sql: str
+        user_param: Any
+        if connection.vendor == "postgresql":  # pragma: no cover
+            uuid_sql = "gen_random_uuid()"
+            user_param = user.uuid
+        elif connection.vendor == "sqlite":
+            uuid_sql = "lower(hex(randomblob(16)))"
+            user_param = user.uuid.hex
+        else:  # pragma: no cover
+            raise RuntimeError(f"unsupported database vendor: {connection.vendor}")
+
+        read_at_field = ReadFeedEntryUserMapping._meta.get_field("read_at")
+        with connection.cursor() as c:
+            # `WHERE TRUE` keeps SQLite from parsing `ON CONFLICT` as a join constraint
+            c.execute(
+                f"""
+                INSERT INTO {ReadFeedEntryUserMapping._meta.db_table}
+                    ("uuid", "feed_entry_id", "user_id", "read_at")
+                SELECT {uuid_sql}, t."uuid", %s, %s FROM ({select_sql}) AS t WHERE TRUE
+                ON CONFLICT DO NOTHING""",
+                (
+                    user_param,
+                    read_at_field.get_db_prep_value(read_at, connection),
+                    *select_params,
+                ),
+            )
+            return c.rowcount
+
+
+class FeedReadWatermark(models.Model):
+    """
+    "Everything in `feed` up to (and including) `ordinal` has been read by `user`".
+
+    Lets "mark all as read" write one row per feed, rather than one
+    `ReadFeedEntryUserMapping` per entry. Those mappings are then only the
+    exceptions above the watermark, and `FeedReadWatermarkException`s the ones
+    under it.
+    """
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("user", "feed"),
+                name="feedreadwatermark__unique__user__feed",
+            ),
+        )
+
+    uuid = models.UUIDField(primary_key=True, default=uuid_extensions.uuid7)
+    feed = models.ForeignKey(Feed, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    ordinal = models.BigIntegerField()
+    read_at = models.DateTimeField(default=timezone.now)
+
+    @staticmethod
+    def covering(
+        user: User | models.OuterRef, outer_ref_prefix: str = ""
+    ) -> models.QuerySet["FeedReadWatermark"]:
+        return FeedReadWatermark.objects.filter(
+            user=user,
+            feed_id=models.OuterRef(f"{outer_ref_prefix}feed_id"),
+            ordinal__gte=models.OuterRef(f"{outer_ref_prefix}ordinal"),
+        ).exclude(
+            models.Exists(
+                FeedReadWatermarkException.objects.filter(
+                    watermark_id=models.OuterRef("uuid"),
+                    feed_entry_id=models.OuterRef(
+                        models.OuterRef(f"{outer_ref_prefix}uuid")
+                    ),
+                )
+            )
+        )
+
+    @staticmethod
+    def covers(
+        user: User | models.OuterRef, outer_ref_prefix: str = ""
+    ) -> models.Exists:
+        return models.Exists(FeedReadWatermark.covering(user, outer_ref_prefix))
+
+    @staticmethod
+    def mark_feeds_read(
+        user: User, feed_uuids: Collection[uuid_.UUID]
+    ) -> dict[uuid_.UUID, int]:
+        read_increments: dict[uuid_.UUID, int] = {}
+
+        now = timezone.now()
+        # only the committed entries are seen, but each feed's entries commit in
+        # ordinal order (see `0046_feedentry_ordinal_commit_order`), so none still
+        # in flight can end up under the watermark
+        max_ordinals: dict[uuid_.UUID, int] = dict(
+            FeedEntry.objects.filter(feed_id__in=feed_uuids, ordinal__isnull=False)
+            .values("feed_id")
+            .annotate(max_ordinal=models.Max("ordinal"))
+            .order_by()
+            .values_list("feed_id", "max_ordinal")
+        )
+        existing_watermarks: dict[uuid_.UUID, FeedReadWatermark] = {
+            w.feed_id: w
+            for w in FeedReadWatermark.objects.filter(
+                user=user, feed_id__in=max_ordinals.keys()
+            ).annotate(
+                has_exceptions=models.Exists(
+                    FeedReadWatermarkException.objects.filter(
+                        watermark_id=models.OuterRef("uuid")
+                    )
+                )
+            )
+        }
+
+        new_watermarks: list[FeedReadWatermark] = []
+        for feed_uuid, max_ordinal in max_ordinals.items():
+            watermark = existing_watermarks.get(feed_uuid)
+            if (
+                watermark is not None
+                and watermark.ordinal >= max_ordinal
+                and not getattr(watermark, "has_exceptions")
+            ):
+                continue
+
+            newly_read_feed_entries = FeedEntry.objects.filter(
+                feed_id=feed_uuid, is_archived=False, ordinal__lte=max_ordinal
+            )
+            if watermark is not None:
+                # above it, or excepted from it
+                newly_read_feed_entries = newly_read_feed_entries.filter(
+                    models.Q(ordinal__gt=watermark.ordinal)
+                    | models.Q(
+                        uuid__in=FeedReadWatermarkException.objects.filter(
+                            watermark=watermark
+                        ).values("feed_entry_id")
+                    )
+                )
+            read_increments[feed_uuid] = newly_read_feed_entries.exclude(
+                uuid__in=ReadFeedEntryUserMapping.objects.filter(user=user).values(
+                    "feed_entry_id"
+                )
+            ).count()
+
+            # the watermark now stands in for these
+            ReadFeedEntryUserMapping.objects.filter(
+                user=user,
+                feed_entry__feed_id=feed_uuid,
+                feed_entry__ordinal__lte=max_ordinal,
+            ).delete()
+            if watermark is not None:
+                FeedReadWatermarkException.objects.filter(watermark=watermark).delete()
+
+            if watermark is None:
+                new_watermarks.append(
+                    FeedReadWatermark(
+                        user=user, feed_id=feed_uuid, ordinal=max_ordinal, read_at=now
+                    )
+                )
+            else:
+                watermark.ordinal = max_ordinal
+                watermark.read_at = now
+                watermark.save(update_fields=("ordinal", "read_at"))
+
+        FeedReadWatermark.objects.bulk_create(new_watermarks)
+
+        return read_increments
+
+    @staticmethod
+    def except_covered(
+        user: User, feed_entry_uuids: Collection[uuid_.UUID]
+    ) -> dict[uuid_.UUID, int]:
+        # entries under a watermark are marked unread by an exception to it each,
+        # rather than by spelling the whole watermark out as mappings
+        read_decrements: Counter[uuid_.UUID] = Counter()
+        exceptions: list[FeedReadWatermarkException] = []
+        for feed_entry_uuid, feed_uuid, watermark_uuid in (
+            FeedEntry.objects.filter(uuid__in=feed_entry_uuids, is_archived=False)
+            .annotate(
+                watermark_uuid=models.Subquery(
+                    FeedReadWatermark.covering(user).values("uuid")[:1]
+                )
+            )
+            .filter(watermark_uuid__isnull=False)
+            .values_list("uuid", "feed_id", "watermark_uuid")
+        ):
+            read_decrements[feed_uuid] += 1
+            exceptions.append(
+                FeedReadWatermarkException(
+                    watermark_id=watermark_uuid, feed_entry_id=feed_entry_uuid
+                )
+            )
+
+        FeedReadWatermarkException.objects.bulk_create(
+            exceptions, ignore_conflicts=True
+        )
+
+        return dict(read_decrements)
+
+    def materialize(self) -> None:
+        bulk_create_iter(
+            (
+                ReadFeedEntryUserMapping(
+                    feed_entry_id=feed_entry_uuid,
+                    user_id=self.user_id,
+                    read_at=self.read_at,
+                )
+                for feed_entry_uuid in FeedEntry.objects.filter(
+                    feed_id=self.feed_id,
+                    is_archived=False,
+                    ordinal__lte=self.ordinal,
+                )
+                .exclude(
+                    uuid__in=ReadFeedEntryUserMapping.objects.filter(
+                        user_id=self.user_id
+                    ).values("feed_entry_id")
+                )
+                .exclude(
+                    uuid__in=FeedReadWatermarkException.objects.filter(
+                        watermark=self
+                    ).values("feed_entry_id")
+                )
+                .values_list("uuid", flat=True)
+                .iterator()
+            ),
+            ReadFeedEntryUserMapping,
+        )
+        self.delete()
+
+
+class FeedReadWatermarkException(models.Model):
+    """
+    "`feed_entry`, although under `watermark`, has been marked unread again".
+
+    An entry which is then read again gets a `ReadFeedEntryUserMapping` as usual,
+    so that it keeps its own read time.
+    """
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=("watermark", "feed_entry"),
+                name="feedreadwatermarkexception__unique__watermark__feed_entry",
+            ),
+        )
+
+    uuid = models.UUIDField(primary_key=True, default=uuid_extensions.uuid7)
+    watermark = models.ForeignKey(FeedReadWatermark, on_delete=models.CASCADE)
+    feed_entry = models.ForeignKey(FeedEntry, on_delete=models.CASCADE)
+
 
 class FeedSubscriptionProgressEntry(models.Model):
     NOT_STARTED = 0
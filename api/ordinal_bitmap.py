@@ -0,0 +1,200 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left, insort
+from typing import Iterable, Iterator
+
+# Roaring-style: ordinals are bucketed by their high bits, and each bucket is a
+# sorted `array` of the low 16 bits while sparse, or a fixed 8KiB bitmap once dense
+_CHUNK_BITS = 16
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+_BITMAP_BYTES = (1 << _CHUNK_BITS) // 8
+# past this many entries, an array container is larger than a bitmap container
+_ARRAY_MAX_CARDINALITY = 4096
+
+_CONTAINER_TYPE_ARRAY = 0
+_CONTAINER_TYPE_BITMAP = 1
+
+_HEADER_STRUCT = struct.Struct("<I")
+_CONTAINER_HEADER_STRUCT = struct.Struct("<QBI")
+
+_Container = array | bytearray
+
+
+def _bitmap_from_array(arr: array) -> bytearray:
+    bitmap = bytearray(_BITMAP_BYTES)
+    for low in arr:
+        bitmap[low >> 3] |= 1 << (low & 7)
+    return bitmap
+
+
+def _array_from_bitmap(bitmap: bytearray) -> array:
+    return array("H", _iter_bitmap(bitmap))
+
+
+def _iter_bitmap(bitmap: bytearray) -> Iterator[int]:
+    for i, byte in enumerate(bitmap):
+        while byte:
+            lowest_bit = byte & -byte
+            yield (i << 3) | (lowest_bit.bit_length() - 1)
+            byte ^= lowest_bit
+
+
+def _bitmap_cardinality(bitmap: bytearray) -> int:
+    return int.from_bytes(bitmap, "little").bit_count()
+
+
+class OrdinalBitmap:
+    __slots__ = ("_containers",)
+
+    def __init__(self, ordinals: Iterable[int] = ()):
+        self._containers: dict[int, _Container] = {}
+
+        chunks: dict[int, list[int]] = {}
+        for ordinal in ordinals:
+            chunks.setdefault(ordinal >> _CHUNK_BITS, []).append(ordinal & _CHUNK_MASK)
+
+        for high, lows in chunks.items():
+            arr = array("H", sorted(set(lows)))
+            self._containers[high] = (
+                _bitmap_from_array(arr) if len(arr) > _ARRAY_MAX_CARDINALITY else arr
+            )
+
+    def __contains__(self, ordinal: object) -> bool:
+        if not isinstance(ordinal, int):
+            return False
+
+        container = self._containers.get(ordinal >> _CHUNK_BITS)
+        if container is None:
+            return False
+
+        low = ordinal & _CHUNK_MASK
+        if isinstance(container, array):
+            i = bisect_left(container, low)
+            return i < len(container) and container[i] == low
+        else:
+            return bool(container[low >> 3] & (1 << (low & 7)))
+
+    def __len__(self) -> int:
+        return sum(
+            len(container)
+            if isinstance(container, array)
+            else _bitmap_cardinality(container)
+            for container in self._containers.values()
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self._containers)
+
+    def __iter__(self) -> Iterator[int]:
+        for high in sorted(self._containers.keys()):
+            container = self._containers[high]
+            base = high << _CHUNK_BITS
+            lows = (
+                container if isinstance(container, array) else _iter_bitmap(container)
+            )
+            for low in lows:
+                yield base | low
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OrdinalBitmap):
+            return NotImplemented
+
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"OrdinalBitmap(len={len(self)})"
+
+    def add(self, ordinal: int) -> None:
+        high = ordinal >> _CHUNK_BITS
+        low = ordinal & _CHUNK_MASK
+
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array("H", (low,))
+        elif isinstance(container, array):
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return
+
+            insort(container, low)
+            if len(container) > _ARRAY_MAX_CARDINALITY:
+                self._containers[high] = _bitmap_from_array(container)
+        else:
+            container[low >> 3] |= 1 << (low & 7)
+
+    def discard(self, ordinal: int) -> None:
+        high = ordinal >> _CHUNK_BITS
+        low = ordinal & _CHUNK_MASK
+
+        container = self._containers.get(high)
+        if container is None:
+            return
+
+        if isinstance(container, array):
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                del container[i]
+                if not container:
+                    del self._containers[high]
+        else:
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            cardinality = _bitmap_cardinality(container)
+            if cardinality == 0:
+                del self._containers[high]
+            elif cardinality <= _ARRAY_MAX_CARDINALITY:
+                self._containers[high] = _array_from_bitmap(container)
+
+    def to_bytes(self) -> bytes:
+        parts: list[bytes] = [_HEADER_STRUCT.pack(len(self._containers))]
+        for high in sorted(self._containers.keys()):
+            container = self._containers[high]
+            if isinstance(container, array):
+                if sys.byteorder == "big":  # pragma: no cover
+                    container = array("H", container)
+                    container.byteswap()
+                payload = container.tobytes()
+                parts.append(
+                    _CONTAINER_HEADER_STRUCT.pack(
+                        high, _CONTAINER_TYPE_ARRAY, len(container)
+                    )
+                )
+            else:
+                payload = bytes(container)
+                parts.append(
+                    _CONTAINER_HEADER_STRUCT.pack(
+                        high, _CONTAINER_TYPE_BITMAP, _BITMAP_BYTES
+                    )
+                )
+            parts.append(payload)
+
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OrdinalBitmap":
+        bitmap = cls()
+
+        (container_count,) = _HEADER_STRUCT.unpack_from(data, 0)
+        offset = _HEADER_STRUCT.size
+        for _ in range(container_count):
+            high, container_type, length = _CONTAINER_HEADER_STRUCT.unpack_from(
+                data, offset
+            )
+            offset += _CONTAINER_HEADER_STRUCT.size
+
+            container: _Container
+            if container_type == _CONTAINER_TYPE_ARRAY:
+                container = array("H")
+                container.frombytes(data[offset : offset + (length * 2)])
+                if sys.byteorder == "big":  # pragma: no cover
+                    container.byteswap()
+                offset += length * 2
+            elif container_type == _CONTAINER_TYPE_BITMAP:
+                container = bytearray(data[offset : offset + length])
+                offset += length
+            else:
+                raise ValueError("unknown container type")
+
+            bitmap._containers[high] = container
+
+        return bitmap
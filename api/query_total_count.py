@@ -0,0 +1,150 @@
+import json
+from typing import Any, Callable, Literal, NamedTuple, Sequence, TypeVar
+
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import F, Model, QuerySet
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.sql import Query
+from django.dispatch import receiver
+from django.utils import tree
+
+from api.cache_utils.query_total_counts import (
+    get_query_total_count_from_cache,
+    normalize_query,
+)
+from api.models import User
+from api.searches import search_fns
+from query_utils import search as searchutils
+
+TotalCountMode = Literal["exact", "cached", "estimated"]
+
+_M = TypeVar("_M", bound=Model)
+
+_QUERY_TOTAL_COUNT_ESTIMATE_CAP: int
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _QUERY_TOTAL_COUNT_ESTIMATE_CAP
+
+    _QUERY_TOTAL_COUNT_ESTIMATE_CAP = settings.QUERY_TOTAL_COUNT_ESTIMATE_CAP
+
+
+_load_global_settings()
+
+
+class TotalCount(NamedTuple):
+    total_count: int
+    # `False` when `total_count` is a planner estimate, or the cap
+    exact: bool
+
+
+def _referenced_names(node: Any, names: set[str]) -> None:
+    if isinstance(node, tree.Node):
+        for child in node.children:
+            if isinstance(child, tuple):
+                lookup, value = child
+                names.add(lookup.split(LOOKUP_SEP, 1)[0])
+                _referenced_names(value, names)
+            else:
+                _referenced_names(child, names)
+    elif isinstance(node, (tuple, list)):
+        for value in node:
+            _referenced_names(value, names)
+    elif isinstance(node, F):
+        # includes `OuterRef`s, which is how a subquery can reach an annotation
+        names.add(node.name.split(LOOKUP_SEP, 1)[0])
+    elif isinstance(node, Query):
+        _referenced_names(node.where, names)
+    elif hasattr(node, "get_source_expressions"):
+        for source_expression in node.get_source_expressions():
+            _referenced_names(source_expression, names)
+
+
+def plan_count_queryset(
+    queryset: QuerySet[_M],
+    filter_args: Sequence[Any],
+    annotators: Sequence[Callable[[QuerySet[_M]], QuerySet[_M]]],
+) -> QuerySet[_M]:
+    # only the annotators whose annotations (or filtered relations) the filters
+    # actually reference are applied. `QuerySet.count()` already drops unreferenced
+    # annotation expressions, but not the joins that they brought into the query
+    referenced_names: set[str] = set()
+    for filter_arg in filter_args:
+        _referenced_names(filter_arg, referenced_names)
+
+    for annotator in annotators:
+        annotated_queryset = annotator(queryset)
+
+        added_names = (
+            annotated_queryset.query.annotations.keys()
+            | annotated_queryset.query._filtered_relations.keys()
+        ) - (
+            queryset.query.annotations.keys()
+            | queryset.query._filtered_relations.keys()
+        )
+        if not referenced_names.isdisjoint(added_names):
+            queryset = annotated_queryset
+
+    return queryset.filter(*filter_args).order_by()
+
+
+def _planner_row_estimate(queryset: QuerySet[Any]) -> int | None:
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as c:  # pragma: no cover
+        c.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = c.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_total_count(queryset: QuerySet[Any], cap: int) -> TotalCount:
+    # the planner's guess is free, but only trusted to say "lots". Anything it
+    # puts under the cap is counted, which the cap keeps cheap
+    row_estimate = _planner_row_estimate(queryset)
+    if row_estimate is not None and row_estimate > cap:  # pragma: no cover
+        return TotalCount(row_estimate, False)
+
+    # the subquery only has to produce the row, not any of its columns
+    capped_count = queryset.order_by().values("pk")[: cap + 1].count()
+    if capped_count > cap:
+        return TotalCount(cap, False)
+
+    return TotalCount(capped_count, True)
+
+
+def get_total_count(
+    queryset: QuerySet[Any],
+    mode: TotalCountMode,
+    *,
+    user: User,
+    object_name: str,
+    search: str,
+    query_parts: Sequence[str] = (),
+    cache: BaseCache,
+) -> TotalCount:
+    if mode == "estimated":
+        return estimate_total_count(queryset, _QUERY_TOTAL_COUNT_ESTIMATE_CAP)
+    elif mode == "cached":
+        total_count, _ = get_query_total_count_from_cache(
+            user,
+            object_name,
+            # searches that only differ in their whitespace share a count, but
+            # not ones that differ inside a quoted value
+            normalize_query(
+                searchutils.to_canonical(object_name, search, search_fns),
+                *query_parts,
+            ),
+            queryset.count,
+            cache,
+        )
+        return TotalCount(total_count, True)
+    else:
+        return TotalCount(queryset.count(), True)
@@ -1,19 +1,26 @@
 from typing import AbstractSet, Callable, cast
 
 from django.db import connection
-from django.db.models import Q
+from django.db.models import Exists, Q
 from django.http import HttpRequest
 from lingua import Language
 from url_normalize import url_normalize
 from django.contrib.postgres.search import SearchQuery
 
-from api.models import AlternateFeedURL, ReadFeedEntryUserMapping, User
+from api.models import (
+    AlternateFeedURL,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    User,
+)
 from query_utils.search.convertto import (
     Bool,
     CustomConvertTo,
     DateTime,
     DateTimeDeltaRange,
     DateTimeRange,
+    Int,
+    IntRange,
     UuidList,
 )
 
@@ -96,6 +103,15 @@ def _feedentry_feedUrl(request: HttpRequest, search_obj: str) -> Q:
     )
 
 
+def _feedentry_readAt(request: HttpRequest, read_at_q: Q) -> Q:
+    user = cast(User, request.user)
+    return Q(
+        uuid__in=ReadFeedEntryUserMapping.objects.filter(read_at_q, user=user).values(
+            "feed_entry_id"
+        )
+    ) | Q(Exists(FeedReadWatermark.covering(user).filter(read_at_q)))
+
+
 search_fns: dict[str, dict[str, Callable[[HttpRequest, str], Q]]] = {
     "usercategory": {
         "uuid": lambda request, search_obj: Q(uuid__in=UuidList.convertto(search_obj)),
@@ -142,6 +158,18 @@ search_fns: dict[str, dict[str, Callable[[HttpRequest, str], Q]]] = {
         | Q(custom_title__icontains=search_obj),
         "calculatedTitle_exact": lambda request, search_obj: Q(title__iexact=search_obj)
         | Q(custom_title__iexact=search_obj),
+        "unreadCount": lambda request, search_obj: Q(
+            stored_unread_count__range=IntRange.convertto(search_obj)
+        ),
+        "unreadCount_exact": lambda request, search_obj: Q(
+            stored_unread_count=Int.convertto(search_obj)
+        ),
+        "readCount": lambda request, search_obj: Q(
+            stored_read_count__range=IntRange.convertto(search_obj)
+        ),
+        "readCount_exact": lambda request, search_obj: Q(
+            stored_read_count=Int.convertto(search_obj)
+        ),
     },
     "feedentry": {
         "uuid": lambda request, search_obj: Q(uuid__in=UuidList.convertto(search_obj)),
@@ -188,22 +216,14 @@ search_fns: dict[str, dict[str, Callable[[HttpRequest, str], Q]]] = {
         "isFavorite": lambda request, search_obj: Q(
             is_favorite=Bool.convertto(search_obj)
         ),
-        "readAt": lambda request, search_obj: Q(
-            uuid__in=ReadFeedEntryUserMapping.objects.filter(
-                user=cast(User, request.user),
-                read_at__range=DateTimeRange.convertto(search_obj),
-            )
-        ),
-        "readAt_exact": lambda request, search_obj: Q(
-            uuid__in=ReadFeedEntryUserMapping.objects.filter(
-                user=cast(User, request.user), read_at=DateTime.convertto(search_obj)
-            )
-        ),
-        "readAt_delta": lambda request, search_obj: Q(
-            uuid__in=ReadFeedEntryUserMapping.objects.filter(
-                user=cast(User, request.user),
-                read_at__range=DateTimeDeltaRange.convertto(search_obj),
-            )
+        "readAt": lambda request, search_obj: _feedentry_readAt(
+            request, Q(read_at__range=DateTimeRange.convertto(search_obj))
+        ),
+        "readAt_exact": lambda request, search_obj: _feedentry_readAt(
+            request, Q(read_at=DateTime.convertto(search_obj))
+        ),
+        "readAt_delta": lambda request, search_obj: _feedentry_readAt(
+            request, Q(read_at__range=DateTimeDeltaRange.convertto(search_obj))
         ),
         "isArchived": lambda request, search_obj: Q(
             is_archived=Bool.convertto(search_obj)
@@ -45,6 +45,7 @@ from api.fields import field_configs
 from api.models import Captcha, ClassifierLabel, Feed, User, UserCategory
 from api.searches import search_fns
 from api.sorts import sort_configs
+from query_utils import cursor as cursorutils
 from query_utils import fields as fieldutils
 from query_utils import search as searchutils
 from query_utils import sort as sortutils
@@ -55,6 +56,9 @@ _logger = logging.getLogger("rss_temple.serializers")
 # deep parse tree or an enormous OR'd full-text query
 _SEARCH_MAX_LENGTH = 1024 * 10
 
+# enough for a client's whole start-up, while keeping one request's work bounded
+_BATCH_QUERY_MAX_COUNT = 20
+
 
 class LoginSerializer(_LoginSerializer):  # pragma: no cover
     stayLoggedIn = serializers.BooleanField(source="stay_logged_in")
@@ -559,6 +563,28 @@ class _SearchField(serializers.Field):
         return value
 
 
+@extend_schema_field(
+    component_name="CursorField",
+    field=OpenApiTypes.STR,
+)
+class _CursorField(serializers.Field):
+    def to_internal_value(self, data: Any):
+        if not isinstance(data, str):
+            raise serializers.ValidationError("Not a valid string.")
+
+        # empty for the first page
+        if not data:
+            return []
+
+        try:
+            return cursorutils.decode_cursor(data)
+        except ValueError as e:
+            raise serializers.ValidationError("cursor malformed") from e
+
+    def to_representation(self, value: list[Any]):  # pragma: no cover
+        return cursorutils.encode_cursor(value)
+
+
 class LocaleSerializer(serializers.Serializer):
     locale = serializers.CharField(default="en-US")
 
@@ -586,6 +612,16 @@ class GetManySerializer(serializers.Serializer):
     totalCount = serializers.BooleanField(
         default=True, required=False, source="return_total_count"
     )
+    totalCountMode = serializers.ChoiceField(
+        ("exact", "cached", "estimated"),
+        default="exact",
+        required=False,
+        source="total_count_mode",
+    )
+    countOnly = serializers.BooleanField(
+        default=False, required=False, source="count_only"
+    )
+    stream = serializers.BooleanField(default=False, required=False)
     sort = _SortField(required=False)
     search = _SearchField(required=False)
     disableDefaultSort = serializers.BooleanField(
@@ -596,12 +632,30 @@ class GetManySerializer(serializers.Serializer):
         super().__init__(*args, **kwargs)
         self.fields["fields"] = _FieldsField(required=False)
 
+    def validate(self, attrs: dict[str, Any]):
+        # nothing but the total, so the views can skip everything that only the
+        # objects need
+        if attrs["count_only"]:
+            attrs["return_objects"] = False
+            attrs["return_total_count"] = True
+
+        return attrs
+
 
 class QuerySerializer(serializers.Serializer):
     totalCount = serializers.IntegerField(required=False)
+    totalCountExact = serializers.BooleanField(required=False)
     objects = serializers.ListField(child=serializers.DictField(), required=False)
 
 
+class CursorGetManySerializer(GetManySerializer):
+    cursor = _CursorField(required=False)
+
+
+class CursorQuerySerializer(QuerySerializer):
+    nextCursor = serializers.CharField(required=False, allow_null=True)
+
+
 class StableQueryCreateSerializer(serializers.Serializer):
     sort = _SortField(required=False)
     search = _SearchField(required=False)
@@ -631,6 +685,7 @@ class StableQueryMultipleSerializer(serializers.Serializer):
     totalCount = serializers.BooleanField(
         default=True, required=False, source="return_total_count"
     )
+    stream = serializers.BooleanField(default=False, required=False)
     sort = _SortField(required=False)
     search = _SearchField(required=False)
     disableDefaultSort = serializers.BooleanField(
@@ -698,6 +753,10 @@ class FeedEntriesMarkReadSerializer(serializers.Serializer):
     )
 
 
+class FeedEntriesMarkReadQuerySerializer(serializers.Serializer):
+    search = _SearchField(required=True)
+
+
 class FeedEntryLanguagesQuerySerializer(serializers.Serializer):
     kind = serializers.ChoiceField(
         ("iso639_1", "iso639_3", "name"), default="iso639_3", required=False
@@ -807,3 +866,24 @@ class FeedReportBodySerializer(serializers.Serializer):
 class FeedEntryReportBodySerializer(serializers.Serializer):
     feedEntryUuid = serializers.UUIDField(required=True, source="feed_entry_uuid")
     reason = serializers.CharField(required=True, max_length=2048)
+
+
+class _BatchQuerySerializer(serializers.Serializer):
+    class Meta:
+        ref_name = "BatchQuery"
+
+    method = serializers.ChoiceField(("GET", "POST"), default="POST", required=False)
+    path = serializers.CharField(required=True, max_length=2048)
+    body = serializers.DictField(default=dict, required=False)
+    ifNoneMatch = serializers.CharField(
+        required=False, max_length=1024, source="if_none_match"
+    )
+
+
+class BatchQuerySerializer(serializers.Serializer):
+    queries = serializers.ListField(
+        child=_BatchQuerySerializer(),
+        required=True,
+        min_length=1,
+        max_length=_BATCH_QUERY_MAX_COUNT,
+    )
@@ -17,6 +17,8 @@ sort_configs: dict[str, dict[str, SortConfig]] = {
         "calculatedTitle": SortConfig(
             [standard_sort("custom_title"), standard_sort("title")], None
         ),
+        "unreadCount": SortConfig([standard_sort("stored_unread_count")], None),
+        "readCount": SortConfig([standard_sort("stored_read_count")], None),
     },
     "feedentry": {
         "uuid": SortConfig([standard_sort("uuid")], None),
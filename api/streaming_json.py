@@ -0,0 +1,119 @@
+from typing import Any, Iterator
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from drf_ujson.renderers import UJSONRenderer
+from rest_framework.response import Response
+
+_QUERY_STREAM_CHUNK_SIZE: int
+_QUERY_STREAM_BUFFER_BYTES: int
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _QUERY_STREAM_CHUNK_SIZE
+    global _QUERY_STREAM_BUFFER_BYTES
+
+    _QUERY_STREAM_CHUNK_SIZE = getattr(settings, "QUERY_STREAM_CHUNK_SIZE", 100)
+    _QUERY_STREAM_BUFFER_BYTES = getattr(
+        settings, "QUERY_STREAM_BUFFER_BYTES", 64 * 1024
+    )
+
+
+_load_global_settings()
+
+_renderer = UJSONRenderer()
+
+
+def stream_chunk_size() -> int:
+    # rows fetched per round trip from the (server-side, where supported) cursor
+    return _QUERY_STREAM_CHUNK_SIZE
+
+
+def _render(value: Any) -> bytes:
+    # as `Response`s are rendered, just a piece at a time. The renderer takes `None`
+    # to mean "no body", though
+    return b"null" if value is None else _renderer.render(value)
+
+
+def _evaluation_order(ret_obj: dict[str, Any]) -> list[str]:
+    # plain values, then iterators, then callables, so that a callable can depend
+    # on what the iterators have been through (such as the cursor of the last
+    # object)
+    def _rank(key: str) -> int:
+        value = ret_obj[key]
+        if isinstance(value, Iterator):
+            return 1
+        elif callable(value):
+            return 2
+        else:
+            return 0
+
+    return sorted(ret_obj.keys(), key=_rank)
+
+
+def _generate(ret_obj: dict[str, Any]) -> Iterator[bytes]:
+    buffer = bytearray(b"{")
+    for i, key in enumerate(_evaluation_order(ret_obj)):
+        if i > 0:
+            buffer += b","
+
+        buffer += _render(key)
+        buffer += b":"
+
+        value = ret_obj[key]
+        if isinstance(value, Iterator):
+            buffer += b"["
+            for j, item in enumerate(value):
+                if j > 0:
+                    buffer += b","
+
+                buffer += _render(item)
+
+                if len(buffer) >= _QUERY_STREAM_BUFFER_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+
+            buffer += b"]"
+        elif callable(value):
+            buffer += _render(value())
+        else:
+            buffer += _render(value)
+
+    buffer += b"}"
+    yield bytes(buffer)
+
+
+def json_response(ret_obj: dict[str, Any], stream: bool) -> HttpResponseBase:
+    # `ret_obj` values can be iterators (rendered as arrays) and callables (called
+    # for their value), evaluated in `_evaluation_order`. When streaming, the
+    # arrays are rendered item by item as they are iterated, so that neither the
+    # objects nor the body are ever all in memory at once
+    if stream:
+        return StreamingHttpResponse(
+            _generate(ret_obj), content_type=_renderer.media_type
+        )
+
+    values: dict[str, Any] = {}
+    for key in _evaluation_order(ret_obj):
+        value = ret_obj[key]
+        if isinstance(value, Iterator):
+            values[key] = list(value)
+        elif callable(value):
+            values[key] = value()
+        else:
+            values[key] = value
+
+    return Response({key: values[key] for key in ret_obj.keys()})
+
+
+def render_json(ret_obj: dict[str, Any]) -> bytes:
+    # the whole body at once, exactly as it would have been streamed
+    return b"".join(_generate(ret_obj))
+
+
+def rendered_json_response(content: bytes) -> HttpResponse:
+    return HttpResponse(content, content_type=_renderer.media_type)
@@ -2,6 +2,8 @@ from .archive_feed_entries import archive_feed_entries
 from .extract_top_images import extract_top_images
 from .feed_scrape import feed_scrape
 from .find_duplicate_feeds import find_duplicate_feeds
+from .flush_pending_reads import flush_pending_reads
+from .fold_read_history import fold_read_history
 from .label_feeds import label_feeds
 from .label_users import label_users
 from .purge_duplicate_feed_urls import purge_duplicate_feed_urls
@@ -19,5 +21,7 @@ __all__ = [
     "feed_scrape",
     "setup_subscriptions",
     "find_duplicate_feeds",
+    "flush_pending_reads",
+    "fold_read_history",
     "ignore_missed_top_images",
 ]
@@ -1,6 +1,22 @@
 import datetime
 
-from api.models import Feed, FeedEntry, ReadFeedEntryUserMapping
+from django.core.cache import BaseCache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from api.cache_utils.archived_counts_lookup import (
+    delete_archived_counts_lookup_cache,
+)
+from api.cache_utils.counts_lookup import delete_read_counts_lookup_cache
+from api.cache_utils.state_versions import bump_feed_content_versions
+from api.models import (
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+)
 
 
 def archive_feed_entries(
@@ -9,6 +25,7 @@ def archive_feed_entries(
     archive_time_threshold: datetime.timedelta,
     archived_count_threshold: int,
     backoff_seconds: float,
+    cache: BaseCache | None = None,
 ) -> None:
     time_cutoff = now + archive_time_threshold
 
@@ -24,7 +41,72 @@ def archive_feed_entries(
 
     FeedEntry.objects.bulk_update(newly_archived, ["is_archived"], batch_size=512)
 
-    ReadFeedEntryUserMapping.objects.filter(feed_entry__in=newly_archived).delete()
+    read_mappings = ReadFeedEntryUserMapping.objects.filter(
+        feed_entry__in=newly_archived
+    )
+
+    if newly_archived:
+        feed_uuid = feed.uuid
+        archived_count = len(newly_archived)
+
+        # the archived entries count as read for every subscriber, except for the
+        # readers, whose own reads of them are replaced by the archived state. Those
+        # reads are counted per subscriber in the UPDATE itself, so that its SQL
+        # doesn't grow with the feed's readers
+        subscriber_read_count_subquery = (
+            FeedEntry.objects.filter(uuid__in=[fe.uuid for fe in newly_archived])
+            .filter(
+                Q(
+                    Exists(
+                        ReadFeedEntryUserMapping.objects.filter(
+                            user_id=OuterRef(OuterRef("user_id")),
+                            feed_entry_id=OuterRef("uuid"),
+                        )
+                    )
+                )
+                | Q(FeedReadWatermark.covers(OuterRef(OuterRef("user_id"))))
+            )
+            .order_by()
+            .values("feed_id")
+            .annotate(c=Count("uuid"))
+            .values("c")
+        )
+        moved_count_expression = Value(archived_count) - Coalesce(
+            Subquery(subscriber_read_count_subquery), 0
+        )
+        SubscribedFeedUserMapping.objects.filter(feed_id=feed_uuid).update(
+            unread_count=F("unread_count") - moved_count_expression,
+            read_count=F("read_count") + moved_count_expression,
+        )
+
+        if cache is not None:
+            # the archived entries move from each reader's read count into the shared
+            # archived count, so those readers' cached read counts are now too high.
+            # The shared archived count is dropped rather than incremented: a reader
+            # that missed the cache in between would have already counted them
+            reader_user_uuids = frozenset(
+                read_mappings.values_list("user_id", flat=True).distinct()
+            ) | frozenset(
+                FeedReadWatermark.objects.filter(
+                    feed=feed,
+                    ordinal__gte=min(
+                        (fe.ordinal for fe in newly_archived if fe.ordinal is not None),
+                        default=0,
+                    ),
+                ).values_list("user_id", flat=True)
+            )
+
+            def _on_commit():
+                delete_archived_counts_lookup_cache((feed_uuid,), cache)
+                delete_read_counts_lookup_cache(reader_user_uuids, feed_uuid, cache)
+
+            transaction.on_commit(_on_commit)
+
+            # the readers' reads of the entries go too, but any response with the
+            # entries in it is in the scope of the feed's content anyway
+            bump_feed_content_versions((feed_uuid,), cache)
+
+    read_mappings.delete()
 
     feed.archive_update_backoff_until = now + datetime.timedelta(
         seconds=backoff_seconds
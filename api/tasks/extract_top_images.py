@@ -1,10 +1,13 @@
 import logging
 import traceback
+import uuid as uuid_
 from typing import Iterable
 
+from django.core.cache import BaseCache
 from django.db.models import F, Q
 from stop_words import LANGUAGE_MAPPING as _STOP_WORDS_LANGUAGE_MAPPING
 
+from api.cache_utils.state_versions import bump_feed_content_versions
 from api.models import FeedEntry
 from api.top_image_extractor import TryAgain, extract_top_image_src, is_top_image_needed
 
@@ -23,8 +26,10 @@ def extract_top_images(
     min_image_height: int,
     response_max_byte_count: int,
     timeout_per_request: int,
+    cache: BaseCache | None = None,
 ) -> int:
     count = 0
+    updated_feed_uuids: set[uuid_.UUID] = set()
     for feed_entry in feed_entry_queryset:
         # just in case this is being run in parallel and another process has already handled it
         feed_entry.refresh_from_db(
@@ -65,6 +70,7 @@ def extract_top_images(
                     "top_image_src",
                 )
             )
+            updated_feed_uuids.add(feed_entry.feed_id)
 
             if feed_entry.has_top_image_been_processed:
                 count += 1
@@ -106,6 +112,7 @@ def extract_top_images(
             feed_entry.save(
                 update_fields=("has_top_image_been_processed", "top_image_src")
             )
+            updated_feed_uuids.add(feed_entry.feed_id)
 
             count += 1
 
@@ -132,6 +139,7 @@ def extract_top_images(
                     )
                     + 1,
                 )
+                updated_feed_uuids.add(feed_entry.feed_id)
                 count += 1
 
                 _logger.debug(
@@ -145,4 +153,8 @@ def extract_top_images(
                 feed_entry.url,
                 traceback.format_exc(),
             )
+
+    if cache is not None:
+        bump_feed_content_versions(updated_feed_uuids, cache)
+
     return count
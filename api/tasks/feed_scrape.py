@@ -1,18 +1,26 @@
 import datetime
 
-from django.db.models import Q
+from django.core.cache import BaseCache
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
 from api import feed_handler
-from api.models import Feed, FeedEntry
+from api.cache_utils.counts_lookup import delete_total_counts_lookup_cache
+from api.cache_utils.state_versions import bump_feed_content_versions
+from api.cache_utils.user_category_counts import (
+    delete_user_category_counts_cache__subscribers,
+)
+from api.models import Feed, FeedEntry, SubscribedFeedUserMapping
 from api.text_classifier.lang_detector import detect_iso639_3
 from api.text_classifier.prep_content import prep_for_lang_detection
 
 
-def feed_scrape(feed: Feed, response_text: str):
+def feed_scrape(feed: Feed, response_text: str, cache: BaseCache | None = None):
     d = feed_handler.text_2_d(response_text)
 
     new_feed_entries: list[FeedEntry] = []
+    has_updated_feed_entries = False
 
     now = timezone.now()
 
@@ -42,6 +50,15 @@ def feed_scrape(feed: Feed, response_text: str):
             old_feed_entry = None
 
         if old_feed_entry is not None:
+            old_values = (
+                old_feed_entry.id,
+                old_feed_entry.content,
+                old_feed_entry.author_name,
+                old_feed_entry.created_at,
+                old_feed_entry.updated_at,
+                old_feed_entry.language_id,
+            )
+
             old_feed_entry.id = feed_entry.id
             old_feed_entry.content = feed_entry.content
             old_feed_entry.author_name = feed_entry.author_name
@@ -61,6 +78,15 @@ def feed_scrape(feed: Feed, response_text: str):
                     "language_id",
                 ]
             )
+
+            has_updated_feed_entries = has_updated_feed_entries or old_values != (
+                old_feed_entry.id,
+                old_feed_entry.content,
+                old_feed_entry.author_name,
+                old_feed_entry.created_at,
+                old_feed_entry.updated_at,
+                old_feed_entry.language_id,
+            )
         else:
             feed_entry.feed = feed
 
@@ -72,6 +98,31 @@ def feed_scrape(feed: Feed, response_text: str):
 
     FeedEntry.objects.bulk_create(new_feed_entries, ignore_conflicts=True)
 
+    inserted_count = 0
+    if new_feed_entries:
+        # `ignore_conflicts` means some may not have been inserted, so count what landed
+        inserted_count = FeedEntry.objects.filter(
+            uuid__in=[fe.uuid for fe in new_feed_entries]
+        ).count()
+
+        if inserted_count > 0:
+            feed_uuid = feed.uuid
+
+            SubscribedFeedUserMapping.objects.filter(feed_id=feed_uuid).update(
+                unread_count=F("unread_count") + inserted_count
+            )
+
+            if cache is not None:
+
+                def _on_commit():
+                    delete_total_counts_lookup_cache((feed_uuid,), cache)
+                    delete_user_category_counts_cache__subscribers(feed_uuid, cache)
+
+                transaction.on_commit(_on_commit)
+
+    if cache is not None and (inserted_count > 0 or has_updated_feed_entries):
+        bump_feed_content_versions((feed.uuid,), cache)
+
     feed.db_updated_at = now
 
 
@@ -0,0 +1,155 @@
+import logging
+import uuid as uuid_
+from collections import Counter
+from typing import Generator
+
+from django.core.cache import BaseCache
+from django.db import transaction
+from django.db.models import F
+
+from api.cache_utils.counts_lookup import increment_read_in_counts_lookup_cache
+from api.cache_utils.pending_reads import (
+    discard_pending_reads,
+    get_pending_read_user_uuids_from_cache,
+    get_pending_reads_from_cache,
+)
+from api.cache_utils.read_feed_entry_ordinals import (
+    update_read_feed_entry_ordinals_cache,
+)
+from api.cache_utils.user_category_counts import delete_user_category_counts_cache
+from api.django_extensions import bulk_create_iter
+from api.lock_context import lock_context
+from api.models import (
+    FeedEntry,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+    User,
+)
+
+_logger = logging.getLogger("rss_temple.tasks.flush_pending_reads")
+
+
+def flush_pending_reads(cache: BaseCache) -> int:
+    count = 0
+    for user in User.objects.filter(
+        uuid__in=get_pending_read_user_uuids_from_cache(cache)
+    ).iterator():
+        try:
+            count += flush_user_pending_reads(user, cache)
+        except Exception:
+            # their reads stay queued for the next run, and the other users
+            # still get flushed
+            _logger.exception("could not flush pending reads for user %s", user.uuid)
+
+    return count
+
+
+def flush_user_pending_reads(user: User, cache: BaseCache) -> int:
+    # the scheduled flush and the inline one in the bulk read views can race
+    # for the same user. Not the queue's own lock, which `discard_pending_reads`
+    # takes while this is held
+    with lock_context(cache, f"pending_reads_flush_lock__{user.uuid}"):
+        return _flush_user_pending_reads(user, cache)
+
+
+def _flush_user_pending_reads(user: User, cache: BaseCache) -> int:
+    pending_reads = get_pending_reads_from_cache(user.uuid, cache)
+    if not pending_reads:
+        return 0
+
+    read_ats = {
+        feed_entry_uuid: pending_read.read_at
+        for feed_entry_uuid, pending_read in pending_reads.items()
+        if pending_read.read_at is not None
+    }
+    unread_feed_entry_uuids = frozenset(
+        feed_entry_uuid
+        for feed_entry_uuid, pending_read in pending_reads.items()
+        if pending_read.read_at is None
+    )
+
+    increment_counter: Counter[uuid_.UUID] = Counter()
+    added_ordinals: list[int | None] = []
+    removed_ordinals: list[int | None] = []
+
+    def generate_read_feed_entry_mappings() -> (
+        Generator[ReadFeedEntryUserMapping, None, None]
+    ):
+        for feed_entry_uuid, feed_uuid, ordinal in (
+            FeedEntry.objects.filter(uuid__in=read_ats.keys(), is_archived=False)
+            .exclude(uuid__in=user.read_feed_entries.values("uuid"))
+            .exclude(FeedReadWatermark.covers(user))
+            .values_list("uuid", "feed_id", "ordinal")
+            .iterator()
+        ):
+            increment_counter[feed_uuid] += 1
+            added_ordinals.append(ordinal)
+
+            yield ReadFeedEntryUserMapping(
+                feed_entry_id=feed_entry_uuid,
+                user=user,
+                read_at=read_ats[feed_entry_uuid],
+            )
+
+    with transaction.atomic():
+        deleted_count = 0
+        if unread_feed_entry_uuids:
+            for feed_uuid, excepted_count in FeedReadWatermark.except_covered(
+                user, unread_feed_entry_uuids
+            ).items():
+                increment_counter[feed_uuid] -= excepted_count
+                deleted_count += excepted_count
+
+            mappings = ReadFeedEntryUserMapping.objects.filter(
+                user=user, feed_entry_id__in=unread_feed_entry_uuids
+            )
+            for feed_uuid, ordinal in mappings.values_list(
+                "feed_entry__feed_id", "feed_entry__ordinal"
+            ).iterator():
+                increment_counter[feed_uuid] -= 1
+                removed_ordinals.append(ordinal)
+
+            _, deletes = mappings.delete()
+            deleted_count += deletes.get("api.ReadFeedEntryUserMapping", 0)
+
+        created_count = 0
+        if read_ats:
+            # a mark read outside of the queue (e.g. a bulk read view) may still
+            # land in between, and that entry is read either way
+            created_count = bulk_create_iter(
+                generate_read_feed_entry_mappings(),
+                ReadFeedEntryUserMapping,
+                ignore_conflicts=True,
+            )
+
+        # one counter update per batch, rather than one per event
+        if created_count != deleted_count:
+            User.objects.filter(uuid=user.uuid).update(
+                read_feed_entries_counter=F("read_feed_entries_counter")
+                + (created_count - deleted_count)
+            )
+
+        increment_counter = Counter(
+            {feed_uuid: incr for feed_uuid, incr in increment_counter.items() if incr}
+        )
+        if increment_counter:
+            SubscribedFeedUserMapping.increment_stored_read_counts(
+                user, increment_counter
+            )
+
+    if added_ordinals or removed_ordinals:
+        update_read_feed_entry_ordinals_cache(
+            user,
+            cache,
+            added_ordinals=added_ordinals,
+            removed_ordinals=removed_ordinals,
+        )
+
+    if increment_counter:
+        increment_read_in_counts_lookup_cache(user, increment_counter, cache)
+        delete_user_category_counts_cache(user, cache)
+
+    discard_pending_reads(user.uuid, pending_reads, cache)
+
+    return len(pending_reads)
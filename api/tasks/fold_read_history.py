@@ -0,0 +1,108 @@
+import datetime
+import uuid as uuid_
+
+from django.core.cache import BaseCache
+from django.db import transaction
+from django.db.models import Max, Min
+
+from api.cache_utils.state_versions import bump_user_state_versions
+from api.models import (
+    FeedEntry,
+    FeedReadWatermark,
+    FeedReadWatermarkException,
+    ReadFeedEntryUserMapping,
+)
+
+
+def fold_read_history(
+    now: datetime.datetime,
+    fold_time_threshold: datetime.timedelta,
+    cache: BaseCache | None = None,
+) -> int:
+    time_cutoff = now + fold_time_threshold
+
+    count = 0
+    # the folded entries' read times become the watermark's
+    folded_user_uuids: set[uuid_.UUID] = set()
+    for user_uuid, feed_uuid in (
+        ReadFeedEntryUserMapping.objects.filter(read_at__lt=time_cutoff)
+        .values_list("user_id", "feed_entry__feed_id")
+        .distinct()
+        .iterator()
+    ):
+        if (
+            folded_count := fold_feed_read_history(user_uuid, feed_uuid, time_cutoff)
+        ) > 0:
+            count += folded_count
+            folded_user_uuids.add(user_uuid)
+
+    if cache is not None:
+        bump_user_state_versions(folded_user_uuids, ("read",), cache)
+
+    return count
+
+
+def fold_feed_read_history(
+    user_uuid: uuid_.UUID, feed_uuid: uuid_.UUID, time_cutoff: datetime.datetime
+) -> int:
+    # The longest run of the feed's (unarchived) entries which were all read
+    # before `time_cutoff`, starting right after the current watermark, is moved
+    # into the watermark, and its mappings deleted. Anything read more recently,
+    # or not at all, ends the run, and stays as it is.
+    with transaction.atomic():
+        watermark = (
+            FeedReadWatermark.objects.select_for_update()
+            .filter(user_id=user_uuid, feed_id=feed_uuid)
+            .first()
+        )
+
+        feed_entries = FeedEntry.objects.filter(feed_id=feed_uuid, is_archived=False)
+        if watermark is not None:
+            feed_entries = feed_entries.filter(ordinal__gt=watermark.ordinal)
+
+        gap_ordinal: int | None = feed_entries.exclude(
+            uuid__in=ReadFeedEntryUserMapping.objects.filter(
+                user_id=user_uuid, read_at__lt=time_cutoff
+            ).values("feed_entry_id")
+        ).aggregate(gap_ordinal=Min("ordinal"))["gap_ordinal"]
+        if gap_ordinal is not None:
+            feed_entries = feed_entries.filter(ordinal__lt=gap_ordinal)
+
+        fold_ordinal: int | None = feed_entries.aggregate(fold_ordinal=Max("ordinal"))[
+            "fold_ordinal"
+        ]
+        if fold_ordinal is None:
+            return 0
+
+        folded_mappings = ReadFeedEntryUserMapping.objects.filter(
+            user_id=user_uuid,
+            feed_entry__feed_id=feed_uuid,
+            feed_entry__ordinal__lte=fold_ordinal,
+        )
+        # the per-entry times are dropped, so keep the latest of them
+        read_at: datetime.datetime = folded_mappings.aggregate(read_at=Max("read_at"))[
+            "read_at"
+        ]
+
+        if watermark is not None:
+            # entries excepted from it, but read again since, are read either way
+            FeedReadWatermarkException.objects.filter(
+                watermark=watermark,
+                feed_entry_id__in=folded_mappings.values("feed_entry_id"),
+            ).delete()
+
+        _, deletes = folded_mappings.delete()
+
+        if watermark is not None:
+            watermark.ordinal = fold_ordinal
+            watermark.read_at = max(watermark.read_at, read_at)
+            watermark.save(update_fields=("ordinal", "read_at"))
+        else:
+            FeedReadWatermark.objects.create(
+                user_id=user_uuid,
+                feed_id=feed_uuid,
+                ordinal=fold_ordinal,
+                read_at=read_at,
+            )
+
+        return deletes.get("api.ReadFeedEntryUserMapping", 0)
@@ -1,14 +1,27 @@
 import logging
 import datetime
 
+from django.core.cache import BaseCache
+
+from api.cache_utils.state_versions import bump_feed_content_versions
 from api.models import FeedEntry
 
 _logger = logging.getLogger("rss_temple.tasks.ignore_missed_top_images")
 
 
-def ignore_missed_top_images(epoch: datetime.datetime) -> None:
-    count = FeedEntry.objects.filter(
+def ignore_missed_top_images(
+    epoch: datetime.datetime, cache: BaseCache | None = None
+) -> None:
+    feed_entries = FeedEntry.objects.filter(
         has_top_image_been_processed=False, db_created_at__lte=epoch
-    ).update(has_top_image_been_processed=True, top_image_src="")
+    )
+
+    if cache is not None:
+        bump_feed_content_versions(
+            frozenset(feed_entries.values_list("feed_id", flat=True).distinct()),
+            cache,
+        )
+
+    count = feed_entries.update(has_top_image_been_processed=True, top_image_src="")
 
     _logger.info("updated %d feed entries", count)
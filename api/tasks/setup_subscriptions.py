@@ -1,12 +1,18 @@
 import logging
+import uuid as uuid_
 from typing import Iterable, cast
 
+from django.core.cache import BaseCache
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from requests.exceptions import RequestException
 
 from api import content_type_util, feed_handler, rss_requests
+from api.cache_utils.state_versions import (
+    bump_feed_content_versions,
+    bump_user_state_versions,
+)
 from api.content_type_util import WrongContentTypeError
 from api.feed_handler import FeedHandlerError
 from api.models import (
@@ -29,8 +35,10 @@ _logger = logging.getLogger("rss_temple.tasks.setup_subscriptions")
 def setup_subscriptions(
     feed_subscription_progress_entry: FeedSubscriptionProgressEntry,
     response_max_byte_count: int,
+    cache: BaseCache | None = None,
 ):
     feeds: dict[str, Feed] = {}
+    generated_feed_uuids: set[uuid_.UUID] = set()
     subscriptions: set[str] = set()
     custom_titles: set[str] = set()
     for mapping in SubscribedFeedUserMapping.objects.select_related("feed").filter(
@@ -85,6 +93,8 @@ def setup_subscriptions(
                         _logger.exception("could not load feed for '%s'", feed_url)
                         continue
 
+                    generated_feed_uuids.add(feed.uuid)
+
                 feeds[feed_url] = cast(Feed, feed)
 
             if feed is not None:
@@ -99,11 +109,16 @@ def setup_subscriptions(
                     if custom_title is not None and feed.title == custom_title:
                         custom_title = None
 
-                    SubscribedFeedUserMapping.objects.create(
+                    subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
                         feed=feed,
                         user_id=feed_subscription_progress_entry.user_id,
                         custom_feed_title=custom_title,
                     )
+                    SubscribedFeedUserMapping.refresh_stored_counts(
+                        SubscribedFeedUserMapping.objects.filter(
+                            uuid=subscribed_feed_mapping.uuid
+                        )
+                    )
 
                     subscriptions.add(feed_url)
 
@@ -152,6 +167,14 @@ def setup_subscriptions(
     feed_subscription_progress_entry.status = FeedSubscriptionProgressEntry.FINISHED
     feed_subscription_progress_entry.save(update_fields=("status",))
 
+    if cache is not None:
+        bump_feed_content_versions(generated_feed_uuids, cache)
+        bump_user_state_versions(
+            (feed_subscription_progress_entry.user_id,),
+            ("subscription", "read", "category"),
+            cache,
+        )
+
 
 def _generate_feed(
     url: str,
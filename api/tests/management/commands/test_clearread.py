@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import (
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+    User,
+)
+
+
+class ClearReadTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("test@test.com", None)
+        self.other_user = User.objects.create_user("other@test.com", None)
+
+        self.feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed_entries = [
+            FeedEntry.objects.create(
+                feed=self.feed,
+                url=f"http://example.com/entry{i}.html",
+                content="content",
+                author_name="John Doe",
+            )
+            for i in range(3)
+        ]
+
+        for user in (self.user, self.other_user):
+            SubscribedFeedUserMapping.objects.create(feed=self.feed, user=user)
+
+        # one read through the watermark, and one through a mapping
+        FeedReadWatermark.mark_feeds_read(self.user, [self.feed.uuid])
+        ReadFeedEntryUserMapping.objects.create(
+            feed_entry=feed_entries[0], user=self.other_user
+        )
+
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.all()
+        )
+
+    def _stored_counts(self, user: User) -> tuple[int, int]:
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.get(
+            feed=self.feed, user=user
+        )
+        return (
+            subscribed_feed_mapping.unread_count,
+            subscribed_feed_mapping.read_count,
+        )
+
+    def test_clearread(self):
+        self.assertEqual(self._stored_counts(self.user), (0, 3))
+        self.assertEqual(self._stored_counts(self.other_user), (2, 1))
+
+        call_command("clearread", stderr=StringIO())
+
+        self.assertEqual(self._stored_counts(self.user), (3, 0))
+        self.assertEqual(self._stored_counts(self.other_user), (3, 0))
+        self.assertEqual(
+            Feed.alias_stored_counts(Feed.objects.all(), self.user)
+            .filter(stored_unread_count__gte=1)
+            .count(),
+            1,
+        )
+
+    def test_clearread_user(self):
+        call_command("clearread", "--user-uuid", str(self.user.uuid), stderr=StringIO())
+
+        self.assertEqual(self._stored_counts(self.user), (3, 0))
+        self.assertEqual(self._stored_counts(self.other_user), (2, 1))
@@ -0,0 +1,94 @@
+import datetime
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from api.cache_utils.archived_counts_lookup import save_archived_counts_lookup_to_cache
+from api.cache_utils.counts_lookup import save_total_counts_lookup_to_cache
+from api.models import Feed, FeedEntry, SubscribedFeedUserMapping, User
+
+
+class RemoveDuplicateEntriesTestCase(TestCase):
+    def setUp(self):
+        now = timezone.now()
+
+        self.feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        self.other_feed = Feed.objects.create(
+            feed_url="http://example.com/other/rss.xml",
+            title="Other Feed",
+            home_url="http://example.com/other",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        FeedEntry.objects.bulk_create(
+            FeedEntry(
+                feed=feed,
+                title=f"Entry {i}",
+                # copies of an entry only differ in when they were updated
+                updated_at=now - datetime.timedelta(days=i),
+                url=url,
+                content="content",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+            for i, (feed, url) in enumerate(
+                [
+                    (self.feed, "http://example.com/entry1.html"),
+                    (self.feed, "http://example.com/entry1.html"),
+                    (self.feed, "http://example.com/entry2.html"),
+                    (self.other_feed, "http://example.com/entry1.html"),
+                ]
+            )
+        )
+
+    def test_removeduplicateentries(self):
+        cache = caches["default"]
+
+        save_total_counts_lookup_to_cache(
+            {self.feed.uuid: 3, self.other_feed.uuid: 1}, cache
+        )
+        save_archived_counts_lookup_to_cache(
+            {self.feed.uuid: 0, self.other_feed.uuid: 0}, cache
+        )
+
+        call_command("removeduplicateentries", stderr=StringIO())
+
+        self.assertEqual(FeedEntry.objects.filter(feed=self.feed).count(), 2)
+        self.assertEqual(FeedEntry.objects.filter(feed=self.other_feed).count(), 1)
+
+        # the shared totals of the feeds that lost entries are recomputed on read
+        self.assertIsNone(cache.get(f"total_counts_lookup_{self.feed.uuid}"))
+        self.assertIsNone(cache.get(f"archived_counts_lookup_{self.feed.uuid}"))
+        self.assertEqual(cache.get(f"total_counts_lookup_{self.other_feed.uuid}"), 1)
+        self.assertEqual(cache.get(f"archived_counts_lookup_{self.other_feed.uuid}"), 0)
+
+    def test_removeduplicateentries_stored_counts(self):
+        user = User.objects.create_user("test@test.com", None)
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+            feed=self.feed, user=user
+        )
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.filter(user=user)
+        )
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertEqual(subscribed_feed_mapping.unread_count, 3)
+
+        call_command("removeduplicateentries", stderr=StringIO())
+
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            (2, 0),
+        )
@@ -2,10 +2,19 @@ import datetime
 import logging
 from typing import ClassVar
 
+from django.core.cache import BaseCache, caches
 from django.test import TestCase
 from django.utils import timezone
 
-from api.models import Feed, FeedEntry
+from api.cache_utils.counts_lookup import generate_counts_lookup
+from api.models import (
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+    User,
+)
 from api.tasks.archive_feed_entries import archive_feed_entries
 
 
@@ -69,3 +78,138 @@ class TaskTestCase(TestCase):
         self.assertGreater(
             feed.archive_update_backoff_until, now + datetime.timedelta(minutes=5)
         )
+
+    def test_archive_feed_entries_counts_lookup_cache(self):
+        cache: BaseCache = caches["default"]
+
+        now = timezone.now()
+
+        user = User.objects.create_user("test@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=now + datetime.timedelta(days=-1),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed_entries = FeedEntry.objects.bulk_create(
+            FeedEntry(
+                feed=feed,
+                published_at=now + datetime.timedelta(days=-i),
+                title=f"Feed Entry Title {i}",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content for {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+                is_archived=False,
+            )
+            for i in range(1, 50, 1)
+        )
+
+        # one read entry that stays, and one that gets archived
+        ReadFeedEntryUserMapping.objects.create(feed_entry=feed_entries[0], user=user)
+        ReadFeedEntryUserMapping.objects.create(feed_entry=feed_entries[-1], user=user)
+
+        self.assertEqual(
+            generate_counts_lookup(user, [feed.uuid], cache),
+            {feed.uuid: Feed._CountsDescriptor(47, 2)},
+        )
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            archive_feed_entries(
+                feed, now, datetime.timedelta(days=-30), 5, 60 * 60 * 24, cache
+            )
+
+        expected_counts_lookup = Feed.generate_counts_lookup(user, [feed.uuid])
+        self.assertGreater(expected_counts_lookup[feed.uuid].read_count, 2)
+
+        # a reader that misses the cache between the archiving and the commit
+        # callback already counts the newly archived entries...
+        cache.delete(f"archived_counts_lookup_{feed.uuid}")
+        generate_counts_lookup(user, [feed.uuid], cache)
+        self.assertIsNotNone(cache.get(f"archived_counts_lookup_{feed.uuid}"))
+
+        for callback in callbacks:
+            callback()
+
+        # ...so the shared archived count is dropped, rather than counting them again
+        self.assertIsNone(cache.get(f"archived_counts_lookup_{feed.uuid}"))
+        self.assertEqual(
+            generate_counts_lookup(user, [feed.uuid], cache), expected_counts_lookup
+        )
+
+    def test_archive_feed_entries_stored_counts(self):
+        now = timezone.now()
+
+        reader_user = User.objects.create_user("test1@test.com", None)
+        watermark_user = User.objects.create_user("test2@test.com", None)
+        other_user = User.objects.create_user("test3@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=now + datetime.timedelta(days=-1),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed_entries = FeedEntry.objects.bulk_create(
+            FeedEntry(
+                feed=feed,
+                published_at=now + datetime.timedelta(days=-i),
+                title=f"Feed Entry Title {i}",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content for {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+                is_archived=False,
+            )
+            for i in range(1, 50, 1)
+        )
+
+        ReadFeedEntryUserMapping.objects.create(
+            feed_entry=feed_entries[0], user=reader_user
+        )
+        ReadFeedEntryUserMapping.objects.create(
+            feed_entry=feed_entries[-1], user=reader_user
+        )
+
+        FeedReadWatermark.mark_feeds_read(watermark_user, [feed.uuid])
+        ReadFeedEntryUserMapping.objects.create(
+            feed_entry=FeedEntry.objects.create(
+                feed=feed,
+                published_at=now + datetime.timedelta(days=-60),
+                title="Feed Entry Title After Watermark",
+                url="http://example.com/entry_after_watermark.html",
+                content="Some Entry content",
+                author_name="John Doe",
+                db_updated_at=None,
+                is_archived=False,
+            ),
+            user=watermark_user,
+        )
+
+        for user in (reader_user, watermark_user, other_user):
+            SubscribedFeedUserMapping.objects.create(feed=feed, user=user)
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.all()
+        )
+
+        archive_feed_entries(feed, now, datetime.timedelta(days=-30), 5, 60 * 60 * 24)
+
+        for user in (reader_user, watermark_user, other_user):
+            with self.subTest(user=user.email):
+                subscribed_feed_mapping = SubscribedFeedUserMapping.objects.get(
+                    feed=feed, user=user
+                )
+                self.assertEqual(
+                    (
+                        subscribed_feed_mapping.unread_count,
+                        subscribed_feed_mapping.read_count,
+                    ),
+                    tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]),
+                )
@@ -3,10 +3,15 @@ import logging
 from typing import ClassVar
 
 from django.conf import settings
+from django.core.cache import BaseCache, caches
 from django.test import TestCase
 from django.utils import timezone
 
-from api.models import Feed, FeedEntry
+from api.cache_utils.counts_lookup import (
+    generate_counts_lookup,
+    get_counts_lookup_from_cache,
+)
+from api.models import Feed, FeedEntry, SubscribedFeedUserMapping, User
 from api.tasks.feed_scrape import (
     error_update_backoff_until,
     feed_scrape,
@@ -59,6 +64,119 @@ class TaskTestCase(TestCase):
         self.assertEqual(feed_count, Feed.objects.count())
         self.assertEqual(feed_entry_count, FeedEntry.objects.count())
 
+    def test_feed_scrape_counts_lookup_cache(self):
+        cache: BaseCache = caches["default"]
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Fake Feed",
+            home_url="http://example.com",
+        )
+
+        cached_user = User.objects.create_user("test1@test.com", None)
+        uncached_user = User.objects.create_user("test2@test.com", None)
+
+        SubscribedFeedUserMapping.objects.create(feed=feed, user=cached_user)
+        SubscribedFeedUserMapping.objects.create(feed=feed, user=uncached_user)
+
+        self.assertEqual(
+            generate_counts_lookup(cached_user, [feed.uuid], cache),
+            {feed.uuid: Feed._CountsDescriptor(0, 0)},
+        )
+
+        text: str
+        with open("api/tests/test_files/atom_1.0/well_formed.xml", "r") as f:
+            text = f.read()
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            feed_scrape(feed, text, cache)
+
+        feed_entry_count = FeedEntry.objects.filter(feed=feed).count()
+        self.assertGreater(feed_entry_count, 0)
+
+        # a reader that misses the cache between the insert and the commit
+        # callback already counts the new entries...
+        cache.delete(f"total_counts_lookup_{feed.uuid}")
+        self.assertEqual(
+            generate_counts_lookup(cached_user, [feed.uuid], cache),
+            {feed.uuid: Feed._CountsDescriptor(feed_entry_count, 0)},
+        )
+
+        for callback in callbacks:
+            callback()
+
+        # ...so the shared total is dropped, rather than counting them again
+        self.assertIsNone(cache.get(f"total_counts_lookup_{feed.uuid}"))
+        counts_lookup, missing_feed_uuids = get_counts_lookup_from_cache(
+            cached_user, [feed.uuid], cache
+        )
+        self.assertEqual(counts_lookup, {})
+        self.assertEqual(missing_feed_uuids, [feed.uuid])
+        self.assertEqual(
+            generate_counts_lookup(cached_user, [feed.uuid], cache),
+            {feed.uuid: Feed._CountsDescriptor(feed_entry_count, 0)},
+        )
+
+        # and the other subscriber still only lacks its own read count
+        self.assertIsNone(
+            cache.get(f"read_counts_lookup_{uncached_user.uuid}_{feed.uuid}")
+        )
+
+        # nothing new, so nothing to drop
+        with self.captureOnCommitCallbacks(execute=True):
+            feed_scrape(feed, text, cache)
+
+        self.assertEqual(
+            get_counts_lookup_from_cache(cached_user, [feed.uuid], cache)[0],
+            {feed.uuid: Feed._CountsDescriptor(feed_entry_count, 0)},
+        )
+
+    def test_feed_scrape_counts_lookup_cache_uncached(self):
+        cache: BaseCache = caches["default"]
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Fake Feed",
+            home_url="http://example.com",
+        )
+
+        text: str
+        with open("api/tests/test_files/atom_1.0/well_formed.xml", "r") as f:
+            text = f.read()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            feed_scrape(feed, text, cache)
+
+        self.assertIsNone(cache.get(f"total_counts_lookup_{feed.uuid}"))
+
+    def test_feed_scrape_stored_counts(self):
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Fake Feed",
+            home_url="http://example.com",
+        )
+
+        user = User.objects.create_user("test@test.com", None)
+
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+            feed=feed, user=user
+        )
+
+        text: str
+        with open("api/tests/test_files/atom_1.0/well_formed.xml", "r") as f:
+            text = f.read()
+
+        feed_scrape(feed, text)
+        # nothing new the second time, so the counts mustn't drift
+        feed_scrape(feed, text)
+
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertGreater(subscribed_feed_mapping.unread_count, 0)
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]),
+        )
+
     def test_success_update_backoff_until(self):
         with self.settings(SUCCESS_BACKOFF_SECONDS=60):
             feed = Feed.objects.create(
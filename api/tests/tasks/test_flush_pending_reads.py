@@ -0,0 +1,295 @@
+import importlib
+import logging
+from typing import Any, ClassVar
+from unittest.mock import patch
+
+from django.core.cache import BaseCache, caches
+from django.test import TestCase
+from django.utils import timezone
+
+from api.cache_utils.pending_reads import (
+    get_pending_read_states_from_cache,
+    get_pending_read_user_uuids_from_cache,
+    queue_pending_read,
+)
+from api.models import (
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    FeedReadWatermarkException,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+    User,
+)
+from api.django_extensions import bulk_create_iter
+from api.tasks.flush_pending_reads import flush_pending_reads
+
+# the module itself, as `api.tasks` exports a function of the same name
+flush_pending_reads_module = importlib.import_module("api.tasks.flush_pending_reads")
+
+
+class TaskTestCase(TestCase):
+    old_app_logger_level: ClassVar[int]
+    old_django_logger_level: ClassVar[int]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.old_app_logger_level = logging.getLogger("rss_temple").getEffectiveLevel()
+        cls.old_django_logger_level = logging.getLogger("django").getEffectiveLevel()
+
+        logging.getLogger("rss_temple").setLevel(logging.CRITICAL)
+        logging.getLogger("django").setLevel(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        logging.getLogger("rss_temple").setLevel(cls.old_app_logger_level)
+        logging.getLogger("django").setLevel(cls.old_django_logger_level)
+
+    def test_flush_pending_reads(self):
+        cache: BaseCache = caches["default"]
+
+        try:
+            user = User.objects.create_user("test@test.com", None)
+
+            feed = Feed.objects.create(
+                feed_url="http://example.com/rss.xml",
+                title="Sample Feed",
+                home_url="http://example.com",
+                published_at=timezone.now(),
+                updated_at=None,
+                db_updated_at=None,
+            )
+            subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+                feed=feed, user=user
+            )
+
+            feed_entries = [
+                FeedEntry.objects.create(
+                    feed=feed,
+                    url=f"http://example.com/entry{i}.html",
+                    content="<b>Some HTML Content</b>",
+                    author_name="John Doe",
+                )
+                for i in range(3)
+            ]
+            for feed_entry in feed_entries:
+                feed_entry.refresh_from_db(fields=("ordinal",))
+
+            ReadFeedEntryUserMapping.objects.create(
+                feed_entry=feed_entries[2], user=user
+            )
+            User.objects.filter(uuid=user.uuid).update(read_feed_entries_counter=1)
+            SubscribedFeedUserMapping.refresh_stored_counts(
+                SubscribedFeedUserMapping.objects.filter(user=user)
+            )
+
+            now = timezone.now()
+            queue_pending_read(user, feed_entries[0], now, cache)
+            # only the latest change to an entry is kept
+            queue_pending_read(user, feed_entries[1], None, cache)
+            queue_pending_read(user, feed_entries[1], now, cache)
+            queue_pending_read(user, feed_entries[2], None, cache)
+
+            self.assertEqual(get_pending_read_user_uuids_from_cache(cache), {user.uuid})
+            self.assertEqual(
+                get_pending_read_states_from_cache(user, cache),
+                {
+                    feed_entries[0].ordinal: True,
+                    feed_entries[1].ordinal: True,
+                    feed_entries[2].ordinal: False,
+                },
+            )
+            # not written yet
+            self.assertEqual(
+                ReadFeedEntryUserMapping.objects.filter(user=user).count(), 1
+            )
+
+            self.assertEqual(flush_pending_reads(cache), 3)
+
+            self.assertEqual(
+                set(
+                    ReadFeedEntryUserMapping.objects.filter(user=user).values_list(
+                        "feed_entry_id", "read_at"
+                    )
+                ),
+                {(feed_entries[0].uuid, now), (feed_entries[1].uuid, now)},
+            )
+
+            user.refresh_from_db(fields=("read_feed_entries_counter",))
+            self.assertEqual(user.read_feed_entries_counter, 2)
+
+            subscribed_feed_mapping.refresh_from_db()
+            self.assertEqual(
+                (
+                    subscribed_feed_mapping.unread_count,
+                    subscribed_feed_mapping.read_count,
+                ),
+                (1, 2),
+            )
+
+            self.assertEqual(get_pending_read_user_uuids_from_cache(cache), set())
+            self.assertEqual(get_pending_read_states_from_cache(user, cache), {})
+            self.assertEqual(flush_pending_reads(cache), 0)
+        finally:
+            cache.clear()
+
+    def _create_feed_entries(self, count: int) -> list[FeedEntry]:
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        return [
+            FeedEntry.objects.create(
+                feed=feed,
+                url=f"http://example.com/entry{i}.html",
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+            )
+            for i in range(count)
+        ]
+
+    def test_flush_pending_reads_watermark(self):
+        cache: BaseCache = caches["default"]
+
+        try:
+            user = User.objects.create_user("test@test.com", None)
+
+            feed_entries = self._create_feed_entries(3)
+            feed = feed_entries[0].feed
+            subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+                feed=feed, user=user
+            )
+
+            FeedReadWatermark.mark_feeds_read(user, [feed.uuid])
+            User.objects.filter(uuid=user.uuid).update(read_feed_entries_counter=3)
+            SubscribedFeedUserMapping.refresh_stored_counts(
+                SubscribedFeedUserMapping.objects.filter(user=user)
+            )
+
+            queue_pending_read(user, feed_entries[1], None, cache)
+
+            self.assertEqual(flush_pending_reads(cache), 1)
+
+            # excepted from the watermark, rather than it being spelled out
+            self.assertTrue(FeedReadWatermark.objects.filter(user=user).exists())
+            self.assertEqual(
+                list(
+                    FeedReadWatermarkException.objects.values_list(
+                        "feed_entry_id", flat=True
+                    )
+                ),
+                [feed_entries[1].uuid],
+            )
+            self.assertFalse(
+                ReadFeedEntryUserMapping.objects.filter(user=user).exists()
+            )
+
+            user.refresh_from_db(fields=("read_feed_entries_counter",))
+            self.assertEqual(user.read_feed_entries_counter, 2)
+
+            subscribed_feed_mapping.refresh_from_db()
+            self.assertEqual(
+                (
+                    subscribed_feed_mapping.unread_count,
+                    subscribed_feed_mapping.read_count,
+                ),
+                (1, 2),
+            )
+        finally:
+            cache.clear()
+
+    def test_flush_pending_reads_user_failure(self):
+        cache: BaseCache = caches["default"]
+
+        try:
+            failing_user = User.objects.create_user("test1@test.com", None)
+            user = User.objects.create_user("test2@test.com", None)
+
+            (feed_entry,) = self._create_feed_entries(1)
+
+            now = timezone.now()
+            queue_pending_read(failing_user, feed_entry, now, cache)
+            queue_pending_read(user, feed_entry, now, cache)
+
+            flush_user_pending_reads = (
+                flush_pending_reads_module._flush_user_pending_reads
+            )
+
+            def _flush_user_pending_reads(user_: User, cache_: BaseCache) -> int:
+                if user_.uuid == failing_user.uuid:
+                    raise RuntimeError
+
+                return flush_user_pending_reads(user_, cache_)
+
+            with patch.object(
+                flush_pending_reads_module,
+                "_flush_user_pending_reads",
+                _flush_user_pending_reads,
+            ):
+                self.assertEqual(flush_pending_reads(cache), 1)
+
+            self.assertTrue(
+                ReadFeedEntryUserMapping.objects.filter(
+                    user=user, feed_entry=feed_entry
+                ).exists()
+            )
+            # still queued for the next run
+            self.assertEqual(
+                get_pending_read_user_uuids_from_cache(cache), {failing_user.uuid}
+            )
+
+            self.assertEqual(flush_pending_reads(cache), 1)
+            self.assertTrue(
+                ReadFeedEntryUserMapping.objects.filter(
+                    user=failing_user, feed_entry=feed_entry
+                ).exists()
+            )
+        finally:
+            cache.clear()
+
+    def test_flush_pending_reads_conflict(self):
+        cache: BaseCache = caches["default"]
+
+        try:
+            user = User.objects.create_user("test@test.com", None)
+
+            feed_entries = self._create_feed_entries(2)
+
+            now = timezone.now()
+            for feed_entry in feed_entries:
+                queue_pending_read(user, feed_entry, now, cache)
+
+            def _bulk_create_iter(iterable: Any, *args: Any, **kwargs: Any) -> int:
+                # another writer marks an entry read after the flush has picked
+                # the entries to insert, but before it inserts them
+                objects = list(iterable)
+                ReadFeedEntryUserMapping.objects.create(
+                    feed_entry=feed_entries[0], user=user
+                )
+                return bulk_create_iter(iter(objects), *args, **kwargs)
+
+            with patch.object(
+                flush_pending_reads_module, "bulk_create_iter", _bulk_create_iter
+            ):
+                self.assertEqual(flush_pending_reads(cache), 2)
+
+            self.assertEqual(
+                frozenset(
+                    ReadFeedEntryUserMapping.objects.filter(user=user).values_list(
+                        "feed_entry_id", flat=True
+                    )
+                ),
+                frozenset(fe.uuid for fe in feed_entries),
+            )
+            self.assertEqual(get_pending_read_user_uuids_from_cache(cache), set())
+        finally:
+            cache.clear()
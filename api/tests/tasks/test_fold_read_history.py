@@ -0,0 +1,171 @@
+import datetime
+import logging
+from typing import ClassVar
+
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import (
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    FeedReadWatermarkException,
+    ReadFeedEntryUserMapping,
+    User,
+)
+from api.tasks.fold_read_history import fold_read_history
+
+
+class TaskTestCase(TestCase):
+    old_app_logger_level: ClassVar[int]
+    old_django_logger_level: ClassVar[int]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.old_app_logger_level = logging.getLogger("rss_temple").getEffectiveLevel()
+        cls.old_django_logger_level = logging.getLogger("django").getEffectiveLevel()
+
+        logging.getLogger("rss_temple").setLevel(logging.CRITICAL)
+        logging.getLogger("django").setLevel(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        logging.getLogger("rss_temple").setLevel(cls.old_app_logger_level)
+        logging.getLogger("django").setLevel(cls.old_django_logger_level)
+
+    def test_fold_read_history(self):
+        now = timezone.now()
+
+        user = User.objects.create_user("test@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=now,
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed_entries = [
+            FeedEntry.objects.create(
+                feed=feed,
+                url=f"http://example.com/entry{i}.html",
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+                is_archived=(i == 1),
+            )
+            for i in range(6)
+        ]
+        for feed_entry in feed_entries:
+            feed_entry.refresh_from_db(fields=("ordinal",))
+
+        old_read_at = now + datetime.timedelta(days=-40)
+        # entry 1 is archived, so it doesn't break the run. Entry 3 was read
+        # recently, so the run ends there, and entry 4 stays as a mapping
+        for i, read_at in (
+            (0, old_read_at + datetime.timedelta(days=-1)),
+            (2, old_read_at),
+            (3, now),
+            (4, old_read_at),
+        ):
+            ReadFeedEntryUserMapping.objects.create(
+                feed_entry=feed_entries[i], user=user, read_at=read_at
+            )
+
+        self.assertEqual(fold_read_history(now, datetime.timedelta(days=-30)), 2)
+
+        watermark = FeedReadWatermark.objects.get(user=user, feed=feed)
+        self.assertEqual(watermark.ordinal, feed_entries[2].ordinal)
+        self.assertEqual(watermark.read_at, old_read_at)
+
+        self.assertEqual(
+            set(
+                ReadFeedEntryUserMapping.objects.filter(user=user).values_list(
+                    "feed_entry_id", flat=True
+                )
+            ),
+            {feed_entries[3].uuid, feed_entries[4].uuid},
+        )
+
+        # the read state, and so the counts, are unchanged
+        self.assertEqual(
+            tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]), (1, 5)
+        )
+
+        # later on, the rest of the run is old enough too
+        later = now + datetime.timedelta(days=31)
+        self.assertEqual(fold_read_history(later, datetime.timedelta(days=-30)), 2)
+
+        watermark.refresh_from_db()
+        self.assertEqual(watermark.ordinal, feed_entries[4].ordinal)
+        self.assertEqual(watermark.read_at, now)
+        self.assertFalse(ReadFeedEntryUserMapping.objects.filter(user=user).exists())
+        self.assertEqual(
+            tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]), (1, 5)
+        )
+
+        self.assertEqual(fold_read_history(later, datetime.timedelta(days=-30)), 0)
+
+    def test_fold_read_history_watermark_exception(self):
+        now = timezone.now()
+
+        user = User.objects.create_user("test@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=now,
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        def create_feed_entry(i: int) -> FeedEntry:
+            return FeedEntry.objects.create(
+                feed=feed,
+                url=f"http://example.com/entry{i}.html",
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+            )
+
+        feed_entries = [create_feed_entry(i) for i in range(3)]
+        FeedReadWatermark.mark_feeds_read(user, [feed.uuid])
+        feed_entries.append(create_feed_entry(3))
+
+        # entries 1 and 2 are unread again, and entry 1 then read again
+        FeedReadWatermark.except_covered(
+            user, [feed_entries[1].uuid, feed_entries[2].uuid]
+        )
+        old_read_at = now + datetime.timedelta(days=-40)
+        for i in (1, 3):
+            ReadFeedEntryUserMapping.objects.create(
+                feed_entry=feed_entries[i], user=user, read_at=old_read_at
+            )
+
+        self.assertEqual(
+            tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]), (1, 3)
+        )
+
+        self.assertEqual(fold_read_history(now, datetime.timedelta(days=-30)), 2)
+
+        feed_entries[3].refresh_from_db(fields=("ordinal",))
+        watermark = FeedReadWatermark.objects.get(user=user, feed=feed)
+        self.assertEqual(watermark.ordinal, feed_entries[3].ordinal)
+        self.assertFalse(ReadFeedEntryUserMapping.objects.filter(user=user).exists())
+        # entry 1's mapping is folded, so its exception has to go with it
+        self.assertEqual(
+            list(
+                FeedReadWatermarkException.objects.values_list(
+                    "feed_entry_id", flat=True
+                )
+            ),
+            [feed_entries[2].uuid],
+        )
+        self.assertEqual(
+            tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]), (1, 3)
+        )
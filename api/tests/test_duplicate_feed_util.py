@@ -1,4 +1,5 @@
 from typing import ClassVar
+from unittest.mock import patch
 
 from django.test import TestCase
 from django.utils import timezone
@@ -7,7 +8,16 @@ from api.duplicate_feed_util import (
     DuplicateFeedTuple,
     convert_duplicate_feeds_to_alternate_feed_urls,
 )
-from api.models import Feed, FeedEntry, ReadFeedEntryUserMapping, User, UserCategory
+from api.models import (
+    AlternateFeedURL,
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+    User,
+    UserCategory,
+)
 
 
 class DuplicateFeedUtilTestCase(TestCase):
@@ -257,3 +267,195 @@ class DuplicateFeedUtilTestCase(TestCase):
         )
 
         self.assertTrue(user_category.feeds.filter(uuid=feed2.uuid).exists())
+
+    def test_convert_duplicate_feeds_to_alternate_feed_urls_stored_counts(self):
+        feed1 = Feed.objects.create(
+            feed_url="http://example.com/rss1.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed2 = Feed.objects.create(
+            feed_url="http://example.com/rss2.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        for i in range(3):
+            for feed in (feed1, feed2):
+                FeedEntry.objects.create(
+                    id=None,
+                    feed=feed,
+                    created_at=None,
+                    updated_at=None,
+                    title=f"Feed Entry Title {i}",
+                    url=f"http://example.com/entry{i}.html",
+                    content="Some Entry content",
+                    author_name="John Doe",
+                    db_updated_at=None,
+                )
+        FeedEntry.objects.create(
+            id=None,
+            feed=feed2,
+            created_at=None,
+            updated_at=None,
+            title="Feed Entry Title 3",
+            url="http://example.com/entry3.html",
+            content="Some Entry content",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+
+        # subscribed to the duplicate only, with all of its entries read
+        DuplicateFeedUtilTestCase.user.read_feed_entries.add(
+            *FeedEntry.objects.filter(feed=feed1)
+        )
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+            feed=feed1, user=DuplicateFeedUtilTestCase.user
+        )
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.filter(uuid=subscribed_feed_mapping.uuid)
+        )
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            (0, 3),
+        )
+
+        convert_duplicate_feeds_to_alternate_feed_urls(
+            [DuplicateFeedTuple(feed2, feed1)]
+        )
+
+        # now counted against the original feed, which has one more entry
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertEqual(subscribed_feed_mapping.feed_id, feed2.uuid)
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            (1, 3),
+        )
+
+    def test_convert_duplicate_feeds_to_alternate_feed_urls_readwatermark(self):
+        feed1 = Feed.objects.create(
+            feed_url="http://example.com/rss1.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed2 = Feed.objects.create(
+            feed_url="http://example.com/rss2.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed2_entries: list[FeedEntry] = []
+        for i in range(2):
+            FeedEntry.objects.create(
+                id=None,
+                feed=feed1,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry Title {i}",
+                url=f"http://example.com/entry{i}.html",
+                content="Some Entry content",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+            feed2_entries.append(
+                FeedEntry.objects.create(
+                    id=None,
+                    feed=feed2,
+                    created_at=None,
+                    updated_at=None,
+                    title=f"Feed Entry Title {i}",
+                    url=f"http://example.com/entry{i}.html",
+                    content="Some Entry content",
+                    author_name="John Doe",
+                    db_updated_at=None,
+                )
+            )
+
+        # read through the watermark alone
+        FeedReadWatermark.mark_feeds_read(DuplicateFeedUtilTestCase.user, [feed1.uuid])
+        self.assertFalse(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=DuplicateFeedUtilTestCase.user
+            ).exists()
+        )
+
+        convert_duplicate_feeds_to_alternate_feed_urls(
+            [DuplicateFeedTuple(feed2, feed1)]
+        )
+
+        self.assertFalse(FeedReadWatermark.objects.exists())
+        self.assertEqual(
+            frozenset(
+                ReadFeedEntryUserMapping.objects.filter(
+                    user=DuplicateFeedUtilTestCase.user
+                ).values_list("feed_entry_id", flat=True)
+            ),
+            frozenset(fe.uuid for fe in feed2_entries),
+        )
+
+    def test_convert_duplicate_feeds_to_alternate_feed_urls_readwatermark_rollback(
+        self,
+    ):
+        feed1 = Feed.objects.create(
+            feed_url="http://example.com/rss1.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed2 = Feed.objects.create(
+            feed_url="http://example.com/rss2.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        FeedEntry.objects.create(
+            id=None,
+            feed=feed1,
+            created_at=None,
+            updated_at=None,
+            title="Feed Entry Title",
+            url="http://example.com/entry1.html",
+            content="Some Entry content",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+
+        FeedReadWatermark.mark_feeds_read(DuplicateFeedUtilTestCase.user, [feed1.uuid])
+
+        with patch.object(
+            AlternateFeedURL.objects, "bulk_create", side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                convert_duplicate_feeds_to_alternate_feed_urls(
+                    [DuplicateFeedTuple(feed2, feed1)]
+                )
+
+        # nothing of the merge is left behind, the watermark included
+        self.assertTrue(FeedReadWatermark.objects.filter(feed=feed1).exists())
+        self.assertFalse(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=DuplicateFeedUtilTestCase.user
+            ).exists()
+        )
+        self.assertTrue(Feed.objects.filter(uuid=feed1.uuid).exists())
@@ -219,6 +219,35 @@ class AllFieldsTestCase(TestCase):
 
                 self.assertTrue(has_run)
 
+    def test_values(self):
+        for key, generator in AllFieldsTestCase.TRIALS.items():
+            with self.subTest(key=key):
+                db_objs = generator()
+
+                has_run = False
+                for field_map in fieldutils.get_all_field_maps(
+                    key, fields.field_configs
+                ):
+                    row_plan = fieldutils.get_row_plan(key, [field_map])
+                    if row_plan is None:
+                        continue
+
+                    for db_obj, row in zip(
+                        db_objs.order_by("uuid").only(*field_map["only_fields"]),
+                        db_objs.order_by("uuid").values_list(*row_plan.names),
+                    ):
+                        self.assertEqual(
+                            row_plan.generate_return_object(row),
+                            {
+                                field_map["field_name"]: field_map["accessor"](
+                                    AllFieldsTestCase.MockRequest(), db_obj, None
+                                )
+                            },
+                        )
+                        has_run = True
+
+                self.assertTrue(has_run)
+
 
 class FieldFnsTestCase(TestCase):
     old_logger_level: ClassVar[int]
@@ -1,12 +1,14 @@
 import datetime
 import logging
 import random
+import threading
+import unittest
 from typing import ClassVar
 
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import connection, models, transaction
 from django.db.utils import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils import timezone
 
 from api.models import (
@@ -17,12 +19,15 @@ from api.models import (
     ClassifierLabelUserCalculated,
     Feed,
     FeedEntry,
+    FeedReadWatermark,
+    FeedReadWatermarkException,
     Language,
     ReadFeedEntryUserMapping,
     SubscribedFeedUserMapping,
     User,
     UserCategory,
 )
+from api.cache_utils.subscription_datas import SubscriptionData
 from api.tests.utils import reusable_captcha_key, reusable_captcha_seed
 
 
@@ -292,6 +297,389 @@ class FeedTestCase(TestCase):
         self.assertEqual(feed.unread_count(user), 0)
         self.assertEqual(feed.read_count(user), 0)
 
+    def test_counts_lookup_grouped(self):
+        user = User.objects.create_user("test_fields@test.com", None)
+
+        feed1 = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        feed2 = Feed.objects.create(
+            feed_url="http://example2.com/rss.xml",
+            title="Sample Feed 2",
+            home_url="http://example2.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        read_feed_entry = FeedEntry.objects.create(
+            feed=feed1,
+            url="http://example.com/entry1.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+        FeedEntry.objects.create(
+            feed=feed1,
+            url="http://example.com/entry2.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+        FeedEntry.objects.create(
+            feed=feed1,
+            url="http://example.com/entry3.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+            is_archived=True,
+        )
+
+        ReadFeedEntryUserMapping.objects.create(feed_entry=read_feed_entry, user=user)
+
+        counts_lookup = Feed.generate_counts_lookup__grouped(
+            user, [feed1.uuid, feed2.uuid]
+        )
+
+        self.assertEqual(
+            counts_lookup,
+            {
+                feed1.uuid: Feed._CountsDescriptor(1, 2),
+                feed2.uuid: Feed._CountsDescriptor(0, 0),
+            },
+        )
+        self.assertEqual(
+            counts_lookup,
+            Feed.generate_counts_lookup(user, [feed1.uuid, feed2.uuid]),
+        )
+
+    def test_annotate_subscription_data_strategies(self):
+        user = User.objects.create_user("test_fields@test.com", None)
+        other_user = User.objects.create_user("test_fields2@test.com", None)
+
+        feeds = [
+            Feed.objects.create(
+                feed_url=f"http://example.com/rss{i}.xml",
+                title=title,
+                home_url="http://example.com",
+                published_at=timezone.now(),
+                updated_at=None,
+                db_updated_at=None,
+            )
+            for i, title in enumerate(("B Feed", "D Feed", "C Feed"))
+        ]
+
+        SubscribedFeedUserMapping.objects.create(
+            feed=feeds[0], user=user, custom_feed_title="A Custom Title"
+        )
+        SubscribedFeedUserMapping.objects.create(feed=feeds[1], user=user)
+        for feed in feeds:
+            SubscribedFeedUserMapping.objects.create(
+                feed=feed, user=other_user, custom_feed_title=f"Other {feed.title}"
+            )
+
+        subscription_datas: list[SubscriptionData] = [
+            {"uuid": feeds[0].uuid, "custom_title": "A Custom Title"},
+            {"uuid": feeds[1].uuid, "custom_title": None},
+        ]
+
+        for literal_max_size, page_size in ((500, 10), (0, 10), (0, None)):
+            with (
+                self.subTest(literal_max_size=literal_max_size, page_size=page_size),
+                self.settings(USER_DATA_LITERAL_MAX_SIZE=literal_max_size),
+            ):
+                qs = Feed.annotate_subscription_data(
+                    Feed.objects.all(),
+                    user,
+                    subscription_datas=subscription_datas,
+                    page_size=page_size,
+                )
+
+                self.assertEqual(
+                    {f.uuid: (f.custom_title, f.is_subscribed) for f in qs},
+                    {
+                        feeds[0].uuid: ("A Custom Title", True),
+                        feeds[1].uuid: (None, True),
+                        feeds[2].uuid: (None, False),
+                    },
+                )
+
+                # the `calculatedTitle` sort and search
+                self.assertEqual(
+                    list(
+                        qs.order_by(
+                            models.F("custom_title").asc(nulls_last=True),
+                            models.F("title").asc(),
+                        ).values_list("uuid", flat=True)
+                    ),
+                    [feeds[0].uuid, feeds[2].uuid, feeds[1].uuid],
+                )
+                self.assertEqual(
+                    list(
+                        qs.filter(
+                            models.Q(title__icontains="custom")
+                            | models.Q(custom_title__icontains="custom")
+                        ).values_list("uuid", flat=True)
+                    ),
+                    [feeds[0].uuid],
+                )
+
+    def test_stored_counts(self):
+        user = User.objects.create_user("test_fields@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        read_feed_entry = FeedEntry.objects.create(
+            feed=feed,
+            url="http://example.com/entry1.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+        FeedEntry.objects.create(
+            feed=feed,
+            url="http://example.com/entry2.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+        FeedEntry.objects.create(
+            feed=feed,
+            url="http://example.com/entry3.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+            is_archived=True,
+        )
+
+        ReadFeedEntryUserMapping.objects.create(feed_entry=read_feed_entry, user=user)
+
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+            feed=feed, user=user
+        )
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.filter(user=user)
+        )
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            tuple(Feed.generate_counts_lookup(user, [feed.uuid])[feed.uuid]),
+        )
+
+        SubscribedFeedUserMapping.increment_stored_read_counts(user, {feed.uuid: 1})
+        subscribed_feed_mapping.refresh_from_db()
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            (0, 3),
+        )
+
+        qs = Feed.alias_stored_counts(Feed.objects.all(), user)
+        self.assertEqual(qs.filter(stored_unread_count=0).count(), 1)
+        self.assertEqual(qs.filter(stored_read_count__gt=3).count(), 0)
+
+    def test_read_watermark(self):
+        user = User.objects.create_user("test_fields@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed_entries = [
+            FeedEntry.objects.create(
+                feed=feed,
+                url=f"http://example.com/entry{i}.html",
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+            )
+            for i in range(3)
+        ]
+
+        ReadFeedEntryUserMapping.objects.create(feed_entry=feed_entries[0], user=user)
+
+        self.assertEqual(
+            FeedReadWatermark.mark_feeds_read(user, [feed.uuid]), {feed.uuid: 2}
+        )
+        # covered mappings are folded into the watermark
+        self.assertFalse(ReadFeedEntryUserMapping.objects.filter(user=user).exists())
+
+        FeedEntry.objects.create(
+            feed=feed,
+            url="http://example.com/entry3.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+            feed=feed, user=user
+        )
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.filter(user=user)
+        )
+        subscribed_feed_mapping.refresh_from_db()
+
+        for generate_counts_lookup in (
+            Feed.generate_counts_lookup,
+            Feed.generate_counts_lookup__fast,
+            Feed.generate_counts_lookup__grouped,
+        ):
+            with self.subTest(generate_counts_lookup=generate_counts_lookup.__name__):
+                self.assertEqual(
+                    tuple(generate_counts_lookup(user, [feed.uuid])[feed.uuid]),
+                    (1, 3),
+                )
+        self.assertEqual(
+            (subscribed_feed_mapping.unread_count, subscribed_feed_mapping.read_count),
+            (1, 3),
+        )
+
+        self.assertEqual(
+            FeedReadWatermark.mark_feeds_read(user, [feed.uuid]), {feed.uuid: 1}
+        )
+
+    def test_read_watermark_exception(self):
+        user = User.objects.create_user("test_fields@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        feed_entries = [
+            FeedEntry.objects.create(
+                feed=feed,
+                url=f"http://example.com/entry{i}.html",
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+            )
+            for i in range(100)
+        ]
+
+        subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
+            feed=feed, user=user
+        )
+
+        FeedReadWatermark.mark_feeds_read(user, [feed.uuid])
+
+        # only the entry itself is excepted, rather than the whole watermark being
+        # spelled out as mappings
+        self.assertEqual(
+            FeedReadWatermark.except_covered(user, [feed_entries[1].uuid]),
+            {feed.uuid: 1},
+        )
+        self.assertEqual(FeedReadWatermarkException.objects.count(), 1)
+        self.assertTrue(FeedReadWatermark.objects.filter(user=user).exists())
+        self.assertFalse(ReadFeedEntryUserMapping.objects.filter(user=user).exists())
+
+        # already excepted
+        self.assertEqual(
+            FeedReadWatermark.except_covered(user, [feed_entries[1].uuid]), {}
+        )
+
+        def assert_read(expected_read_uuids: set, expected_read_count: int):
+            for generate_counts_lookup in (
+                Feed.generate_counts_lookup,
+                Feed.generate_counts_lookup__fast,
+                Feed.generate_counts_lookup__grouped,
+            ):
+                with self.subTest(
+                    generate_counts_lookup=generate_counts_lookup.__name__
+                ):
+                    self.assertEqual(
+                        tuple(generate_counts_lookup(user, [feed.uuid])[feed.uuid]),
+                        (100 - expected_read_count, expected_read_count),
+                    )
+
+            SubscribedFeedUserMapping.refresh_stored_counts(
+                SubscribedFeedUserMapping.objects.filter(user=user)
+            )
+            subscribed_feed_mapping.refresh_from_db()
+            self.assertEqual(
+                (
+                    subscribed_feed_mapping.unread_count,
+                    subscribed_feed_mapping.read_count,
+                ),
+                (100 - expected_read_count, expected_read_count),
+            )
+
+            self.assertEqual(
+                FeedEntry.generate_read_at_lookup(
+                    user, [fe.uuid for fe in feed_entries]
+                ).keys(),
+                expected_read_uuids,
+            )
+
+            for literal_max_size, page_size in ((500, 10), (0, 10), (0, None)):
+                with (
+                    self.subTest(
+                        literal_max_size=literal_max_size, page_size=page_size
+                    ),
+                    self.settings(
+                        USER_DATA_LITERAL_MAX_SIZE=literal_max_size,
+                        USER_DATA_EXISTS_MAX_PAGE_SIZE=100,
+                    ),
+                ):
+                    self.assertEqual(
+                        {
+                            fe.uuid
+                            for fe in FeedEntry.annotate_user_data(
+                                FeedEntry.objects.all(),
+                                user,
+                                read_feed_entry_ordinals=list(
+                                    FeedEntry.objects.filter(
+                                        readfeedentryusermapping__user=user
+                                    ).values_list("ordinal", flat=True)
+                                ),
+                                page_size=page_size,
+                            ).filter(is_read=True)
+                        },
+                        expected_read_uuids,
+                    )
+
+        all_uuids = {fe.uuid for fe in feed_entries}
+        assert_read(all_uuids - {feed_entries[1].uuid}, 99)
+
+        # read again, so a mapping as usual
+        ReadFeedEntryUserMapping.objects.create(feed_entry=feed_entries[1], user=user)
+        assert_read(all_uuids, 100)
+        ReadFeedEntryUserMapping.objects.filter(user=user).delete()
+
+        # the watermark's own entries
+        watermark = FeedReadWatermark.objects.get(user=user)
+        watermark.materialize()
+        self.assertEqual(
+            frozenset(
+                ReadFeedEntryUserMapping.objects.filter(user=user).values_list(
+                    "feed_entry_id", flat=True
+                )
+            ),
+            all_uuids - {feed_entries[1].uuid},
+        )
+        self.assertFalse(FeedReadWatermarkException.objects.exists())
+
+        # marking the feed read again drops the exceptions
+        FeedReadWatermark.mark_feeds_read(user, [feed.uuid])
+        FeedReadWatermark.except_covered(user, [feed_entries[1].uuid])
+        self.assertEqual(
+            FeedReadWatermark.mark_feeds_read(user, [feed.uuid]), {feed.uuid: 1}
+        )
+        self.assertFalse(FeedReadWatermarkException.objects.exists())
+        assert_read(all_uuids, 100)
+
     def test_str(self):
         feed = Feed(
             feed_url="http://example.com/rss.xml",
@@ -340,6 +728,101 @@ class FeedEntryTestCase(TestCase):
         self.assertTrue(hasattr(feed_entry, "is_read"))
         self.assertTrue(hasattr(feed_entry, "is_favorite"))
 
+    def test_annotate_user_data_strategies(self):
+        user = User.objects.create_user("test_fields@test.com", None)
+
+        subscribed_feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        unsubscribed_feed = Feed.objects.create(
+            feed_url="http://example2.com/rss.xml",
+            title="Sample Feed 2",
+            home_url="http://example2.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        SubscribedFeedUserMapping.objects.create(feed=subscribed_feed, user=user)
+
+        feed_entries = [
+            FeedEntry.objects.create(
+                feed=feed,
+                url=f"http://example.com/entry{i}.html",
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+                is_archived=is_archived,
+            )
+            for i, (feed, is_archived) in enumerate(
+                (
+                    (subscribed_feed, False),
+                    (subscribed_feed, False),
+                    (subscribed_feed, True),
+                    (unsubscribed_feed, False),
+                )
+            )
+        ]
+
+        ReadFeedEntryUserMapping.objects.create(feed_entry=feed_entries[0], user=user)
+        user.favorite_feed_entries.add(feed_entries[1])
+
+        # another user's state mustn't leak in, or duplicate rows through the joins
+        other_user = User.objects.create_user("test_fields2@test.com", None)
+        SubscribedFeedUserMapping.objects.create(
+            feed=unsubscribed_feed, user=other_user
+        )
+        for feed_entry in feed_entries:
+            ReadFeedEntryUserMapping.objects.create(
+                feed_entry=feed_entry, user=other_user
+            )
+            other_user.favorite_feed_entries.add(feed_entry)
+
+        ordinals = dict(FeedEntry.objects.values_list("uuid", "ordinal"))
+
+        expected = {
+            feed_entries[0].uuid: (True, True, False),
+            feed_entries[1].uuid: (True, False, True),
+            feed_entries[2].uuid: (True, True, False),
+            feed_entries[3].uuid: (False, False, False),
+        }
+
+        for literal_max_size, exists_max_page_size, page_size in (
+            (500, 100, 10),
+            (0, 100, 10),
+            (0, 100, None),
+        ):
+            with (
+                self.subTest(literal_max_size=literal_max_size, page_size=page_size),
+                self.settings(
+                    USER_DATA_LITERAL_MAX_SIZE=literal_max_size,
+                    USER_DATA_EXISTS_MAX_PAGE_SIZE=exists_max_page_size,
+                ),
+            ):
+                qs = FeedEntry.annotate_user_data(
+                    FeedEntry.objects.all(),
+                    user,
+                    subscription_datas=[
+                        {"uuid": subscribed_feed.uuid, "custom_title": None}
+                    ],
+                    read_feed_entry_ordinals=[ordinals[feed_entries[0].uuid]],
+                    favorite_feed_entry_ordinals=[ordinals[feed_entries[1].uuid]],
+                    page_size=page_size,
+                )
+
+                self.assertEqual(
+                    {
+                        fe.uuid: (fe.is_from_subscription, fe.is_read, fe.is_favorite)
+                        for fe in qs
+                    },
+                    expected,
+                )
+                self.assertEqual(qs.filter(is_read=False).count(), 2)
+
     def test_eq(self):
         feed = Feed(
             feed_url="http://example.com/rss.xml",
@@ -499,6 +982,86 @@ class FeedEntryTestCase(TestCase):
         self.assertEqual(str(feed_entry), "Title - http://example.com/entry1.html")
 
 
+@unittest.skipUnless(
+    connection.vendor == "postgresql",
+    "SQLite only has the one writer at a time, so there's nothing to interleave",
+)
+class FeedEntryOrdinalTestCase(TransactionTestCase):
+    def test_ordinal_commit_order(self):
+        user = User.objects.create_user("test@test.com", None)
+
+        feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        def create_feed_entry(url: str) -> FeedEntry:
+            return FeedEntry.objects.create(
+                feed=feed,
+                url=url,
+                content="<b>Some HTML Content</b>",
+                author_name="John Doe",
+            )
+
+        create_feed_entry("http://example.com/entry0.html")
+
+        in_flight_inserted = threading.Event()
+        in_flight_release = threading.Event()
+
+        def in_flight_scrape():
+            try:
+                with transaction.atomic():
+                    create_feed_entry("http://example.com/in_flight.html")
+                    in_flight_inserted.set()
+                    in_flight_release.wait(10.0)
+            finally:
+                connection.close()
+
+        def later_scrape():
+            try:
+                create_feed_entry("http://example.com/later.html")
+            finally:
+                connection.close()
+
+        in_flight_thread = threading.Thread(target=in_flight_scrape)
+        in_flight_thread.start()
+        self.assertTrue(in_flight_inserted.wait(10.0))
+
+        # an insert into the same feed waits for the one in flight to commit...
+        later_thread = threading.Thread(target=later_scrape)
+        later_thread.start()
+        later_thread.join(0.5)
+        self.assertTrue(later_thread.is_alive())
+
+        # ...so the highest committed ordinal is still below the in-flight one
+        FeedReadWatermark.mark_feeds_read(user, [feed.uuid])
+
+        in_flight_release.set()
+        in_flight_thread.join(10.0)
+        later_thread.join(10.0)
+
+        in_flight_feed_entry = FeedEntry.objects.get(
+            url="http://example.com/in_flight.html"
+        )
+        later_feed_entry = FeedEntry.objects.get(url="http://example.com/later.html")
+        assert in_flight_feed_entry.ordinal is not None
+        assert later_feed_entry.ordinal is not None
+        self.assertLess(in_flight_feed_entry.ordinal, later_feed_entry.ordinal)
+
+        self.assertEqual(
+            set(
+                FeedEntry.objects.filter(feed=feed)
+                .exclude(FeedReadWatermark.covers(user))
+                .values_list("uuid", flat=True)
+            ),
+            {in_flight_feed_entry.uuid, later_feed_entry.uuid},
+        )
+
+
 class CaptchaTestCase(TestCase):
     def _generate_captcha(self):
         return Captcha(
@@ -0,0 +1,149 @@
+import random
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from api.cache_utils.ordinal_bitmap import (
+    delete_ordinal_bitmap_cache,
+    get_ordinal_bitmap_from_cache,
+    update_ordinal_bitmap_cache,
+)
+from api.ordinal_bitmap import OrdinalBitmap
+
+
+class OrdinalBitmapTestCase(SimpleTestCase):
+    def test_membership(self):
+        ordinals = {1, 2, 65535, 65536, 70000, (1 << 40) + 5}
+        bitmap = OrdinalBitmap(ordinals)
+
+        self.assertEqual(len(bitmap), len(ordinals))
+        self.assertEqual(list(bitmap), sorted(ordinals))
+
+        for ordinal in ordinals:
+            with self.subTest(ordinal=ordinal):
+                self.assertIn(ordinal, bitmap)
+
+        for ordinal in (0, 3, 65534, 65537, 1 << 40):
+            with self.subTest(ordinal=ordinal):
+                self.assertNotIn(ordinal, bitmap)
+
+        self.assertNotIn("1", bitmap)
+
+        self.assertFalse(OrdinalBitmap())
+        self.assertTrue(bitmap)
+
+    def test_add_discard(self):
+        bitmap = OrdinalBitmap()
+
+        # enough in one chunk to convert to a bitmap container, and back again
+        ordinals = list(range(0, 20000, 3))
+        for ordinal in ordinals:
+            bitmap.add(ordinal)
+        bitmap.add(ordinals[0])
+
+        self.assertEqual(list(bitmap), ordinals)
+
+        for ordinal in ordinals[:-10]:
+            bitmap.discard(ordinal)
+        bitmap.discard(ordinals[0])
+        bitmap.discard(1 << 20)
+
+        self.assertEqual(list(bitmap), ordinals[-10:])
+
+        for ordinal in ordinals[-10:]:
+            bitmap.discard(ordinal)
+
+        self.assertEqual(len(bitmap), 0)
+        self.assertFalse(bitmap)
+
+    def test_bytes_roundtrip(self):
+        rng = random.Random(0)
+        ordinals = {rng.randrange(0, 1_000_000) for _ in range(2000)}
+        # plus one dense chunk
+        ordinals.update(range(200000, 210000))
+
+        bitmap = OrdinalBitmap(ordinals)
+        data = bitmap.to_bytes()
+
+        self.assertEqual(OrdinalBitmap.from_bytes(data), bitmap)
+        self.assertEqual(list(OrdinalBitmap.from_bytes(data)), sorted(ordinals))
+        # far smaller than the equivalent 16-byte UUIDs
+        self.assertLess(len(data), len(ordinals) * 16 // 4)
+
+        self.assertEqual(
+            OrdinalBitmap.from_bytes(OrdinalBitmap().to_bytes()), OrdinalBitmap()
+        )
+
+        with self.assertRaises(ValueError):
+            OrdinalBitmap.from_bytes(
+                b"\x01\x00\x00\x00" + b"\x00" * 8 + b"\x09" + b"\x00" * 4
+            )
+
+    def test_eq(self):
+        self.assertEqual(OrdinalBitmap([1, 2]), OrdinalBitmap([2, 1]))
+        self.assertNotEqual(OrdinalBitmap([1, 2]), OrdinalBitmap([1]))
+        self.assertNotEqual(OrdinalBitmap([1]), [1])
+        self.assertEqual(repr(OrdinalBitmap([1, 2])), "OrdinalBitmap(len=2)")
+
+
+class OrdinalBitmapCacheTestCase(SimpleTestCase):
+    def test_writethrough(self):
+        cache = LocMemCache("ordinal_bitmap_test", {})
+        rows = {1, 2}
+
+        bitmap, cache_hit = get_ordinal_bitmap_from_cache(
+            "key", "lock", lambda: rows, cache
+        )
+        self.assertEqual(list(bitmap), [1, 2])
+        self.assertFalse(cache_hit)
+
+        rows.add(3)
+        rows.discard(1)
+        update_ordinal_bitmap_cache("key", "lock", (3,), (1,), cache)
+
+        bitmap, cache_hit = get_ordinal_bitmap_from_cache(
+            "key", "lock", lambda: rows, cache
+        )
+        self.assertEqual(list(bitmap), [2, 3])
+        self.assertTrue(cache_hit)
+
+        delete_ordinal_bitmap_cache("key", cache)
+        # nothing cached, so nothing to apply the write to
+        update_ordinal_bitmap_cache("key", "lock", (4,), (), cache)
+
+        bitmap, cache_hit = get_ordinal_bitmap_from_cache(
+            "key", "lock", lambda: rows, cache
+        )
+        self.assertEqual(list(bitmap), [2, 3])
+        self.assertFalse(cache_hit)
+
+    def test_lost_update(self):
+        cache = LocMemCache("ordinal_bitmap_test", {})
+        rows = {1}
+
+        def load_racing_write():
+            # the load reads the rows, then a write lands before it saves
+            loaded = set(rows)
+            rows.add(2)
+            update_ordinal_bitmap_cache("key", "lock", (2,), (), cache)
+            return loaded
+
+        bitmap, cache_hit = get_ordinal_bitmap_from_cache(
+            "key", "lock", load_racing_write, cache
+        )
+        self.assertEqual(list(bitmap), [1])
+        self.assertFalse(cache_hit)
+
+        # so the stale load wasn't saved
+        bitmap, cache_hit = get_ordinal_bitmap_from_cache(
+            "key", "lock", lambda: rows, cache
+        )
+        self.assertEqual(list(bitmap), [1, 2])
+        self.assertFalse(cache_hit)
+
+        # a bitmap which missed a write is dropped by the next write, rather than
+        # having it applied on top
+        version = cache.get("key__version")
+        cache.set("key__version", version + 1, None)
+        update_ordinal_bitmap_cache("key", "lock", (3,), (), cache)
+        self.assertIsNone(cache.get("key"))
@@ -0,0 +1,96 @@
+from typing import ClassVar
+
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Feed, FeedEntry, ReadFeedEntryUserMapping, User
+from api.query_total_count import estimate_total_count, plan_count_queryset
+
+
+class QueryTotalCountTestCase(TestCase):
+    user: ClassVar[User]
+    feed: ClassVar[Feed]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = User.objects.create_user("test@test.com", None)
+
+        cls.feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        for i in range(3):
+            feed_entry = FeedEntry.objects.create(
+                feed=cls.feed,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content="Some Entry content",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+            if i == 0:
+                ReadFeedEntryUserMapping.objects.create(
+                    feed_entry=feed_entry, user=cls.user
+                )
+
+    def _plan(self, search: list[Q]):
+        return plan_count_queryset(
+            FeedEntry.objects.all(),
+            search,
+            (lambda qs: FeedEntry.annotate_user_data(qs, self.user),),
+        )
+
+    def _count_sql(self, search: list[Q]) -> tuple[int, str]:
+        with CaptureQueriesContext(connection) as context:
+            count = self._plan(search).count()
+
+        (query,) = context.captured_queries
+        return count, query["sql"]
+
+    def test_plan_count_queryset(self):
+        count, sql = self._count_sql([Q(title__icontains="Title")])
+        self.assertEqual(count, 3)
+        self.assertNotIn(ReadFeedEntryUserMapping._meta.db_table, sql)
+
+        count, sql = self._count_sql([Q(is_read=False)])
+        self.assertEqual(count, 2)
+        self.assertIn(ReadFeedEntryUserMapping._meta.db_table, sql)
+
+        # referenced from deeper in the filter
+        count, sql = self._count_sql(
+            [Q(title__icontains="Title") & (Q(is_read=True) | Q(is_favorite=True))]
+        )
+        self.assertEqual(count, 1)
+        self.assertIn(ReadFeedEntryUserMapping._meta.db_table, sql)
+
+        # subqueries only reach the outer query through `OuterRef`s
+        count, sql = self._count_sql(
+            [
+                Q(
+                    Exists(
+                        FeedEntry.objects.filter(
+                            uuid=OuterRef("uuid"), title__icontains="Title"
+                        )
+                    )
+                )
+            ]
+        )
+        self.assertEqual(count, 3)
+        self.assertNotIn(ReadFeedEntryUserMapping._meta.db_table, sql)
+
+    def test_estimate_total_count(self):
+        feed_entries = self._plan([])
+
+        self.assertEqual(estimate_total_count(feed_entries, 10), (3, True))
+        self.assertEqual(estimate_total_count(feed_entries, 3), (3, True))
+        self.assertEqual(estimate_total_count(feed_entries, 2), (2, False))
@@ -29,8 +29,11 @@ class AllSearchesTestCase(TestCase):
         },
         "feed": {
             "get_queryset": lambda: Feed.annotate_search_vectors(
-                Feed.annotate_subscription_data(
-                    Feed.objects.all(), AllSearchesTestCase.user
+                Feed.alias_stored_counts(
+                    Feed.annotate_subscription_data(
+                        Feed.objects.all(), AllSearchesTestCase.user
+                    ),
+                    AllSearchesTestCase.user,
                 ),
                 "english",
             ),
@@ -52,6 +55,10 @@ class AllSearchesTestCase(TestCase):
                 "customTitle_null": ["true", "false"],
                 "calculatedTitle": ["calculated title"],
                 "calculatedTitle_exact": ["calculated title"],
+                "unreadCount": ["1|100"],
+                "unreadCount_exact": ["0"],
+                "readCount": ["1|100"],
+                "readCount_exact": ["0"],
             },
         },
         "feedentry": {
@@ -21,8 +21,11 @@ class AllSortsTestCase(TestCase):
         },
         "feed": {
             "get_queryset": lambda: Feed.annotate_search_vectors(
-                Feed.annotate_subscription_data(
-                    Feed.objects.all(), AllSortsTestCase.user
+                Feed.alias_stored_counts(
+                    Feed.annotate_subscription_data(
+                        Feed.objects.all(), AllSortsTestCase.user
+                    ),
+                    AllSortsTestCase.user,
                 ),
                 "english",
             ),
@@ -0,0 +1,110 @@
+import time
+import uuid
+from unittest.mock import patch
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+
+from api.cache_utils.stable_query import (
+    get_stable_query_from_cache,
+    save_stable_query_to_cache,
+)
+
+
+class StableQueryCacheTestCase(SimpleTestCase):
+    def test_pages(self):
+        uuids = [uuid.uuid4() for _ in range(25)]
+
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                with override_settings(
+                    STABLE_QUERY_SEGMENT_SIZE=10, STABLE_QUERY_SEGMENT_COMPRESS=compress
+                ):
+                    cache = LocMemCache("stable_query_test", {})
+                    cache.clear()
+
+                    self.assertEqual(
+                        save_stable_query_to_cache("token", iter(uuids), cache), 25
+                    )
+
+                for skip, count in (
+                    (0, 5),
+                    (0, 10),
+                    (5, 10),
+                    (8, 15),
+                    (20, 10),
+                    (0, 50),
+                    (25, 5),
+                    (30, 5),
+                    (3, 0),
+                ):
+                    page_uuids, total_count = get_stable_query_from_cache(
+                        "token", skip, count, cache
+                    )
+                    self.assertEqual(page_uuids, uuids[skip : skip + count])
+                    self.assertEqual(total_count, 25)
+
+    def test_missing(self):
+        cache = LocMemCache("stable_query_test", {})
+        cache.clear()
+
+        self.assertEqual(get_stable_query_from_cache("token", 0, 10, cache), ([], 0))
+
+        save_stable_query_to_cache("token", [], cache)
+        self.assertEqual(get_stable_query_from_cache("token", 0, 10, cache), ([], 0))
+
+        with override_settings(STABLE_QUERY_SEGMENT_SIZE=10):
+            save_stable_query_to_cache(
+                "token", [uuid.uuid4() for _ in range(25)], cache
+            )
+        cache.delete("token__1")
+
+        # a page in an evicted segment is treated like an expired query
+        self.assertEqual(get_stable_query_from_cache("token", 5, 10, cache), ([], 0))
+
+    def test_touches(self):
+        cache = LocMemCache("stable_query_test", {})
+        cache.clear()
+
+        with override_settings(STABLE_QUERY_SEGMENT_SIZE=10):
+            save_stable_query_to_cache(
+                "token", [uuid.uuid4() for _ in range(95)], cache
+            )
+
+        # only the header is kept alive, however many segments there are
+        with patch.object(cache, "touch", wraps=cache.touch) as touch:
+            get_stable_query_from_cache("token", 15, 10, cache)
+
+        self.assertEqual(touch.call_count, 1)
+        self.assertEqual(touch.call_args.args[0], "token")
+
+    def test_max_lifetime(self):
+        cache = LocMemCache("stable_query_test", {"TIMEOUT": 60})
+        cache.clear()
+
+        uuids = [uuid.uuid4() for _ in range(25)]
+
+        now = time.time()
+        with override_settings(
+            STABLE_QUERY_SEGMENT_SIZE=10, STABLE_QUERY_MAX_LIFETIME_SECONDS=100.0
+        ):
+            with patch("time.time", return_value=now):
+                save_stable_query_to_cache("token", uuids, cache)
+
+        # touched within the cache timeout, so it is kept alive...
+        with patch("time.time", return_value=now + 50.0):
+            self.assertEqual(
+                get_stable_query_from_cache("token", 20, 10, cache), (uuids[20:], 25)
+            )
+
+        with patch("time.time", return_value=now + 95.0):
+            self.assertEqual(
+                get_stable_query_from_cache("token", 0, 10, cache), (uuids[:10], 25)
+            )
+
+        # ...but never past its lifetime, along with its segments
+        with patch("time.time", return_value=now + 105.0):
+            self.assertFalse(cache.has_key("token"))
+            self.assertEqual(
+                get_stable_query_from_cache("token", 0, 10, cache), ([], 0)
+            )
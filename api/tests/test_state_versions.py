@@ -0,0 +1,65 @@
+import uuid
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+
+from api.cache_utils.state_versions import (
+    EPOCH_VERSION_KEY,
+    bump_epoch,
+    bump_user_state_versions,
+    get_versions,
+    user_state_version_key,
+)
+
+
+class StateVersionsTestCase(SimpleTestCase):
+    def test_bump(self):
+        cache = LocMemCache("state_versions_test", {})
+        cache.clear()
+
+        user_uuid = uuid.uuid4()
+        read_key = user_state_version_key(user_uuid, "read")
+        favorite_key = user_state_version_key(user_uuid, "favorite")
+
+        versions = get_versions([EPOCH_VERSION_KEY, read_key, favorite_key], cache)
+        self.assertEqual(
+            get_versions([EPOCH_VERSION_KEY, read_key, favorite_key], cache), versions
+        )
+
+        # outside of any transaction, so bumped right away
+        bump_user_state_versions((user_uuid,), ("read",), cache)
+
+        epoch_version, read_version, favorite_version = get_versions(
+            [EPOCH_VERSION_KEY, read_key, favorite_key], cache
+        )
+        self.assertEqual(epoch_version, versions[0])
+        self.assertGreater(read_version, versions[1])
+        self.assertEqual(favorite_version, versions[2])
+
+        bump_epoch(cache)
+
+        self.assertGreater(get_versions([EPOCH_VERSION_KEY], cache)[0], epoch_version)
+
+    def test_evicted(self):
+        cache = LocMemCache("state_versions_test", {})
+        cache.clear()
+
+        user_uuid = uuid.uuid4()
+        read_key = user_state_version_key(user_uuid, "read")
+
+        (version,) = get_versions([read_key], cache)
+        for _ in range(3):
+            bump_user_state_versions((user_uuid,), ("read",), cache)
+        (bumped_version,) = get_versions([read_key], cache)
+
+        cache.delete(read_key)
+
+        # restarted, but never back to a version it has been before
+        (restarted_version,) = get_versions([read_key], cache)
+        self.assertGreater(restarted_version, bumped_version)
+        self.assertGreater(bumped_version, version)
+
+        cache.delete(read_key)
+        bump_user_state_versions((user_uuid,), ("read",), cache)
+
+        self.assertGreater(get_versions([read_key], cache)[0], restarted_version)
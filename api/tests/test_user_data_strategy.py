@@ -0,0 +1,24 @@
+from django.test import SimpleTestCase
+
+from api.user_data_strategy import choose_user_data_strategy
+
+
+class UserDataStrategyTestCase(SimpleTestCase):
+    def test_choose_user_data_strategy(self):
+        with self.settings(
+            USER_DATA_LITERAL_MAX_SIZE=10, USER_DATA_EXISTS_MAX_PAGE_SIZE=50
+        ):
+            for collection_size, page_size, expected in (
+                (0, None, "literal"),
+                (10, 1000, "literal"),
+                (11, 1, "exists"),
+                (11, 50, "exists"),
+                (11, 51, "join"),
+                (11, None, "join"),
+                (None, 1, "exists"),
+                (None, None, "join"),
+            ):
+                with self.subTest(collection_size=collection_size, page_size=page_size):
+                    self.assertEqual(
+                        choose_user_data_strategy(collection_size, page_size), expected
+                    )
@@ -0,0 +1,254 @@
+import logging
+from typing import ClassVar
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api import user_context
+from api.models import Feed, FeedEntry, SubscribedFeedUserMapping, User, UserCategory
+from api.tests.utils import disable_silk, disable_throttling
+
+
+@disable_silk()
+@disable_throttling()
+class BatchTestCase(APITestCase):
+    old_app_logger_level: ClassVar[int]
+    old_django_logger_level: ClassVar[int]
+    user: ClassVar[User]
+    feed: ClassVar[Feed]
+    feed_entry: ClassVar[FeedEntry]
+    user_category: ClassVar[UserCategory]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.old_app_logger_level = logging.getLogger("rss_temple").getEffectiveLevel()
+        cls.old_django_logger_level = logging.getLogger("django").getEffectiveLevel()
+
+        logging.getLogger("rss_temple").setLevel(logging.CRITICAL)
+        logging.getLogger("django").setLevel(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        logging.getLogger("rss_temple").setLevel(cls.old_app_logger_level)
+        logging.getLogger("django").setLevel(cls.old_django_logger_level)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = User.objects.create_user("test@test.com", None)
+
+        cls.feed = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        SubscribedFeedUserMapping.objects.create(user=cls.user, feed=cls.feed)
+
+        cls.feed_entry = FeedEntry.objects.create(
+            id=None,
+            feed=cls.feed,
+            created_at=None,
+            updated_at=None,
+            title="Feed Entry Title",
+            url="http://example.com/entry1.html",
+            content="Some Entry content",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+
+        cls.user_category = UserCategory.objects.create(
+            user=cls.user, text="Test User Category"
+        )
+
+    def setUp(self):
+        super().setUp()
+
+        # the read/favorite ordinals are cached, and other tests change them
+        caches["default"].clear()
+
+        self.client.force_authenticate(user=BatchTestCase.user)
+
+    def test_BatchQueryView_post(self):
+        feeds_data = {"fields": ["uuid", "title", "isSubscribed"]}
+        feed_entries_data = {
+            "fields": ["uuid", "isRead", "isFavorite"],
+            "search": f'feedUuid:"{BatchTestCase.feed.uuid}"',
+        }
+
+        response = self.client.post(
+            "/api/batch/query",
+            {
+                "queries": [
+                    {"path": "/api/feeds/query", "body": feeds_data},
+                    {"path": "/api/feedentries/query", "body": feed_entries_data},
+                    {
+                        "method": "GET",
+                        "path": f"/api/usercategory/{BatchTestCase.user_category.uuid}",
+                    },
+                    {"method": "GET", "path": "/api/user/meta/readcount"},
+                    {
+                        "method": "GET",
+                        "path": f"/api/feedentry/{BatchTestCase.feed_entry.uuid}?fields=uuid&fields=title",
+                    },
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        responses = response.json()["responses"]
+        self.assertEqual(len(responses), 5)
+        self.assertEqual([r["status"] for r in responses], [200] * 5)
+
+        for response_json, individual_response in zip(
+            responses,
+            [
+                self.client.post("/api/feeds/query", feeds_data),
+                self.client.post("/api/feedentries/query", feed_entries_data),
+                self.client.get(
+                    f"/api/usercategory/{BatchTestCase.user_category.uuid}"
+                ),
+                self.client.get("/api/user/meta/readcount"),
+                self.client.get(
+                    f"/api/feedentry/{BatchTestCase.feed_entry.uuid}?fields=uuid&fields=title"
+                ),
+            ],
+        ):
+            self.assertEqual(response_json["body"], individual_response.json())
+            self.assertEqual(response_json["etag"], individual_response.get("ETag"))
+
+        self.assertEqual(
+            responses[4]["body"],
+            {
+                "uuid": str(BatchTestCase.feed_entry.uuid),
+                "title": "Feed Entry Title",
+            },
+        )
+
+    def test_BatchQueryView_post_shared_user_context(self):
+        data = {"fields": ["uuid", "isRead", "isFavorite"]}
+
+        with (
+            patch.object(
+                user_context,
+                "get_subscription_datas_from_cache",
+                wraps=user_context.get_subscription_datas_from_cache,
+            ) as get_subscription_datas_from_cache,
+            patch.object(
+                user_context,
+                "get_read_feed_entry_ordinals_from_cache",
+                wraps=user_context.get_read_feed_entry_ordinals_from_cache,
+            ) as get_read_feed_entry_ordinals_from_cache,
+        ):
+            response = self.client.post(
+                "/api/batch/query",
+                {
+                    "queries": [
+                        {"path": "/api/feedentries/query", "body": data},
+                        {
+                            "path": "/api/feedentries/query",
+                            "body": {**data, "search": 'isRead:"false"'},
+                        },
+                        {"path": "/api/feeds/query", "body": {"fields": ["uuid"]}},
+                    ],
+                },
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+
+            self.assertEqual(get_subscription_datas_from_cache.call_count, 1)
+            self.assertEqual(get_read_feed_entry_ordinals_from_cache.call_count, 1)
+
+        responses = response.json()["responses"]
+        self.assertEqual([r["status"] for r in responses], [200] * 3)
+        self.assertEqual(
+            responses[0]["body"]["objects"],
+            [
+                {
+                    "uuid": str(BatchTestCase.feed_entry.uuid),
+                    "isRead": False,
+                    "isFavorite": False,
+                }
+            ],
+        )
+
+    def test_BatchQueryView_post_not_modified(self):
+        data = {"fields": ["uuid", "isRead"]}
+
+        response = self.client.post("/api/feedentries/query", data)
+        self.assertEqual(response.status_code, 200, response.content)
+        etag = response["ETag"]
+
+        response = self.client.post(
+            "/api/batch/query",
+            {
+                "queries": [
+                    {
+                        "path": "/api/feedentries/query",
+                        "body": data,
+                        "ifNoneMatch": etag,
+                    },
+                    {
+                        "path": "/api/feedentries/query",
+                        "body": {**data, "count": 1},
+                        "ifNoneMatch": etag,
+                    },
+                ],
+            },
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        responses = response.json()["responses"]
+        self.assertEqual(responses[0], {"status": 304, "etag": etag, "body": None})
+        self.assertEqual(responses[1]["status"], 200)
+        self.assertEqual(len(responses[1]["body"]["objects"]), 1)
+
+    def test_BatchQueryView_post_sub_query_error(self):
+        response = self.client.post(
+            "/api/batch/query",
+            {
+                "queries": [
+                    {"path": "/api/feeds/query", "body": {"count": -1}},
+                    {"path": "/api/feeds/query", "body": {"fields": ["uuid"]}},
+                ],
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        responses = response.json()["responses"]
+        self.assertEqual(responses[0]["status"], 400)
+        self.assertEqual(responses[1]["status"], 200)
+
+    def test_BatchQueryView_post_malformed(self):
+        for data in [
+            {},
+            {"queries": []},
+            {"queries": [{"path": "/api/feeds/query"}] * 21},
+            {"queries": [{"method": "PUT", "path": "/api/feeds/query"}]},
+            {"queries": [{"path": "/api/doesnotexist"}]},
+            {"queries": [{"path": "/api/feed/subscribe"}]},
+            {"queries": [{"method": "GET", "path": "/api/feeds/query"}]},
+            {"queries": [{"method": "GET", "path": "/api/feed?url=http://a.com"}]},
+            {"queries": [{"path": "/api/batch/query"}]},
+        ]:
+            with self.subTest(data=data):
+                response = self.client.post("/api/batch/query", data)
+                self.assertEqual(response.status_code, 400, response.content)
+
+    def test_BatchQueryView_post_unauthenticated(self):
+        self.client.force_authenticate(user=None)
+
+        response = self.client.post(
+            "/api/batch/query",
+            {"queries": [{"method": "GET", "path": "/api/user/meta/readcount"}]},
+        )
+        self.assertEqual(response.status_code, 401, response.content)
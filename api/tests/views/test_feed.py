@@ -1,3 +1,4 @@
+import json
 import logging
 from typing import ClassVar
 
@@ -6,8 +7,20 @@ from django.http.response import HttpResponse
 from django.test import override_settings, tag
 from django.utils import timezone
 
+from api.cache_utils.archived_counts_lookup import (
+    save_archived_counts_lookup_to_cache,
+)
+from api.cache_utils.counts_lookup import (
+    get_counts_lookup_from_cache,
+    save_read_counts_lookup_to_cache,
+    save_total_counts_lookup_to_cache,
+)
+from api.cache_utils.state_versions import (
+    bump_feed_content_versions,
+    bump_user_state_versions,
+)
 from api.fields import field_configs
-from api.models import Feed, RemovedFeed, SubscribedFeedUserMapping, User
+from api.models import Feed, FeedEntry, RemovedFeed, SubscribedFeedUserMapping, User
 from api.tests import TestFileServerTestCase
 from api.tests.utils import (
     assert_x_cache_hit_working,
@@ -154,6 +167,273 @@ class FeedTestCase(TestFileServerTestCase):
         self.assertIs(type(json_["objects"]), list)
         self.assertGreaterEqual(len(json_["objects"]), 0)
 
+    def test_FeedsQueryView_post_partial_counts_cache(self):
+        user = self.generate_credentials()
+
+        cached_feed = Feed.objects.create(
+            feed_url=f"{FeedTestCase.live_server_url}/rss_2.0/well_formed.xml",
+            title="Sample Feed",
+            home_url=FeedTestCase.live_server_url,
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        uncached_feed = Feed.objects.create(
+            feed_url=f"{FeedTestCase.live_server_url}/rss_2.0/well_formed2.xml",
+            title="Sample Feed 2",
+            home_url=FeedTestCase.live_server_url,
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        FeedEntry.objects.create(
+            feed=uncached_feed,
+            url=f"{FeedTestCase.live_server_url}/entry1.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+
+        cache: BaseCache = caches["default"]
+        save_total_counts_lookup_to_cache({cached_feed.uuid: 10}, cache)
+        save_archived_counts_lookup_to_cache({cached_feed.uuid: 0}, cache)
+        save_read_counts_lookup_to_cache(user, {cached_feed.uuid: 3}, cache)
+
+        response = self.client.post(
+            "/api/feeds/query",
+            {"fields": ["uuid", "unreadCount", "readCount"]},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        json_ = response.json()
+
+        counts = {
+            o["uuid"]: (o["unreadCount"], o["readCount"]) for o in json_["objects"]
+        }
+        self.assertEqual(
+            counts,
+            {
+                str(cached_feed.uuid): (7, 3),
+                str(uncached_feed.uuid): (1, 0),
+            },
+        )
+
+        counts_lookup, missing_feed_uuids = get_counts_lookup_from_cache(
+            user, [cached_feed.uuid, uncached_feed.uuid], cache
+        )
+        self.assertEqual(missing_feed_uuids, [])
+        self.assertEqual(
+            counts_lookup[uncached_feed.uuid], Feed._CountsDescriptor(1, 0)
+        )
+
+    def test_FeedsQueryView_post_stored_counts(self):
+        user = self.generate_credentials()
+
+        feeds: list[Feed] = []
+        for i, entry_count in enumerate((1, 3, 0, 2)):
+            feed = Feed.objects.create(
+                feed_url=f"{FeedTestCase.live_server_url}/rss_2.0/well_formed{i}.xml",
+                title=f"Sample Feed {i}",
+                home_url=FeedTestCase.live_server_url,
+                published_at=timezone.now(),
+                updated_at=None,
+                db_updated_at=None,
+            )
+            for j in range(entry_count):
+                FeedEntry.objects.create(
+                    feed=feed,
+                    url=f"{FeedTestCase.live_server_url}/{i}/entry{j}.html",
+                    content="<b>Some HTML Content</b>",
+                    author_name="John Doe",
+                )
+            feeds.append(feed)
+
+        # the last feed isn't subscribed to, so has no stored counts
+        for feed in feeds[:-1]:
+            SubscribedFeedUserMapping.objects.create(feed=feed, user=user)
+        SubscribedFeedUserMapping.refresh_stored_counts(
+            SubscribedFeedUserMapping.objects.filter(user=user)
+        )
+
+        response = self.client.post(
+            "/api/feeds/query",
+            {
+                "fields": ["uuid", "unreadCount"],
+                "search": 'unreadCount:"1|1000"',
+                "sort": "unreadCount:DESC",
+                "count": 1,
+                "returnTotalCount": True,
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        json_ = response.json()
+
+        self.assertEqual(json_["totalCount"], 2)
+        self.assertEqual(
+            json_["objects"], [{"uuid": str(feeds[1].uuid), "unreadCount": 3}]
+        )
+
+        response = self.client.post(
+            "/api/feeds/query",
+            {
+                "fields": ["uuid"],
+                "search": 'readCount_exact:"0"',
+                "sort": "title:ASC",
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(
+            [o["uuid"] for o in response.json()["objects"]],
+            [str(feed.uuid) for feed in feeds[:-1]],
+        )
+
+    def test_FeedsQueryView_post_stream(self):
+        user = self.generate_credentials()
+
+        for i, entry_count in enumerate((1, 3, 0)):
+            feed = Feed.objects.create(
+                feed_url=f"{FeedTestCase.live_server_url}/rss_2.0/well_formed{i}.xml",
+                title=f"Sample Feed {i}",
+                home_url=FeedTestCase.live_server_url,
+                published_at=timezone.now(),
+                updated_at=None,
+                db_updated_at=None,
+            )
+            for j in range(entry_count):
+                FeedEntry.objects.create(
+                    feed=feed,
+                    url=f"{FeedTestCase.live_server_url}/{i}/entry{j}.html",
+                    content="<b>Some HTML Content</b>",
+                    author_name="John Doe",
+                )
+            SubscribedFeedUserMapping.objects.create(feed=feed, user=user)
+
+        for data in (
+            {"fields": list(fieldutils.field_list("feed", field_configs))},
+            {"fields": ["uuid", "title"], "sort": "title:DESC"},
+            {"fields": ["uuid", "unreadCount"], "count": 2},
+            {"fields": ["uuid"], "totalCountMode": "estimated"},
+            {"countOnly": True},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post("/api/feeds/query", data)
+                self.assertEqual(response.status_code, 200, response.content)
+
+                stream_response = self.client.post(
+                    "/api/feeds/query", {**data, "stream": True}
+                )
+                self.assertEqual(stream_response.status_code, 200)
+                self.assertTrue(stream_response.streaming)
+                self.assertIn("X-Cache-Hit", stream_response.headers)
+
+                self.assertEqual(
+                    json.loads(b"".join(stream_response.streaming_content)),
+                    response.json(),
+                )
+
+    def test_FeedsQueryView_post_etag(self):
+        user = self.generate_credentials()
+
+        feeds: list[Feed] = []
+        for i in range(2):
+            feeds.append(
+                Feed.objects.create(
+                    feed_url=f"{FeedTestCase.live_server_url}/rss_2.0/well_formed{i}.xml",
+                    title=f"Sample Feed {i}",
+                    home_url=FeedTestCase.live_server_url,
+                    published_at=timezone.now(),
+                    updated_at=None,
+                    db_updated_at=None,
+                )
+            )
+
+        data = {"fields": ["uuid", "isSubscribed"]}
+        scoped_data = {**data, "search": f'uuid:"{feeds[0].uuid}"'}
+
+        response = self.client.post("/api/feeds/query", data)
+        self.assertEqual(response.status_code, 200, response.content)
+        etag = response["ETag"]
+
+        response = self.client.post("/api/feeds/query", data, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304, response.content)
+
+        SubscribedFeedUserMapping.objects.create(feed=feeds[1], user=user)
+        bump_user_state_versions((user.uuid,), ("subscription",), caches["default"])
+
+        response = self.client.post("/api/feeds/query", data, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        etag = response["ETag"]
+
+        response = self.client.delete("/api/feed/subscribe", {"url": feeds[1].feed_url})
+        self.assertEqual(response.status_code, 204, response.content)
+
+        response = self.client.post("/api/feeds/query", data, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.post("/api/feeds/query", scoped_data)
+        self.assertEqual(response.status_code, 200, response.content)
+        scoped_etag = response["ETag"]
+
+        bump_feed_content_versions((feeds[1].uuid,), caches["default"])
+
+        response = self.client.post(
+            "/api/feeds/query", scoped_data, HTTP_IF_NONE_MATCH=scoped_etag
+        )
+        self.assertEqual(response.status_code, 304, response.content)
+
+        bump_feed_content_versions((feeds[0].uuid,), caches["default"])
+
+        response = self.client.post(
+            "/api/feeds/query", scoped_data, HTTP_IF_NONE_MATCH=scoped_etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        # relative to the current time, which no version covers
+        response = self.client.post("/api/feeds/query", {"fields": ["uuid", "isDead"]})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn("ETag", response)
+
+    @override_settings(QUERY_RESULT_CACHE=True)
+    def test_FeedsQueryView_post_result_cache(self):
+        user = self.generate_credentials()
+
+        feed = Feed.objects.create(
+            feed_url=f"{FeedTestCase.live_server_url}/rss_2.0/well_formed.xml",
+            title="Sample Feed",
+            home_url=FeedTestCase.live_server_url,
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        SubscribedFeedUserMapping.objects.create(feed=feed, user=user)
+
+        data = {"fields": ["uuid", "customTitle"]}
+
+        for cache_hit in ("NO", "YES"):
+            response = self.client.post("/api/feeds/query", data)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response["X-Result-Cache-Hit"], cache_hit)
+            self.assertIsNone(response.json()["objects"][0]["customTitle"])
+
+        response = self.client.put(
+            "/api/feed/subscribe",
+            {"url": feed.feed_url, "customTitle": "Custom Title"},
+        )
+        self.assertEqual(response.status_code, 204, response.content)
+
+        response = self.client.post("/api/feeds/query", data)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response["X-Result-Cache-Hit"], "NO")
+        self.assertEqual(response.json()["objects"][0]["customTitle"], "Custom Title")
+
+        # depends on the current time, so never cached
+        for _ in range(2):
+            response = self.client.post("/api/feeds/query", {"fields": ["isDead"]})
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertNotIn("X-Result-Cache-Hit", response)
+
     def test_FeedLookupView_get(self):
         cache: BaseCache = caches["captcha"]
 
@@ -1,14 +1,28 @@
+import datetime
+import json
 import logging
 import uuid
-from typing import ClassVar, Sequence
+from typing import Any, ClassVar, Sequence
+from unittest.mock import patch
 
 from django.core.cache import BaseCache, caches
+from django.db.models import F
 from django.utils import timezone
 from rest_framework.test import APITestCase
 
-from api.cache_utils.counts_lookup import save_counts_lookup_to_cache
-from api.models import Feed, FeedEntry, ReadFeedEntryUserMapping, User
+from api.cache_utils.counts_lookup import save_read_counts_lookup_to_cache
+from api.cache_utils.state_versions import bump_feed_content_versions
+from api.models import (
+    Feed,
+    FeedEntry,
+    FeedReadWatermark,
+    FeedReadWatermarkException,
+    ReadFeedEntryUserMapping,
+    User,
+)
+from api.tasks.flush_pending_reads import flush_pending_reads
 from api.tests.utils import disable_silk, disable_throttling
+from query_utils import cursor as cursorutils
 
 
 @disable_silk()
@@ -101,6 +115,600 @@ class FeedEntryTestCase(APITestCase):
         )
         self.assertEqual(response.status_code, 200, response.content)
 
+    def test_FeedEntriesQueryView_post_user_data(self):
+        # the cached ordinals are kept current rather than dropped, so start cold
+        caches["default"].clear()
+
+        feed_entries = [
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry Title {i}",
+                url=f"http://example.com/entry{i}.html",
+                content="Some Entry content",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+            for i in range(3)
+        ]
+
+        response = self.client.post(f"/api/feedentry/{feed_entries[0].uuid}/read")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.post(f"/api/feedentry/{feed_entries[1].uuid}/favorite")
+        self.assertEqual(response.status_code, 204, response.content)
+
+        # the second pass reads the read/favorite state from the cached bitmaps
+        for cache_hit in ("NO", "YES"):
+            with self.subTest(cache_hit=cache_hit):
+                response = self.client.post(
+                    "/api/feedentries/query",
+                    {"fields": ["uuid", "isRead", "isFavorite"], "count": 10},
+                )
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertIn(cache_hit, response.headers["X-Cache-Hit"])
+
+                self.assertEqual(
+                    {
+                        o["uuid"]: (o["isRead"], o["isFavorite"])
+                        for o in response.json()["objects"]
+                    },
+                    {
+                        str(feed_entries[0].uuid): (True, False),
+                        str(feed_entries[1].uuid): (False, True),
+                        str(feed_entries[2].uuid): (False, False),
+                    },
+                )
+
+    def test_FeedEntriesQueryView_post_user_data_writethrough(self):
+        cache: BaseCache = caches["default"]
+
+        try:
+            feed_entries = [
+                FeedEntry.objects.create(
+                    id=None,
+                    feed=FeedEntryTestCase.feed,
+                    created_at=None,
+                    updated_at=None,
+                    title=f"Feed Entry Title {i}",
+                    url=f"http://example.com/entry{i}.html",
+                    content="Some Entry content",
+                    author_name="John Doe",
+                    db_updated_at=None,
+                )
+                for i in range(3)
+            ]
+
+            def query():
+                response = self.client.post(
+                    "/api/feedentries/query",
+                    {"fields": ["uuid", "isRead", "isFavorite"], "count": 10},
+                )
+                self.assertEqual(response.status_code, 200, response.content)
+                return response
+
+            query()
+
+            # every change is applied to the cached ordinals, rather than
+            # dropping them, so none of these queries reload from the DB
+            for method, url, body, expected in (
+                (
+                    "post",
+                    f"/api/feedentry/{feed_entries[0].uuid}/read",
+                    None,
+                    (True, False),
+                ),
+                (
+                    "post",
+                    f"/api/feedentry/{feed_entries[0].uuid}/favorite",
+                    None,
+                    (True, True),
+                ),
+                (
+                    "delete",
+                    f"/api/feedentry/{feed_entries[0].uuid}/read",
+                    None,
+                    (False, True),
+                ),
+                (
+                    "delete",
+                    "/api/feedentries/favorite",
+                    {"feedEntryUuids": [str(feed_entries[0].uuid)]},
+                    (False, False),
+                ),
+                (
+                    "post",
+                    "/api/feedentries/read",
+                    {"feedEntryUuids": [str(feed_entries[0].uuid)]},
+                    (True, False),
+                ),
+            ):
+                with self.subTest(method=method, url=url):
+                    response = getattr(self.client, method)(url, body)
+                    self.assertIn(response.status_code, (200, 204), response.content)
+
+                    response = query()
+                    self.assertEqual(response.headers["X-Cache-Hit"], "YES,YES,YES")
+                    self.assertEqual(
+                        {
+                            o["uuid"]: (o["isRead"], o["isFavorite"])
+                            for o in response.json()["objects"]
+                        }[str(feed_entries[0].uuid)],
+                        expected,
+                    )
+        finally:
+            cache.clear()
+
+    def test_FeedEntriesQueryView_post_total_count_mode(self):
+        caches["default"].clear()
+
+        for i in range(3):
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {
+                "objects": False,
+                "totalCountMode": "estimated",
+                "search": 'authorName:"John"',
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 3, "totalCountExact": True})
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {
+                "objects": False,
+                "totalCountMode": "cached",
+                "search": 'authorName:"John"',
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 3})
+
+        FeedEntry.objects.create(
+            id=None,
+            feed=FeedEntryTestCase.feed,
+            created_at=None,
+            updated_at=None,
+            title="Feed Entry 3 Title",
+            url="http://example.com/entry3.html",
+            content="Some Entry content 3",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+
+        # the same query, give or take whitespace
+        response = self.client.post(
+            "/api/feedentries/query",
+            {
+                "objects": False,
+                "totalCountMode": "cached",
+                "search": '  authorName:"John" ',
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 3})
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {
+                "objects": False,
+                "totalCountMode": "cached",
+                "search": 'authorName:"Doe"',
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 4})
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {
+                "objects": False,
+                "totalCountMode": "cached",
+                "search": 'authorName:"John Doe"',
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 4})
+
+        # but whitespace inside a quoted value is part of the query
+        response = self.client.post(
+            "/api/feedentries/query",
+            {
+                "objects": False,
+                "totalCountMode": "cached",
+                "search": 'authorName:"John  Doe"',
+            },
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 0})
+
+    def test_FeedEntriesQueryView_post_count_only(self):
+        for i in range(2):
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"countOnly": True, "objects": True, "totalCount": False},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 2})
+        # none of the per-object user data was loaded
+        self.assertNotIn("X-Cache-Hit", response.headers)
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"countOnly": True, "search": 'isRead:"false"'},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 2})
+
+    def test_FeedEntriesQueryView_post_cursor(self):
+        published_at = timezone.now()
+        for i in range(5):
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                # some ties, which only the tiebreaker can order
+                published_at=published_at - datetime.timedelta(days=i // 2),
+                updated_at=None if i % 2 else published_at,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+
+        for sort, order_by in (
+            (None, (F("published_at").desc(), F("uuid").desc())),
+            (
+                "updatedAt:ASC",
+                (
+                    F("updated_at").asc(nulls_last=True),
+                    F("published_at").desc(),
+                    F("uuid").desc(),
+                ),
+            ),
+            (
+                "title:ASC,publishedAt:DESC",
+                (F("title").asc(), F("published_at").desc(), F("uuid").desc()),
+            ),
+        ):
+            with self.subTest(sort=sort):
+                data: dict[str, Any] = {"fields": ["uuid"], "count": 2}
+                if sort is not None:
+                    data["sort"] = sort
+
+                uuids: list[str] = []
+                cursor = ""
+                for _ in range(10):
+                    response = self.client.post(
+                        "/api/feedentries/query",
+                        {**data, "cursor": cursor, "totalCount": False},
+                    )
+                    self.assertEqual(response.status_code, 200, response.content)
+
+                    json_ = response.json()
+                    uuids.extend(o["uuid"] for o in json_["objects"])
+                    cursor = json_["nextCursor"]
+                    if cursor is None:
+                        break
+
+                self.assertEqual(
+                    uuids,
+                    [
+                        str(uuid_)
+                        for uuid_ in FeedEntry.objects.order_by(*order_by).values_list(
+                            "uuid", flat=True
+                        )
+                    ],
+                )
+
+    def test_FeedEntriesQueryView_post_cursor_malformed(self):
+        for data in (
+            {"cursor": "%%%"},
+            {"cursor": 1},
+            {"cursor": "", "skip": 1},
+            # a cursor from a different sort
+            {"cursor": "WzFd"},
+            # a bad datetime
+            {"cursor": cursorutils.encode_cursor(["notadate", "zzz"])},
+            # a bad UUID
+            {"cursor": cursorutils.encode_cursor([timezone.now().isoformat(), "zzz"])},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post("/api/feedentries/query", data)
+                self.assertEqual(response.status_code, 400, response.content)
+
+    def test_FeedEntriesQueryView_post_stream(self):
+        published_at = timezone.now()
+        for i in range(5):
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                published_at=published_at - datetime.timedelta(days=i),
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+
+        for data in (
+            {},
+            {"fields": ["uuid", "title", "publishedAt"]},
+            {"fields": ["uuid", "readAt"], "count": 3},
+            {"fields": ["uuid"], "count": 2, "cursor": ""},
+            {"fields": ["uuid"], "count": 5, "cursor": ""},
+            {"fields": ["uuid"], "count": 10, "cursor": ""},
+            {"fields": ["uuid"], "totalCountMode": "estimated"},
+            {"objects": False},
+            {"countOnly": True},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post("/api/feedentries/query", data)
+                self.assertEqual(response.status_code, 200, response.content)
+
+                # small enough that every object is its own chunk
+                with self.settings(
+                    QUERY_STREAM_CHUNK_SIZE=2, QUERY_STREAM_BUFFER_BYTES=1
+                ):
+                    stream_response = self.client.post(
+                        "/api/feedentries/query", {**data, "stream": True}
+                    )
+                    self.assertEqual(stream_response.status_code, 200)
+                    self.assertTrue(stream_response.streaming)
+                    self.assertEqual(
+                        stream_response["Content-Type"], "application/json"
+                    )
+
+                    chunks = list(stream_response.streaming_content)
+
+                self.assertEqual(json.loads(b"".join(chunks)), response.json())
+                if response.json().get("objects"):
+                    self.assertGreater(len(chunks), 1)
+
+                self.assertEqual(
+                    stream_response.get("X-Cache-Hit"), response.get("X-Cache-Hit")
+                )
+
+    def test_FeedEntriesQueryView_post_readAt_page(self):
+        published_at = timezone.now()
+        feed_entries = [
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                published_at=published_at - datetime.timedelta(days=i),
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+            for i in range(5)
+        ]
+
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                with patch.object(
+                    FeedEntry,
+                    "generate_read_at_lookup",
+                    wraps=FeedEntry.generate_read_at_lookup,
+                ) as generate_read_at_lookup:
+                    response = self.client.post(
+                        "/api/feedentries/query",
+                        {
+                            "fields": ["uuid", "readAt"],
+                            "sort": "publishedAt:DESC",
+                            "skip": 1,
+                            "count": 2,
+                            "stream": stream,
+                        },
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    if stream:
+                        b"".join(response.streaming_content)
+
+                # only the page is looked up, not everything the search matches
+                generate_read_at_lookup.assert_called_once()
+                self.assertEqual(
+                    set(generate_read_at_lookup.call_args.args[1]),
+                    {feed_entries[1].uuid, feed_entries[2].uuid},
+                )
+
+    def test_FeedEntriesQueryView_post_etag(self):
+        feed_entry = FeedEntry.objects.create(
+            id=None,
+            feed=FeedEntryTestCase.feed,
+            created_at=None,
+            updated_at=None,
+            title="Feed Entry Title",
+            url="http://example.com/entry1.html",
+            content="Some Entry content",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+        other_feed = Feed.objects.create(
+            feed_url="http://example.com/other/rss.xml",
+            title="Other Feed",
+            home_url="http://example.com/other",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        data = {"fields": ["uuid", "isRead", "isFavorite"]}
+        scoped_data = {**data, "search": f'feedUuid:"{FeedEntryTestCase.feed.uuid}"'}
+
+        response = self.client.post("/api/feedentries/query", data)
+        self.assertEqual(response.status_code, 200, response.content)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.post(
+            "/api/feedentries/query", data, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304, response.content)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.post(
+            "/api/feedentries/query", {**data, "count": 1}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/feedentry/{feed_entry.uuid}/read")
+            self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.post(
+            "/api/feedentries/query", data, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()["objects"][0]["isRead"])
+        self.assertNotEqual(response["ETag"], etag)
+        etag = response["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/feedentry/{feed_entry.uuid}/favorite")
+            self.assertEqual(response.status_code, 204, response.content)
+
+        response = self.client.post(
+            "/api/feedentries/query", data, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertTrue(response.json()["objects"][0]["isFavorite"])
+        etag = response["ETag"]
+
+        response = self.client.post("/api/feedentries/query", scoped_data)
+        self.assertEqual(response.status_code, 200, response.content)
+        scoped_etag = response["ETag"]
+
+        # only the content of the feeds in the search's scope matters to it
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_feed_content_versions((other_feed.uuid,), caches["default"])
+
+        response = self.client.post(
+            "/api/feedentries/query", scoped_data, HTTP_IF_NONE_MATCH=scoped_etag
+        )
+        self.assertEqual(response.status_code, 304, response.content)
+
+        response = self.client.post(
+            "/api/feedentries/query", data, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        # relative to the current time, which no version covers
+        response = self.client.post(
+            "/api/feedentries/query",
+            {**data, "search": 'publishedAt_delta:"older_than:1d"'},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn("ETag", response)
+
+        with self.settings(QUERY_ETAGS=False):
+            response = self.client.post("/api/feedentries/query", data)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertNotIn("ETag", response)
+
+    def test_FeedEntriesQueryView_post_result_cache(self):
+        # the cached ordinals are kept current rather than dropped, so start cold
+        caches["default"].clear()
+
+        feed_entry = FeedEntry.objects.create(
+            id=None,
+            feed=FeedEntryTestCase.feed,
+            created_at=None,
+            updated_at=None,
+            title="Feed Entry Title",
+            url="http://example.com/entry1.html",
+            content="Some Entry content",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+
+        data = {"fields": ["uuid", "title", "isRead"], "returnTotalCount": True}
+
+        response = self.client.post("/api/feedentries/query", data)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn("X-Result-Cache-Hit", response)
+        expected_json = response.json()
+
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                with self.settings(
+                    QUERY_RESULT_CACHE=True, QUERY_RESULT_CACHE_COMPRESS=compress
+                ):
+                    caches["default"].clear()
+
+                    for cache_hit in ("NO", "YES", "YES"):
+                        response = self.client.post("/api/feedentries/query", data)
+                        self.assertEqual(response.status_code, 200, response.content)
+                        self.assertEqual(response["X-Result-Cache-Hit"], cache_hit)
+                        self.assertEqual(response.json(), expected_json)
+                        self.assertIn("ETag", response)
+
+                    # streamed responses aren't cached
+                    response = self.client.post(
+                        "/api/feedentries/query", {**data, "stream": True}
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertNotIn("X-Result-Cache-Hit", response)
+
+        with self.settings(QUERY_RESULT_CACHE=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f"/api/feedentry/{feed_entry.uuid}/read")
+                self.assertEqual(response.status_code, 200, response.content)
+
+            response = self.client.post("/api/feedentries/query", data)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response["X-Result-Cache-Hit"], "NO")
+            self.assertTrue(response.json()["objects"][0]["isRead"])
+
+            # still cached without ETags
+            with self.settings(QUERY_ETAGS=False):
+                response = self.client.post("/api/feedentries/query", data)
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(response["X-Result-Cache-Hit"], "YES")
+                self.assertNotIn("ETag", response)
+
+            # too big to be worth keeping
+            with self.settings(QUERY_RESULT_CACHE_MAX_BYTES=16):
+                for _ in range(2):
+                    response = self.client.post(
+                        "/api/feedentries/query", {**data, "count": 1}
+                    )
+                    self.assertEqual(response.status_code, 200, response.content)
+                    self.assertEqual(response["X-Result-Cache-Hit"], "NO")
+
     def test_FeedEntryReadView_post(self):
         feed_entry = FeedEntry.objects.create(
             id=None,
@@ -144,12 +752,8 @@ class FeedEntryTestCase(APITestCase):
                 db_updated_at=None,
             )
 
-            save_counts_lookup_to_cache(
-                FeedEntryTestCase.user,
-                {
-                    FeedEntryTestCase.feed.uuid: Feed._CountsDescriptor(5, 5),
-                },
-                cache,
+            save_read_counts_lookup_to_cache(
+                FeedEntryTestCase.user, {FeedEntryTestCase.feed.uuid: 5}, cache
             )
 
             response = self.client.post(
@@ -288,10 +892,8 @@ class FeedEntryTestCase(APITestCase):
             FeedEntryTestCase.user.read_feed_entries_counter = 1
             FeedEntryTestCase.user.save(update_fields=("read_feed_entries_counter",))
 
-            save_counts_lookup_to_cache(
-                FeedEntryTestCase.user,
-                {FeedEntryTestCase.feed.uuid: Feed._CountsDescriptor(5, 5)},
-                cache,
+            save_read_counts_lookup_to_cache(
+                FeedEntryTestCase.user, {FeedEntryTestCase.feed.uuid: 5}, cache
             )
 
             response = self.client.delete(
@@ -315,6 +917,83 @@ class FeedEntryTestCase(APITestCase):
         )
         self.assertEqual(response.status_code, 204, response.content)
 
+    def test_FeedEntryReadView_writebehind(self):
+        cache: BaseCache = caches["default"]
+
+        try:
+            feed_entry = FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title="Feed Entry Title",
+                url="http://example.com/entry1.html",
+                content="Some Entry content",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+
+            def is_read() -> bool:
+                response = self.client.get(
+                    f"/api/feedentry/{feed_entry.uuid}",
+                    {"fields": "isRead"},
+                )
+                self.assertEqual(response.status_code, 200, response.content)
+                return response.json()["isRead"]
+
+            with self.settings(FEED_ENTRY_READ_WRITE_BEHIND=True):
+                response = self.client.post(f"/api/feedentry/{feed_entry.uuid}/read")
+                self.assertEqual(response.status_code, 200, response.content)
+                read_at = response.json()
+
+                # queued, but already visible
+                self.assertFalse(
+                    ReadFeedEntryUserMapping.objects.filter(
+                        user=FeedEntryTestCase.user
+                    ).exists()
+                )
+                self.assertTrue(is_read())
+
+                # the same read is handed back while it's pending
+                response = self.client.post(f"/api/feedentry/{feed_entry.uuid}/read")
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(response.json(), read_at)
+
+                flush_pending_reads(cache)
+
+                self.assertTrue(
+                    ReadFeedEntryUserMapping.objects.filter(
+                        user=FeedEntryTestCase.user, feed_entry=feed_entry
+                    ).exists()
+                )
+                self.assertTrue(is_read())
+
+                response = self.client.delete(f"/api/feedentry/{feed_entry.uuid}/read")
+                self.assertEqual(response.status_code, 204, response.content)
+
+                self.assertTrue(
+                    ReadFeedEntryUserMapping.objects.filter(
+                        user=FeedEntryTestCase.user, feed_entry=feed_entry
+                    ).exists()
+                )
+                self.assertFalse(is_read())
+
+                # the bulk views flush the queue before writing
+                response = self.client.delete(
+                    "/api/feedentries/read",
+                    {"feedEntryUuids": [str(uuid.uuid4())]},
+                )
+                self.assertEqual(response.status_code, 204, response.content)
+
+                self.assertFalse(
+                    ReadFeedEntryUserMapping.objects.filter(
+                        user=FeedEntryTestCase.user
+                    ).exists()
+                )
+                self.assertFalse(is_read())
+        finally:
+            cache.clear()
+
     def test_FeedEntriesReadView_post(self):
         feed_entry1 = FeedEntry.objects.create(
             id=None,
@@ -349,13 +1028,19 @@ class FeedEntryTestCase(APITestCase):
         self.assertEqual(response.status_code, 204, response.content)
 
         self.assertEqual(
-            ReadFeedEntryUserMapping.objects.filter(
-                user=FeedEntryTestCase.user, feed_entry__in=[feed_entry1, feed_entry2]
+            FeedEntry.objects.filter(
+                FeedReadWatermark.covers(FeedEntryTestCase.user),
+                uuid__in=[feed_entry1.uuid, feed_entry2.uuid],
             ).count(),
             2,
         )
+        self.assertFalse(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=FeedEntryTestCase.user
+            ).exists()
+        )
 
-        ReadFeedEntryUserMapping.objects.all().delete()
+        FeedReadWatermark.objects.all().delete()
 
         response = self.client.post(
             "/api/feedentries/read",
@@ -384,11 +1069,17 @@ class FeedEntryTestCase(APITestCase):
         self.assertEqual(response.status_code, 204, response.content)
 
         self.assertEqual(
-            ReadFeedEntryUserMapping.objects.filter(
-                user=FeedEntryTestCase.user, feed_entry__in=[feed_entry1, feed_entry2]
+            FeedEntry.objects.filter(
+                FeedReadWatermark.covers(FeedEntryTestCase.user),
+                uuid__in=[feed_entry1.uuid, feed_entry2.uuid],
             ).count(),
             2,
         )
+        self.assertFalse(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=FeedEntryTestCase.user
+            ).exists()
+        )
 
     def test_FeedEntriesReadView_post_cachewarmed(self):
         cache: BaseCache = caches["default"]
@@ -418,10 +1109,8 @@ class FeedEntryTestCase(APITestCase):
                 db_updated_at=None,
             )
 
-            save_counts_lookup_to_cache(
-                FeedEntryTestCase.user,
-                {FeedEntryTestCase.feed.uuid: Feed._CountsDescriptor(5, 5)},
-                cache,
+            save_read_counts_lookup_to_cache(
+                FeedEntryTestCase.user, {FeedEntryTestCase.feed.uuid: 5}, cache
             )
 
             response = self.client.post(
@@ -433,19 +1122,22 @@ class FeedEntryTestCase(APITestCase):
             self.assertEqual(response.status_code, 204, response.content)
 
             self.assertEqual(
-                ReadFeedEntryUserMapping.objects.filter(
-                    user=FeedEntryTestCase.user,
-                    feed_entry__in=[feed_entry1, feed_entry2],
+                FeedEntry.objects.filter(
+                    FeedReadWatermark.covers(FeedEntryTestCase.user),
+                    uuid__in=[feed_entry1.uuid, feed_entry2.uuid],
                 ).count(),
                 2,
             )
+            self.assertFalse(
+                ReadFeedEntryUserMapping.objects.filter(
+                    user=FeedEntryTestCase.user
+                ).exists()
+            )
 
-            ReadFeedEntryUserMapping.objects.all().delete()
+            FeedReadWatermark.objects.all().delete()
 
-            save_counts_lookup_to_cache(
-                FeedEntryTestCase.user,
-                {FeedEntryTestCase.feed.uuid: Feed._CountsDescriptor(5, 5)},
-                cache,
+            save_read_counts_lookup_to_cache(
+                FeedEntryTestCase.user, {FeedEntryTestCase.feed.uuid: 5}, cache
             )
 
             response = self.client.post(
@@ -466,10 +1158,8 @@ class FeedEntryTestCase(APITestCase):
 
             ReadFeedEntryUserMapping.objects.all().delete()
 
-            save_counts_lookup_to_cache(
-                FeedEntryTestCase.user,
-                {FeedEntryTestCase.feed.uuid: Feed._CountsDescriptor(5, 5)},
-                cache,
+            save_read_counts_lookup_to_cache(
+                FeedEntryTestCase.user, {FeedEntryTestCase.feed.uuid: 5}, cache
             )
 
             response = self.client.post(
@@ -482,15 +1172,228 @@ class FeedEntryTestCase(APITestCase):
             self.assertEqual(response.status_code, 204, response.content)
 
             self.assertEqual(
-                ReadFeedEntryUserMapping.objects.filter(
-                    user=FeedEntryTestCase.user,
-                    feed_entry__in=[feed_entry1, feed_entry2],
+                FeedEntry.objects.filter(
+                    FeedReadWatermark.covers(FeedEntryTestCase.user),
+                    uuid__in=[feed_entry1.uuid, feed_entry2.uuid],
                 ).count(),
                 2,
             )
+            self.assertFalse(
+                ReadFeedEntryUserMapping.objects.filter(
+                    user=FeedEntryTestCase.user
+                ).exists()
+            )
         finally:
             cache.clear()
 
+    def test_FeedEntriesReadView_post_watermark(self):
+        feed_entries = [
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+            for i in range(3)
+        ]
+
+        response = self.client.post(
+            "/api/feedentries/read",
+            {
+                "feedUuids": [str(FeedEntryTestCase.feed.uuid)],
+            },
+        )
+        self.assertEqual(response.status_code, 204, response.content)
+
+        self.assertEqual(
+            FeedReadWatermark.objects.filter(user=FeedEntryTestCase.user).count(), 1
+        )
+
+        FeedEntryTestCase.user.refresh_from_db(fields=("read_feed_entries_counter",))
+        self.assertEqual(FeedEntryTestCase.user.read_feed_entries_counter, 3)
+
+        # entries scraped after the watermark stay unread
+        late_feed_entry = FeedEntry.objects.create(
+            id=None,
+            feed=FeedEntryTestCase.feed,
+            created_at=None,
+            updated_at=None,
+            title="Late Feed Entry Title",
+            url="http://example.com/late-entry.html",
+            content="Some Entry content",
+            author_name="John Doe",
+            db_updated_at=None,
+        )
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"fields": ["uuid", "isRead", "readAt"], "count": 10},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        objs = {o["uuid"]: o for o in response.json()["objects"]}
+        for feed_entry in feed_entries:
+            self.assertTrue(objs[str(feed_entry.uuid)]["isRead"])
+            self.assertIsNotNone(objs[str(feed_entry.uuid)]["readAt"])
+        self.assertFalse(objs[str(late_feed_entry.uuid)]["isRead"])
+        self.assertIsNone(objs[str(late_feed_entry.uuid)]["readAt"])
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"fields": ["uuid"], "search": 'isRead:"true"', "count": 10},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["totalCount"], 3)
+
+        # unmarking one entry only excepts it from the watermark, rather than
+        # spelling the watermark out into per-entry mappings
+        response = self.client.delete(f"/api/feedentry/{feed_entries[1].uuid}/read")
+        self.assertEqual(response.status_code, 204, response.content)
+
+        self.assertTrue(
+            FeedReadWatermark.objects.filter(user=FeedEntryTestCase.user).exists()
+        )
+        self.assertEqual(
+            list(
+                FeedReadWatermarkException.objects.values_list(
+                    "feed_entry_id", flat=True
+                )
+            ),
+            [feed_entries[1].uuid],
+        )
+        self.assertFalse(
+            ReadFeedEntryUserMapping.objects.filter(
+                user=FeedEntryTestCase.user
+            ).exists()
+        )
+
+        FeedEntryTestCase.user.refresh_from_db(fields=("read_feed_entries_counter",))
+        self.assertEqual(FeedEntryTestCase.user.read_feed_entries_counter, 2)
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"fields": ["uuid", "isRead", "readAt"], "count": 10},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        objs = {o["uuid"]: o for o in response.json()["objects"]}
+        self.assertFalse(objs[str(feed_entries[1].uuid)]["isRead"])
+        self.assertIsNone(objs[str(feed_entries[1].uuid)]["readAt"])
+        for feed_entry in (feed_entries[0], feed_entries[2]):
+            self.assertTrue(objs[str(feed_entry.uuid)]["isRead"])
+
+        # and reading it again is a mapping as usual
+        response = self.client.post(f"/api/feedentry/{feed_entries[1].uuid}/read")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"fields": ["uuid"], "search": 'isRead:"true"', "count": 10},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["totalCount"], 3)
+
+        # the bulk unmark too
+        response = self.client.delete(
+            "/api/feedentries/read",
+            {"feedEntryUuids": [str(feed_entries[1].uuid), str(feed_entries[2].uuid)]},
+        )
+        self.assertEqual(response.status_code, 204, response.content)
+
+        self.assertTrue(
+            FeedReadWatermark.objects.filter(user=FeedEntryTestCase.user).exists()
+        )
+        self.assertEqual(
+            set(
+                FeedReadWatermarkException.objects.values_list(
+                    "feed_entry_id", flat=True
+                )
+            ),
+            {feed_entries[1].uuid, feed_entries[2].uuid},
+        )
+        FeedEntryTestCase.user.refresh_from_db(fields=("read_feed_entries_counter",))
+        self.assertEqual(FeedEntryTestCase.user.read_feed_entries_counter, 1)
+
+    def test_FeedEntriesReadQueryView_post(self):
+        feed_entries = [
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe" if i < 3 else "Jane Doe",
+                db_updated_at=None,
+            )
+            for i in range(4)
+        ]
+
+        ReadFeedEntryUserMapping.objects.create(
+            feed_entry=feed_entries[0], user=FeedEntryTestCase.user
+        )
+        FeedEntryTestCase.user.read_feed_entries_counter = 1
+        FeedEntryTestCase.user.save(update_fields=("read_feed_entries_counter",))
+
+        response = self.client.post(
+            "/api/feedentries/read/query",
+            {"search": 'authorName:"John"'},
+        )
+        self.assertEqual(response.status_code, 204, response.content)
+
+        self.assertEqual(
+            set(
+                ReadFeedEntryUserMapping.objects.filter(
+                    user=FeedEntryTestCase.user
+                ).values_list("feed_entry_id", flat=True)
+            ),
+            {feed_entry.uuid for feed_entry in feed_entries[:3]},
+        )
+
+        FeedEntryTestCase.user.refresh_from_db(fields=("read_feed_entries_counter",))
+        self.assertEqual(FeedEntryTestCase.user.read_feed_entries_counter, 3)
+
+        response = self.client.post(
+            "/api/feedentries/query",
+            {"fields": ["uuid", "isRead"], "count": 10},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        objs = {o["uuid"]: o for o in response.json()["objects"]}
+        for feed_entry in feed_entries[:3]:
+            self.assertTrue(objs[str(feed_entry.uuid)]["isRead"])
+        self.assertFalse(objs[str(feed_entries[3].uuid)]["isRead"])
+
+        # nothing left to match, so nothing changes
+        response = self.client.post(
+            "/api/feedentries/read/query",
+            {"search": 'authorName:"John"'},
+        )
+        self.assertEqual(response.status_code, 204, response.content)
+
+        FeedEntryTestCase.user.refresh_from_db(fields=("read_feed_entries_counter",))
+        self.assertEqual(FeedEntryTestCase.user.read_feed_entries_counter, 3)
+
+    def test_FeedEntriesReadQueryView_post_search_missing(self):
+        response = self.client.post(
+            "/api/feedentries/read/query",
+            {},
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+
+    def test_FeedEntriesReadQueryView_post_search_malformed(self):
+        response = self.client.post(
+            "/api/feedentries/read/query",
+            {"search": "("},
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+
     def test_FeedEntriesReadView_post_noentries(self):
         response = self.client.post(
             "/api/feedentries/read",
@@ -674,10 +1577,8 @@ class FeedEntryTestCase(APITestCase):
             FeedEntryTestCase.user.read_feed_entries_counter = 2
             FeedEntryTestCase.user.save(update_fields=("read_feed_entries_counter",))
 
-            save_counts_lookup_to_cache(
-                FeedEntryTestCase.user,
-                {FeedEntryTestCase.feed.uuid: Feed._CountsDescriptor(5, 5)},
-                cache,
+            save_read_counts_lookup_to_cache(
+                FeedEntryTestCase.user, {FeedEntryTestCase.feed.uuid: 5}, cache
             )
 
             response = self.client.delete(
@@ -986,6 +1887,63 @@ class FeedEntryTestCase(APITestCase):
         self.assertIn("objects", json_)
         self.assertIsInstance(json_["objects"], list)
 
+    def test_FeedEntriesQueryStableView_post_stream(self):
+        for i in range(3):
+            FeedEntry.objects.create(
+                id=None,
+                feed=FeedEntryTestCase.feed,
+                created_at=None,
+                updated_at=None,
+                title=f"Feed Entry {i} Title",
+                url=f"http://example.com/entry{i}.html",
+                content=f"Some Entry content {i}",
+                author_name="John Doe",
+                db_updated_at=None,
+            )
+
+        response = self.client.post(
+            "/api/feedentries/query/stable/create",
+            {},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        token = response.json()
+
+        def _assert_same(data: dict[str, Any]):
+            response = self.client.post(
+                "/api/feedentries/query/stable", {**data, "token": token}
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+
+            with self.settings(QUERY_STREAM_CHUNK_SIZE=2):
+                stream_response = self.client.post(
+                    "/api/feedentries/query/stable",
+                    {**data, "token": token, "stream": True},
+                )
+                self.assertEqual(stream_response.status_code, 200)
+                self.assertTrue(stream_response.streaming)
+
+                json_ = json.loads(b"".join(stream_response.streaming_content))
+
+            self.assertEqual(json_, response.json())
+
+            return json_
+
+        for data in (
+            {},
+            {"fields": ["uuid", "title"]},
+            {"fields": ["uuid", "readAt"], "skip": 1},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(
+                    len(_assert_same(data)["objects"]), 3 - data.get("skip", 0)
+                )
+
+        # a page with anything since deleted is left empty
+        FeedEntry.objects.filter(title="Feed Entry 1 Title").delete()
+
+        self.assertEqual(_assert_same({"fields": ["uuid"]})["objects"], [])
+
     def test_FeedEntriesQueryStableView_post_token_missing(self):
         response = self.client.post(
             "/api/feedentries/query/stable",
@@ -1,11 +1,20 @@
+import json
 import logging
 import uuid
 from typing import ClassVar
 
+from django.core.cache import BaseCache, caches
 from django.utils import timezone
 from rest_framework.test import APITestCase
 
-from api.models import Feed, User, UserCategory
+from api.cache_utils.user_category_counts import delete_user_category_counts_cache
+from api.models import (
+    Feed,
+    FeedEntry,
+    SubscribedFeedUserMapping,
+    User,
+    UserCategory,
+)
 from api.tests.utils import disable_silk, disable_throttling
 
 
@@ -54,6 +63,39 @@ class UserCategoryTestCase(APITestCase):
         )
         self.assertEqual(response.status_code, 200, response.content)
 
+    def test_UserCategoryView_get_etag(self):
+        user_category = UserCategory.objects.create(
+            user=UserCategoryTestCase.user, text="Test User Category"
+        )
+
+        response = self.client.get(f"/api/usercategory/{user_category.uuid}")
+        self.assertEqual(response.status_code, 200, response.content)
+        etag = response["ETag"]
+
+        response = self.client.get(
+            f"/api/usercategory/{user_category.uuid}", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304, response.content)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(
+            f"/api/usercategory/{user_category.uuid}", HTTP_IF_NONE_MATCH="*"
+        )
+        self.assertEqual(response.status_code, 304, response.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(
+                f"/api/usercategory/{user_category.uuid}",
+                {"text": "Renamed User Category"},
+            )
+            self.assertEqual(response.status_code, 204, response.content)
+
+        response = self.client.get(
+            f"/api/usercategory/{user_category.uuid}", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotEqual(response["ETag"], etag)
+
     def test_UserCategoryView_get_not_found(self):
         response = self.client.get(
             f"/api/usercategory/{uuid.uuid4()}",
@@ -176,6 +218,111 @@ class UserCategoryTestCase(APITestCase):
         )
         self.assertEqual(response.status_code, 200, response.content)
 
+    def test_UserCategoriesQueryView_post_stream(self):
+        for i in range(3):
+            UserCategory.objects.create(
+                user=UserCategoryTestCase.user, text=f"Test User Category {i}"
+            )
+
+        for data in (
+            {},
+            {"fields": ["uuid", "text", "feedUuids"], "sort": "text:DESC"},
+            {"fields": ["uuid"], "count": 2, "skip": 1},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post("/api/usercategories/query", data)
+                self.assertEqual(response.status_code, 200, response.content)
+
+                stream_response = self.client.post(
+                    "/api/usercategories/query", {**data, "stream": True}
+                )
+                self.assertEqual(stream_response.status_code, 200)
+                self.assertTrue(stream_response.streaming)
+
+                self.assertEqual(
+                    json.loads(b"".join(stream_response.streaming_content)),
+                    response.json(),
+                )
+
+    def test_UserCategoriesQueryView_post_etag(self):
+        UserCategory.objects.create(
+            user=UserCategoryTestCase.user, text="Test User Category"
+        )
+
+        data = {"fields": ["uuid", "text"]}
+
+        response = self.client.post("/api/usercategories/query", data)
+        self.assertEqual(response.status_code, 200, response.content)
+        etag = response["ETag"]
+
+        response = self.client.post(
+            "/api/usercategories/query", data, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304, response.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/usercategory", {"text": "Another User Category"}
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.post(
+            "/api/usercategories/query", data, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(response.json()["objects"]), 2)
+
+    def test_UserCategoriesQueryView_post_total_count_mode(self):
+        caches["default"].clear()
+
+        for i in range(3):
+            UserCategory.objects.create(
+                user=UserCategoryTestCase.user, text=f"Test User Category {i}"
+            )
+
+        with self.settings(QUERY_TOTAL_COUNT_ESTIMATE_CAP=2):
+            response = self.client.post(
+                "/api/usercategories/query",
+                {"objects": False, "totalCountMode": "estimated"},
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(
+                response.json(), {"totalCount": 2, "totalCountExact": False}
+            )
+
+        response = self.client.post(
+            "/api/usercategories/query",
+            {"objects": False, "totalCountMode": "cached"},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 3})
+
+        UserCategory.objects.create(
+            user=UserCategoryTestCase.user, text="Test User Category 3"
+        )
+
+        # served from the cache until it expires
+        response = self.client.post(
+            "/api/usercategories/query",
+            {"objects": False, "totalCountMode": "cached"},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 3})
+
+        response = self.client.post(
+            "/api/usercategories/query",
+            {"objects": False, "totalCountMode": "exact"},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {"totalCount": 4})
+
+    def test_UserCategoriesQueryView_post_total_count_mode_malformed(self):
+        response = self.client.post(
+            "/api/usercategories/query",
+            {"totalCountMode": "bad"},
+        )
+        self.assertEqual(response.status_code, 400, response.content)
+
     def test_UserCategoriesApplyView_put(self):
         feed1 = Feed.objects.create(
             feed_url="http://example.com/rss.xml",
@@ -306,3 +453,93 @@ class UserCategoryTestCase(APITestCase):
             },
         )
         self.assertEqual(response.status_code, 404, response.content)
+
+    def test_UserCategoriesCountsView_get(self):
+        cache: BaseCache = caches["default"]
+
+        delete_user_category_counts_cache(UserCategoryTestCase.user, cache)
+
+        user_category1 = UserCategory.objects.create(
+            user=UserCategoryTestCase.user, text="Test User Category 1"
+        )
+        user_category2 = UserCategory.objects.create(
+            user=UserCategoryTestCase.user, text="Test User Category 2"
+        )
+
+        feed1 = Feed.objects.create(
+            feed_url="http://example.com/rss.xml",
+            title="Sample Feed",
+            home_url="http://example.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+        feed2 = Feed.objects.create(
+            feed_url="http://example2.com/rss.xml",
+            title="Sample Feed 2",
+            home_url="http://example2.com",
+            published_at=timezone.now(),
+            updated_at=None,
+            db_updated_at=None,
+        )
+
+        SubscribedFeedUserMapping.objects.create(
+            feed=feed1, user=UserCategoryTestCase.user
+        )
+        SubscribedFeedUserMapping.objects.create(
+            feed=feed2, user=UserCategoryTestCase.user
+        )
+
+        user_category1.feeds.add(feed1)
+
+        feed_entry1 = FeedEntry.objects.create(
+            feed=feed1,
+            url="http://example.com/entry1.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+        FeedEntry.objects.create(
+            feed=feed1,
+            url="http://example.com/entry2.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+        FeedEntry.objects.create(
+            feed=feed2,
+            url="http://example2.com/entry1.html",
+            content="<b>Some HTML Content</b>",
+            author_name="John Doe",
+        )
+
+        response = self.client.get("/api/usercategories/counts")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response["X-Cache-Hit"], "NO")
+        self.assertEqual(
+            response.json(),
+            {
+                "categories": {
+                    str(user_category1.uuid): {"unreadCount": 2, "readCount": 0},
+                    str(user_category2.uuid): {"unreadCount": 0, "readCount": 0},
+                },
+                "uncategorized": {"unreadCount": 1, "readCount": 0},
+                "total": {"unreadCount": 3, "readCount": 0},
+            },
+        )
+
+        response = self.client.get("/api/usercategories/counts")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response["X-Cache-Hit"], "YES")
+
+        response = self.client.post(f"/api/feedentry/{feed_entry1.uuid}/read")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        response = self.client.get("/api/usercategories/counts")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response["X-Cache-Hit"], "NO")
+
+        json_ = response.json()
+        self.assertEqual(
+            json_["categories"][str(user_category1.uuid)],
+            {"unreadCount": 1, "readCount": 1},
+        )
+        self.assertEqual(json_["total"], {"unreadCount": 2, "readCount": 1})
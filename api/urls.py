@@ -106,6 +106,7 @@ urlpatterns = [
     ),
     re_path(rf"^feedentry/{_uuid_regex}/read/?$", views.FeedEntryReadView.as_view()),
     re_path(r"^feedentries/read/?$", views.FeedEntriesReadView.as_view()),
+    re_path(r"^feedentries/read/query/?$", views.FeedEntriesReadQueryView.as_view()),
     re_path(
         rf"^feedentry/{_uuid_regex}/favorite/?$", views.FeedEntryFavoriteView.as_view()
     ),
@@ -115,6 +116,7 @@ urlpatterns = [
     re_path(rf"^usercategory/{_uuid_regex}/?$", views.UserCategoryView.as_view()),
     re_path(r"^usercategories/query/?$", views.UserCategoriesQueryView.as_view()),
     re_path(r"^usercategories/apply/?$", views.UserCategoriesApplyView.as_view()),
+    re_path(r"^usercategories/counts/?$", views.UserCategoriesCountsView.as_view()),
     re_path(r"^opml/?$", views.OPMLView.as_view()),
     re_path(
         rf"^feed/subscribe/progress/{_uuid_regex}/?$",
@@ -135,4 +137,5 @@ urlpatterns = [
     ),
     re_path(r"^report/feed/?$", views.FeedReportView.as_view()),
     re_path(r"^report/feedentry?$", views.FeedEntryReportView.as_view()),
+    re_path(r"^batch/query/?$", views.BatchQueryView.as_view()),
 ]
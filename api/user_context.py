@@ -0,0 +1,73 @@
+from typing import Any, Callable, TypeVar
+
+from django.core.cache import BaseCache
+from django.http import HttpRequest
+
+from api.cache_utils.favorite_feed_entry_ordinals import (
+    _GetFavoriteFeedEntryOrdinalsFromCacheResults,
+    get_favorite_feed_entry_ordinals_from_cache,
+)
+from api.cache_utils.read_feed_entry_ordinals import (
+    _GetReadFeedEntryOrdinalsFromCacheResults,
+    get_read_feed_entry_ordinals_from_cache,
+)
+from api.cache_utils.subscription_datas import (
+    _GetSubscriptionDatasFromCacheResults,
+    get_subscription_datas_from_cache,
+)
+from api.models import User
+
+_T = TypeVar("_T")
+
+# The user's state that every query on their behalf loads the same way
+# (subscriptions, read/favorite ordinals, ...), memoized on the request. Unlike
+# the memos in `api.fields`, which are of one page of objects, these aren't tied
+# to any query, so a batch of queries (see `api.views.batch`) shares a single
+# memo between all of its sub-requests, and loads each of them only once.
+
+
+def get_user_context_memo(request: HttpRequest) -> dict[str, Any]:
+    memo: dict[str, Any] | None = getattr(request, "_user_context", None)
+    if memo is None:
+        memo = {}
+        setattr(request, "_user_context", memo)
+
+    return memo
+
+
+def load_user_context(request: HttpRequest, key: str, load: Callable[[], _T]) -> _T:
+    memo = get_user_context_memo(request)
+    if key not in memo:
+        memo[key] = load()
+
+    return memo[key]
+
+
+def get_subscription_datas(
+    request: HttpRequest, user: User, cache: BaseCache
+) -> _GetSubscriptionDatasFromCacheResults:
+    return load_user_context(
+        request,
+        "subscription_datas",
+        lambda: get_subscription_datas_from_cache(user, cache),
+    )
+
+
+def get_read_feed_entry_ordinals(
+    request: HttpRequest, user: User, cache: BaseCache
+) -> _GetReadFeedEntryOrdinalsFromCacheResults:
+    return load_user_context(
+        request,
+        "read_feed_entry_ordinals",
+        lambda: get_read_feed_entry_ordinals_from_cache(user, cache),
+    )
+
+
+def get_favorite_feed_entry_ordinals(
+    request: HttpRequest, user: User, cache: BaseCache
+) -> _GetFavoriteFeedEntryOrdinalsFromCacheResults:
+    return load_user_context(
+        request,
+        "favorite_feed_entry_ordinals",
+        lambda: get_favorite_feed_entry_ordinals_from_cache(user, cache),
+    )
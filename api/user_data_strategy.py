@@ -0,0 +1,40 @@
+from typing import Any, Literal
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+UserDataStrategy = Literal["literal", "exists", "join"]
+
+_USER_DATA_LITERAL_MAX_SIZE: int
+_USER_DATA_EXISTS_MAX_PAGE_SIZE: int
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _USER_DATA_LITERAL_MAX_SIZE
+    global _USER_DATA_EXISTS_MAX_PAGE_SIZE
+
+    _USER_DATA_LITERAL_MAX_SIZE = getattr(settings, "USER_DATA_LITERAL_MAX_SIZE", 500)
+    _USER_DATA_EXISTS_MAX_PAGE_SIZE = getattr(
+        settings, "USER_DATA_EXISTS_MAX_PAGE_SIZE", 100
+    )
+
+
+_load_global_settings()
+
+
+def choose_user_data_strategy(
+    collection_size: int | None, page_size: int | None
+) -> UserDataStrategy:
+    # small lists are cheapest inlined. Past that, the SQL text (and so the
+    # parse/plan cost) would grow with the user's history, so look the rows up in
+    # the mapping table instead: per row for small pages, and as one hashable join
+    # when the query has to scan (or return) many rows
+    if collection_size is not None and collection_size <= _USER_DATA_LITERAL_MAX_SIZE:
+        return "literal"
+
+    if page_size is not None and page_size <= _USER_DATA_EXISTS_MAX_PAGE_SIZE:
+        return "exists"
+
+    return "join"
@@ -8,6 +8,7 @@ from .auth import (
     UserDeleteView,
     UserDetailsView,
 )
+from .batch import BatchQueryView
 from .captcha import CaptchaAudioView, CaptchaImageView, NewCaptchaView
 from .classifier_label import (
     ClassifierLabelFeedEntryVotesView,
@@ -22,6 +23,7 @@ from .feed_entry import (
     FeedEntriesQueryStableCreateView,
     FeedEntriesQueryStableView,
     FeedEntriesQueryView,
+    FeedEntriesReadQueryView,
     FeedEntriesReadView,
     FeedEntryFavoriteView,
     FeedEntryLanguagesView,
@@ -42,6 +44,7 @@ from .social import (
 )
 from .user_category import (
     UserCategoriesApplyView,
+    UserCategoriesCountsView,
     UserCategoriesQueryView,
     UserCategoryCreateView,
     UserCategoryView,
@@ -82,6 +85,7 @@ __all__ = [
     "FeedEntriesQueryStableView",
     "FeedEntryReadView",
     "FeedEntriesReadView",
+    "FeedEntriesReadQueryView",
     "FeedEntryFavoriteView",
     "FeedEntriesFavoriteView",
     "FeedEntryLanguagesView",
@@ -89,6 +93,7 @@ __all__ = [
     "UserCategoryCreateView",
     "UserCategoriesQueryView",
     "UserCategoriesApplyView",
+    "UserCategoriesCountsView",
     "OPMLView",
     "FeedSubscriptionProgressView",
     "ExploreView",
@@ -98,4 +103,5 @@ __all__ = [
     "ClassifierLabelFeedEntryVotesView",
     "FeedReportView",
     "FeedEntryReportView",
+    "BatchQueryView",
 ]
@@ -0,0 +1,185 @@
+import datetime
+import functools
+import io
+from typing import Any, Callable, NamedTuple, cast
+from urllib.parse import urlsplit
+
+import ujson
+from django.core.handlers.wsgi import WSGIRequest
+from django.http.response import HttpResponseBase
+from django.urls import Resolver404, ResolverMatch, resolve
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from api.serializers import BatchQuerySerializer
+from api.streaming_json import rendered_json_response
+from api.user_context import get_user_context_memo
+from api.views.feed import FeedsQueryView
+from api.views.feed_entry import (
+    FeedEntriesQueryStableView,
+    FeedEntriesQueryView,
+    FeedEntryLanguagesView,
+    FeedEntryView,
+)
+from api.views.user_category import (
+    UserCategoriesCountsView,
+    UserCategoriesQueryView,
+    UserCategoryView,
+)
+from api.views.user_meta import ReadCountView
+
+# the views a batch can run, and how: only the ones that read. `FeedView` isn't
+# one of them, as its GET can go and fetch (and create) a feed
+_BATCHABLE_VIEW_METHODS: dict[type[APIView], frozenset[str]] = {
+    FeedsQueryView: frozenset({"POST"}),
+    FeedEntriesQueryView: frozenset({"POST"}),
+    FeedEntriesQueryStableView: frozenset({"POST"}),
+    UserCategoriesQueryView: frozenset({"POST"}),
+    FeedEntryView: frozenset({"GET"}),
+    FeedEntryLanguagesView: frozenset({"GET"}),
+    UserCategoryView: frozenset({"GET"}),
+    UserCategoriesCountsView: frozenset({"GET"}),
+    ReadCountView: frozenset({"GET"}),
+}
+
+
+class _BatchAuthentication(BaseAuthentication):
+    # the batch request is already authenticated (and throttled), so its
+    # sub-requests just take on the same user and token
+    def authenticate(self, request: Request):
+        return getattr(request, "_batch_auth", None)
+
+
+@functools.cache
+def _sub_view(view_class: type[APIView]) -> Callable[..., HttpResponseBase]:
+    return view_class.as_view(
+        authentication_classes=(_BatchAuthentication,), throttle_classes=()
+    )
+
+
+class _SubQuery(NamedTuple):
+    view_class: type[APIView]
+    match: ResolverMatch
+    method: str
+    path: str
+    query_string: str
+    body: dict[str, Any]
+    if_none_match: str | None
+
+
+def _prepare_sub_query(index: int, query: dict[str, Any]) -> _SubQuery:
+    method: str = query["method"]
+    url = urlsplit(query["path"])
+
+    match: ResolverMatch
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        raise ValidationError({f"queries[{index}]": "path not found"})
+
+    view_class = cast(type[APIView] | None, getattr(match.func, "view_class", None))
+    if view_class is None or method not in _BATCHABLE_VIEW_METHODS.get(view_class, ()):
+        raise ValidationError({f"queries[{index}]": "query not batchable"})
+
+    return _SubQuery(
+        view_class=view_class,
+        match=match,
+        method=method,
+        path=url.path,
+        query_string=url.query,
+        body=query["body"],
+        if_none_match=query.get("if_none_match"),
+    )
+
+
+def _sub_request(
+    request: Request, sub_query: _SubQuery, now: datetime.datetime
+) -> WSGIRequest:
+    body = ujson.dumps(sub_query.body).encode() if sub_query.method != "GET" else b""
+
+    environ = request.META.copy()
+    environ.pop("HTTP_IF_NONE_MATCH", None)
+    if sub_query.if_none_match is not None:
+        environ["HTTP_IF_NONE_MATCH"] = sub_query.if_none_match
+
+    environ.update(
+        {
+            "REQUEST_METHOD": sub_query.method,
+            "PATH_INFO": sub_query.path,
+            "QUERY_STRING": sub_query.query_string,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+        }
+    )
+
+    sub_request = WSGIRequest(environ)
+    sub_request.user = request.user
+    setattr(sub_request, "_batch_auth", (request.user, request.auth))
+    # shared with every other sub-request, so each load happens at most once per
+    # batch. The page memos that `api.fields` keeps are each of one query's
+    # objects, so they start over in every sub-request
+    setattr(sub_request, "_user_context", get_user_context_memo(request))
+    # ...but all of them see the same "now"
+    setattr(sub_request, "_now", now)
+    return sub_request
+
+
+def _response_body(response: HttpResponseBase) -> bytes:
+    content: bytes
+    if response.streaming:
+        content = b"".join(cast(Any, response).streaming_content)
+    else:
+        render = getattr(response, "render", None)
+        if render is not None:
+            render()
+
+        content = cast(Any, response).content
+
+    return content or b"null"
+
+
+class BatchQueryView(APIView):
+    @extend_schema(
+        summary="Run multiple queries at once",
+        description="Run multiple queries at once, sharing the loaded user state",
+        request=BatchQuerySerializer,
+        responses=OpenApiTypes.OBJECT,
+    )
+    def post(self, request: Request):
+        serializer = BatchQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # all or nothing: every query has to be valid before any of them run
+        sub_queries = [
+            _prepare_sub_query(i, query)
+            for i, query in enumerate(serializer.validated_data["queries"])
+        ]
+
+        now = timezone.now()
+
+        # the sub-responses are already rendered, so they're put together as-is
+        # rather than parsed just to be rendered again
+        parts: list[bytes] = []
+        for sub_query in sub_queries:
+            response = _sub_view(sub_query.view_class)(
+                _sub_request(request, sub_query, now),
+                *sub_query.match.args,
+                **sub_query.match.kwargs,
+            )
+
+            parts.append(
+                b'{"status":%d,"etag":%s,"body":%s}'
+                % (
+                    response.status_code,
+                    ujson.dumps(response.get("ETag")).encode(),
+                    _response_body(response),
+                )
+            )
+
+        return rendered_json_response(b'{"responses":[%s]}' % b",".join(parts))
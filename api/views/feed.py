@@ -1,6 +1,7 @@
+import functools
 import logging
 import uuid
-from typing import Any, Collection, NamedTuple, cast
+from typing import Any, Collection, Iterable, NamedTuple, cast
 
 import dramatiq
 from django.conf import settings
@@ -9,6 +10,7 @@ from django.core.signals import setting_changed
 from django.db import transaction
 from django.db.models import OrderBy, Q
 from django.dispatch import receiver
+from django.http.response import HttpResponseBase
 from django.utils import timezone
 from dramatiq import Message, group
 from dramatiq.errors import DramatiqError
@@ -28,13 +30,33 @@ from api.cache_utils.archived_counts_lookup import (
     save_archived_counts_lookup_to_cache,
 )
 from api.cache_utils.counts_lookup import (
+    delete_read_counts_lookup_cache,
+    get_counts_lookup_batch_task,
     get_counts_lookup_from_cache,
-    get_counts_lookup_task,
-    save_counts_lookup_to_cache,
 )
-from api.cache_utils.subscription_datas import (
-    delete_subscription_data_cache,
-    get_subscription_datas_from_cache,
+from api.cache_utils.query_results import (
+    get_query_result_from_cache,
+    query_result_cache_enabled,
+    save_query_result_to_cache,
+)
+from api.cache_utils.read_feed_entry_ordinals import (
+    delete_read_feed_entry_ordinals_cache,
+)
+from api.cache_utils.state_versions import (
+    UserStateKind,
+    bump_feed_content_versions,
+    bump_user_state_versions,
+)
+from api.cache_utils.subscription_datas import delete_subscription_data_cache
+from api.cache_utils.user_category_counts import delete_user_category_counts_cache
+from api.etag_util import (
+    ContentScope,
+    digest_etag,
+    etags_enabled,
+    generate_etag,
+    generate_state_digest,
+    is_not_modified,
+    not_modified_response,
 )
 from api.exceptions import Conflict, InsufficientStorage
 from api.exposed_feed_extractor import ExposedFeed, extract_exposed_feeds
@@ -48,6 +70,12 @@ from api.models import (
     SubscribedFeedUserMapping,
     User,
 )
+from api.query_total_count import (
+    TotalCount,
+    TotalCountMode,
+    get_total_count,
+    plan_count_queryset,
+)
 from api.requests_extensions import ResponseTooBig, safe_response_text
 from api.serializers import (
     FeedFindQuerySerializer,
@@ -58,8 +86,15 @@ from api.serializers import (
     QuerySerializer,
     LocaleSerializer,
 )
+from api.streaming_json import (
+    json_response,
+    render_json,
+    rendered_json_response,
+    stream_chunk_size,
+)
 from api.text_classifier.lang_detector import detect_iso639_3
 from api.text_classifier.prep_content import prep_for_lang_detection
+from api.user_context import get_subscription_datas
 from query_utils import fields as fieldutils
 
 _logger = logging.getLogger("rss_temple.views.feed")
@@ -68,6 +103,7 @@ _EXPOSED_FEEDS_CACHE_TIMEOUT_SECONDS: float | None
 _DOWNLOAD_MAX_BYTE_COUNT: int
 _FEED_GET_REQUESTS_DRAMATIQ: bool
 _FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_TIMEOUT_SECONDS: float
+_FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_BATCH_SIZE: int | None
 _FEED_GET_REQUESTS_DRAMATIQ_ARCHIVED_COUNTS_LOOKUP_TIMEOUT_SECONDS: float
 
 
@@ -77,6 +113,7 @@ def _load_global_settings(*args: Any, **kwargs: Any):
     global _DOWNLOAD_MAX_BYTE_COUNT
     global _FEED_GET_REQUESTS_DRAMATIQ
     global _FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_TIMEOUT_SECONDS
+    global _FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_BATCH_SIZE
     global _FEED_GET_REQUESTS_DRAMATIQ_ARCHIVED_COUNTS_LOOKUP_TIMEOUT_SECONDS
 
     _EXPOSED_FEEDS_CACHE_TIMEOUT_SECONDS = settings.EXPOSED_FEEDS_CACHE_TIMEOUT_SECONDS
@@ -87,6 +124,12 @@ def _load_global_settings(*args: Any, **kwargs: Any):
         "FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_TIMEOUT_SECONDS",
         1000.0 * 10.0,
     )
+    # `None` falls back to one `get_counts_lookup` message per missing feed
+    _FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_BATCH_SIZE = getattr(
+        settings,
+        "FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_BATCH_SIZE",
+        500,
+    )
     _FEED_GET_REQUESTS_DRAMATIQ_ARCHIVED_COUNTS_LOOKUP_TIMEOUT_SECONDS = getattr(
         settings,
         "FEED_GET_REQUESTS_DRAMATIQ_ARCHIVED_COUNTS_LOOKUP_TIMEOUT_SECONDS",
@@ -98,6 +141,13 @@ _load_global_settings()
 
 _OBJECT_NAME = "feed"
 
+# what a feed's fields can depend on, besides its content
+_ETAG_USER_STATE_KINDS: tuple[UserStateKind, ...] = (
+    "read",
+    "subscription",
+    "category",
+)
+
 
 class _PreprocessGetRequestFromCacheResults(NamedTuple):
     counts_lookup_cache_hit: bool | None
@@ -140,8 +190,35 @@ def _preprocess_get_request_from_cache__dramatiq(
         )
 
         if missing_counts_lookup_feed_uuids:
-            g = group(
-                [
+            counts_messages: list[Message]
+            if (
+                batch_size := _FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_BATCH_SIZE
+            ) is not None:
+                counts_messages = [
+                    Message(
+                        queue_name="rss_temple",
+                        actor_name="get_counts_lookup_batch",
+                        args=(
+                            str(user.uuid),
+                            [
+                                str(uuid_)
+                                for uuid_ in missing_counts_lookup_feed_uuids[
+                                    i : i + batch_size
+                                ]
+                            ],
+                        ),
+                        kwargs={},
+                        options={
+                            "max_age": (
+                                _FEED_GET_REQUESTS_DRAMATIQ_COUNTS_LOOKUP_TIMEOUT_SECONDS
+                                * 1000.0
+                            ),
+                        },
+                    )
+                    for i in range(0, len(missing_counts_lookup_feed_uuids), batch_size)
+                ]
+            else:
+                counts_messages = [
                     Message(
                         queue_name="rss_temple",
                         actor_name="get_counts_lookup",
@@ -158,9 +235,9 @@ def _preprocess_get_request_from_cache__dramatiq(
                         },
                     )
                     for uuid_ in missing_counts_lookup_feed_uuids
-                ],
-                broker=broker,
-            )
+                ]
+
+            g = group(counts_messages, broker=broker)
             messages["counts"] = g.run()
             counts_lookup_cache_hit = False
         else:
@@ -220,8 +297,6 @@ def _preprocess_get_request_from_cache__dramatiq(
                     }
                 )
 
-            save_counts_lookup_to_cache(user, missing_counts_lookup, cache)
-
             assert counts_lookup is not None
             counts_lookup.update(missing_counts_lookup)
         elif k == "archived_counts":
@@ -275,41 +350,8 @@ def _preprocess_get_request_from_cache__sync(
     user: User,
     feed_uuids: Collection[uuid.UUID],
 ) -> _PreprocessGetRequestFromCacheResults:
-    counts_lookup_cache_hit: bool | None = None
-    if field_names.intersection(("readCount", "unreadCount")):
-        counts_lookup, missing_counts_lookup_feed_uuids = get_counts_lookup_from_cache(
-            user, feed_uuids, cache
-        )
-
-        if missing_counts_lookup_feed_uuids:
-            missing_counts_lookup: dict[uuid.UUID, Feed._CountsDescriptor] = {}
-
-            for feed_uuid in feed_uuids:
-                missing_counts_lookup_results = get_counts_lookup_task(
-                    str(user.uuid), str(feed_uuid)
-                )
-                missing_counts_lookup.update(
-                    {
-                        uuid.UUID(fus): Feed._CountsDescriptor(
-                            count_dict["unread_count"], count_dict["read_count"]
-                        )
-                        for fus, count_dict in missing_counts_lookup_results.items()
-                    }
-                )
-
-            save_counts_lookup_to_cache(user, missing_counts_lookup, cache)
-
-            counts_lookup.update(missing_counts_lookup)
-            counts_lookup_cache_hit = False
-        else:
-            counts_lookup_cache_hit = True
-
-        setattr(
-            request,
-            "_counts_lookup",
-            counts_lookup,
-        )
-
+    # archived counts first, since they are also one of the parts the
+    # unread/read counts are composed from
     archived_counts_lookup_cache_hit: bool | None = None
     if field_names.intersection(("archivedCount",)):
         (
@@ -320,7 +362,7 @@ def _preprocess_get_request_from_cache__sync(
         if missing_archived_counts_lookup_feed_uuids:
             missing_archived_counts_lookup: dict[uuid.UUID, int] = {}
 
-            for feed_uuid in feed_uuids:
+            for feed_uuid in missing_archived_counts_lookup_feed_uuids:
                 missing_archived_counts_lookup_results = (
                     get_archived_counts_lookup_task(str(feed_uuid))
                 )
@@ -344,6 +386,37 @@ def _preprocess_get_request_from_cache__sync(
             archived_counts_lookup,
         )
 
+    counts_lookup_cache_hit: bool | None = None
+    if field_names.intersection(("readCount", "unreadCount")):
+        counts_lookup, missing_counts_lookup_feed_uuids = get_counts_lookup_from_cache(
+            user, feed_uuids, cache
+        )
+
+        if missing_counts_lookup_feed_uuids:
+            missing_counts_lookup_results = get_counts_lookup_batch_task(
+                str(user.uuid),
+                [str(feed_uuid) for feed_uuid in missing_counts_lookup_feed_uuids],
+                cache,
+            )
+
+            counts_lookup.update(
+                {
+                    uuid.UUID(fus): Feed._CountsDescriptor(
+                        count_dict["unread_count"], count_dict["read_count"]
+                    )
+                    for fus, count_dict in missing_counts_lookup_results.items()
+                }
+            )
+            counts_lookup_cache_hit = False
+        else:
+            counts_lookup_cache_hit = True
+
+        setattr(
+            request,
+            "_counts_lookup",
+            counts_lookup,
+        )
+
     return _PreprocessGetRequestFromCacheResults(
         counts_lookup_cache_hit, archived_counts_lookup_cache_hit
     )
@@ -372,10 +445,22 @@ class FeedView(APIView):
 
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
 
+        etag = generate_etag(
+            request,
+            user,
+            cache,
+            kinds=_ETAG_USER_STATE_KINDS,
+            object_name=_OBJECT_NAME,
+            content_scope=ContentScope(),
+            field_names=fieldutils.generate_field_names(field_maps),
+        )
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         (
             subscription_datas,
             subscription_datas_cache_hit,
-        ) = get_subscription_datas_from_cache(user, cache)
+        ) = get_subscription_datas(request, user, cache)
 
         feed: Feed
         try:
@@ -384,6 +469,7 @@ class FeedView(APIView):
                     Feed.objects.all(),
                     user,
                     subscription_datas=subscription_datas,
+                    page_size=1,
                 )
                 .only(*fieldutils.generate_only_fields(field_maps))
                 .get(
@@ -396,7 +482,7 @@ class FeedView(APIView):
                 )
             )
         except Feed.DoesNotExist:
-            feed = _save_feed(url)
+            feed = _save_feed(url, cache)
 
         field_names = fieldutils.generate_field_names(field_maps)
 
@@ -416,6 +502,8 @@ class FeedView(APIView):
         ret_obj = fieldutils.generate_return_object(field_maps, feed, request, None)
 
         response = Response(ret_obj)
+        if etag is not None:
+            response["ETag"] = etag
         response["X-Cache-Hit"] = ",".join(
             (
                 "YES" if subscription_datas_cache_hit else "NO",
@@ -464,64 +552,170 @@ class FeedsQueryView(APIView):
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
         return_objects: bool = serializer.validated_data["return_objects"]
         return_total_count: bool = serializer.validated_data["return_total_count"]
-
-        (
-            subscription_datas,
-            subscription_datas_cache_hit,
-        ) = get_subscription_datas_from_cache(user, cache)
-
-        feeds = (
-            Feed.annotate_search_vectors(
-                Feed.annotate_subscription_data(
-                    Feed.objects.all(),
-                    user,
-                    subscription_datas=subscription_datas,
-                ),
-                getattr(request, "_ts_config"),
+        total_count_mode: TotalCountMode = serializer.validated_data["total_count_mode"]
+        stream: bool = serializer.validated_data["stream"]
+
+        # streamed responses are never all in memory, so they aren't cached
+        use_result_cache = not stream and query_result_cache_enabled()
+
+        state_digest = (
+            generate_state_digest(
+                request,
+                user,
+                cache,
+                kinds=_ETAG_USER_STATE_KINDS,
+                object_name=_OBJECT_NAME,
+                content_scope=ContentScope("uuid", "isSubscribed"),
+                field_names=fieldutils.generate_field_names(field_maps),
             )
-            .filter(*search)
-            .only(*fieldutils.generate_only_fields(field_maps))
+            if etags_enabled() or use_result_cache
+            else None
         )
+        etag = digest_etag(state_digest)
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        if state_digest is None:
+            use_result_cache = False
+        elif (
+            use_result_cache
+            and (content := get_query_result_from_cache(state_digest, cache))
+            is not None
+        ):
+            response = rendered_json_response(content)
+            if etag is not None:
+                response["ETag"] = etag
+            response["X-Result-Cache-Hit"] = "YES"
+            return response
 
-        # TODO maybe improve performance https://archive.li/rxzuU ?
-        feeds_qs = feeds.order_by(*sort)[skip : skip + count]
-
-        feed_uuids = frozenset(f.uuid for f in feeds_qs)
-
-        field_names = fieldutils.generate_field_names(field_maps)
+        ret_obj: dict[str, Any] = {}
 
-        counts_lookup_cache_hit: bool | None
-        archived_counts_lookup_cache_hit: bool | None
-        try:
+        subscription_datas_cache_hit: bool | None = None
+        counts_lookup_cache_hit: bool | None = None
+        archived_counts_lookup_cache_hit: bool | None = None
+        if return_objects:
             (
-                counts_lookup_cache_hit,
-                archived_counts_lookup_cache_hit,
-            ) = _preprocess_get_request_from_cache(
-                request, cache, field_names, user, feed_uuids
+                subscription_datas,
+                subscription_datas_cache_hit,
+            ) = get_subscription_datas(request, user, cache)
+
+            feeds = (
+                Feed.annotate_search_vectors(
+                    Feed.alias_stored_counts(
+                        Feed.annotate_subscription_data(
+                            Feed.objects.all(),
+                            user,
+                            subscription_datas=subscription_datas,
+                            page_size=count,
+                        ),
+                        user,
+                    ),
+                    getattr(request, "_ts_config"),
+                )
+                .filter(*search)
+                .only(*fieldutils.generate_only_fields(field_maps))
             )
-        except DramatiqError as e:  # pragma: no cover
-            _logger.exception("failed to get values from cache")
-            raise APIException("failed to load data") from e
 
-        ret_obj: dict[str, Any] = {}
+            objs: Iterable[dict[str, Any]]
+            if (
+                row_plan := fieldutils.get_row_plan(_OBJECT_NAME, field_maps)
+            ) is not None:
+                # plain rows, for when no field needs a model instance. None of
+                # those fields are counts, so there are no lookups to preload
+                rows = feeds.order_by(*sort).values_list(*row_plan.names)[
+                    skip : skip + count
+                ]
+                objs = (
+                    row_plan.generate_return_object(row)
+                    for row in (
+                        rows.iterator(chunk_size=stream_chunk_size())
+                        if stream
+                        else rows
+                    )
+                )
+            else:
+                # TODO maybe improve performance https://archive.li/rxzuU ?
+                feeds_qs = feeds.order_by(*sort)[skip : skip + count]
+
+                # when streaming, the page is only gone through once, so the
+                # lookups are preloaded from its UUIDs alone
+                feed_uuids = frozenset(
+                    feeds_qs.values_list("uuid", flat=True)
+                    if stream
+                    else (f.uuid for f in feeds_qs)
+                )
 
-        if return_objects:
-            objs: list[dict[str, Any]] = []
-            for feed in feeds_qs:
-                obj = fieldutils.generate_return_object(
-                    field_maps, feed, request, feeds
+                field_names = fieldutils.generate_field_names(field_maps)
+
+                try:
+                    (
+                        counts_lookup_cache_hit,
+                        archived_counts_lookup_cache_hit,
+                    ) = _preprocess_get_request_from_cache(
+                        request, cache, field_names, user, feed_uuids
+                    )
+                except DramatiqError as e:  # pragma: no cover
+                    _logger.exception("failed to get values from cache")
+                    raise APIException("failed to load data") from e
+
+                objs = (
+                    fieldutils.generate_return_object(field_maps, feed, request, feeds)
+                    for feed in (
+                        feeds_qs.iterator(chunk_size=stream_chunk_size())
+                        if stream
+                        else feeds_qs
+                    )
                 )
-                objs.append(obj)
 
             ret_obj["objects"] = objs
 
         if return_total_count:
-            ret_obj["totalCount"] = feeds.count()
+            # counted on its own queryset, which leaves out whatever the search
+            # doesn't need
+            @functools.cache
+            def total_count() -> TotalCount:
+                return get_total_count(
+                    plan_count_queryset(
+                        Feed.objects.all(),
+                        search,
+                        (
+                            lambda qs: Feed.annotate_subscription_data(qs, user),
+                            lambda qs: Feed.alias_stored_counts(qs, user),
+                            lambda qs: Feed.annotate_search_vectors(
+                                qs, getattr(request, "_ts_config")
+                            ),
+                        ),
+                    ),
+                    total_count_mode,
+                    user=user,
+                    object_name=_OBJECT_NAME,
+                    search=str(request.data.get("search", "")),
+                    query_parts=(getattr(request, "_ts_config"),),
+                    cache=cache,
+                )
 
-        response = Response(ret_obj)
+            ret_obj["totalCount"] = lambda: total_count().total_count
+            if total_count_mode == "estimated":
+                ret_obj["totalCountExact"] = lambda: total_count().exact
+
+        response: HttpResponseBase
+        if use_result_cache:
+            assert state_digest is not None
+            content = render_json(ret_obj)
+            save_query_result_to_cache(state_digest, content, cache)
+            response = rendered_json_response(content)
+            response["X-Result-Cache-Hit"] = "NO"
+        else:
+            response = json_response(ret_obj, stream)
+        if etag is not None:
+            response["ETag"] = etag
         response["X-Cache-Hit"] = ",".join(
             (
-                "YES" if subscription_datas_cache_hit else "NO",
+                (
+                    ("YES" if subscription_datas_cache_hit else "NO")
+                    if subscription_datas_cache_hit is not None
+                    else "SKIP"
+                ),
                 (
                     ("YES" if counts_lookup_cache_hit else "NO")
                     if counts_lookup_cache_hit is not None
@@ -604,7 +798,7 @@ class FeedSubscribeView(APIView):
                 )
             )
         except Feed.DoesNotExist:
-            feed = _save_feed(url)
+            feed = _save_feed(url, cache)
 
         custom_title: str | None = serializer.validated_data.get("custom_title")
 
@@ -628,13 +822,23 @@ class FeedSubscribeView(APIView):
         read_mappings = grace_period_util.generate_grace_period_read_entries(feed, user)
 
         with transaction.atomic():
-            SubscribedFeedUserMapping.objects.create(
+            subscribed_feed_mapping = SubscribedFeedUserMapping.objects.create(
                 user=user, feed=feed, custom_feed_title=custom_title
             )
 
             ReadFeedEntryUserMapping.objects.bulk_create(read_mappings)
 
+            SubscribedFeedUserMapping.refresh_stored_counts(
+                SubscribedFeedUserMapping.objects.filter(
+                    uuid=subscribed_feed_mapping.uuid
+                )
+            )
+
         delete_subscription_data_cache(user, cache)
+        delete_read_counts_lookup_cache((user.uuid,), feed.uuid, cache)
+        delete_read_feed_entry_ordinals_cache(user, cache)
+        delete_user_category_counts_cache(user, cache)
+        bump_user_state_versions((user.uuid,), ("subscription", "read"), cache)
 
         return Response(status=204)
 
@@ -679,6 +883,7 @@ class FeedSubscribeView(APIView):
         subscribed_feed_mapping.save(update_fields=["custom_feed_title"])
 
         delete_subscription_data_cache(user, cache)
+        bump_user_state_versions((user.uuid,), ("subscription",), cache)
 
         return Response(status=204)
 
@@ -706,11 +911,13 @@ class FeedSubscribeView(APIView):
             raise NotFound("user not subscribed")
 
         delete_subscription_data_cache(user, cache)
+        delete_user_category_counts_cache(user, cache)
+        bump_user_state_versions((user.uuid,), ("subscription",), cache)
 
         return Response(status=204)
 
 
-def _save_feed(url: str):
+def _save_feed(url: str, cache: BaseCache):
     if RemovedFeed.objects.filter(feed_url=url).exists():
         raise NotFound("feed not found")
 
@@ -761,4 +968,6 @@ def _save_feed(url: str):
 
         FeedEntry.objects.bulk_create(feed_entries, ignore_conflicts=True)
 
+        bump_feed_content_versions((feed.uuid,), cache)
+
         return feed
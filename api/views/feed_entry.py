@@ -1,14 +1,17 @@
+import datetime
+import functools
 import uuid as uuid_
 from collections import Counter
-from typing import Any, Generator, cast
+from typing import Any, Generator, Iterator, cast
 
 from django.conf import settings
 from django.core.cache import BaseCache, caches
 from django.core.signals import setting_changed
 from django.db import transaction
-from django.db.models import F, OrderBy, Q
+from django.db.models import Count, F, OrderBy, Q, QuerySet
 from django.dispatch import receiver
 from django.http.response import HttpResponseBase
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiResponse, extend_schema
 from rest_framework.exceptions import NotFound, ValidationError
@@ -16,51 +19,140 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from api.cache_utils.counts_lookup import increment_read_in_counts_lookup_cache
-from api.cache_utils.favorite_feed_entry_uuids import (
-    delete_favorite_feed_entry_uuids_cache,
-    get_favorite_feed_entry_uuids_from_cache,
+from api.cache_utils.counts_lookup import (
+    delete_read_counts_lookup_cache__user,
+    increment_read_in_counts_lookup_cache,
 )
-from api.cache_utils.read_feed_entry_uuids import (
-    delete_read_feed_entry_uuids_cache,
-    get_read_feed_entry_uuids_from_cache,
+from api.cache_utils.favorite_feed_entry_ordinals import (
+    update_favorite_feed_entry_ordinals_cache,
 )
-from api.cache_utils.subscription_datas import get_subscription_datas_from_cache
+from api.cache_utils.pending_reads import (
+    get_pending_read_states_from_cache,
+    get_pending_reads_from_cache,
+    queue_pending_read,
+)
+from api.cache_utils.query_results import (
+    get_query_result_from_cache,
+    query_result_cache_enabled,
+    save_query_result_to_cache,
+)
+from api.cache_utils.read_feed_entry_ordinals import (
+    delete_read_feed_entry_ordinals_cache,
+    update_read_feed_entry_ordinals_cache,
+)
+from api.cache_utils.stable_query import (
+    get_stable_query_from_cache,
+    save_stable_query_to_cache,
+)
+from api.cache_utils.state_versions import UserStateKind, bump_user_state_versions
+from api.cache_utils.user_category_counts import delete_user_category_counts_cache
 from api.django_extensions import bulk_create_iter
-from api.models import FeedEntry, ReadFeedEntryUserMapping, User
+from api.etag_util import (
+    ContentScope,
+    digest_etag,
+    etags_enabled,
+    generate_etag,
+    generate_state_digest,
+    is_not_modified,
+    not_modified_response,
+)
+from api.models import (
+    FeedEntry,
+    FeedReadWatermark,
+    ReadFeedEntryUserMapping,
+    SubscribedFeedUserMapping,
+    User,
+)
+from api.query_total_count import (
+    TotalCount,
+    TotalCountMode,
+    get_total_count,
+    plan_count_queryset,
+)
 from api.serializers import (
+    CursorGetManySerializer,
+    CursorQuerySerializer,
+    FeedEntriesMarkReadQuerySerializer,
     FeedEntriesMarkReadSerializer,
     FeedEntriesMarkSerializer,
     FeedEntryLanguagesQuerySerializer,
     FeedEntryLanguagesSerializer,
-    GetManySerializer,
     GetSingleSerializer,
     QuerySerializer,
     StableQueryCreateSerializer,
     StableQueryMultipleSerializer,
     LocaleSerializer,
 )
+from api.streaming_json import (
+    json_response,
+    render_json,
+    rendered_json_response,
+    stream_chunk_size,
+)
+from api.tasks.flush_pending_reads import flush_user_pending_reads
+from api.user_context import (
+    get_favorite_feed_entry_ordinals,
+    get_read_feed_entry_ordinals,
+    get_subscription_datas,
+    load_user_context,
+)
+from query_utils import cursor as cursorutils
 from query_utils import fields as fieldutils
 
 _MAX_FEED_ENTRIES_STABLE_QUERY_COUNT: int
 _FEED_ENTRY_LANGUAGES_CACHE_TIMEOUT_SECONDS: float
+_FEED_ENTRY_READ_WRITE_BEHIND: bool
 
 
 @receiver(setting_changed)
 def _load_global_settings(*args: Any, **kwargs: Any):
     global _MAX_FEED_ENTRIES_STABLE_QUERY_COUNT
     global _FEED_ENTRY_LANGUAGES_CACHE_TIMEOUT_SECONDS
+    global _FEED_ENTRY_READ_WRITE_BEHIND
 
     _MAX_FEED_ENTRIES_STABLE_QUERY_COUNT = settings.MAX_FEED_ENTRIES_STABLE_QUERY_COUNT
     _FEED_ENTRY_LANGUAGES_CACHE_TIMEOUT_SECONDS = (
         settings.FEED_ENTRY_LANGUAGES_CACHE_TIMEOUT_SECONDS
     )
+    # queue single-entry read/unread changes for `flush_pending_reads`, instead
+    # of writing them in the request
+    _FEED_ENTRY_READ_WRITE_BEHIND = getattr(
+        settings, "FEED_ENTRY_READ_WRITE_BEHIND", False
+    )
 
 
 _load_global_settings()
 
 _OBJECT_NAME = "feedentry"
 
+# what a feed entry's fields can depend on, besides its content
+_ETAG_USER_STATE_KINDS: tuple[UserStateKind, ...] = (
+    "read",
+    "favorite",
+    "subscription",
+)
+_ETAG_CONTENT_SCOPE = ContentScope("feedUuid", "isFromSubscription")
+
+_NON_NULL_FIELD_NAMES = frozenset(
+    name
+    for field in FeedEntry._meta.concrete_fields
+    if not field.null
+    for name in (field.name, field.attname)
+)
+
+
+def _get_pending_read_states(
+    request: Request, user: User, cache: BaseCache
+) -> dict[int, bool] | None:
+    if not _FEED_ENTRY_READ_WRITE_BEHIND:
+        return None
+
+    return load_user_context(
+        request,
+        "pending_read_states",
+        lambda: get_pending_read_states_from_cache(user, cache),
+    )
+
 
 class FeedEntryView(APIView):
     def dispatch(self, *args: Any, **kwargs: Any) -> HttpResponseBase:
@@ -91,18 +183,30 @@ class FeedEntryView(APIView):
 
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
 
+        etag = generate_etag(
+            request,
+            user,
+            cache,
+            kinds=_ETAG_USER_STATE_KINDS,
+            object_name=_OBJECT_NAME,
+            content_scope=ContentScope(),
+            field_names=fieldutils.generate_field_names(field_maps),
+        )
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         (
             subscription_datas,
             subscription_datas_cache_hit,
-        ) = get_subscription_datas_from_cache(user, cache)
+        ) = get_subscription_datas(request, user, cache)
         (
-            read_feed_entry_uuids,
-            read_feed_entry_uuids_cache_hit,
-        ) = get_read_feed_entry_uuids_from_cache(user, cache)
+            read_feed_entry_ordinals,
+            read_feed_entry_ordinals_cache_hit,
+        ) = get_read_feed_entry_ordinals(request, user, cache)
         (
-            favorite_feed_entry_uuids,
-            favorite_feed_entry_uuids_cache_hit,
-        ) = get_favorite_feed_entry_uuids_from_cache(user, cache)
+            favorite_feed_entry_ordinals,
+            favorite_feed_entry_ordinals_cache_hit,
+        ) = get_favorite_feed_entry_ordinals(request, user, cache)
 
         feed_entry: FeedEntry
         try:
@@ -112,8 +216,12 @@ class FeedEntryView(APIView):
                         FeedEntry.objects.all(),
                         user,
                         subscription_datas=subscription_datas,
-                        read_feed_entry_uuids=read_feed_entry_uuids,
-                        favorite_feed_entry_uuids=favorite_feed_entry_uuids,
+                        read_feed_entry_ordinals=read_feed_entry_ordinals,
+                        favorite_feed_entry_ordinals=favorite_feed_entry_ordinals,
+                        pending_read_states=_get_pending_read_states(
+                            request, user, cache
+                        ),
+                        page_size=1,
                     ),
                     getattr(request, "_ts_config"),
                 )
@@ -129,11 +237,13 @@ class FeedEntryView(APIView):
         )
 
         response = Response(ret_obj)
+        if etag is not None:
+            response["ETag"] = etag
         response["X-Cache-Hit"] = ",".join(
             (
                 "YES" if subscription_datas_cache_hit else "NO",
-                "YES" if read_feed_entry_uuids_cache_hit else "NO",
-                "YES" if favorite_feed_entry_uuids_cache_hit else "NO",
+                "YES" if read_feed_entry_ordinals_cache_hit else "NO",
+                "YES" if favorite_feed_entry_ordinals_cache_hit else "NO",
             )
         )
 
@@ -144,9 +254,9 @@ class FeedEntriesQueryView(APIView):
     @extend_schema(
         summary="Query for Feed Entries",
         description="Query for Feed Entries",
-        parameters=[GetManySerializer],
+        parameters=[CursorGetManySerializer],
         request=None,
-        responses=QuerySerializer,
+        responses=CursorQuerySerializer,
     )
     def post(self, request: Request):
         cache: BaseCache = caches["default"]
@@ -158,7 +268,7 @@ class FeedEntriesQueryView(APIView):
 
         setattr(request, "_ts_config", locale_serializer.get_ts_config())
 
-        serializer = GetManySerializer(
+        serializer = CursorGetManySerializer(
             data=request.data, context={"object_name": _OBJECT_NAME, "request": request}
         )
         serializer.is_valid(raise_exception=True)
@@ -170,60 +280,219 @@ class FeedEntriesQueryView(APIView):
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
         return_objects: bool = serializer.validated_data["return_objects"]
         return_total_count: bool = serializer.validated_data["return_total_count"]
+        total_count_mode: TotalCountMode = serializer.validated_data["total_count_mode"]
+        stream: bool = serializer.validated_data["stream"]
+        cursor: list[Any] | None = serializer.validated_data.get("cursor")
 
-        (
-            subscription_datas,
-            subscription_datas_cache_hit,
-        ) = get_subscription_datas_from_cache(user, cache)
-        (
-            read_feed_entry_uuids,
-            read_feed_entry_uuids_cache_hit,
-        ) = get_read_feed_entry_uuids_from_cache(user, cache)
-        (
-            favorite_feed_entry_uuids,
-            favorite_feed_entry_uuids_cache_hit,
-        ) = get_favorite_feed_entry_uuids_from_cache(user, cache)
+        keyset: list[Any] = []
+        if cursor is not None:
+            if skip:
+                raise ValidationError({"skip": "cannot be combined with cursor"})
 
-        feed_entries = (
-            FeedEntry.annotate_search_vectors(
-                FeedEntry.annotate_user_data(
-                    FeedEntry.objects.all(),
-                    user,
-                    subscription_datas=subscription_datas,
-                    read_feed_entry_uuids=read_feed_entry_uuids,
-                    favorite_feed_entry_uuids=favorite_feed_entry_uuids,
-                ),
-                getattr(request, "_ts_config"),
+            sort = cursorutils.to_keyset_order_by_args(
+                sort, "uuid", _NON_NULL_FIELD_NAMES
             )
-            .filter(*search)
-            .only(*fieldutils.generate_only_fields(field_maps).union({"language"}))
-            .select_related("language")
+            if cursor:
+                try:
+                    keyset = cursorutils.to_keyset_filter_args(
+                        sort, cursor, _NON_NULL_FIELD_NAMES, FeedEntry
+                    )
+                except ValueError as e:
+                    raise ValidationError({"cursor": "cursor malformed"}) from e
+
+        # streamed responses are never all in memory, so they aren't cached
+        use_result_cache = not stream and query_result_cache_enabled()
+
+        state_digest = (
+            generate_state_digest(
+                request,
+                user,
+                cache,
+                kinds=_ETAG_USER_STATE_KINDS,
+                object_name=_OBJECT_NAME,
+                content_scope=_ETAG_CONTENT_SCOPE,
+                field_names=fieldutils.generate_field_names(field_maps),
+            )
+            if etags_enabled() or use_result_cache
+            else None
         )
+        etag = digest_etag(state_digest)
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        if state_digest is None:
+            use_result_cache = False
+        elif (
+            use_result_cache
+            and (content := get_query_result_from_cache(state_digest, cache))
+            is not None
+        ):
+            response = rendered_json_response(content)
+            if etag is not None:
+                response["ETag"] = etag
+            response["X-Result-Cache-Hit"] = "YES"
+            return response
+
+        pending_read_states = _get_pending_read_states(request, user, cache)
 
         ret_obj: dict[str, Any] = {}
 
+        subscription_datas_cache_hit: bool | None = None
+        read_feed_entry_ordinals_cache_hit: bool | None = None
+        favorite_feed_entry_ordinals_cache_hit: bool | None = None
         if return_objects:
-            objs: list[dict[str, Any]] = []
-            # TODO maybe improve performance https://archive.li/rxzuU ?
-            for feed_entry in feed_entries.order_by(*sort)[skip : skip + count]:
-                obj = fieldutils.generate_return_object(
-                    field_maps, feed_entry, request, feed_entries
+            (
+                subscription_datas,
+                subscription_datas_cache_hit,
+            ) = get_subscription_datas(request, user, cache)
+            (
+                read_feed_entry_ordinals,
+                read_feed_entry_ordinals_cache_hit,
+            ) = get_read_feed_entry_ordinals(request, user, cache)
+            (
+                favorite_feed_entry_ordinals,
+                favorite_feed_entry_ordinals_cache_hit,
+            ) = get_favorite_feed_entry_ordinals(request, user, cache)
+
+            feed_entries = (
+                FeedEntry.annotate_search_vectors(
+                    FeedEntry.annotate_user_data(
+                        FeedEntry.objects.all(),
+                        user,
+                        subscription_datas=subscription_datas,
+                        read_feed_entry_ordinals=read_feed_entry_ordinals,
+                        favorite_feed_entry_ordinals=favorite_feed_entry_ordinals,
+                        pending_read_states=pending_read_states,
+                        page_size=count,
+                    ),
+                    getattr(request, "_ts_config"),
                 )
-                objs.append(obj)
+                .filter(*search)
+                .only(*fieldutils.generate_only_fields(field_maps).union({"language"}))
+                .select_related("language")
+            )
 
-            ret_obj["objects"] = objs
+            cursor_names: list[str] = []
+            if cursor is not None:
+                # seeks past the previous page, instead of counting through it
+                cursor_annotations = cursorutils.cursor_annotations(sort)
+                cursor_names = list(cursor_annotations.keys())
+                page_feed_entries = (
+                    feed_entries.filter(*keyset)
+                    .annotate(**cursor_annotations)
+                    .order_by(*sort)
+                )
+            else:
+                page_feed_entries = feed_entries.order_by(*sort)
+
+            row_plan = fieldutils.get_row_plan(_OBJECT_NAME, field_maps)
+            page: QuerySet[Any]
+            lookup_page: QuerySet[FeedEntry] | None = None
+            if row_plan is not None:
+                # plain rows, for when no field needs a model instance
+                page = page_feed_entries.values_list(*row_plan.names, *cursor_names)[
+                    skip : skip + count
+                ]
+            else:
+                page = page_feed_entries[skip : skip + count]
+                # what the per-page lookups (like `readAt`) are built from. When
+                # streaming, the page isn't kept around, so they get a UUID-only
+                # copy of it
+                lookup_page = (
+                    page_feed_entries.select_related(None).only("uuid")[
+                        skip : skip + count
+                    ]
+                    if stream
+                    else page
+                )
+
+            last: Any = None
+            objs_count = 0
+
+            def generate_objs() -> Generator[dict[str, Any], None, None]:
+                nonlocal last, objs_count
+
+                for last in (
+                    page.iterator(chunk_size=stream_chunk_size()) if stream else page
+                ):
+                    objs_count += 1
+                    yield (
+                        row_plan.generate_return_object(last)
+                        if row_plan is not None
+                        else fieldutils.generate_return_object(
+                            field_maps, last, request, lookup_page
+                        )
+                    )
+
+            def next_cursor() -> str | None:
+                if last is None or objs_count != count:
+                    return None
+
+                return cursorutils.encode_cursor(
+                    list(last[len(row_plan.names) :])
+                    if row_plan is not None
+                    else [getattr(last, cursor_name) for cursor_name in cursor_names]
+                )
+
+            if cursor is not None:
+                ret_obj["nextCursor"] = next_cursor
+
+            ret_obj["objects"] = generate_objs()
 
         if return_total_count:
-            ret_obj["totalCount"] = feed_entries.count()
+            # counted on its own queryset, which leaves out whatever the search
+            # doesn't need. The row-by-row user data lookups (rather than the
+            # cached, inlined ordinals) keep the SQL small, too
+            @functools.cache
+            def total_count() -> TotalCount:
+                return get_total_count(
+                    plan_count_queryset(
+                        FeedEntry.objects.all(),
+                        search,
+                        (
+                            lambda qs: FeedEntry.annotate_user_data(
+                                qs, user, pending_read_states=pending_read_states
+                            ),
+                            lambda qs: FeedEntry.annotate_search_vectors(
+                                qs, getattr(request, "_ts_config")
+                            ),
+                        ),
+                    ),
+                    total_count_mode,
+                    user=user,
+                    object_name=_OBJECT_NAME,
+                    search=str(request.data.get("search", "")),
+                    query_parts=(getattr(request, "_ts_config"),),
+                    cache=cache,
+                )
 
-        response = Response(ret_obj)
-        response["X-Cache-Hit"] = ",".join(
-            (
-                "YES" if subscription_datas_cache_hit else "NO",
-                "YES" if read_feed_entry_uuids_cache_hit else "NO",
-                "YES" if favorite_feed_entry_uuids_cache_hit else "NO",
+            ret_obj["totalCount"] = lambda: total_count().total_count
+            if total_count_mode == "estimated":
+                ret_obj["totalCountExact"] = lambda: total_count().exact
+
+        response: HttpResponseBase
+        if use_result_cache:
+            assert state_digest is not None
+            content = render_json(ret_obj)
+            save_query_result_to_cache(state_digest, content, cache)
+            response = rendered_json_response(content)
+            response["X-Result-Cache-Hit"] = "NO"
+        else:
+            response = json_response(ret_obj, stream)
+        if etag is not None:
+            response["ETag"] = etag
+        if (
+            subscription_datas_cache_hit is not None
+            and read_feed_entry_ordinals_cache_hit is not None
+            and favorite_feed_entry_ordinals_cache_hit is not None
+        ):
+            response["X-Cache-Hit"] = ",".join(
+                (
+                    "YES" if subscription_datas_cache_hit else "NO",
+                    "YES" if read_feed_entry_ordinals_cache_hit else "NO",
+                    "YES" if favorite_feed_entry_ordinals_cache_hit else "NO",
+                )
             )
-        )
         return response
 
 
@@ -259,41 +528,47 @@ class FeedEntriesQueryStableCreateView(APIView):
         (
             subscription_datas,
             subscription_datas_cache_hit,
-        ) = get_subscription_datas_from_cache(user, cache)
+        ) = get_subscription_datas(request, user, cache)
         (
-            read_feed_entry_uuids,
-            read_feed_entry_uuids_cache_hit,
-        ) = get_read_feed_entry_uuids_from_cache(user, cache)
+            read_feed_entry_ordinals,
+            read_feed_entry_ordinals_cache_hit,
+        ) = get_read_feed_entry_ordinals(request, user, cache)
         (
-            favorite_feed_entry_uuids,
-            favorite_feed_entry_uuids_cache_hit,
-        ) = get_favorite_feed_entry_uuids_from_cache(user, cache)
+            favorite_feed_entry_ordinals,
+            favorite_feed_entry_ordinals_cache_hit,
+        ) = get_favorite_feed_entry_ordinals(request, user, cache)
 
-        stable_query_cache.set(
+        save_stable_query_to_cache(
             token,
-            list(
+            (
                 FeedEntry.annotate_search_vectors(
                     FeedEntry.annotate_user_data(
                         FeedEntry.objects.all(),
                         user,
                         subscription_datas=subscription_datas,
-                        read_feed_entry_uuids=read_feed_entry_uuids,
-                        favorite_feed_entry_uuids=favorite_feed_entry_uuids,
+                        read_feed_entry_ordinals=read_feed_entry_ordinals,
+                        favorite_feed_entry_ordinals=favorite_feed_entry_ordinals,
+                        pending_read_states=_get_pending_read_states(
+                            request, user, cache
+                        ),
+                        page_size=_MAX_FEED_ENTRIES_STABLE_QUERY_COUNT,
                     ),
                     getattr(request, "_ts_config"),
                 )
                 .filter(*search)
                 .order_by(*sort)
                 .values_list("uuid", flat=True)[:_MAX_FEED_ENTRIES_STABLE_QUERY_COUNT]
+                .iterator()
             ),
+            stable_query_cache,
         )
 
         response = Response(token)
         response["X-Cache-Hit"] = ",".join(
             (
                 "YES" if subscription_datas_cache_hit else "NO",
-                "YES" if read_feed_entry_uuids_cache_hit else "NO",
-                "YES" if favorite_feed_entry_uuids_cache_hit else "NO",
+                "YES" if read_feed_entry_ordinals_cache_hit else "NO",
+                "YES" if favorite_feed_entry_ordinals_cache_hit else "NO",
             )
         )
         return response
@@ -324,74 +599,149 @@ class FeedEntriesQueryStableView(APIView):
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
         return_objects: bool = serializer.validated_data["return_objects"]
         return_total_count: bool = serializer.validated_data["return_total_count"]
+        stream: bool = serializer.validated_data["stream"]
+
+        # the page is fixed by the token, for as long as the token lasts
+        etag = generate_etag(
+            request,
+            user,
+            cache,
+            kinds=_ETAG_USER_STATE_KINDS,
+            object_name=_OBJECT_NAME,
+            content_scope=ContentScope(),
+            field_names=fieldutils.generate_field_names(field_maps),
+            parts=(stable_query_cache.has_key(token),),
+        )
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
 
-        stable_query_cache.touch(token)
-        uuids = stable_query_cache.get(token, [])
+        # only the segments that the page falls in are loaded
+        current_uuids, total_count = get_stable_query_from_cache(
+            token, skip, count if return_objects else 0, stable_query_cache
+        )
 
         ret_obj: dict[str, Any] = {}
 
         subscription_datas_cache_hit: bool | None = None
-        read_feed_entry_uuids_cache_hit: bool | None = None
-        favorite_feed_entry_uuids_cache_hit: bool | None = None
+        read_feed_entry_ordinals_cache_hit: bool | None = None
+        favorite_feed_entry_ordinals_cache_hit: bool | None = None
         if return_objects:
-            # TODO maybe improve performance https://archive.li/rxzuU ?
-            current_uuids = uuids[skip : skip + count]
-
             (
                 subscription_datas,
                 subscription_datas_cache_hit,
-            ) = get_subscription_datas_from_cache(user, cache)
+            ) = get_subscription_datas(request, user, cache)
             (
-                read_feed_entry_uuids,
-                read_feed_entry_uuids_cache_hit,
-            ) = get_read_feed_entry_uuids_from_cache(user, cache)
+                read_feed_entry_ordinals,
+                read_feed_entry_ordinals_cache_hit,
+            ) = get_read_feed_entry_ordinals(request, user, cache)
             (
-                favorite_feed_entry_uuids,
-                favorite_feed_entry_uuids_cache_hit,
-            ) = get_favorite_feed_entry_uuids_from_cache(user, cache)
-
-            feed_entries: dict[uuid_.UUID, FeedEntry] = {
-                feed_entry.uuid: feed_entry
-                for feed_entry in FeedEntry.annotate_user_data(
-                    FeedEntry.objects.filter(uuid__in=current_uuids)
-                    .only(
-                        *fieldutils.generate_only_fields(field_maps).union(
-                            {"uuid", "language"}
-                        )
+                favorite_feed_entry_ordinals,
+                favorite_feed_entry_ordinals_cache_hit,
+            ) = get_favorite_feed_entry_ordinals(request, user, cache)
+
+            feed_entries = FeedEntry.annotate_user_data(
+                FeedEntry.objects.filter(uuid__in=current_uuids)
+                .only(
+                    *fieldutils.generate_only_fields(field_maps).union(
+                        {"uuid", "language"}
                     )
-                    .select_related("language"),
-                    user,
-                    subscription_datas=subscription_datas,
-                    read_feed_entry_uuids=read_feed_entry_uuids,
-                    favorite_feed_entry_uuids=favorite_feed_entry_uuids,
                 )
-            }
-
-            objs: list[dict[str, Any]] = []
-            if len(current_uuids) == len(feed_entries):
-                for uuid in current_uuids:
-                    feed_entry = feed_entries[uuid]
-                    obj = fieldutils.generate_return_object(
-                        field_maps, feed_entry, request, feed_entries.values()
+                .select_related("language"),
+                user,
+                subscription_datas=subscription_datas,
+                read_feed_entry_ordinals=read_feed_entry_ordinals,
+                favorite_feed_entry_ordinals=favorite_feed_entry_ordinals,
+                pending_read_states=_get_pending_read_states(request, user, cache),
+                page_size=count,
+            )
+
+            row_plan = fieldutils.get_row_plan(_OBJECT_NAME, field_maps)
+
+            def generate_objs() -> Generator[dict[str, Any], None, None]:
+                # a chunk at a time, each put back in token order. The whole
+                # page is what the per-page lookups (like `readAt`) are for, though
+                page_feed_entries = FeedEntry.objects.filter(
+                    uuid__in=current_uuids
+                ).only("uuid")
+                chunk_size = stream_chunk_size()
+                for i in range(0, len(current_uuids), chunk_size):
+                    chunk_uuids = current_uuids[i : i + chunk_size]
+                    chunk_feed_entries = feed_entries.filter(uuid__in=chunk_uuids)
+                    # anything deleted since the count is left out
+                    if row_plan is not None:
+                        chunk_rows: dict[uuid_.UUID, tuple[Any, ...]] = {
+                            row[-1]: row
+                            for row in chunk_feed_entries.values_list(
+                                *row_plan.names, "uuid"
+                            )
+                        }
+                        for uuid in chunk_uuids:
+                            if (row := chunk_rows.get(uuid)) is not None:
+                                yield row_plan.generate_return_object(row)
+                    else:
+                        chunk_feed_entries_dict: dict[uuid_.UUID, FeedEntry] = {
+                            feed_entry.uuid: feed_entry
+                            for feed_entry in chunk_feed_entries
+                        }
+                        for uuid in chunk_uuids:
+                            if (
+                                feed_entry := chunk_feed_entries_dict.get(uuid)
+                            ) is not None:
+                                yield fieldutils.generate_return_object(
+                                    field_maps, feed_entry, request, page_feed_entries
+                                )
+
+            objs: Iterator[dict[str, Any]] = iter(())
+            if stream:
+                # checked up front, as nothing streamed can be taken back
+                if FeedEntry.objects.filter(uuid__in=current_uuids).count() == len(
+                    current_uuids
+                ):
+                    objs = generate_objs()
+            elif row_plan is not None:
+                # plain rows, for when no field needs a model instance
+                rows: dict[uuid_.UUID, tuple[Any, ...]] = {
+                    row[-1]: row
+                    for row in feed_entries.values_list(*row_plan.names, "uuid")
+                }
+                if len(current_uuids) == len(rows):
+                    objs = (
+                        row_plan.generate_return_object(rows[uuid])
+                        for uuid in current_uuids
+                    )
+            else:
+                feed_entries_dict: dict[uuid_.UUID, FeedEntry] = {
+                    feed_entry.uuid: feed_entry for feed_entry in feed_entries
+                }
+                if len(current_uuids) == len(feed_entries_dict):
+                    objs = (
+                        fieldutils.generate_return_object(
+                            field_maps,
+                            feed_entries_dict[uuid],
+                            request,
+                            feed_entries_dict.values(),
+                        )
+                        for uuid in current_uuids
                     )
-                    objs.append(obj)
 
             ret_obj["objects"] = objs
 
         if return_total_count:
-            ret_obj["totalCount"] = len(uuids)
+            ret_obj["totalCount"] = total_count
 
-        response = Response(ret_obj)
+        response = json_response(ret_obj, stream)
+        if etag is not None:
+            response["ETag"] = etag
         if (
             subscription_datas_cache_hit is not None
-            and read_feed_entry_uuids_cache_hit is not None
-            and favorite_feed_entry_uuids_cache_hit is not None
+            and read_feed_entry_ordinals_cache_hit is not None
+            and favorite_feed_entry_ordinals_cache_hit is not None
         ):
             response["X-Cache-Hit"] = ",".join(
                 (
                     "YES" if subscription_datas_cache_hit else "NO",
-                    "YES" if read_feed_entry_uuids_cache_hit else "NO",
-                    "YES" if favorite_feed_entry_uuids_cache_hit else "NO",
+                    "YES" if read_feed_entry_ordinals_cache_hit else "NO",
+                    "YES" if favorite_feed_entry_ordinals_cache_hit else "NO",
                 )
             )
         return response
@@ -414,6 +764,7 @@ class FeedEntryReadView(APIView):
         user = cast(User, request.user)
 
         read_feed_entry_user_mapping: ReadFeedEntryUserMapping
+        created = False
         with transaction.atomic():
             feed_entry: FeedEntry
             try:
@@ -422,30 +773,65 @@ class FeedEntryReadView(APIView):
                 raise NotFound("feed entry not found")
 
             ret_obj: str
+            read_watermark: FeedReadWatermark | None
             if feed_entry.is_archived:
                 ret_obj = ""
-            else:
-                created: bool
-                with transaction.atomic():
-                    (
-                        read_feed_entry_user_mapping,
-                        created,
-                    ) = ReadFeedEntryUserMapping.objects.get_or_create(
-                        feed_entry=feed_entry, user=user
-                    )
-
-                    if created:
-                        User.objects.filter(uuid=user.uuid).update(
-                            read_feed_entries_counter=F("read_feed_entries_counter") + 1
+            elif (
+                read_watermark := FeedReadWatermark.objects.filter(
+                    user=user,
+                    feed_id=feed_entry.feed_id,
+                    ordinal__gte=feed_entry.ordinal,
+                )
+                .exclude(feedreadwatermarkexception__feed_entry=feed_entry)
+                .first()
+            ) is not None:
+                ret_obj = read_watermark.read_at.isoformat()
+            elif _FEED_ENTRY_READ_WRITE_BEHIND:
+                pending_read = get_pending_reads_from_cache(user.uuid, cache).get(
+                    feed_entry.uuid
+                )
+                if pending_read is not None and pending_read.read_at is not None:
+                    ret_obj = pending_read.read_at.isoformat()
+                else:
+                    existing_read_at: datetime.datetime | None = (
+                        ReadFeedEntryUserMapping.objects.filter(
+                            user=user, feed_entry=feed_entry
                         )
+                        .values_list("read_at", flat=True)
+                        .first()
+                    )
+                    read_at = existing_read_at or timezone.now()
+                    # also queued over a pending "unread", to cancel it
+                    if pending_read is not None or existing_read_at is None:
+                        queue_pending_read(user, feed_entry, read_at, cache)
+                        bump_user_state_versions((user.uuid,), ("read",), cache)
 
-                    ret_obj = read_feed_entry_user_mapping.read_at.isoformat()
+                    ret_obj = read_at.isoformat()
+            else:
+                (
+                    read_feed_entry_user_mapping,
+                    created,
+                ) = ReadFeedEntryUserMapping.objects.get_or_create(
+                    feed_entry=feed_entry, user=user
+                )
 
                 if created:
-                    increment_read_in_counts_lookup_cache(
-                        user, {feed_entry.feed_id: 1}, cache
+                    User.objects.filter(uuid=user.uuid).update(
+                        read_feed_entries_counter=F("read_feed_entries_counter") + 1
+                    )
+                    SubscribedFeedUserMapping.increment_stored_read_counts(
+                        user, {feed_entry.feed_id: 1}
                     )
-                    delete_read_feed_entry_uuids_cache(user, cache)
+
+                ret_obj = read_feed_entry_user_mapping.read_at.isoformat()
+
+        if created:
+            increment_read_in_counts_lookup_cache(user, {feed_entry.feed_id: 1}, cache)
+            update_read_feed_entry_ordinals_cache(
+                user, cache, added_ordinals=(feed_entry.ordinal,)
+            )
+            delete_user_category_counts_cache(user, cache)
+            bump_user_state_versions((user.uuid,), ("read",), cache)
 
         return Response(ret_obj)
 
@@ -460,7 +846,8 @@ class FeedEntryReadView(APIView):
 
         user = cast(User, request.user)
 
-        deleted: bool
+        excepted_count = 0
+        mapping_deleted_count = 0
         with transaction.atomic():
             feed_entry: FeedEntry
             try:
@@ -468,20 +855,45 @@ class FeedEntryReadView(APIView):
             except FeedEntry.DoesNotExist:
                 return Response(status=204)
 
-            _, deletes = ReadFeedEntryUserMapping.objects.filter(
-                user=user, feed_entry=feed_entry
-            ).delete()
-            deleted_count = deletes.get("api.ReadFeedEntryUserMapping", 0)
-            deleted = deleted_count > 0
-            if deleted:
-                User.objects.filter(uuid=user.uuid).update(
-                    read_feed_entries_counter=F("read_feed_entries_counter")
-                    - deleted_count
+            # the flush does all of this, for the write-behind
+            if not _FEED_ENTRY_READ_WRITE_BEHIND:
+                excepted_count = sum(
+                    FeedReadWatermark.except_covered(user, (feed_entry.uuid,)).values()
                 )
 
+                _, deletes = ReadFeedEntryUserMapping.objects.filter(
+                    user=user, feed_entry=feed_entry
+                ).delete()
+                mapping_deleted_count = deletes.get("api.ReadFeedEntryUserMapping", 0)
+
+                deleted_count = excepted_count + mapping_deleted_count
+                if deleted_count > 0:
+                    User.objects.filter(uuid=user.uuid).update(
+                        read_feed_entries_counter=F("read_feed_entries_counter")
+                        - deleted_count
+                    )
+                    SubscribedFeedUserMapping.increment_stored_read_counts(
+                        user, {feed_entry.feed_id: -deleted_count}
+                    )
+
+        deleted = excepted_count + mapping_deleted_count > 0
+
+        if _FEED_ENTRY_READ_WRITE_BEHIND:
+            queue_pending_read(user, feed_entry, None, cache)
+
+        # the exceptions are looked up alongside the cached ordinals, like their
+        # watermarks
+        if mapping_deleted_count > 0:
+            update_read_feed_entry_ordinals_cache(
+                user, cache, removed_ordinals=(feed_entry.ordinal,)
+            )
+
         if deleted:
             increment_read_in_counts_lookup_cache(user, {feed_entry.feed_id: -1}, cache)
-            delete_read_feed_entry_uuids_cache(user, cache)
+            delete_user_category_counts_cache(user, cache)
+
+        if _FEED_ENTRY_READ_WRITE_BEHIND or deleted:
+            bump_user_state_versions((user.uuid,), ("read",), cache)
 
         return Response(status=204)
 
@@ -501,55 +913,82 @@ class FeedEntriesReadView(APIView):
         serializer = FeedEntriesMarkReadSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        q: Q | None = None
-        if feed_uuids := serializer.validated_data.get("feed_uuids"):
-            if q is None:
-                q = Q(feed__uuid__in=feed_uuids)
-            else:
-                q |= Q(feed__uuid__in=feed_uuids)  # pragma: no cover
-
-        if feed_entry_uuids := serializer.validated_data.get("feed_entry_uuids"):
-            if q is None:
-                q = Q(uuid__in=feed_entry_uuids)
-            else:
-                q |= Q(uuid__in=feed_entry_uuids)
+        feed_uuids = serializer.validated_data.get("feed_uuids")
+        feed_entry_uuids = serializer.validated_data.get("feed_entry_uuids")
 
-        if q is None:
+        if not feed_uuids and not feed_entry_uuids:
             raise ValidationError("no entries to mark read")
 
+        if _FEED_ENTRY_READ_WRITE_BEHIND:
+            # the queued changes are older, so they must land first
+            flush_user_pending_reads(user, cache)
+
+        # whole feeds are marked read by moving their watermarks, so only the
+        # individually-listed entries outside of those feeds need mappings
         q = (
             Q(is_archived=False)
             & ~Q(uuid__in=user.read_feed_entries.values("uuid"))
-            & q
+            & ~Q(FeedReadWatermark.covers(user))
+            & Q(uuid__in=(feed_entry_uuids or ()))
         )
+        if feed_uuids:
+            q &= ~Q(feed_id__in=feed_uuids)
 
         increment_counter: Counter[uuid_.UUID] = Counter()
+        added_ordinals: list[int | None] = []
 
         def generate_read_feed_entry_mappings_and_count_feed_uuids() -> (
             Generator[ReadFeedEntryUserMapping, None, None]
         ):
-            for feed_entry_uuid, feed_uuid in (
-                FeedEntry.objects.filter(q).values_list("uuid", "feed_id").iterator()
+            for feed_entry_uuid, feed_uuid, ordinal in (
+                FeedEntry.objects.filter(q)
+                .values_list("uuid", "feed_id", "ordinal")
+                .iterator()
             ):
                 increment_counter.update([feed_uuid])
+                added_ordinals.append(ordinal)
 
                 yield ReadFeedEntryUserMapping(feed_entry_id=feed_entry_uuid, user=user)
 
         with transaction.atomic():
-            created_count = bulk_create_iter(
-                generate_read_feed_entry_mappings_and_count_feed_uuids(),
-                ReadFeedEntryUserMapping,
-            )
+            created_count = 0
+            if feed_uuids:
+                watermark_increments = FeedReadWatermark.mark_feeds_read(
+                    user, feed_uuids
+                )
+                increment_counter.update(watermark_increments)
+                created_count += sum(watermark_increments.values())
+
+            if feed_entry_uuids:
+                created_count += bulk_create_iter(
+                    generate_read_feed_entry_mappings_and_count_feed_uuids(),
+                    ReadFeedEntryUserMapping,
+                )
+
             if created_count > 0:
                 User.objects.filter(uuid=user.uuid).update(
                     read_feed_entries_counter=(
                         F("read_feed_entries_counter") + created_count
                     )
                 )
+                SubscribedFeedUserMapping.increment_stored_read_counts(
+                    user, increment_counter
+                )
+
+        # the watermarks are looked up alongside the cached ordinals, so the
+        # ordinals only need the per-entry mappings
+        if added_ordinals:
+            update_read_feed_entry_ordinals_cache(
+                user, cache, added_ordinals=added_ordinals
+            )
 
+        increment_counter = +increment_counter
         if increment_counter:
             increment_read_in_counts_lookup_cache(user, increment_counter, cache)
-            delete_read_feed_entry_uuids_cache(user, cache)
+            delete_user_category_counts_cache(user, cache)
+
+        if created_count > 0:
+            bump_user_state_versions((user.uuid,), ("read",), cache)
 
         return Response(status=204)
 
@@ -574,28 +1013,50 @@ class FeedEntriesReadView(APIView):
         if len(feed_entry_uuids) < 1:
             return Response(status=204)
 
+        if _FEED_ENTRY_READ_WRITE_BEHIND:
+            # the queued changes are older, so they must land first
+            flush_user_pending_reads(user, cache)
+
         increment_counter: Counter[uuid_.UUID] = Counter()
+        removed_ordinals: list[int | None] = []
 
         with transaction.atomic():
+            excepted_counts = FeedReadWatermark.except_covered(user, feed_entry_uuids)
+            increment_counter.update(excepted_counts)
+
             mappings = ReadFeedEntryUserMapping.objects.filter(
                 user=user, feed_entry_id__in=feed_entry_uuids
             )
 
             # tally the per-feed counts in a single query before deleting, rather
             # than issuing one DELETE per mapping
-            for feed_uuid in mappings.values_list(
-                "feed_entry__feed_id", flat=True
+            for feed_uuid, ordinal in mappings.values_list(
+                "feed_entry__feed_id", "feed_entry__ordinal"
             ).iterator():
                 increment_counter.update([feed_uuid])
+                removed_ordinals.append(ordinal)
 
             _, deletes = mappings.delete()
-            total_deleted_count = deletes.get("api.ReadFeedEntryUserMapping", 0)
+            total_deleted_count = deletes.get("api.ReadFeedEntryUserMapping", 0) + sum(
+                excepted_counts.values()
+            )
 
             if total_deleted_count > 0:
                 User.objects.filter(uuid=user.uuid).update(
                     read_feed_entries_counter=F("read_feed_entries_counter")
                     - total_deleted_count
                 )
+                SubscribedFeedUserMapping.increment_stored_read_counts(
+                    user,
+                    {feed_uuid: -incr for feed_uuid, incr in increment_counter.items()},
+                )
+
+        # the exceptions are looked up alongside the cached ordinals, like their
+        # watermarks
+        if removed_ordinals:
+            update_read_feed_entry_ordinals_cache(
+                user, cache, removed_ordinals=removed_ordinals
+            )
 
         if increment_counter:
             increment_read_in_counts_lookup_cache(
@@ -603,7 +1064,104 @@ class FeedEntriesReadView(APIView):
                 {feed_uuid: -incr for feed_uuid, incr in increment_counter.items()},
                 cache,
             )
-            delete_read_feed_entry_uuids_cache(user, cache)
+            delete_user_category_counts_cache(user, cache)
+
+        if total_deleted_count > 0:
+            bump_user_state_versions((user.uuid,), ("read",), cache)
+
+        return Response(status=204)
+
+
+class FeedEntriesReadQueryView(APIView):
+    @extend_schema(
+        summary="Mark all feed entries matching a search as 'read'",
+        description="Mark all feed entries matching a search as 'read'",
+        request=FeedEntriesMarkReadQuerySerializer,
+        responses={204: OpenApiResponse(description="No response body")},
+    )
+    def post(self, request: Request):
+        cache: BaseCache = caches["default"]
+
+        user = cast(User, request.user)
+
+        locale_serializer = LocaleSerializer(data=request.data)
+        locale_serializer.is_valid(raise_exception=True)
+
+        setattr(request, "_ts_config", locale_serializer.get_ts_config())
+
+        serializer = FeedEntriesMarkReadQuerySerializer(
+            data=request.data, context={"object_name": _OBJECT_NAME, "request": request}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        search: list[Q] = serializer.validated_data["search"]
+
+        if _FEED_ENTRY_READ_WRITE_BEHIND:
+            # the queued changes are older, so they must land first
+            flush_user_pending_reads(user, cache)
+
+        # the matching entries stay in the DB, and only the per-feed totals come
+        # back out
+        feed_entries = (
+            FeedEntry.annotate_search_vectors(
+                FeedEntry.annotate_user_data(FeedEntry.objects.all(), user),
+                getattr(request, "_ts_config"),
+            )
+            .filter(*search)
+            .filter(is_archived=False)
+            .exclude(uuid__in=user.read_feed_entries.values("uuid"))
+            .exclude(FeedReadWatermark.covers(user))
+            .order_by()
+        )
+
+        increment_counter: Counter[uuid_.UUID]
+        with transaction.atomic():
+            increment_counter = Counter(
+                {
+                    feed_uuid: count
+                    for feed_uuid, count in feed_entries.values("feed_id")
+                    .annotate(count=Count("uuid"))
+                    .values_list("feed_id", "count")
+                }
+            )
+
+            created_count = ReadFeedEntryUserMapping.insert_from_query(
+                user, feed_entries, timezone.now()
+            )
+
+            if created_count > 0:
+                User.objects.filter(uuid=user.uuid).update(
+                    read_feed_entries_counter=(
+                        F("read_feed_entries_counter") + created_count
+                    )
+                )
+
+            if created_count == increment_counter.total():
+                SubscribedFeedUserMapping.increment_stored_read_counts(
+                    user, increment_counter
+                )
+            else:
+                # some of the entries were marked read concurrently, so the
+                # per-feed totals can't be trusted
+                SubscribedFeedUserMapping.refresh_stored_counts(
+                    SubscribedFeedUserMapping.objects.filter(
+                        user=user, feed_id__in=increment_counter.keys()
+                    )
+                )
+                increment_counter.clear()
+
+        if created_count > 0:
+            # the new ordinals were never loaded, so there is nothing to apply
+            # to the cached bitmap
+            delete_read_feed_entry_ordinals_cache(user, cache)
+            delete_user_category_counts_cache(user, cache)
+
+            if increment_counter:
+                increment_read_in_counts_lookup_cache(user, increment_counter, cache)
+            else:
+                delete_read_counts_lookup_cache__user(user, cache)
+
+            bump_user_state_versions((user.uuid,), ("read",), cache)
 
         return Response(status=204)
 
@@ -632,7 +1190,10 @@ class FeedEntryFavoriteView(APIView):
 
         user.favorite_feed_entries.add(feed_entry)
 
-        delete_favorite_feed_entry_uuids_cache(user, cache)
+        update_favorite_feed_entry_ordinals_cache(
+            user, cache, added_ordinals=(feed_entry.ordinal,)
+        )
+        bump_user_state_versions((user.uuid,), ("favorite",), cache)
 
         return Response(status=204)
 
@@ -647,11 +1208,19 @@ class FeedEntryFavoriteView(APIView):
 
         user = cast(User, request.user)
 
-        User.favorite_feed_entries.through.objects.filter(
+        favorite_mappings = User.favorite_feed_entries.through.objects.filter(
             user=user, feedentry_id=uuid
-        ).delete()
+        )
+        removed_ordinals = list(
+            favorite_mappings.values_list("feedentry__ordinal", flat=True)
+        )
+        favorite_mappings.delete()
 
-        delete_favorite_feed_entry_uuids_cache(user, cache)
+        if removed_ordinals:
+            update_favorite_feed_entry_ordinals_cache(
+                user, cache, removed_ordinals=removed_ordinals
+            )
+            bump_user_state_versions((user.uuid,), ("favorite",), cache)
 
         return Response(status=204)
 
@@ -685,7 +1254,12 @@ class FeedEntriesFavoriteView(APIView):
 
         user.favorite_feed_entries.add(*feed_entries)
 
-        delete_favorite_feed_entry_uuids_cache(user, cache)
+        update_favorite_feed_entry_ordinals_cache(
+            user,
+            cache,
+            added_ordinals=[feed_entry.ordinal for feed_entry in feed_entries],
+        )
+        bump_user_state_versions((user.uuid,), ("favorite",), cache)
 
         return Response(status=204)
 
@@ -710,11 +1284,19 @@ class FeedEntriesFavoriteView(APIView):
         if len(feed_entry_uuids) < 1:
             return Response(status=204)
 
-        User.favorite_feed_entries.through.objects.filter(
+        favorite_mappings = User.favorite_feed_entries.through.objects.filter(
             user=user, feedentry_id__in=feed_entry_uuids
-        ).delete()
+        )
+        removed_ordinals = list(
+            favorite_mappings.values_list("feedentry__ordinal", flat=True)
+        )
+        favorite_mappings.delete()
 
-        delete_favorite_feed_entry_uuids_cache(user, cache)
+        if removed_ordinals:
+            update_favorite_feed_entry_ordinals_cache(
+                user, cache, removed_ordinals=removed_ordinals
+            )
+            bump_user_state_versions((user.uuid,), ("favorite",), cache)
 
         return Response(status=204)
 
@@ -6,6 +6,7 @@ import lxml.etree as lxml_etree
 import xmlschema
 from defusedxml.ElementTree import ParseError as defused_ParseError
 from defusedxml.ElementTree import fromstring as defused_fromstring
+from django.core.cache import BaseCache, caches
 from django.db import transaction
 from django.db.models import Q
 from django.http.response import HttpResponse
@@ -19,6 +20,12 @@ from url_normalize import url_normalize
 
 from api import grace_period_util
 from api import opml as opml_util
+from api.cache_utils.counts_lookup import delete_read_counts_lookup_cache__user
+from api.cache_utils.read_feed_entry_ordinals import (
+    delete_read_feed_entry_ordinals_cache,
+)
+from api.cache_utils.state_versions import bump_user_state_versions
+from api.cache_utils.user_category_counts import delete_user_category_counts_cache
 from api.models import (
     AlternateFeedURL,
     Feed,
@@ -101,6 +108,8 @@ This will return [OPML](http://opml.org/spec2.opml) XML representing your subscr
 Request body should be [OPML](http://opml.org/spec2.opml) XML representing feeds you intend to subscribe to.""",
     )
     def post(self, request: Request):
+        cache: BaseCache = caches["default"]
+
         user = cast(User, request.user)
 
         opml_element: Element
@@ -169,6 +178,14 @@ Request body should be [OPML](http://opml.org/spec2.opml) XML representing feeds
                         ignore_conflicts=True,
                     )
 
+            # the grace period reads also land on already-subscribed feeds
+            SubscribedFeedUserMapping.refresh_stored_counts(
+                SubscribedFeedUserMapping.objects.filter(
+                    user=user,
+                    feed_id__in=[f.uuid for f in feeds_dict.values() if f is not None],
+                )
+            )
+
             if feed_subscription_progress_entry is not None:
                 feed_subscription_progress_entry.save()
 
@@ -176,6 +193,15 @@ Request body should be [OPML](http://opml.org/spec2.opml) XML representing feeds
                     feed_subscription_progress_entry_descriptors
                 )
 
+        # many subscriptions (and their grace period read entries) at once, so
+        # drop the user's read counts wholesale
+        delete_read_counts_lookup_cache__user(user, cache)
+        delete_read_feed_entry_ordinals_cache(user, cache)
+        delete_user_category_counts_cache(user, cache)
+        bump_user_state_versions(
+            (user.uuid,), ("subscription", "read", "category"), cache
+        )
+
         return (
             Response(status=204)
             if feed_subscription_progress_entry is None
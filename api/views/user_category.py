@@ -1,6 +1,8 @@
+import functools
 import uuid as uuid_
-from typing import Any, cast
+from typing import Any, Iterable, cast
 
+from django.core.cache import BaseCache, caches
 from django.db import IntegrityError, transaction
 from django.db.models import OrderBy, Q
 from django.http.response import HttpResponseBase
@@ -11,8 +13,15 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.cache_utils.state_versions import UserStateKind, bump_user_state_versions
+from api.cache_utils.user_category_counts import (
+    delete_user_category_counts_cache,
+    get_user_category_counts_from_cache,
+)
+from api.etag_util import generate_etag, is_not_modified, not_modified_response
 from api.exceptions import Conflict
 from api.models import Feed, User, UserCategory
+from api.query_total_count import TotalCount, TotalCountMode, get_total_count
 from api.serializers import (
     GetManySerializer,
     GetSingleSerializer,
@@ -21,10 +30,14 @@ from api.serializers import (
     UserCategoryCreateSerializer,
     UserCategorySerializer,
 )
+from api.streaming_json import json_response, stream_chunk_size
 from query_utils import fields as fieldutils
 
 _OBJECT_NAME = "usercategory"
 
+# what a user category's fields can depend on
+_ETAG_USER_STATE_KINDS: tuple[UserStateKind, ...] = ("category", "subscription")
+
 
 class UserCategoryView(APIView):
     def dispatch(self, *args: Any, **kwargs: Any) -> HttpResponseBase:
@@ -38,6 +51,10 @@ class UserCategoryView(APIView):
         responses=OpenApiTypes.OBJECT,
     )
     def get(self, request: Request, *, uuid: uuid_.UUID):
+        cache: BaseCache = caches["default"]
+
+        user = cast(User, request.user)
+
         serializer = GetSingleSerializer(
             data=request.query_params,
             context={"object_name": _OBJECT_NAME, "request": request},
@@ -46,12 +63,16 @@ class UserCategoryView(APIView):
 
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
 
+        etag = generate_etag(request, user, cache, kinds=_ETAG_USER_STATE_KINDS)
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         user_category: UserCategory
         try:
             user_category = (
                 UserCategory.objects.only(*fieldutils.generate_only_fields(field_maps))
                 .prefetch_related("feeds")
-                .get(uuid=uuid, user=cast(User, request.user))
+                .get(uuid=uuid, user=user)
             )
         except UserCategory.DoesNotExist:
             return Response("user category not found", status=404)
@@ -60,7 +81,10 @@ class UserCategoryView(APIView):
             field_maps, user_category, request, None
         )
 
-        return Response(ret_obj)
+        response = Response(ret_obj)
+        if etag is not None:
+            response["ETag"] = etag
+        return response
 
     @extend_schema(
         summary="Update a User Category",
@@ -69,11 +93,11 @@ class UserCategoryView(APIView):
         responses={204: OpenApiResponse(description="No response body")},
     )
     def put(self, request: Request, *, uuid: uuid_.UUID):
+        user = cast(User, request.user)
+
         user_category: UserCategory
         try:
-            user_category = UserCategory.objects.get(
-                uuid=uuid, user=cast(User, request.user)
-            )
+            user_category = UserCategory.objects.get(uuid=uuid, user=user)
         except UserCategory.DoesNotExist:
             return Response("user category not found", status=404)
 
@@ -86,6 +110,8 @@ class UserCategoryView(APIView):
         except IntegrityError:
             raise Conflict("user category already exists")
 
+        bump_user_state_versions((user.uuid,), ("category",), caches["default"])
+
         return Response(status=204)
 
     @extend_schema(
@@ -94,13 +120,18 @@ class UserCategoryView(APIView):
         responses={204: OpenApiResponse(description="No response body")},
     )
     def delete(self, request: Request, *, uuid: uuid_.UUID):
-        count, _ = UserCategory.objects.filter(
-            uuid=uuid, user=cast(User, request.user)
-        ).delete()
+        cache: BaseCache = caches["default"]
+
+        user = cast(User, request.user)
+
+        count, _ = UserCategory.objects.filter(uuid=uuid, user=user).delete()
 
         if count < 1:
             raise NotFound("user category not found")
 
+        delete_user_category_counts_cache(user, cache)
+        bump_user_state_versions((user.uuid,), ("category",), cache)
+
         return Response(status=204)
 
 
@@ -112,6 +143,10 @@ class UserCategoryCreateView(APIView):
         responses=OpenApiTypes.OBJECT,
     )
     def post(self, request: Request):
+        cache: BaseCache = caches["default"]
+
+        user = cast(User, request.user)
+
         serializer = UserCategoryCreateSerializer(
             data=request.data, context={"object_name": _OBJECT_NAME, "request": request}
         )
@@ -119,15 +154,16 @@ class UserCategoryCreateView(APIView):
 
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
 
-        user_category = UserCategory(
-            user=cast(User, request.user), text=serializer.validated_data["text"]
-        )
+        user_category = UserCategory(user=user, text=serializer.validated_data["text"])
 
         try:
             user_category.save()
         except IntegrityError:
             raise Conflict("user category already exists")
 
+        delete_user_category_counts_cache(user, cache)
+        bump_user_state_versions((user.uuid,), ("category",), cache)
+
         ret_obj = fieldutils.generate_return_object(
             field_maps, user_category, request, None
         )
@@ -143,6 +179,10 @@ class UserCategoriesQueryView(APIView):
         responses=QuerySerializer,
     )
     def post(self, request: Request):
+        cache: BaseCache = caches["default"]
+
+        user = cast(User, request.user)
+
         serializer = GetManySerializer(
             data=request.data, context={"object_name": _OBJECT_NAME, "request": request}
         )
@@ -151,12 +191,23 @@ class UserCategoriesQueryView(APIView):
         count: int = serializer.validated_data["count"]
         skip: int = serializer.validated_data["skip"]
         sort: list[OrderBy] = serializer.validated_data["sort"]
-        search: list[Q] = [
-            Q(user=cast(User, request.user))
-        ] + serializer.validated_data["search"]
+        search: list[Q] = [Q(user=user)] + serializer.validated_data["search"]
         field_maps: list[fieldutils.FieldMap] = serializer.validated_data["fields"]
         return_objects: bool = serializer.validated_data["return_objects"]
         return_total_count: bool = serializer.validated_data["return_total_count"]
+        total_count_mode: TotalCountMode = serializer.validated_data["total_count_mode"]
+        stream: bool = serializer.validated_data["stream"]
+
+        etag = generate_etag(
+            request,
+            user,
+            cache,
+            kinds=_ETAG_USER_STATE_KINDS,
+            object_name=_OBJECT_NAME,
+            field_names=fieldutils.generate_field_names(field_maps),
+        )
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
 
         user_categories = UserCategory.objects.filter(*search).only(
             *fieldutils.generate_only_fields(field_maps)
@@ -165,20 +216,59 @@ class UserCategoriesQueryView(APIView):
         ret_obj: dict[str, Any] = {}
 
         if return_objects:
-            objs: list[dict[str, Any]] = []
-            # TODO maybe improve performance https://archive.li/rxzuU ?
-            for user_category in user_categories.order_by(*sort)[skip : skip + count]:
-                obj = fieldutils.generate_return_object(
-                    field_maps, user_category, request, user_categories
+            objs: Iterable[dict[str, Any]]
+            if (
+                row_plan := fieldutils.get_row_plan(_OBJECT_NAME, field_maps)
+            ) is not None:
+                # plain rows, for when no field needs a model instance
+                rows = user_categories.order_by(*sort).values_list(*row_plan.names)[
+                    skip : skip + count
+                ]
+                objs = (
+                    row_plan.generate_return_object(row)
+                    for row in (
+                        rows.iterator(chunk_size=stream_chunk_size())
+                        if stream
+                        else rows
+                    )
+                )
+            else:
+                # TODO maybe improve performance https://archive.li/rxzuU ?
+                page = user_categories.order_by(*sort)[skip : skip + count]
+                objs = (
+                    fieldutils.generate_return_object(
+                        field_maps, user_category, request, user_categories
+                    )
+                    for user_category in (
+                        page.iterator(chunk_size=stream_chunk_size())
+                        if stream
+                        else page
+                    )
                 )
-                objs.append(obj)
 
             ret_obj["objects"] = objs
 
         if return_total_count:
-            ret_obj["totalCount"] = user_categories.count()
 
-        return Response(ret_obj)
+            @functools.cache
+            def total_count() -> TotalCount:
+                return get_total_count(
+                    user_categories,
+                    total_count_mode,
+                    user=user,
+                    object_name=_OBJECT_NAME,
+                    search=str(request.data.get("search", "")),
+                    cache=cache,
+                )
+
+            ret_obj["totalCount"] = lambda: total_count().total_count
+            if total_count_mode == "estimated":
+                ret_obj["totalCountExact"] = lambda: total_count().exact
+
+        response = json_response(ret_obj, stream)
+        if etag is not None:
+            response["ETag"] = etag
+        return response
 
 
 class UserCategoriesApplyView(APIView):
@@ -189,6 +279,10 @@ class UserCategoriesApplyView(APIView):
         responses={204: OpenApiResponse(description="No response body")},
     )
     def put(self, request: Request):
+        cache: BaseCache = caches["default"]
+
+        user = cast(User, request.user)
+
         serializer = UserCategoryApplySerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -212,7 +306,7 @@ class UserCategoriesApplyView(APIView):
         user_categories: dict[uuid_.UUID, UserCategory] = {
             user_category.uuid: user_category
             for user_category in UserCategory.objects.filter(
-                uuid__in=all_user_category_uuids, user=cast(User, request.user)
+                uuid__in=all_user_category_uuids, user=user
             )
         }
 
@@ -228,4 +322,40 @@ class UserCategoriesApplyView(APIView):
                     ]
                 )
 
+        delete_user_category_counts_cache(user, cache)
+        bump_user_state_versions((user.uuid,), ("category",), cache)
+
         return Response(status=204)
+
+
+class UserCategoriesCountsView(APIView):
+    @extend_schema(
+        summary="Get the unread/read counts of every User Category",
+        description="""Get the unread/read counts of every User Category, plus those of subscribed feeds without a category, and the total across all subscribed feeds.
+
+A feed in multiple categories counts towards each of them.""",
+        responses=OpenApiTypes.OBJECT,
+    )
+    def get(self, request: Request):
+        cache: BaseCache = caches["default"]
+
+        user_category_counts, cache_hit = get_user_category_counts_from_cache(
+            cast(User, request.user), cache
+        )
+
+        def _counts_obj(counts: tuple[int, int]) -> dict[str, int]:
+            unread_count, read_count = counts
+            return {"unreadCount": unread_count, "readCount": read_count}
+
+        response = Response(
+            {
+                "categories": {
+                    str(uc_uuid): _counts_obj(counts)
+                    for uc_uuid, counts in user_category_counts.categories.items()
+                },
+                "uncategorized": _counts_obj(user_category_counts.uncategorized),
+                "total": _counts_obj(user_category_counts.total),
+            }
+        )
+        response["X-Cache-Hit"] = "YES" if cache_hit else "NO"
+        return response
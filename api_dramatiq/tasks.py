@@ -8,6 +8,7 @@ import datetime
 
 import dramatiq
 from django.conf import settings
+from django.core.cache import caches
 from django.db import transaction
 from django.db.models import F, Q
 from django.db.models.functions import Now
@@ -18,6 +19,7 @@ from api import content_type_util, rss_requests
 from api.cache_utils.archived_counts_lookup import get_archived_counts_lookup_task
 from api.cache_utils.counts_lookup import (
     _GetCountsLookupTaskResults_Lookup,
+    get_counts_lookup_batch_task,
     get_counts_lookup_task,
 )
 from api.content_type_util import WrongContentTypeError
@@ -33,6 +35,8 @@ from api.tasks import archive_feed_entries as archive_feed_entries_
 from api.tasks import extract_top_images as extract_top_images_
 from api.tasks import feed_scrape as feed_scrape_
 from api.tasks import find_duplicate_feeds as find_duplicate_feeds_
+from api.tasks import flush_pending_reads as flush_pending_reads_
+from api.tasks import fold_read_history as fold_read_history_
 from api.tasks import label_feeds as label_feeds_
 from api.tasks import label_users as label_users_
 from api.tasks import purge_duplicate_feed_urls as purge_duplicate_feed_urls_
@@ -55,7 +59,19 @@ def get_counts_lookup(
     user_uuid_str: str, feed_uuid_str: str, *args: Any, **kwargs: Any
 ) -> dict[str, _GetCountsLookupTaskResults_Lookup]:
     get_counts_lookup.logger.info("get_counts_lookup() started...")
-    return get_counts_lookup_task(user_uuid_str, feed_uuid_str)
+    return get_counts_lookup_task(user_uuid_str, feed_uuid_str, caches["default"])
+
+
+@dramatiq.actor(queue_name="rss_temple", store_results=True)
+def get_counts_lookup_batch(
+    user_uuid_str: str, feed_uuid_strs: list[str], *args: Any, **kwargs: Any
+) -> dict[str, _GetCountsLookupTaskResults_Lookup]:
+    get_counts_lookup_batch.logger.info(
+        "get_counts_lookup_batch() started for %d feed(s)...", len(feed_uuid_strs)
+    )
+    return get_counts_lookup_batch_task(
+        user_uuid_str, feed_uuid_strs, caches["default"]
+    )
 
 
 @dramatiq.actor(queue_name="rss_temple", store_results=True)
@@ -81,6 +97,7 @@ def archive_feed_entries(*args: Any, limit=1000, **kwargs: Any) -> None:
                 settings.ARCHIVE_TIME_THRESHOLD,
                 settings.ARCHIVE_COUNT_THRESHOLD,
                 settings.ARCHIVE_BACKOFF_SECONDS,
+                caches["default"],
             )
 
     archive_feed_entries.logger.info("processed %d feed(s) for archiving", count)
@@ -137,6 +154,7 @@ def extract_top_images(
             min_image_height,
             response_max_byte_count,
             timeout_per_request,
+            caches["default"],
         )
         extract_top_images.logger.info("updated %d feed entry(s)", count)
     else:
@@ -205,7 +223,7 @@ def feed_scrape(
                         response, response_max_byte_count
                     )
 
-                feed_scrape_(feed, response_text)
+                feed_scrape_(feed, response_text, caches["default"])
 
                 feed_urls_succeeded.append(feed.feed_url)
 
@@ -263,7 +281,9 @@ def setup_subscriptions(
 ) -> None:
     feed_subscription_progress_entry = setup_subscriptions__get_first_entry()
     if feed_subscription_progress_entry is not None:
-        setup_subscriptions_(feed_subscription_progress_entry, response_max_byte_count)
+        setup_subscriptions_(
+            feed_subscription_progress_entry, response_max_byte_count, caches["default"]
+        )
         setup_subscriptions.logger.info("subscription process entry(s) setup")
     else:
         setup_subscriptions.logger.info("no subscription process entry available")
@@ -311,5 +331,19 @@ def purge_duplicate_feed_urls(*args: Any, **kwargs: Any) -> None:
 def ignore_missed_top_images(*args: Any, since_interval_days=14, **kwargs: Any) -> None:
     epoch = timezone.now() - datetime.timedelta(days=since_interval_days)
 
-    ignore_missed_top_images_(epoch)
+    ignore_missed_top_images_(epoch, caches["default"])
     ignore_missed_top_images.logger.info("ignored missed top images")
+
+
+@dramatiq.actor(queue_name="rss_temple")
+def flush_pending_reads(*args: Any, **kwargs: Any) -> None:
+    count = flush_pending_reads_(caches["default"])
+    flush_pending_reads.logger.info("flushed %d pending read(s)", count)
+
+
+@dramatiq.actor(queue_name="rss_temple")
+def fold_read_history(*args: Any, **kwargs: Any) -> None:
+    count = fold_read_history_(
+        timezone.now(), settings.READ_HISTORY_FOLD_TIME_THRESHOLD, caches["default"]
+    )
+    fold_read_history.logger.info("folded %d read mapping(s)", count)
@@ -0,0 +1,179 @@
+import base64
+import datetime
+import json
+import uuid
+from functools import reduce
+from typing import AbstractSet, Any, Sequence, cast
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Model, OrderBy, Q
+
+# A cursor is the sort-key tuple of the last row of a page. The next page is then
+# "every row sorting after it", which the DB can seek to through an index, rather
+# than reading and throwing away all of the rows before it, as `OFFSET` does.
+
+
+def _is_nullable(order_by: OrderBy, non_null_field_names: AbstractSet[str]) -> bool:
+    expression = order_by.expression
+    return not (isinstance(expression, F) and expression.name in non_null_field_names)
+
+
+def to_keyset_order_by_args(
+    order_by_args: list[OrderBy],
+    tiebreaker_field_name: str,
+    non_null_field_names: AbstractSet[str],
+) -> list[OrderBy]:
+    keyset_order_by_args: list[OrderBy] = []
+    for order_by in order_by_args:
+        if not isinstance(order_by.expression, F):
+            raise ValueError("only field sorts can be keyset-paginated")
+
+        if _is_nullable(order_by, non_null_field_names):
+            # pinned, so that the keyset filter agrees with the DB on where the
+            # `NULL`s sort. Non-null fields are left alone, to keep their indexes usable
+            order_by = OrderBy(
+                order_by.expression, descending=order_by.descending, nulls_last=True
+            )
+        keyset_order_by_args.append(order_by)
+
+    # the sort must be total, otherwise rows tied across a page boundary get
+    # skipped or repeated
+    if not any(
+        order_by.expression.name == tiebreaker_field_name
+        for order_by in keyset_order_by_args
+    ):
+        keyset_order_by_args.append(
+            OrderBy(
+                F(tiebreaker_field_name),
+                descending=(
+                    keyset_order_by_args[-1].descending
+                    if keyset_order_by_args
+                    else False
+                ),
+            )
+        )
+
+    return keyset_order_by_args
+
+
+def cursor_annotations(order_by_args: list[OrderBy]) -> dict[str, F]:
+    return {
+        f"_cursor_{i}": order_by.expression for i, order_by in enumerate(order_by_args)
+    }
+
+
+def _to_python(model: type[Model], field_name: str, value: Any) -> Any:
+    # the cursor is the client's, so its values are only trusted once they are
+    # of the sort field's type. Otherwise they'd fail in the DB, not here
+    if value is None:
+        return None
+
+    try:
+        *relation_names, last_name = field_name.split("__")
+        for relation_name in relation_names:
+            related_model = model._meta.get_field(relation_name).related_model
+            if related_model is None:
+                raise ValueError(f"'{relation_name}' is not a relation")
+            model = cast(type[Model], related_model)
+
+        return model._meta.get_field(last_name).to_python(value)
+    except (FieldDoesNotExist, ValidationError, TypeError) as e:
+        raise ValueError("cursor malformed") from e
+
+
+def to_keyset_filter_args(
+    order_by_args: list[OrderBy],
+    values: Sequence[Any],
+    non_null_field_names: AbstractSet[str],
+    model: type[Model],
+) -> list[Any]:
+    if len(order_by_args) != len(values):
+        raise ValueError("cursor does not match sort")
+
+    values = [
+        _to_python(model, order_by.expression.name, value)
+        for order_by, value in zip(order_by_args, values)
+    ]
+
+    # the row-value comparison spelled out:
+    # `a > x OR (a = x AND b > y) OR ...`, with each term's own direction and NULLs
+    qs: list[Q] = []
+    equal_q = Q()
+    for order_by, value in zip(order_by_args, values):
+        field_name: str = order_by.expression.name
+        nullable = _is_nullable(order_by, non_null_field_names)
+
+        # `NULL`s sort last, so nothing sorts after one on this term
+        if value is not None:
+            after_q = Q(
+                **{f"{field_name}__{'lt' if order_by.descending else 'gt'}": value}
+            )
+            if nullable:
+                after_q |= Q(**{f"{field_name}__isnull": True})
+            qs.append(equal_q & after_q)
+
+        equal_q &= (
+            Q(**{f"{field_name}__isnull": True})
+            if value is None
+            else Q(**{field_name: value})
+        )
+
+    if not qs:  # pragma: no cover
+        return [Q(pk__in=[])]
+
+    keyset_q = reduce(lambda a, b: a | b, qs)
+
+    first_order_by = order_by_args[0]
+    first_value = values[0]
+    if first_value is not None and not _is_nullable(
+        first_order_by, non_null_field_names
+    ):
+        # implied by the terms above, but as a plain range on the leading sort
+        # field, it lets an index on it seek to the page, instead of scanning
+        # for the `OR`
+        keyset_q = (
+            Q(
+                **{
+                    f"{first_order_by.expression.name}__{'lte' if first_order_by.descending else 'gte'}": first_value
+                }
+            )
+            & keyset_q
+        )
+
+    return [keyset_q]
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    elif isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"{type(obj).__name__} is not cursor-encodable")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return (
+        base64.urlsafe_b64encode(
+            json.dumps(
+                list(values), default=_json_default, separators=(",", ":")
+            ).encode()
+        )
+        .rstrip(b"=")
+        .decode()
+    )
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("cursor malformed") from e
+
+    if not isinstance(values, list) or not all(
+        value is None or isinstance(value, (str, int, float, bool)) for value in values
+    ):
+        raise ValueError("cursor malformed")
+
+    return values
@@ -1,21 +1,73 @@
 from dataclasses import dataclass
 from functools import reduce
-from typing import AbstractSet, Any, Callable, Iterable, TypedDict
-
+from operator import itemgetter
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Iterable,
+    NotRequired,
+    Sequence,
+    TypedDict,
+)
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.http import HttpRequest
 
+from query_utils.lru_cache import LRUCache
+
+
+@dataclass(frozen=True, slots=True)
+class ValuesConfig:
+    # the `values()` names (fields, lookups, or annotations) the field is made
+    # from, and how. `convert` can be left out for a single name used as-is
+    names: tuple[str, ...]
+    convert: Callable[..., Any] | None = None
+
 
 @dataclass(slots=True)
 class FieldConfig:
     accessor: Callable[[HttpRequest, Any, Iterable[Any] | None], Any]
     default: bool
     only_fields: AbstractSet[str]
+    # set when the field can be made from a `values()` row alone, without the
+    # model instance or the request
+    values: ValuesConfig | None = None
 
 
 class FieldMap(TypedDict):
     field_name: str
     accessor: Callable[[HttpRequest, Any, Iterable[Any] | None], Any]
     only_fields: AbstractSet[str]
+    values: NotRequired[ValuesConfig | None]
+
+
+@dataclass(frozen=True, slots=True)
+class RowPlan:
+    # what to `values_list()`, in order
+    names: tuple[str, ...]
+    getters: tuple[tuple[str, Callable[[Sequence[Any]], Any]], ...]
+
+    def generate_return_object(self, row: Sequence[Any]) -> dict[str, Any]:
+        return {field_name: getter(row) for field_name, getter in self.getters}
+
+
+# (object name, fields) -> row plan. There are only so many field sets that clients
+# actually ask for
+_row_plan_cache: LRUCache[tuple[str, tuple[tuple[str, ValuesConfig], ...]], RowPlan] = (
+    LRUCache(0)
+)
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    _row_plan_cache.maxsize = getattr(settings, "FIELD_ROW_PLAN_CACHE_SIZE", 256)
+    _row_plan_cache.clear()
+
+
+_load_global_settings()
 
 
 def get_default_field_maps(
@@ -30,6 +82,7 @@ def get_default_field_maps(
                 "field_name": field_name,
                 "accessor": field_config.accessor,
                 "only_fields": field_config.only_fields,
+                "values": field_config.values,
             }
 
             default_field_maps.append(default_field_map)
@@ -48,6 +101,7 @@ def get_all_field_maps(
             "field_name": field_name,
             "accessor": field_config.accessor,
             "only_fields": field_config.only_fields,
+            "values": field_config.values,
         }
 
         all_field_maps.append(field_map)
@@ -66,6 +120,7 @@ def to_field_map(
                 "field_name": _field_name,
                 "accessor": field_config.accessor,
                 "only_fields": field_config.only_fields,
+                "values": field_config.values,
             }
     return None
 
@@ -88,6 +143,65 @@ def generate_return_object(
     return return_obj
 
 
+def _converted(
+    convert: Callable[..., Any], get: Callable[[Sequence[Any]], Any]
+) -> Callable[[Sequence[Any]], Any]:
+    return lambda row: convert(get(row))
+
+
+def _converted_many(
+    convert: Callable[..., Any], get: Callable[[Sequence[Any]], Any]
+) -> Callable[[Sequence[Any]], Any]:
+    return lambda row: convert(*get(row))
+
+
+def _compile_row_plan(fields: tuple[tuple[str, ValuesConfig], ...]) -> RowPlan:
+    # each name is only selected once, however many fields are made from it
+    indexes: dict[str, int] = {}
+    for _, values_config in fields:
+        for name in values_config.names:
+            indexes.setdefault(name, len(indexes))
+
+    getters: list[tuple[str, Callable[[Sequence[Any]], Any]]] = []
+    for field_name, values_config in fields:
+        getter: Callable[[Sequence[Any]], Any]
+        if len(values_config.names) == 1:
+            getter = itemgetter(indexes[values_config.names[0]])
+            if values_config.convert is not None:
+                getter = _converted(values_config.convert, getter)
+        else:
+            assert values_config.convert is not None
+            getter = _converted_many(
+                values_config.convert,
+                itemgetter(*(indexes[name] for name in values_config.names)),
+            )
+
+        getters.append((field_name, getter))
+
+    return RowPlan(tuple(indexes.keys()), tuple(getters))
+
+
+def get_row_plan(object_name: str, field_maps: list[FieldMap]) -> RowPlan | None:
+    # `None` if any of the fields needs a model instance (or the request), in
+    # which case the objects have to be generated the slow way
+    fields: list[tuple[str, ValuesConfig]] = []
+    for field_map in field_maps:
+        if (values_config := field_map.get("values")) is None:
+            return None
+
+        fields.append((field_map["field_name"], values_config))
+
+    if not fields:
+        return None
+
+    key = (object_name, tuple(fields))
+    if (row_plan := _row_plan_cache.get(key)) is None:
+        row_plan = _compile_row_plan(key[1])
+        _row_plan_cache.set(key, row_plan)
+
+    return row_plan
+
+
 def generate_only_fields(field_maps: list[FieldMap]) -> frozenset[str]:
     return reduce(
         lambda a, b: a.union(b), (fm["only_fields"] for fm in field_maps), frozenset()
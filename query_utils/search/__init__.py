@@ -1,14 +1,52 @@
 import logging
-from typing import Callable, cast
+from typing import Any, Callable, Literal, TypeVar, cast
 
+from django.conf import settings
+from django.core.signals import setting_changed
 from django.db.models import Q
+from django.dispatch import receiver
 from django.http import HttpRequest
 from pyparsing import ParseException, ParseResults
 
+from query_utils.lru_cache import LRUCache
+from query_utils.search import iterative_parser
+from query_utils.search.nodes import (
+    AndExpression,
+    Expression,
+    NamedExpression,
+    OrExpression,
+    ParenthesizedExpression,
+)
 from query_utils.search.parser import parser
 
 _logger = logging.getLogger("rss_temple.query_utils.search")
 
+_T = TypeVar("_T")
+
+_SEARCH_PARSER: Literal["pyparsing", "iterative"]
+
+# (object name, search) -> parsed search. Clients tend to send the same few
+# searches over and over, and parsing is by far the most expensive part of turning
+# a search into filters
+_parse_cache: LRUCache[tuple[str, str], Expression] = LRUCache(0)
+
+
+@receiver(setting_changed)
+def _load_global_settings(*args: Any, **kwargs: Any):
+    global _SEARCH_PARSER
+
+    _SEARCH_PARSER = getattr(settings, "SEARCH_PARSER", "pyparsing")
+
+    _parse_cache.maxsize = getattr(settings, "SEARCH_PARSE_CACHE_SIZE", 512)
+    _parse_cache.clear()
+
+
+_load_global_settings()
+
+
+def clear_parse_cache() -> None:
+    _parse_cache.clear()
+
 
 def to_filter_args(
     object_name: str,
@@ -18,95 +56,238 @@ def to_filter_args(
 ) -> list[Q]:
     object_search_fns = search_fns[object_name]
 
+    try:
+        expression = _parse(object_name, search, object_search_fns)
+        return [_bind(request, expression, object_search_fns)]
+    except RecursionError:
+        # deeply-nested parentheses or a very long and/or chain can blow the
+        # recursion limit in the pyparsing parser; treat it as a malformed search
+        # rather than letting it surface as an unhandled 500
+        _logger.warning("Parsing of '%s' failed: recursion limit exceeded", search)
+        raise ValueError("search malformed")
+
+
+def to_conjuncts(
+    object_name: str,
+    search: str,
+    search_fns: dict[str, dict[str, Callable[[HttpRequest, str], Q]]],
+) -> list[NamedExpression]:
+    # the terms that every result has to match, i.e. those only ever and-ed with
+    # the rest of the search, with their field names resolved. Unlike
+    # `to_filter_args`, nothing about the request is needed
+    try:
+        expression = _parse(object_name, search, search_fns[object_name])
+    except RecursionError:
+        _logger.warning("Parsing of '%s' failed: recursion limit exceeded", search)
+        raise ValueError("search malformed")
+
+    conjuncts: list[NamedExpression] = []
+    stack: list[Expression] = [expression]
+    while stack:
+        expression = stack.pop()
+        if isinstance(expression, NamedExpression):
+            conjuncts.append(expression)
+        elif isinstance(expression, ParenthesizedExpression):
+            stack.append(expression.expression)
+        elif isinstance(expression, AndExpression):
+            stack.append(expression.right)
+            stack.append(expression.left)
+
+    return conjuncts
+
+
+def to_canonical(
+    object_name: str,
+    search: str,
+    search_fns: dict[str, dict[str, Callable[[HttpRequest, str], Q]]],
+) -> str:
+    # the same for searches that only differ in how they are written (whitespace
+    # between terms, field name case), but not for ones with different values
+    search = search.strip()
+    if not search:
+        return ""
+
+    try:
+        expression = _parse(object_name, search, search_fns[object_name])
+    except RecursionError:
+        _logger.warning("Parsing of '%s' failed: recursion limit exceeded", search)
+        raise ValueError("search malformed")
+
+    return repr(expression)
+
+
+def _parse(
+    object_name: str,
+    search: str,
+    object_search_fns: dict[str, Callable[[HttpRequest, str], Q]],
+) -> Expression:
+    key = (object_name, search)
+    if (expression := _parse_cache.get(key)) is not None:
+        return expression
+
+    # failures aren't cached, as they are rare and not worth the space
+    if _SEARCH_PARSER == "iterative":
+        expression = _parse_iterative(search)
+    else:
+        expression = _parse_pyparsing(search)
+
+    expression = _resolve_field_names(expression, object_search_fns)
+
+    _parse_cache.set(key, expression)
+
+    return expression
+
+
+def _parse_pyparsing(search: str) -> Expression:
     try:
         parse_results = parser().parseString(search, True)
-        return [_handle_parse_result(request, parse_results, object_search_fns)]
     except ParseException as e:
         _logger.warning("Parsing of '%s' failed: %s", search, e)
         raise ValueError("search malformed")
-    except RecursionError:
-        # deeply-nested parentheses or a very long and/or chain can blow the
-        # recursion limit in the parser or in this tree walker; treat it as a
-        # malformed search rather than letting it surface as an unhandled 500
-        _logger.warning("Parsing of '%s' failed: recursion limit exceeded", search)
+
+    return _to_expression(parse_results)
+
+
+def _parse_iterative(search: str) -> Expression:
+    try:
+        return iterative_parser.parse(search)
+    except iterative_parser.ParseError as e:
+        _logger.warning("Parsing of '%s' failed: %s", search, e)
         raise ValueError("search malformed")
 
 
-def _handle_parse_result(
-    request: HttpRequest, parse_results: ParseResults, object_search_fns
-) -> Q:
+def _to_expression(parse_results: ParseResults) -> Expression:
     if "WhereClause" in parse_results and "WhereExpressionExtension" in parse_results:
-        where_clause = parse_results["WhereClause"]
-        where_expression_extension = parse_results["WhereExpressionExtension"]
+        where_clause = _to_expression(cast(ParseResults, parse_results["WhereClause"]))
+        where_expression_extension = cast(
+            ParseResults, parse_results["WhereExpressionExtension"]
+        )
         if "AndOperator" in where_expression_extension:
-            return _handle_parse_result(
-                request, cast(ParseResults, where_clause), object_search_fns
-            ) & _handle_parse_result(
-                request,
-                cast(ParseResults, where_expression_extension),
-                object_search_fns,
+            return AndExpression(
+                where_clause,
+                _to_expression(where_expression_extension),
             )
         elif "OrOperator" in where_expression_extension:
-            return _handle_parse_result(
-                request, cast(ParseResults, where_clause), object_search_fns
-            ) | _handle_parse_result(
-                request,
-                cast(ParseResults, where_expression_extension),
-                object_search_fns,
+            return OrExpression(
+                where_clause,
+                _to_expression(where_expression_extension),
             )
         else:
-            return _handle_parse_result(
-                request, cast(ParseResults, where_clause), object_search_fns
-            )
+            return where_clause
     elif "NamedExpression" in parse_results:
-        named_expression = cast(ParseResults, parse_results["NamedExpression"])
-        field_name = cast(str, named_expression["IdentifierTerm"])
-        # if search_obj is "" (empty string), 'StringTerm' will not exist, so default it
-        search_obj = cast(
-            str,
-            named_expression["StringTerm"] if "StringTerm" in named_expression else "",
+        return _to_named_expression(
+            cast(ParseResults, parse_results["NamedExpression"]),
+            False,
         )
-
-        return _q(request, field_name, search_obj, object_search_fns)
     elif "ExcludeNamedExpression" in parse_results:
-        exclude_named_expression = cast(
-            ParseResults, parse_results["ExcludeNamedExpression"]
+        return _to_named_expression(
+            cast(ParseResults, parse_results["ExcludeNamedExpression"]),
+            True,
         )
-        field_name = cast(str, exclude_named_expression["IdentifierTerm"])
-        # if search_obj is "" (empty string), 'StringTerm' will not exist, so default it
-        search_obj = cast(
-            str,
-            (
-                exclude_named_expression["StringTerm"]
-                if "StringTerm" in exclude_named_expression
-                else ""
-            ),
-        )
-
-        return ~_q(request, field_name, search_obj, object_search_fns)
     elif "ParenthesizedExpression" in parse_results:
-        return Q(
-            _handle_parse_result(
-                request,
-                cast(ParseResults, parse_results["ParenthesizedExpression"]),
-                object_search_fns,
-            )
+        return ParenthesizedExpression(
+            _to_expression(cast(ParseResults, parse_results["ParenthesizedExpression"]))
         )
     else:  # pragma: no cover
         raise ValueError("unknown parse_result")
 
 
-def _q(
+def _to_named_expression(
+    named_expression: ParseResults, exclude: bool
+) -> NamedExpression:
+    field_name = cast(str, named_expression["IdentifierTerm"])
+    # if search_obj is "" (empty string), 'StringTerm' will not exist, so default it
+    search_obj = cast(
+        str,
+        named_expression["StringTerm"] if "StringTerm" in named_expression else "",
+    )
+
+    return NamedExpression(field_name, search_obj, exclude)
+
+
+def _fold(
+    expression: Expression,
+    named_fn: Callable[[NamedExpression], _T],
+    and_fn: Callable[[_T, _T], _T],
+    or_fn: Callable[[_T, _T], _T],
+    parenthesized_fn: Callable[[_T], _T],
+) -> _T:
+    # a post-order walk, left to right, with explicit stacks instead of recursion,
+    # so that the nesting of the search doesn't count against the recursion limit
+    results: list[_T] = []
+    stack: list[tuple[Expression, bool]] = [(expression, False)]
+    while stack:
+        expression, children_done = stack.pop()
+        if isinstance(expression, NamedExpression):
+            results.append(named_fn(expression))
+        elif isinstance(expression, ParenthesizedExpression):
+            if children_done:
+                results.append(parenthesized_fn(results.pop()))
+            else:
+                stack.append((expression, True))
+                stack.append((expression.expression, False))
+        else:
+            if children_done:
+                right = results.pop()
+                left = results.pop()
+                results.append(
+                    and_fn(left, right)
+                    if isinstance(expression, AndExpression)
+                    else or_fn(left, right)
+                )
+            else:
+                stack.append((expression, True))
+                stack.append((expression.right, False))
+                stack.append((expression.left, False))
+
+    (result,) = results
+    return result
+
+
+def _resolve_field_names(
+    expression: Expression,
+    object_search_fns: dict[str, Callable[[HttpRequest, str], Q]],
+) -> Expression:
+    # the first match wins, as when they were looked up one by one
+    lower_field_names: dict[str, str] = {}
+    for _field_name in object_search_fns.keys():
+        lower_field_names.setdefault(_field_name.lower(), _field_name)
+
+    def _named_fn(named_expression: NamedExpression) -> Expression:
+        field_name = lower_field_names.get(named_expression.field_name.lower())
+        if field_name is None:
+            raise AttributeError(named_expression.field_name)
+
+        return named_expression._replace(field_name=field_name)
+
+    return _fold(
+        expression, _named_fn, AndExpression, OrExpression, ParenthesizedExpression
+    )
+
+
+def _bind(
     request: HttpRequest,
-    field_name: str,
-    search_obj: str,
+    expression: Expression,
     object_search_fns: dict[str, Callable[[HttpRequest, str], Q]],
 ) -> Q:
-    for _field_name, object_search_fn in object_search_fns.items():
-        if field_name.lower() == _field_name.lower():
-            try:
-                return object_search_fn(request, search_obj)
-            except ValueError:
-                raise ValueError(f"'{field_name}' search malformed")
-    else:
-        raise AttributeError(field_name)
+    # the search fns are what can depend on the request (the user, their timezone,
+    # etc.), so they are the only part redone for every request
+    def _named_fn(named_expression: NamedExpression) -> Q:
+        object_search_fn = object_search_fns.get(named_expression.field_name)
+        if object_search_fn is None:
+            raise AttributeError(named_expression.field_name)
+
+        try:
+            q = object_search_fn(request, named_expression.search_obj)
+        except ValueError:
+            raise ValueError(f"'{named_expression.field_name}' search malformed")
+
+        return ~q if named_expression.exclude else q
+
+    return _fold(
+        expression,
+        _named_fn,
+        lambda left, right: left & right,
+        lambda left, right: left | right,
+        Q,
+    )
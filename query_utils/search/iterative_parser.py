@@ -0,0 +1,220 @@
+import re
+from typing import Iterator, NamedTuple
+
+from query_utils.search.nodes import (
+    AndExpression,
+    Expression,
+    NamedExpression,
+    OrExpression,
+    ParenthesizedExpression,
+)
+
+# A tokenizer and an (iterative) precedence-climbing parser for the same grammar
+# as `query_utils.search.parser`, producing the same trees. Nothing here recurses,
+# so the nesting of the search is bounded by `MAX_DEPTH`, not by the recursion
+# limit.
+#
+# Matching the pyparsing grammar:
+# - whitespace is ` `, `\n`, and `\r` (tabs are expanded to spaces beforehand)
+# - identifiers are `[A-Za-z][A-Za-z0-9_]*`, and `and`/`or` are (caseless)
+#   keywords only where an operator is expected
+# - strings are double-quoted, with the same escapes as `QuotedString`
+# - `and` and `or` have the same precedence, and are right-associative
+
+# deeper than pyparsing gets before hitting the recursion limit, but well short
+# of where Django does when compiling the resulting `Q`
+MAX_DEPTH = 128
+
+
+class ParseError(ValueError):
+    def __init__(self, expected: str, loc: int):
+        super().__init__(f"Expected {expected} (at char {loc})")
+        self.loc = loc
+
+
+class _Token(NamedTuple):
+    kind: str
+    value: str
+    loc: int
+
+
+# leading whitespace is part of each match, to halve the number of matches
+_token_regex = re.compile(
+    r"""
+    [ \n\r]*
+    (?:
+        (?P<Identifier>[A-Za-z][A-Za-z0-9_]*)
+        |(?P<String>"(?:(?:\\.)|(?:[^"\n\r\\]))*")
+        |(?P<ExcludeSeparator>:!)
+        |(?P<Separator>:)
+        |(?P<OpenParenthesis>\()
+        |(?P<CloseParenthesis>\))
+        |(?P<End>$)
+    )
+    """,
+    re.VERBOSE,
+)
+
+# exactly as `QuotedString` unescapes, quirks included: its quantifiers are
+# swallowed by an f-string, so e.g. `\x[0-9a-fA-F]2` is its "hex escape"
+_unescape_regex = re.compile(
+    r"(\\t|\\n|\\f|\\r)"
+    r"|(\\[0-7]3|\\0|\\x[0-9a-fA-F]2|\\u[0-9a-fA-F]4)"
+    r"|(\\.)"
+    r"|(\n|.)"
+)
+
+_whitespace_escapes = {r"\t": "\t", r"\n": "\n", r"\f": "\f", r"\r": "\r"}
+
+_OPERATORS = {
+    "AND": (1, AndExpression),
+    "OR": (1, OrExpression),
+}
+
+
+def _unescape_numeric(s: str) -> str:
+    if s == "0":
+        return "\0"
+    elif s.isdigit() and len(s) == 3:
+        return chr(int(s, 8))
+    elif s.startswith(("u", "x")):
+        return chr(int(s[1:], 16))
+    else:
+        return s
+
+
+def _unescape(s: str) -> str:
+    if "\\" not in s:
+        return s
+
+    return "".join(
+        _whitespace_escapes[m[1]]
+        if m[1]
+        else _unescape_numeric(m[2][1:])
+        if m[2]
+        else m[3][-1]
+        if m[3]
+        else m[4]
+        for m in _unescape_regex.finditer(s)
+    )
+
+
+def _tokenize(search: str) -> Iterator[_Token]:
+    loc = 0
+    while True:
+        match = _token_regex.match(search, loc)
+        if match is None:
+            raise ParseError("a token", loc)
+
+        kind = match.lastgroup
+        assert kind is not None
+        yield _Token(kind, match[kind], match.start(kind))
+        if kind == "End":
+            return
+
+        loc = match.end()
+
+
+class _Operand(NamedTuple):
+    expression: Expression
+    depth: int
+
+
+def _reduce(operands: list[_Operand], operator: str, loc: int) -> None:
+    right = operands.pop()
+    left = operands.pop()
+    _, expression_type = _OPERATORS[operator]
+    _push(
+        operands,
+        expression_type(left.expression, right.expression),
+        max(left.depth, right.depth) + 1,
+        loc,
+    )
+
+
+def _push(operands: list[_Operand], expression: Expression, depth: int, loc: int):
+    if depth > MAX_DEPTH:
+        raise ParseError(f"at most {MAX_DEPTH} nested expressions", loc)
+
+    operands.append(_Operand(expression, depth))
+
+
+def parse(search: str) -> Expression:
+    # `None` marks an open parenthesis
+    operators: list[tuple[str | None, int]] = []
+    operands: list[_Operand] = []
+
+    tokens = _tokenize(search.expandtabs())
+    expect_operand = True
+    for token in tokens:
+        if expect_operand:
+            if token.kind == "Identifier":
+                separator = next(tokens)
+                if separator.kind not in ("Separator", "ExcludeSeparator"):
+                    raise ParseError("':' or ':!'", separator.loc)
+
+                string = next(tokens)
+                if string.kind != "String":
+                    raise ParseError("string enclosed in '\"'", string.loc)
+
+                _push(
+                    operands,
+                    NamedExpression(
+                        token.value,
+                        _unescape(string.value[1:-1]),
+                        separator.kind == "ExcludeSeparator",
+                    ),
+                    1,
+                    token.loc,
+                )
+                expect_operand = False
+            elif token.kind == "OpenParenthesis":
+                operators.append((None, token.loc))
+            else:
+                raise ParseError("identifier or '('", token.loc)
+        else:
+            operator = token.value.upper() if token.kind == "Identifier" else None
+            if operator in _OPERATORS:
+                precedence, _ = _OPERATORS[operator]
+                # right-associative, so only strictly tighter operators are reduced
+                while operators:
+                    top, top_loc = operators[-1]
+                    if top is None or _OPERATORS[top][0] <= precedence:
+                        break
+
+                    operators.pop()
+                    _reduce(operands, top, top_loc)
+
+                operators.append((operator, token.loc))
+                expect_operand = True
+            elif token.kind == "CloseParenthesis":
+                while operators and operators[-1][0] is not None:
+                    top, top_loc = operators.pop()
+                    assert top is not None
+                    _reduce(operands, top, top_loc)
+
+                if not operators:
+                    raise ParseError("end of text", token.loc)
+
+                _, open_loc = operators.pop()
+                operand = operands.pop()
+                _push(
+                    operands,
+                    ParenthesizedExpression(operand.expression),
+                    operand.depth + 1,
+                    open_loc,
+                )
+            elif token.kind == "End":
+                while operators:
+                    top, top_loc = operators.pop()
+                    if top is None:
+                        raise ParseError("')'", token.loc)
+
+                    _reduce(operands, top, top_loc)
+
+                (operand,) = operands
+                return operand.expression
+            else:
+                raise ParseError("'and', 'or', or end of text", token.loc)
+
+    raise ParseError("identifier or '('", len(search))  # pragma: no cover
@@ -0,0 +1,30 @@
+from typing import NamedTuple, Union
+
+# The parsed form of a search, with no request-dependent parts, so that it can be
+# cached and shared between requests (and then bound to a `Q` per request).
+
+
+class NamedExpression(NamedTuple):
+    # as typed, until resolved to the key in the object's search fns
+    field_name: str
+    search_obj: str
+    exclude: bool
+
+
+class AndExpression(NamedTuple):
+    left: "Expression"
+    right: "Expression"
+
+
+class OrExpression(NamedTuple):
+    left: "Expression"
+    right: "Expression"
+
+
+class ParenthesizedExpression(NamedTuple):
+    expression: "Expression"
+
+
+Expression = Union[
+    NamedExpression, AndExpression, OrExpression, ParenthesizedExpression
+]
@@ -0,0 +1,227 @@
+import datetime
+import uuid
+
+from django.apps.registry import Apps
+from django.db import models
+from django.db.models import F, OrderBy, Q
+from django.test import SimpleTestCase
+
+from query_utils import cursor as cursorutils
+
+_NON_NULL_FIELD_NAMES = frozenset(("uuid", "text", "created_at", "is_archived"))
+
+_UUID = uuid.UUID("01234567-89ab-cdef-0123-456789abcdef")
+
+# only for their fields, so they're kept out of the project's app registry
+_apps = Apps()
+
+
+class _Category(models.Model):
+    name = models.CharField(max_length=128)
+
+    class Meta:
+        apps = _apps
+        app_label = "query_utils"
+
+
+class _Object(models.Model):
+    uuid = models.UUIDField(primary_key=True)
+    text = models.CharField(max_length=128)
+    image_src = models.URLField(null=True)
+    created_at = models.DateTimeField()
+    is_archived = models.BooleanField()
+    category = models.ForeignKey(_Category, models.CASCADE, null=True)
+
+    class Meta:
+        apps = _apps
+        app_label = "query_utils"
+
+
+class CursorTestCase(SimpleTestCase):
+    def test_encode_decode(self):
+        values = [
+            datetime.datetime(
+                2020, 1, 1, 0, 0, 0, 123456, tzinfo=datetime.timezone.utc
+            ),
+            uuid.UUID("01234567-89ab-cdef-0123-456789abcdef"),
+            "text",
+            1,
+            True,
+            None,
+        ]
+
+        cursor = cursorutils.encode_cursor(values)
+        self.assertNotIn("=", cursor)
+
+        self.assertEqual(
+            cursorutils.decode_cursor(cursor),
+            [
+                "2020-01-01T00:00:00.123456+00:00",
+                "01234567-89ab-cdef-0123-456789abcdef",
+                "text",
+                1,
+                True,
+                None,
+            ],
+        )
+
+    def test_decode_malformed(self):
+        for cursor in (
+            "%%%",
+            cursorutils.encode_cursor([])[:-1] + "x",
+            "bm90IGpzb24",  # `not json`
+            "eyJhIjoxfQ",  # `{"a":1}`
+            "W1sxXV0",  # `[[1]]`
+        ):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    cursorutils.decode_cursor(cursor)
+
+    def test_to_keyset_order_by_args(self):
+        self.assertEqual(
+            cursorutils.to_keyset_order_by_args(
+                [F("text").desc()], "uuid", _NON_NULL_FIELD_NAMES
+            ),
+            [F("text").desc(), F("uuid").desc()],
+        )
+        self.assertEqual(
+            cursorutils.to_keyset_order_by_args(
+                [F("image_src").asc()], "uuid", _NON_NULL_FIELD_NAMES
+            ),
+            [OrderBy(F("image_src"), nulls_last=True), F("uuid").asc()],
+        )
+        self.assertEqual(
+            cursorutils.to_keyset_order_by_args(
+                [F("uuid").asc(), F("text").desc()], "uuid", _NON_NULL_FIELD_NAMES
+            ),
+            [F("uuid").asc(), F("text").desc()],
+        )
+        self.assertEqual(
+            cursorutils.to_keyset_order_by_args([], "uuid", _NON_NULL_FIELD_NAMES),
+            [F("uuid").asc()],
+        )
+
+    def test_to_keyset_filter_args_uniform(self):
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [F("text").desc(), F("uuid").desc()],
+            ["a", str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        self.assertEqual(
+            filter_arg,
+            Q(text__lte="a") & (Q(text__lt="a") | (Q(text="a") & Q(uuid__lt=_UUID))),
+        )
+
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [F("text").asc(), F("uuid").asc()],
+            ["a", str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        self.assertEqual(
+            filter_arg,
+            Q(text__gte="a") & (Q(text__gt="a") | (Q(text="a") & Q(uuid__gt=_UUID))),
+        )
+
+    def test_to_keyset_filter_args_expanded(self):
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [F("text").asc(), F("uuid").desc()],
+            ["a", str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        self.assertEqual(
+            filter_arg,
+            Q(text__gte="a") & (Q(text__gt="a") | (Q(text="a") & Q(uuid__lt=_UUID))),
+        )
+
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [OrderBy(F("image_src"), nulls_last=True), F("uuid").asc()],
+            ["a", str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        self.assertEqual(
+            filter_arg,
+            (Q(image_src__gt="a") | Q(image_src__isnull=True))
+            | (Q(image_src="a") & Q(uuid__gt=_UUID)),
+        )
+
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [OrderBy(F("image_src"), nulls_last=True), F("uuid").asc()],
+            [None, str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        self.assertEqual(filter_arg, Q(image_src__isnull=True) & Q(uuid__gt=_UUID))
+
+    def test_to_keyset_filter_args_to_python(self):
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [OrderBy(F("category__name"), nulls_last=True), F("uuid").asc()],
+            [1, str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        self.assertEqual(
+            filter_arg,
+            (Q(category__name__gt="1") | Q(category__name__isnull=True))
+            | (Q(category__name="1") & Q(uuid__gt=_UUID)),
+        )
+
+        (filter_arg,) = cursorutils.to_keyset_filter_args(
+            [F("created_at").asc(), F("uuid").asc()],
+            ["2020-01-01T00:00:00+00:00", str(_UUID)],
+            _NON_NULL_FIELD_NAMES,
+            _Object,
+        )
+        created_at = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        self.assertEqual(
+            filter_arg,
+            Q(created_at__gte=created_at)
+            & (
+                Q(created_at__gt=created_at)
+                | (Q(created_at=created_at) & Q(uuid__gt=_UUID))
+            ),
+        )
+
+    def test_to_keyset_filter_args_malformed(self):
+        for order_by_args, values in (
+            # a bad datetime
+            (
+                [F("created_at").asc(), F("uuid").asc()],
+                ["notadate", str(_UUID)],
+            ),
+            # a bad UUID
+            (
+                [F("created_at").asc(), F("uuid").asc()],
+                ["2020-01-01T00:00:00+00:00", "zzz"],
+            ),
+            (
+                [F("is_archived").asc(), F("uuid").asc()],
+                ["zzz", str(_UUID)],
+            ),
+            # not a field of the model
+            (
+                [F("notafield").asc(), F("uuid").asc()],
+                ["a", str(_UUID)],
+            ),
+            (
+                [F("text__name").asc(), F("uuid").asc()],
+                ["a", str(_UUID)],
+            ),
+        ):
+            with self.subTest(order_by_args=order_by_args, values=values):
+                with self.assertRaises(ValueError):
+                    cursorutils.to_keyset_filter_args(
+                        order_by_args, values, _NON_NULL_FIELD_NAMES, _Object
+                    )
+
+    def test_to_keyset_filter_args_mismatched(self):
+        with self.assertRaises(ValueError):
+            cursorutils.to_keyset_filter_args(
+                [F("text").asc(), F("uuid").asc()],
+                ["a"],
+                _NON_NULL_FIELD_NAMES,
+                _Object,
+            )
@@ -134,3 +134,58 @@ class FieldsTestCase(SimpleTestCase):
             fieldutils.generate_field_names(field_maps),
             {"myUuid", "myText"},
         )
+
+    def test_get_row_plan(self):
+        uuid_field_map: fieldutils.FieldMap = {
+            "field_name": "uuid",
+            "accessor": lambda request, db_obj, queryset: str(db_obj.uuid),
+            "only_fields": {"uuid"},
+            "values": fieldutils.ValuesConfig(("uuid",), str),
+        }
+        text_field_map: fieldutils.FieldMap = {
+            "field_name": "text",
+            "accessor": lambda request, db_obj, queryset: db_obj.text,
+            "only_fields": {"text"},
+            "values": fieldutils.ValuesConfig(("text",)),
+        }
+        label_field_map: fieldutils.FieldMap = {
+            "field_name": "label",
+            "accessor": lambda request, db_obj, queryset: (
+                f"{db_obj.text} ({db_obj.uuid})"
+            ),
+            "only_fields": {"uuid", "text"},
+            "values": fieldutils.ValuesConfig(
+                ("text", "uuid"), lambda text, uuid_: f"{text} ({uuid_})"
+            ),
+        }
+        request_field_map: fieldutils.FieldMap = {
+            "field_name": "other",
+            "accessor": lambda request, db_obj, queryset: request.path,
+            "only_fields": frozenset(),
+        }
+
+        row_plan = fieldutils.get_row_plan(
+            "object", [uuid_field_map, text_field_map, label_field_map]
+        )
+        assert row_plan is not None
+
+        # each name is selected once
+        self.assertEqual(row_plan.names, ("uuid", "text"))
+
+        uuid_ = uuid.uuid4()
+        self.assertEqual(
+            row_plan.generate_return_object((uuid_, "test")),
+            {"uuid": str(uuid_), "text": "test", "label": f"test ({uuid_})"},
+        )
+
+        self.assertIs(
+            fieldutils.get_row_plan(
+                "object", [uuid_field_map, text_field_map, label_field_map]
+            ),
+            row_plan,
+        )
+
+        self.assertIsNone(
+            fieldutils.get_row_plan("object", [uuid_field_map, request_field_map])
+        )
+        self.assertIsNone(fieldutils.get_row_plan("object", []))
@@ -0,0 +1,267 @@
+import logging
+import random
+import sys
+from typing import Any, ClassVar
+from unittest.mock import Mock
+
+from django.db.models import Q
+from django.http import HttpRequest
+from django.test import SimpleTestCase
+
+from query_utils import search as searchutils
+from query_utils.search import iterative_parser
+from query_utils.search.nodes import (
+    AndExpression,
+    NamedExpression,
+    OrExpression,
+    ParenthesizedExpression,
+)
+
+# cases are checked against the pyparsing grammar, as that is the reference
+_searches = [
+    'text:"test"',
+    'text:!"test"',
+    'TeXt:"test"',
+    'text_2:"test"',
+    'and:"test"',
+    'or:!"test"',
+    'text:""',
+    'text:!""',
+    ' \n\r text : "test" \r\n ',
+    'text :! "test"',
+    'text: !"test"',
+    'text:"a\\"b"',
+    'text:"a\\\\b"',
+    'text:"a\\tb\\nc\\fd\\re"',
+    'text:"\\101\\0\\x41\\u0041\\q\\8"',
+    'text:"a\tb"',
+    '\ttext:"a\tb"',
+    'text:"a\\\tb"',
+    'text:"a\\\rb"',
+    'text:"a\nb"',
+    'text:"a\\\nb"',
+    'text:"é"',
+    'text:"test" and text:"example"',
+    'text:"test" AND text:"example"',
+    'text:"test" aNd text:"example"',
+    'text:"test" or text:"example"',
+    'text:"test"and text:"example"',
+    'text:"test" andtext:"example"',
+    'text:"test" and_ text:"example"',
+    'text:"test" and$ text:"example"',
+    'text:"test" and1 text:"example"',
+    'text:"a" and text:"b" or text:"c"',
+    'text:"a" or text:"b" and text:"c"',
+    'text:"a" or text:"b" or text:"c" and text:"d"',
+    '(text:"a" or text:"b") and text:"c"',
+    'text:"a" or (text:"b" and text:"c")',
+    '(text:"a")and(text:"b")',
+    '((text:"a"))',
+    '( ( text:"a" ) )',
+    '(text:"a" or (text:"b" and (text:"c" or text:"d")))',
+    "",
+    " ",
+    "text",
+    "text:",
+    "text:test",
+    'text:"test',
+    'text:"test" and',
+    'text:"test" and and',
+    'text:"test" text:"example"',
+    "and",
+    '(text:"test"',
+    'text:"test")',
+    '((text:"test")',
+    "()",
+    '(text:"test" and)',
+    'text:"test"(',
+    '"test"',
+    '1text:"test"',
+    '_text:"test"',
+    'é:"test"',
+    'text:"test" \f',
+    '\vtext:"test"',
+    'text:"test" && text:"example"',
+    'text::"test"',
+    'text:!!"test"',
+    'text:"test" or text:!"example" and (text:"a" or text:!"b")',
+]
+
+_fragments = [
+    "text",
+    "Text",
+    "and",
+    "AND",
+    "or",
+    "Or",
+    "andx",
+    ":",
+    ":!",
+    "!",
+    '"',
+    '"test"',
+    '"a\\"b"',
+    '"\\x41"',
+    "\\",
+    "(",
+    ")",
+    " ",
+    "  ",
+    "\t",
+    "\n",
+    "\r",
+    "_",
+    "1",
+    "$",
+    "é",
+]
+
+
+class IterativeParserTestCase(SimpleTestCase):
+    old_logger_level: ClassVar[int]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.old_logger_level = logging.getLogger(
+            "rss_temple.query_utils"
+        ).getEffectiveLevel()
+
+        logging.getLogger("rss_temple.query_utils").setLevel(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+
+        logging.getLogger("rss_temple.query_utils").setLevel(cls.old_logger_level)
+
+    @staticmethod
+    def _parse_outcome(parse_fn, search: str) -> Any:
+        try:
+            return parse_fn(search)
+        except ValueError as e:
+            return ValueError, str(e)
+
+    def _assert_same(self, search: str):
+        self.assertEqual(
+            self._parse_outcome(searchutils._parse_iterative, search),
+            self._parse_outcome(searchutils._parse_pyparsing, search),
+            search,
+        )
+
+    def test_differential(self):
+        for search in _searches:
+            with self.subTest(search=search):
+                self._assert_same(search)
+
+    def test_differential_random(self):
+        random_ = random.Random(0)
+        for _ in range(2000):
+            search = "".join(random_.choices(_fragments, k=random_.randint(1, 12)))
+            with self.subTest(search=search):
+                self._assert_same(search)
+
+    def test_differential_generated(self):
+        # random, but well-formed, so that they get through to the trees
+        random_ = random.Random(0)
+
+        def _generate(depth: int) -> str:
+            kind = random_.randrange(4) if depth < 5 else 0
+            if kind == 0:
+                return (
+                    random_.choice(("text", "TEXT", "and", "or"))
+                    + random_.choice((":", " : ", ":!", " :! "))
+                    + random_.choice(('""', '"test"', '"a\\"b"', '"\\t"'))
+                )
+            elif kind == 1:
+                return (
+                    "("
+                    + random_.choice(("", " "))
+                    + _generate(depth + 1)
+                    + random_.choice(("", " "))
+                    + ")"
+                )
+            else:
+                return (
+                    _generate(depth + 1)
+                    + random_.choice((" and ", " AND ", " or ", " Or "))
+                    + _generate(depth + 1)
+                )
+
+        for _ in range(500):
+            search = _generate(0)
+            with self.subTest(search=search):
+                self._assert_same(search)
+
+    def test_tree(self):
+        self.assertEqual(
+            iterative_parser.parse('a:"1" and b:!"2" or (c:"3" and d:"4") and e:"5"'),
+            AndExpression(
+                NamedExpression("a", "1", False),
+                OrExpression(
+                    NamedExpression("b", "2", True),
+                    AndExpression(
+                        ParenthesizedExpression(
+                            AndExpression(
+                                NamedExpression("c", "3", False),
+                                NamedExpression("d", "4", False),
+                            )
+                        ),
+                        NamedExpression("e", "5", False),
+                    ),
+                ),
+            ),
+        )
+
+    def test_max_depth(self):
+        depth = iterative_parser.MAX_DEPTH - 1
+        search = ("(" * depth) + 'text:"test"' + (")" * depth)
+        old_recursion_limit = sys.getrecursionlimit()
+        # nothing recurses, so a low limit has no effect
+        sys.setrecursionlimit(100)
+        try:
+            iterative_parser.parse(search)
+            iterative_parser.parse(" or ".join(['text:"test"'] * (depth + 1)))
+        finally:
+            sys.setrecursionlimit(old_recursion_limit)
+
+        for search in (
+            ("(" * (depth + 1)) + 'text:"test"' + (")" * (depth + 1)),
+            " or ".join(['text:"test"'] * (depth + 2)),
+            ("(" * 5000) + 'text:"test"' + (")" * 5000),
+            " or ".join(['text:"test"'] * 5000),
+        ):
+            with self.assertRaises(iterative_parser.ParseError):
+                iterative_parser.parse(search)
+
+    def test_to_filter_args(self):
+        search_fns = {
+            "object": {
+                "text": lambda request, search_obj: Q(text__icontains=search_obj),
+            },
+        }
+
+        search = 'TEXT:"test" and (text:!"example" or text:"word")'
+        with self.settings(SEARCH_PARSER="pyparsing"):
+            expected_q_list = searchutils.to_filter_args(
+                "object", Mock(HttpRequest), search, search_fns
+            )
+
+        with self.settings(SEARCH_PARSER="iterative"):
+            self.assertEqual(
+                searchutils.to_filter_args(
+                    "object", Mock(HttpRequest), search, search_fns
+                ),
+                expected_q_list,
+            )
+
+            with self.assertRaises(ValueError):
+                searchutils.to_filter_args(
+                    "object", Mock(HttpRequest), '(text:"test"', search_fns
+                )
+
+            with self.assertRaises(AttributeError):
+                searchutils.to_filter_args(
+                    "object", Mock(HttpRequest), 'unknownfield:"test"', search_fns
+                )
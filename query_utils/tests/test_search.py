@@ -1,7 +1,7 @@
 import logging
 import uuid
 from typing import Callable, ClassVar
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from django.db.models import Q
 from django.http import HttpRequest
@@ -9,6 +9,7 @@ from django.test import SimpleTestCase
 
 from query_utils import search as searchutils
 from query_utils.search.convertto import UuidList
+from query_utils.search.nodes import NamedExpression
 
 search_fns: dict[str, dict[str, Callable[[HttpRequest, str], Q]]] = {
     "object": {
@@ -161,3 +162,130 @@ class SearchesTestCase(SimpleTestCase):
             'uuid:!"99d63124-59e2-4204-ba61-be294dcb4d22,c54a1f76-f350-4336-b7c4-33ec8f5e81a3"',
             search_fns,
         )
+
+    def test_parse_cache(self):
+        searchutils.clear_parse_cache()
+
+        requests: list[HttpRequest] = []
+
+        def _text_search_fn(request: HttpRequest, search_obj: str) -> Q:
+            requests.append(request)
+            return Q(text__icontains=search_obj)
+
+        _search_fns = {"object": {"text": _text_search_fn}}
+
+        request1 = Mock(HttpRequest)
+        request2 = Mock(HttpRequest)
+
+        search = 'TEXT:"test" and (text:!"example" or text:"word")'
+        expected_q = Q(text__icontains="test") & Q(
+            ~Q(text__icontains="example") | Q(text__icontains="word")
+        )
+
+        with patch(
+            "query_utils.search.parser", wraps=searchutils.parser
+        ) as parser_mock:
+            self.assertEqual(
+                searchutils.to_filter_args("object", request1, search, _search_fns),
+                [expected_q],
+            )
+            self.assertEqual(
+                searchutils.to_filter_args("object", request2, search, _search_fns),
+                [expected_q],
+            )
+
+            # parsed once, but bound to each request
+            self.assertEqual(parser_mock.call_count, 1)
+            self.assertEqual(requests, [request1] * 3 + [request2] * 3)
+
+            # keyed by object name as well
+            searchutils.to_filter_args(
+                "other", request1, search, {"other": {"text": _text_search_fn}}
+            )
+            self.assertEqual(parser_mock.call_count, 2)
+
+    def test_parse_cache_size(self):
+        with self.settings(SEARCH_PARSE_CACHE_SIZE=2):
+            with patch(
+                "query_utils.search.parser", wraps=searchutils.parser
+            ) as parser_mock:
+                for search in (
+                    'text:"1"',
+                    'text:"2"',
+                    'text:"1"',
+                    'text:"3"',
+                    'text:"1"',
+                    'text:"2"',
+                ):
+                    searchutils.to_filter_args(
+                        "object", Mock(HttpRequest), search, search_fns
+                    )
+
+                # `2` was evicted by `3`, as `1` was used more recently
+                self.assertEqual(parser_mock.call_count, 4)
+
+        with self.settings(SEARCH_PARSE_CACHE_SIZE=0):
+            with patch(
+                "query_utils.search.parser", wraps=searchutils.parser
+            ) as parser_mock:
+                for _ in range(2):
+                    searchutils.to_filter_args(
+                        "object", Mock(HttpRequest), 'text:"1"', search_fns
+                    )
+
+                self.assertEqual(parser_mock.call_count, 2)
+
+    def test_to_conjuncts(self):
+        for search, expected_conjuncts in (
+            ('TEXT:"test"', [NamedExpression("text", "test", False)]),
+            (
+                'text:"a" and (uuid:!"b" and (text:"c"))',
+                [
+                    NamedExpression("text", "a", False),
+                    NamedExpression("uuid", "b", True),
+                    NamedExpression("text", "c", False),
+                ],
+            ),
+            (
+                'text:"a" and (text:"b" or text:"c")',
+                [NamedExpression("text", "a", False)],
+            ),
+            ('text:"a" or text:"b"', []),
+        ):
+            with self.subTest(search=search):
+                self.assertEqual(
+                    searchutils.to_conjuncts("object", search, search_fns),
+                    expected_conjuncts,
+                )
+
+        with self.assertRaises(ValueError):
+            searchutils.to_conjuncts("object", 'text:"a" and', search_fns)
+
+        with self.assertRaises(AttributeError):
+            searchutils.to_conjuncts("object", 'unknownfield:"a"', search_fns)
+
+    def test_to_canonical(self):
+        for search_a, search_b in (
+            ('text:"a"', '  TEXT:"a" '),
+            ('text:"a" and uuid:"b"', 'text:"a"   and\nuuid:"b"'),
+            ("", "   "),
+        ):
+            with self.subTest(search_a=search_a, search_b=search_b):
+                self.assertEqual(
+                    searchutils.to_canonical("object", search_a, search_fns),
+                    searchutils.to_canonical("object", search_b, search_fns),
+                )
+
+        for search_a, search_b in (
+            ('text:"a b"', 'text:"a  b"'),
+            ('text:"a"', 'text:!"a"'),
+            ('text:"a" and text:"b"', 'text:"a" or text:"b"'),
+        ):
+            with self.subTest(search_a=search_a, search_b=search_b):
+                self.assertNotEqual(
+                    searchutils.to_canonical("object", search_a, search_fns),
+                    searchutils.to_canonical("object", search_b, search_fns),
+                )
+
+        with self.assertRaises(ValueError):
+            searchutils.to_canonical("object", 'text:"a" and', search_fns)
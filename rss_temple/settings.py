@@ -467,11 +467,20 @@ ARCHIVE_BACKOFF_SECONDS = 60.0 * 60.0 * 24.0  # 1 day
 ARCHIVE_TIME_THRESHOLD = datetime.timedelta(days=-45)
 ARCHIVE_COUNT_THRESHOLD = 1000
 
+# read mappings older than this are folded into the per-feed read watermarks
+READ_HISTORY_FOLD_TIME_THRESHOLD = datetime.timedelta(days=-30)
+
 MAX_FEED_ENTRIES_STABLE_QUERY_COUNT = 5000
 FEED_ENTRY_LANGUAGES_CACHE_TIMEOUT_SECONDS = 60.0 * 5.0  # 5 minutes
 
 FEED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS = 60.0 * 15.0  # 15 minutes
+FEED_TOTAL_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS = 60.0 * 60.0 * 12.0  # 12 hours
 FEED_ARCHIVED_COUNT_LOOKUPS_CACHE_TIMEOUT_SECONDS = 60.0 * 60.0 * 12.0  # 12 hours
+USER_CATEGORY_COUNTS_CACHE_TIMEOUT_SECONDS = 60.0 * 15.0  # 15 minutes
+
+# `totalCountMode` of the query views
+QUERY_TOTAL_COUNT_CACHE_TIMEOUT_SECONDS = 30.0  # 30 seconds
+QUERY_TOTAL_COUNT_ESTIMATE_CAP = 10000
 
 ACCOUNT_CONFIRM_EMAIL_URL = os.getenv(
     "APP_ACCOUNT_CONFIRM_EMAIL_URL", "http://localhost:4200/verify?token=%(key)s"
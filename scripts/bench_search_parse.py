@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# Micro-benchmark of the per-request cost of turning a `search` into filters, with
+# the parsed search cache disabled (every request parses, with either parser) and
+# enabled (every request after the first only binds).
+#
+# Usage: pipenv run python scripts/bench_search_parse.py [--number N]
+
+import argparse
+import os
+import sys
+import timeit
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from django.conf import settings  # noqa: E402
+
+settings.configure()
+
+from django.db.models import Q  # noqa: E402
+from django.http import HttpRequest  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from query_utils import search as searchutils  # noqa: E402
+
+_search_fns = {
+    "object": {
+        "title": lambda request, search_obj: Q(title__icontains=search_obj),
+        "isRead": lambda request, search_obj: Q(is_read=search_obj == "true"),
+        "feedUuid": lambda request, search_obj: Q(feed_id__in=search_obj.split(",")),
+    },
+}
+
+_searches = {
+    "simple": 'isRead:"false"',
+    "compound": 'isRead:"false" and (title:"python" or title:"django") and feedUuid:!"a,b"',
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--number", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    request = Mock(HttpRequest)
+
+    for name, search in _searches.items():
+        for label, parser, cache_size in (
+            ("pyparsing", "pyparsing", 0),
+            ("iterative", "iterative", 0),
+            ("cached", "pyparsing", 512),
+        ):
+            with override_settings(
+                SEARCH_PARSER=parser, SEARCH_PARSE_CACHE_SIZE=cache_size
+            ):
+                # warm up (and fill the cache, when enabled)
+                searchutils.to_filter_args("object", request, search, _search_fns)
+
+                seconds = timeit.timeit(
+                    lambda search=search: searchutils.to_filter_args(
+                        "object", request, search, _search_fns
+                    ),
+                    number=args.number,
+                )
+
+            print(
+                f"{name:<10} {label:<10} {seconds / args.number * 1e6:10.1f} us/request"
+            )
+
+        # the parse on its own, without the binding (or the lookups around it)
+        for label, parse_fn in (
+            ("pyparsing", searchutils._parse_pyparsing),
+            ("iterative", searchutils._parse_iterative),
+        ):
+            seconds = timeit.timeit(
+                lambda search=search, parse_fn=parse_fn: parse_fn(search),
+                number=args.number,
+            )
+
+            print(
+                f"{name:<10} {label:<10} {seconds / args.number * 1e6:10.1f} us/parse"
+            )
+
+
+if __name__ == "__main__":
+    main()